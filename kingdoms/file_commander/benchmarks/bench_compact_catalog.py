@@ -0,0 +1,66 @@
+"""
+Because we want to know what the compact catalog saves per session, this
+script builds one synthetic catalog, converts it to the compact form and
+prints the memory of each column both ways, plus the cost of converting
+and of rebuilding `path` for one page and for every row.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_compact_catalog.py --rows 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Make `src` and `shared` importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from bench_sqlite_write import make_synthetic_catalog  # noqa: E402
+from src.compact_catalog import (  # noqa: E402
+    catalog_memory_report,
+    catalog_paths,
+    compact_catalog,
+    expand_catalog,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    arguments = parser.parse_args()
+
+    file_catalog = make_synthetic_catalog(arguments.rows)
+
+    start = time.perf_counter()
+    compact = compact_catalog(file_catalog)
+    print(f"[bench] compact:        {time.perf_counter() - start:7.3f} s")
+
+    regular_report = catalog_memory_report(file_catalog).set_index("column")
+    compact_report = catalog_memory_report(compact).set_index("column")
+    print(f"[bench] {'column':<18}{'regular MB':>12}{'compact MB':>12}")
+    for column in regular_report.index:
+        compact_bytes = compact_report["bytes"].get(column, 0)
+        print(f"[bench] {column:<18}{regular_report.loc[column, 'bytes'] / 1024**2:>12,.1f}"
+              f"{compact_bytes / 1024**2:>12,.1f}")
+    print(f"[bench] {'total':<18}{regular_report['bytes'].sum() / 1024**2:>12,.1f}"
+          f"{compact_report['bytes'].sum() / 1024**2:>12,.1f}")
+
+    start = time.perf_counter()
+    catalog_paths(compact.iloc[:500])
+    print(f"[bench] paths (1 page): {time.perf_counter() - start:7.3f} s")
+
+    start = time.perf_counter()
+    expand_catalog(compact)
+    print(f"[bench] expand (all):   {time.perf_counter() - start:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Because we want to know what staged hashing saves, this script builds a
+synthetic tree where many files share a size (but few share contents),
+then compares hashing every same-size file completely against
+find_duplicates (size -> edge hash -> full hash), cold and with a warm
+hash cache.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_duplicates.py --files 2000 --size-kib 512
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Make `src` and `shared` importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from shared.database.database import get_sqlite_engine  # noqa: E402
+from src.duplicates import find_duplicates, hash_file_contents  # noqa: E402
+from src.scanner import build_file_catalog  # noqa: E402
+
+
+def make_duplicate_tree(root: Path, file_count: int, size_bytes: int, seed: int = 0) -> None:
+    """
+    Write `file_count` files of `size_bytes` each, spread over 20 folders.
+    Every tenth file is a copy of an earlier one; the rest are unique.
+    """
+    generator = random.Random(seed)
+    written: list[bytes] = []
+    for index in range(file_count):
+        folder = root / f"folder_{index % 20}"
+        folder.mkdir(parents=True, exist_ok=True)
+        if written and index % 10 == 0:
+            contents = generator.choice(written)
+        else:
+            contents = os.urandom(size_bytes)
+            written.append(contents)
+        (folder / f"file_{index}.bin").write_bytes(contents)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=2_000)
+    parser.add_argument("--size-kib", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=None)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        tree = Path(temporary_directory) / "tree"
+        make_duplicate_tree(tree, arguments.files, arguments.size_kib * 1024)
+        file_catalog = build_file_catalog(tree)
+        print(f"[bench] {len(file_catalog)} files of {arguments.size_kib} KiB")
+
+        start = time.perf_counter()
+        for path in file_catalog["path"]:
+            hash_file_contents(path)
+        elapsed = time.perf_counter() - start
+        print(f"[bench] full hash of every file : {elapsed:7.3f} s")
+
+        engine = get_sqlite_engine(Path(temporary_directory) / "hashes.db")
+        for label in ["staged (cold cache)", "staged (warm cache)"]:
+            start = time.perf_counter()
+            report = find_duplicates(file_catalog, engine=engine, workers=arguments.workers)
+            elapsed = time.perf_counter() - start
+            print(f"[bench] {label:25}: {elapsed:7.3f} s "
+                  f"({len(report.groups)} groups, {report.full_hashed} full hashes, "
+                  f"{report.bytes_read / 2**20:,.0f} MiB read, "
+                  f"{report.cache_hits} cache hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Because we want to know what the batch move engine saves, this script
+moves the same synthetic files with a move_file loop and with move_files,
+within one filesystem (rename) and, if `--other-device` points at a
+directory on another filesystem (e.g. /dev/shm), across filesystems.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_move_files.py --files 20000 --other-device /dev/shm
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Make `src` and `shared` importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from src.operations import move_file, move_files  # noqa: E402
+
+
+def make_files(directory: Path, file_count: int, size_bytes: int) -> list[Path]:
+    """Write `file_count` files of `size_bytes` random bytes into `directory`."""
+    directory.mkdir(parents=True)
+    paths = []
+    for index in range(file_count):
+        path = directory / f"file_{index}.bin"
+        path.write_bytes(os.urandom(size_bytes))
+        paths.append(path)
+    return paths
+
+
+def compare(label: str, work: Path, destination_root: Path, file_count: int,
+            size_bytes: int, workers: int) -> None:
+    """Time a move_file loop against move_files for one source/destination pair."""
+    loop_sources = make_files(work / f"{label}_loop_source", file_count, size_bytes)
+    loop_destination = destination_root / f"{label}_loop_destination"
+    loop_destination.mkdir()
+    start = time.perf_counter()
+    for source in loop_sources:
+        move_file(source, loop_destination)
+    loop_seconds = time.perf_counter() - start
+
+    batch_sources = make_files(work / f"{label}_batch_source", file_count, size_bytes)
+    batch_destination = destination_root / f"{label}_batch_destination"
+    batch_destination.mkdir()
+    start = time.perf_counter()
+    report = move_files([(source, batch_destination) for source in batch_sources],
+                        journal_path=work / f"{label}.journal", workers=workers)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"[bench] {label:12} move_file loop: {loop_seconds:7.3f} s | "
+          f"move_files: {batch_seconds:7.3f} s "
+          f"({report.renamed} renamed, {report.copied} copied, {len(report.failed)} failed)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=5_000)
+    parser.add_argument("--size-kib", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--other-device", type=Path, default=None)
+    arguments = parser.parse_args()
+    size_bytes = arguments.size_kib * 1024
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        work = Path(temporary_directory)
+        compare("same device", work, work, arguments.files, size_bytes, arguments.workers)
+
+        if arguments.other_device is not None:
+            with tempfile.TemporaryDirectory(dir=arguments.other_device) as other_directory:
+                compare("cross device", work, Path(other_directory),
+                        arguments.files, size_bytes, arguments.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Because the threaded scan only pays off when `stat` is slow, this script
+times build_file_catalog with different worker counts over a synthetic
+deep/wide tree (or over a real directory such as a NAS mount via --root)
+and checks that every run produced exactly the same catalog.
+
+On a local SSD with a warm page cache `stat` is so cheap that thread
+hand-offs cost more than they save, so expect workers=1 to win there;
+the gains show up when each `stat` waits on the network or a disk seek.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_parallel_scan.py --workers 1 4 8 16
+    python benchmarks/bench_parallel_scan.py --root /mnt/nas/archive --workers 1 8 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Make `src.scanner` (and the sibling benchmark) importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+for import_path in (FILE_COMMANDER_ROOT, Path(__file__).resolve().parent):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from bench_scanner import make_synthetic_tree  # noqa: E402
+from src.scanner import build_file_catalog  # noqa: E402
+
+
+def time_workers(root: Path, worker_counts: list[int]) -> None:
+    """Scan `root` once per worker count, print timings, and compare outputs."""
+    reference_catalog = None
+
+    for worker_count in worker_counts:
+        start = time.perf_counter()
+        file_catalog = build_file_catalog(root, workers=worker_count)
+        elapsed = time.perf_counter() - start
+
+        print(f"[bench] workers={worker_count:<3d}: {elapsed:8.3f} s "
+              f"({len(file_catalog) / elapsed:,.0f} files/s)")
+
+        # Access times can move while we scan a live tree, so compare
+        # everything except last_accessed_at.
+        comparable_catalog = file_catalog.drop(columns=["last_accessed_at"])
+        if reference_catalog is None:
+            reference_catalog = comparable_catalog
+        else:
+            pd.testing.assert_frame_equal(reference_catalog, comparable_catalog)
+
+    print("[bench] all worker counts produced identical catalogs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--root", type=Path, default=None,
+                        help="Scan this directory instead of a synthetic tree.")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--files-per-dir", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    arguments = parser.parse_args()
+
+    if arguments.root is not None:
+        time_workers(arguments.root, arguments.workers)
+        return
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        root = Path(temporary_directory)
+        file_count = make_synthetic_tree(
+            root, arguments.depth, arguments.fan_out, arguments.files_per_dir
+        )
+        print(f"[bench] synthetic tree: {file_count} files")
+        time_workers(root, arguments.workers)
+
+
+if __name__ == "__main__":
+    main()
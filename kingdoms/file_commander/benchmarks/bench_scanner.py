@@ -0,0 +1,149 @@
+"""
+Because we want to see (not just believe) that the scandir walker is
+faster than the old rglob + is_file + stat approach, and that the columnar
+catalog beats a dict per file, this script builds a synthetic folder tree
+in a temporary directory and times both versions of each stage.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_scanner.py --depth 3 --fan-out 6 --files-per-dir 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Make `src.scanner` importable when run as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+if str(FILE_COMMANDER_ROOT) not in sys.path:
+    sys.path.insert(0, str(FILE_COMMANDER_ROOT))
+
+from src.scanner import (  # noqa: E402
+    CATALOG_COLUMNS,
+    build_file_catalog,
+    classify_file_type,
+    iter_file_entries,
+)
+
+EXTENSIONS = [".txt", ".jpg", ".py", ".csv", ".mp3", ".zip", ".pdf", ""]
+
+
+def make_synthetic_tree(root: Path, depth: int, fan_out: int, files_per_dir: int) -> int:
+    """
+    Because a benchmark needs a repeatable input, this helper creates a tree
+    with `fan_out` subfolders per level, `depth` levels deep, and
+    `files_per_dir` small files in every folder. Returns the file count.
+    """
+    file_count = 0
+    current_level = [root]
+
+    for level in range(depth + 1):
+        next_level: list[Path] = []
+        for directory in current_level:
+            directory.mkdir(parents=True, exist_ok=True)
+            for file_index in range(files_per_dir):
+                extension = EXTENSIONS[file_index % len(EXTENSIONS)]
+                (directory / f"file_{file_index}{extension}").write_bytes(b"x" * file_index)
+                file_count += 1
+            if level < depth:
+                next_level.extend(directory / f"dir_{i}" for i in range(fan_out))
+        current_level = next_level
+
+    return file_count
+
+
+def legacy_walk(root: Path) -> int:
+    """The pre-scandir approach: rglob, is_file, then stat each Path again."""
+    seen = 0
+    file_paths = [p for p in root.rglob("*") if p.is_file()]
+    for file_path in file_paths:
+        file_path.stat()
+        _ = (str(file_path), str(file_path.parent), file_path.name, file_path.suffix)
+        seen += 1
+    return seen
+
+
+def scandir_walk(root: Path) -> int:
+    """The new approach: one scandir pass with a single stat per file."""
+    seen = 0
+    for _entry in iter_file_entries(root):
+        seen += 1
+    return seen
+
+
+def legacy_catalog(root: Path) -> int:
+    """The pre-columnar catalog: a 9-key dict per file, then from_records + reorder."""
+    file_records = []
+    for file_path, directory, name, file_stat in iter_file_entries(root):
+        extension = Path(name).suffix.lower()
+        file_records.append({
+            "path": file_path,
+            "directory": directory,
+            "name": name,
+            "extension": extension,
+            "file_type": classify_file_type(extension),
+            "size_bytes": file_stat.st_size,
+            "created_at": datetime.fromtimestamp(file_stat.st_ctime),
+            "modified_at": datetime.fromtimestamp(file_stat.st_mtime),
+            "last_accessed_at": datetime.fromtimestamp(file_stat.st_atime),
+        })
+    return len(pd.DataFrame.from_records(file_records)[CATALOG_COLUMNS])
+
+
+def columnar_catalog(root: Path) -> int:
+    """The columnar catalog built by build_file_catalog."""
+    return len(build_file_catalog(root))
+
+
+def best_of(function, root: Path, repeats: int) -> float:
+    """Return the best wall-clock time (seconds) over `repeats` runs."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(root)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=6)
+    parser.add_argument("--files-per-dir", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=3)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        root = Path(temporary_directory)
+        file_count = make_synthetic_tree(
+            root, arguments.depth, arguments.fan_out, arguments.files_per_dir
+        )
+        print(f"[bench] synthetic tree: {file_count} files")
+
+        legacy_seconds = best_of(legacy_walk, root, arguments.repeats)
+        scandir_seconds = best_of(scandir_walk, root, arguments.repeats)
+
+        print(f"[bench] rglob + is_file + stat : {legacy_seconds:8.3f} s "
+              f"({file_count / legacy_seconds:,.0f} files/s)")
+        print(f"[bench] os.scandir walker      : {scandir_seconds:8.3f} s "
+              f"({file_count / scandir_seconds:,.0f} files/s)")
+        print(f"[bench] speedup                : {legacy_seconds / scandir_seconds:8.2f}x")
+
+        legacy_catalog_seconds = best_of(legacy_catalog, root, arguments.repeats)
+        columnar_catalog_seconds = best_of(columnar_catalog, root, arguments.repeats)
+
+        print(f"[bench] dict-per-file catalog  : {legacy_catalog_seconds:8.3f} s")
+        print(f"[bench] columnar catalog       : {columnar_catalog_seconds:8.3f} s")
+        print(f"[bench] speedup                : "
+              f"{legacy_catalog_seconds / columnar_catalog_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Because we want to know what the trigram search index buys us, this
+script loads a synthetic catalog into SQLite and times the sidebar's
+text search with instr() on every row versus the FTS5 trigram index,
+plus one fuzzy (typo-tolerant) search.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_search.py --rows 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Make `src` and `shared` importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from bench_sqlite_write import make_synthetic_catalog  # noqa: E402
+from shared.database.database import get_sqlite_engine  # noqa: E402
+from src.catalog_query import (  # noqa: E402
+    CatalogFilters,
+    compile_catalog_filters,
+    fuzzy_search_catalog,
+)
+from src.catalog_store import replace_catalog  # noqa: E402
+
+
+def _time_count(engine, where_clause: str, parameters: dict, repeats: int) -> tuple[float, int]:
+    """Run a COUNT(*) with `where_clause` `repeats` times; return (best seconds, rows)."""
+    best = float("inf")
+    row_count = 0
+    with engine.connect() as connection:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            row_count = connection.execute(
+                text(f"SELECT COUNT(*) FROM file_catalog WHERE {where_clause}"), parameters
+            ).scalar_one()
+            best = min(best, time.perf_counter() - start)
+    return best, row_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--search", default="file_12345")
+    parser.add_argument("--repeats", type=int, default=3)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        engine = get_sqlite_engine(Path(temporary_directory) / "search.db")
+        report = replace_catalog(engine, make_synthetic_catalog(arguments.rows))
+        print(f"[bench] loaded {report.rows_written} rows in {report.total_seconds:.2f} s "
+              f"(indexes incl. search index: {report.index_seconds:.2f} s)")
+
+        filters = CatalogFilters(search_text=arguments.search)
+        for label, use_search_index in [("instr() scan", False), ("trigram index", True)]:
+            where_clause, parameters = compile_catalog_filters(filters, use_search_index)
+            seconds, row_count = _time_count(engine, where_clause, parameters, arguments.repeats)
+            print(f"[bench] {label:14}: {seconds * 1000:8.1f} ms ({row_count} matches)")
+
+        typo = arguments.search[:-2] + arguments.search[-1] + arguments.search[-2]
+        start = time.perf_counter()
+        matches = fuzzy_search_catalog(engine, CatalogFilters(search_text=typo), limit=10)
+        elapsed = time.perf_counter() - start
+        best = matches["name"].iloc[0] if len(matches) else None
+        print(f"[bench] fuzzy {typo!r:9}: {elapsed * 1000:8.1f} ms (best match: {best})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Because we want to know what reopening a catalog from a Parquet snapshot
+saves, this script writes one synthetic catalog as a snapshot and into
+SQLite, then times loading it back each way (and a filtered snapshot load).
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_snapshots.py --rows 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Make `src` and `shared` importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from bench_sqlite_write import make_synthetic_catalog  # noqa: E402
+from shared.database.database import get_sqlite_engine  # noqa: E402
+from src.catalog_store import load_catalog, replace_catalog  # noqa: E402
+from src.snapshots import load_catalog_snapshot, write_catalog_snapshot  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    arguments = parser.parse_args()
+
+    file_catalog = make_synthetic_catalog(arguments.rows)
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        work = Path(temporary_directory)
+
+        start = time.perf_counter()
+        snapshot = write_catalog_snapshot(file_catalog, work / "snapshots", "/data")
+        print(f"[bench] snapshot write: {time.perf_counter() - start:7.3f} s "
+              f"({snapshot.size_bytes / 1024**2:,.1f} MB)")
+
+        engine = get_sqlite_engine(work / "catalog.db")
+        replace_catalog(engine, file_catalog)
+        print(f"[bench] sqlite file:    {(work / 'catalog.db').stat().st_size / 1024**2:,.1f} MB")
+
+        start = time.perf_counter()
+        load_catalog(engine, "/data")
+        print(f"[bench] sqlite load:    {time.perf_counter() - start:7.3f} s")
+
+        start = time.perf_counter()
+        load_catalog_snapshot(snapshot.path)
+        print(f"[bench] snapshot load:  {time.perf_counter() - start:7.3f} s")
+
+        start = time.perf_counter()
+        big_images = load_catalog_snapshot(
+            snapshot.path, file_types=["image"], minimum_size_bytes=900_000_000
+        )
+        print(f"[bench] filtered load:  {time.perf_counter() - start:7.3f} s "
+              f"({len(big_images):,} big images)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Because we want to know how much faster the bulk loader is than plain
+DataFrame.to_sql, this script writes the same synthetic catalog both ways
+into a fresh SQLite file and prints rows per second.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/bench_sqlite_write.py --rows 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Make `src` and `shared` importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from shared.database.database import bulk_load_sqlite, get_sqlite_engine  # noqa: E402
+
+
+def make_synthetic_catalog(row_count: int, seed: int = 0) -> pd.DataFrame:
+    """Build a catalog-shaped DataFrame without touching the filesystem."""
+    generator = np.random.default_rng(seed)
+    directories = np.array([f"/data/dir_{index}" for index in range(max(row_count // 50, 1))])
+    extensions = np.array([".txt", ".jpg", ".py", ".csv", ".mp3", ".zip", ".pdf", ""])
+    file_types = np.array(
+        ["document", "image", "code", "data", "audio", "archive", "document", "other"]
+    )
+
+    directory_codes = generator.integers(0, len(directories), row_count)
+    extension_codes = generator.integers(0, len(extensions), row_count)
+    names = [f"file_{index}{extensions[code]}" for index, code in enumerate(extension_codes)]
+    epochs = generator.uniform(1.3e9, 1.7e9, size=(3, row_count))
+
+    return pd.DataFrame({
+        "path": [f"{directories[d]}/{n}" for d, n in zip(directory_codes, names)],
+        "directory": pd.Categorical(directories[directory_codes]),
+        "name": names,
+        "extension": pd.Categorical(extensions[extension_codes]),
+        "file_type": pd.Categorical(file_types[extension_codes]),
+        "size_bytes": generator.integers(0, 10**9, row_count),
+        "created_at": pd.to_datetime(epochs[0], unit="s"),
+        "modified_at": pd.to_datetime(epochs[1], unit="s"),
+        "last_accessed_at": pd.to_datetime(epochs[2], unit="s"),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    arguments = parser.parse_args()
+
+    file_catalog = make_synthetic_catalog(arguments.rows)
+    print(f"[bench] synthetic catalog: {len(file_catalog)} rows")
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        to_sql_engine = get_sqlite_engine(Path(temporary_directory) / "to_sql.db")
+        start = time.perf_counter()
+        file_catalog.to_sql("file_catalog", con=to_sql_engine, if_exists="replace", index=False)
+        elapsed = time.perf_counter() - start
+        print(f"[bench] DataFrame.to_sql   : {elapsed:8.3f} s "
+              f"({len(file_catalog) / elapsed:,.0f} rows/s)")
+
+        bulk_engine = get_sqlite_engine(Path(temporary_directory) / "bulk.db")
+        report = bulk_load_sqlite(
+            bulk_engine, "file_catalog", [file_catalog],
+            batch_size=arguments.batch_size, index_columns=["path", "directory"],
+        )
+        print(f"[bench] bulk_load_sqlite   : {report.total_seconds:8.3f} s "
+              f"({report.rows_per_second:,.0f} rows/s, "
+              f"of which {report.index_seconds:.3f} s building 2 indexes)")
+
+
+if __name__ == "__main__":
+    main()
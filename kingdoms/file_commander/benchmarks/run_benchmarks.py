@@ -0,0 +1,278 @@
+"""
+Because a slowdown in one of the hot paths (walking, building the
+catalog, classifying, writing SQLite, the sidebar filters, search) is
+easy to miss, this script runs all of them on seeded synthetic trees
+(see tree_generator.py) at several sizes and writes the results as JSON,
+so two commits can be compared stage by stage.
+
+For every size and stage it records wall-clock seconds, files/s, the
+process's peak RSS so far (ru_maxrss) and, with --tracemalloc, the peak
+of Python allocations during that stage alone.
+
+Run it from kingdoms/file_commander:
+
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000 --output new.json
+    python benchmarks/run_benchmarks.py --sizes 10000 --output new.json --baseline old.json
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# Make `src`, `shared` and the sibling generator importable as a plain script.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT, Path(__file__).resolve().parent):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from shared.database.database import get_sqlite_engine  # noqa: E402
+from src.catalog_query import (  # noqa: E402
+    CatalogFilters,
+    count_catalog_rows,
+    fuzzy_search_catalog,
+    query_catalog_page,
+)
+from src.catalog_store import replace_catalog  # noqa: E402
+from src.file_types import classify_file_types  # noqa: E402
+from src.scanner import build_file_catalog  # noqa: E402
+from src.walker import list_files  # noqa: E402
+from tree_generator import (  # noqa: E402
+    DEFAULT_EXTENSION_MIX,
+    MTIME_END_EPOCH,
+    make_benchmark_tree,
+    parse_extension_mix,
+)
+
+# Bumped whenever the JSON layout changes, so --compare can refuse files
+# it would misread.
+RESULTS_FORMAT_VERSION = 1
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# A stage slower than the baseline by more than this factor is flagged.
+REGRESSION_THRESHOLD = 1.10
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """The process's peak resident set size so far, or None where `resource` is missing."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_commit() -> Optional[str]:
+    """The checked-out commit, so a results file says what it measured."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=FILE_COMMANDER_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_stage(
+    function: Callable[[], Any],
+    file_count: int,
+    repeats: int,
+    trace_memory: bool,
+) -> dict[str, Any]:
+    """
+    Because one run can be disturbed by the rest of the machine, this
+    function runs `function` `repeats` times and reports the best time
+    with the memory figures.
+    """
+    best_seconds = float("inf")
+    tracemalloc_peak = None
+    for _ in range(repeats):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if trace_memory:
+            tracemalloc_peak = max(tracemalloc_peak or 0, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        best_seconds = min(best_seconds, elapsed)
+
+    return {
+        "seconds": round(best_seconds, 6),
+        "files_per_second": round(file_count / best_seconds, 1) if best_seconds else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "tracemalloc_peak_bytes": tracemalloc_peak,
+    }
+
+
+def benchmark_size(
+    work_directory: Path,
+    file_count: int,
+    arguments: argparse.Namespace,
+) -> dict[str, Any]:
+    """Build one tree with `file_count` files and time every stage on it."""
+    root = work_directory / f"tree_{file_count}"
+    start = time.perf_counter()
+    tree = make_benchmark_tree(
+        root, file_count, arguments.depth, arguments.fan_out, arguments.mix, arguments.seed
+    )
+    generate_seconds = time.perf_counter() - start
+    print(f"[bench] {file_count:,} files in {tree.directory_count} folders "
+          f"(generated in {generate_seconds:.1f} s)")
+
+    engine = get_sqlite_engine(work_directory / f"catalog_{file_count}.db")
+    # The sidebar's usual narrowing: two types, a minimum size and a stale
+    # filter under the scanned root. `now` is pinned to the generator's
+    # newest mtime, so the stale filter matches the same files every run.
+    now = datetime.fromtimestamp(MTIME_END_EPOCH)
+    filters = CatalogFilters(
+        root=str(root), file_types=["image", "document"], minimum_size_bytes=64,
+        stale_days=365, now=now,
+    )
+    search = CatalogFilters(root=str(root), search_text=f"file_{file_count // 2}")
+    typo = CatalogFilters(root=str(root), search_text=f"flie_{file_count // 2}")
+
+    # Later stages work on the catalog the "catalog" stage built.
+    catalog_holder: dict[str, Any] = {}
+
+    def build_catalog() -> None:
+        catalog_holder["catalog"] = build_file_catalog(root)
+
+    stages: list[tuple[str, Callable[[], Any]]] = [
+        ("scan", lambda: list_files(root)),
+        ("catalog", build_catalog),
+        ("classify", lambda: classify_file_types(catalog_holder["catalog"]["extension"])),
+        ("persist", lambda: replace_catalog(engine, catalog_holder["catalog"])),
+        ("filter", lambda: (
+            count_catalog_rows(engine, filters), query_catalog_page(engine, filters)
+        )),
+        ("search", lambda: (
+            count_catalog_rows(engine, search), query_catalog_page(engine, search)
+        )),
+        ("fuzzy_search", lambda: fuzzy_search_catalog(engine, typo, limit=10)),
+    ]
+
+    results: dict[str, Any] = {}
+    for stage_name, function in stages:
+        results[stage_name] = time_stage(
+            function, file_count, arguments.repeats, arguments.tracemalloc
+        )
+        stage = results[stage_name]
+        print(f"[bench]   {stage_name:<13}: {stage['seconds']:9.3f} s "
+              f"({stage['files_per_second'] or 0:>12,.0f} files/s, "
+              f"peak RSS {(stage['peak_rss_bytes'] or 0) / 1024**2:,.0f} MB)")
+    engine.dispose()
+
+    return {
+        "file_count": file_count,
+        "directory_count": tree.directory_count,
+        "total_bytes": tree.total_bytes,
+        "generate_seconds": round(generate_seconds, 3),
+        "stages": results,
+    }
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """
+    Because a results file is only useful next to another one, this
+    function lines up the stages of every size present in both and
+    returns one line per stage with the time ratio (current / baseline),
+    marking stages slower than REGRESSION_THRESHOLD.
+    """
+    for results in (baseline, current):
+        if results.get("format_version") != RESULTS_FORMAT_VERSION:
+            raise ValueError(
+                f"Expected results format {RESULTS_FORMAT_VERSION}, "
+                f"got {results.get('format_version')!r}"
+            )
+    baseline_runs = {run["file_count"]: run for run in baseline["runs"]}
+    lines = [f"[bench] {str(baseline.get('commit'))[:10]} -> {str(current.get('commit'))[:10]}"]
+    for run in current["runs"]:
+        baseline_run = baseline_runs.get(run["file_count"])
+        if baseline_run is None:
+            continue
+        for stage_name, stage in run["stages"].items():
+            baseline_stage = baseline_run["stages"].get(stage_name)
+            if not baseline_stage or not baseline_stage["seconds"]:
+                continue
+            ratio = stage["seconds"] / baseline_stage["seconds"]
+            flag = "  <-- slower" if ratio > REGRESSION_THRESHOLD else ""
+            lines.append(
+                f"[bench] {run['file_count']:>9,} {stage_name:<13}: "
+                f"{baseline_stage['seconds']:9.3f} s -> {stage['seconds']:9.3f} s "
+                f"({ratio:5.2f}x){flag}"
+            )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--mix", type=parse_extension_mix, default=None,
+                        help='extension weights, e.g. ".jpg=5,.txt=2,=1"')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also record each stage's peak Python allocations (slower)")
+    parser.add_argument("--work-directory", type=Path, default=None,
+                        help="where to build the trees (default: a temporary directory)")
+    parser.add_argument("--output", type=Path, default=None, help="write the results here")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="compare this run against an earlier results file")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="only compare two results files, without running anything")
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        baseline, current = (json.loads(path.read_text()) for path in arguments.compare)
+        print("\n".join(compare_results(baseline, current)))
+        return
+
+    with tempfile.TemporaryDirectory(dir=arguments.work_directory) as temporary_directory:
+        # Smallest first: ru_maxrss only ever grows, so each size's peak
+        # is not hidden behind a bigger run that came before it.
+        runs = [
+            benchmark_size(Path(temporary_directory), file_count, arguments)
+            for file_count in sorted(arguments.sizes)
+        ]
+
+    results = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "commit": current_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "depth": arguments.depth,
+            "fan_out": arguments.fan_out,
+            "seed": arguments.seed,
+            "repeats": arguments.repeats,
+            "extension_mix": arguments.mix or DEFAULT_EXTENSION_MIX,
+        },
+        "runs": runs,
+    }
+    if arguments.output:
+        arguments.output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"[bench] results written to {arguments.output}")
+    if arguments.baseline:
+        print("\n".join(compare_results(json.loads(arguments.baseline.read_text()), results)))
+
+
+if __name__ == "__main__":
+    main()
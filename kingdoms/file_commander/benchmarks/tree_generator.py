@@ -0,0 +1,159 @@
+"""
+Because benchmark numbers are only comparable between commits if every
+run scans the same tree, this module builds a seeded synthetic folder
+tree: `depth` levels of `fan_out` subfolders, `file_count` files spread
+over them, extensions drawn from a weighted mix, and sizes and mtimes
+drawn from the same seed. The same arguments always give the same tree.
+
+It is imported by run_benchmarks.py, and can also be run on its own to
+leave a tree on disk for profiling:
+
+    python benchmarks/tree_generator.py /tmp/tree --files 100000 --mix ".jpg=5,.txt=2,=1"
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+# Roughly what a home folder looks like: many photos and documents, some
+# code and media, a few archives and installers, and extension-less files.
+DEFAULT_EXTENSION_MIX: dict[str, float] = {
+    ".jpg": 20, ".png": 6, ".heic": 4,
+    ".pdf": 10, ".docx": 5, ".txt": 8, ".md": 3,
+    ".py": 6, ".js": 4, ".json": 4, ".csv": 4,
+    ".mp3": 4, ".mp4": 3, ".mov": 1,
+    ".zip": 3, ".tar.gz": 1, ".dmg": 1,
+    "": 3,
+}
+
+# File sizes are drawn uniformly up to this many bytes. Kept small, so a
+# 1M-file tree stays a few hundred MB on disk.
+DEFAULT_MAX_FILE_BYTES = 512
+
+# Modification times are spread over the ten years before this moment, so
+# "not accessed in N days" filters match a realistic share of files.
+MTIME_END_EPOCH = 1_750_000_000
+MTIME_SPAN_SECONDS = 10 * 365 * 24 * 3600
+
+
+@dataclass
+class SyntheticTree:
+    """What make_benchmark_tree built, recorded next to the timings."""
+
+    root: Path
+    file_count: int
+    directory_count: int
+    total_bytes: int
+    seed: int
+    depth: int
+    fan_out: int
+    extension_mix: dict[str, float]
+
+
+def parse_extension_mix(mix: str) -> dict[str, float]:
+    """
+    Because the mix is given on the command line, this function parses
+    ".jpg=5,.txt=2,=1" into {".jpg": 5.0, ".txt": 2.0, "": 1.0}. An empty
+    extension means files without one.
+    """
+    extension_mix: dict[str, float] = {}
+    for item in mix.split(","):
+        extension, separator, weight = item.strip().partition("=")
+        if not separator:
+            raise ValueError(f"Expected EXTENSION=WEIGHT, got {item!r}")
+        extension = extension.strip().lower()
+        if extension and not extension.startswith("."):
+            extension = "." + extension
+        extension_mix[extension] = float(weight)
+    if not extension_mix or sum(extension_mix.values()) <= 0:
+        raise ValueError("The extension mix needs at least one positive weight")
+    return extension_mix
+
+
+def tree_directories(root: Path, depth: int, fan_out: int) -> list[Path]:
+    """Every folder of a tree `depth` levels deep with `fan_out` subfolders each, root first."""
+    directories = [root]
+    current_level = [root]
+    for _level in range(depth):
+        current_level = [
+            directory / f"dir_{index}" for directory in current_level for index in range(fan_out)
+        ]
+        directories.extend(current_level)
+    return directories
+
+
+def make_benchmark_tree(
+    root: Path,
+    file_count: int,
+    depth: int = 3,
+    fan_out: int = 8,
+    extension_mix: dict[str, float] | None = None,
+    seed: int = 0,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+) -> SyntheticTree:
+    """
+    Because a benchmark needs a repeatable input, this function writes
+    `file_count` files into the folders of tree_directories(root, depth,
+    fan_out), round-robin so every folder gets about the same share.
+    Extensions follow `extension_mix` (weights, see DEFAULT_EXTENSION_MIX);
+    sizes and mtimes come from `seed`.
+    """
+    extension_mix = extension_mix or DEFAULT_EXTENSION_MIX
+    generator = random.Random(seed)
+    directories = tree_directories(root, depth, fan_out)
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    extensions = generator.choices(
+        list(extension_mix), weights=list(extension_mix.values()), k=file_count
+    )
+    # One shared buffer: the benchmarks look at names, sizes and times,
+    # never at contents.
+    filler = bytes(max_file_bytes)
+    total_bytes = 0
+    for index, extension in enumerate(extensions):
+        file_path = os.path.join(directories[index % len(directories)], f"file_{index}{extension}")
+        size_bytes = generator.randint(0, max_file_bytes)
+        with open(file_path, "wb") as output_file:
+            output_file.write(filler[:size_bytes])
+        mtime = MTIME_END_EPOCH - generator.randint(0, MTIME_SPAN_SECONDS)
+        os.utime(file_path, (mtime, mtime))
+        total_bytes += size_bytes
+
+    return SyntheticTree(
+        root=root,
+        file_count=file_count,
+        directory_count=len(directories),
+        total_bytes=total_bytes,
+        seed=seed,
+        depth=depth,
+        fan_out=fan_out,
+        extension_mix=dict(extension_mix),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--mix", type=parse_extension_mix, default=None,
+                        help='e.g. ".jpg=5,.txt=2,=1" (default: a home-folder mix)')
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    tree = make_benchmark_tree(
+        arguments.root, arguments.files, arguments.depth, arguments.fan_out,
+        arguments.mix, arguments.seed,
+    )
+    print(f"[bench] wrote {tree.file_count} files in {tree.directory_count} folders "
+          f"({tree.total_bytes / 1024**2:,.1f} MB) under {tree.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 Because we want a quick, visual way to understand what our file catalog
 functions are doing, this module acts as a small playground script:
 it takes a directory, builds a file catalog, and prints a preview.
+Pass a snapshot (.parquet) instead of a directory to open a saved catalog.
 """
 
 from __future__ import annotations
@@ -9,7 +10,9 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+from src.compact_catalog import catalog_memory_report, compact_catalog
 from src.scanner import build_file_catalog
+from src.snapshots import load_catalog_snapshot
 
 
 def main() -> None:
@@ -25,9 +28,17 @@ def main() -> None:
     else:
         target_directory = Path.home() / "Downloads"
 
-    print(f"\n[playground] Scanning directory: {target_directory}")
+    # An optional second argument sets how many threads list directories
+    # in parallel (handy on network shares), e.g. `... ~/Downloads 8`.
+    scan_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
 
-    file_catalog = build_file_catalog(target_directory)
+    if target_directory.suffix == ".parquet":
+        # A snapshot saved by an earlier scan: memory-mapped, no disk walk.
+        print(f"\n[playground] Loading snapshot: {target_directory}")
+        file_catalog = load_catalog_snapshot(target_directory)
+    else:
+        print(f"\n[playground] Scanning directory: {target_directory} (workers={scan_workers})")
+        file_catalog = build_file_catalog(target_directory, workers=scan_workers)
 
     print(f"[playground] Number of files found: {len(file_catalog)}\n")
 
@@ -39,6 +50,17 @@ def main() -> None:
     print("\n[playground] Data types:")
     print(file_catalog.dtypes)
 
+    # What the catalog costs in memory, per column, and what the compact
+    # form (src.compact_catalog) would cost instead.
+    regular_report = catalog_memory_report(file_catalog)
+    compact_report = catalog_memory_report(compact_catalog(file_catalog))
+    print("\n[playground] Memory per column:")
+    print(regular_report.to_string(index=False))
+    print(
+        f"[playground] Total: {regular_report['bytes'].sum() / 1024**2:,.1f} MB "
+        f"(compact form: {compact_report['bytes'].sum() / 1024**2:,.1f} MB)"
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,476 @@
+# src/catalog_api.py
+
+"""
+This module is an HTTP service over the `file_catalog` table. Other
+kingdoms and dashboards can query the catalog over HTTP, even a
+multi-million-row one and several at a time, without loading it into
+pandas.
+
+Endpoints (GET, JSON):
+  /files          matching files, one keyset page at a time
+  /files/count    how many files match
+  /aggregates     file count and bytes per file_type, extension or directory
+  /scans          recorded scans, newest first
+
+The filters mirror the Streamlit sidebar: root, file_type (repeatable),
+min_size_mb, stale_days and search. They compile to the same WHERE clause
+(src.catalog_sql), so the API and the app always agree.
+
+Pages use keysets. Each /files page returns a `next_cursor`, which holds
+the sort value and path of its last row. The next page seeks past that
+row through the catalog indexes instead of skipping rows with OFFSET.
+
+Caching:
+  - Every response has an ETag built from the catalog version and the
+    request. The catalog version is the latest scan_id; for a SQLite file
+    it also includes the database's mtime and size, so incremental scans
+    and the watcher count as well.
+  - A client that sends the ETag back in If-None-Match gets
+    304 Not Modified.
+  - Response bodies go into an in-process LRU cache under the same key,
+    so a dashboard's repeated query skips the database until the catalog
+    changes.
+
+`fastapi` (and `uvicorn`, to serve it) are only imported by create_app /
+serve_catalog_api, so the query functions work without them:
+
+    python -m src.cli serve --port 8000
+    uvicorn --factory src.catalog_api:create_app
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from shared.database.database import get_engine
+from src.catalog_query import count_catalog_rows, has_search_index
+from src.catalog_sql import (
+    CATALOG_TABLE,
+    SORT_ORDERS,
+    SORT_KEYS,
+    CatalogFilters,
+    compile_catalog_filters,
+    compile_keyset_condition,
+)
+from src.catalog_store import SCAN_HISTORY_TABLE, ensure_catalog_schema
+from src.walker import CATALOG_COLUMNS
+
+# The database the API serves when neither an argument nor DATABASE_URL
+# names one: the same file the Streamlit app and the command line use.
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[1] / "file_commander.db"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1_000
+
+# Columns /aggregates may group by. Only these names ever reach the SQL text.
+AGGREGATE_COLUMNS = ["file_type", "extension", "directory"]
+
+# How many response bodies the LRU cache keeps.
+RESPONSE_CACHE_SIZE = 256
+
+# A server database has no file whose mtime tells us it changed, so there
+# the catalog version also moves on every this many seconds.
+SERVER_CATALOG_VERSION_SECONDS = 30
+
+TIMESTAMP_COLUMNS = ["created_at", "modified_at", "last_accessed_at"]
+
+
+def encode_cursor(sort_value: Any, path: str) -> str:
+    """Pack the last row's (sort value, path) into an opaque, URL-safe cursor."""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = str(sort_value)
+    payload = json.dumps([sort_value, path], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, str]:
+    """Unpack a cursor from encode_cursor (ValueError if it is not one)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, path = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not isinstance(path, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return sort_value, path
+
+
+def _file_record(row: dict) -> dict:
+    """One catalog row as JSON-ready values, with ISO 8601 timestamps."""
+    record = dict(row)
+    for column in TIMESTAMP_COLUMNS:
+        value = record[column]
+        if isinstance(value, datetime):
+            record[column] = value.isoformat()
+        elif isinstance(value, str):
+            # SQLite stores "YYYY-MM-DD HH:MM:SS.ffffff".
+            record[column] = value.replace(" ", "T", 1)
+    return record
+
+
+def query_files_page(
+    engine: Engine,
+    filters: CatalogFilters,
+    sort_by: str = "modified_at",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> dict:
+    """
+    Because an API client pages through results it may never finish,
+    this function returns one page of files matching `filters`:
+    {"files": [...], "next_cursor": str or None}. Pass `next_cursor` back
+    as `cursor` for the following page; None means this was the last one.
+    """
+    if sort_by not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort column {sort_by!r}; choose from {sorted(SORT_ORDERS)}")
+
+    where_clause, parameters = compile_catalog_filters(
+        filters, has_search_index(engine), engine.dialect.name
+    )
+    if cursor is not None:
+        keyset_condition, keyset_parameters = compile_keyset_condition(
+            sort_by, decode_cursor(cursor)
+        )
+        where_clause = f"{where_clause} AND {keyset_condition}"
+        parameters.update(keyset_parameters)
+    # One extra row tells us whether there is a next page.
+    parameters["limit"] = int(limit) + 1
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                f"SELECT {', '.join(CATALOG_COLUMNS)} FROM {CATALOG_TABLE}"
+                f" WHERE {where_clause}"
+                f" ORDER BY {SORT_ORDERS[sort_by]}"
+                " LIMIT :limit"
+            ),
+            parameters,
+        ).mappings().all()
+
+    page_rows = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        sort_column = SORT_KEYS[sort_by][0]
+        last_row = page_rows[-1]
+        next_cursor = encode_cursor(
+            last_row[sort_column] if sort_column else None, last_row["path"]
+        )
+    return {"files": [_file_record(row) for row in page_rows], "next_cursor": next_cursor}
+
+
+def aggregate_files(
+    engine: Engine,
+    filters: CatalogFilters,
+    group_by: str = "file_type",
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> list[dict]:
+    """
+    Return the file count and total bytes per `group_by` value (one of
+    AGGREGATE_COLUMNS) among the files matching `filters`, biggest first.
+    """
+    if group_by not in AGGREGATE_COLUMNS:
+        raise ValueError(f"Unknown group_by {group_by!r}; choose from {AGGREGATE_COLUMNS}")
+
+    where_clause, parameters = compile_catalog_filters(
+        filters, has_search_index(engine), engine.dialect.name
+    )
+    parameters["limit"] = int(limit)
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                f"SELECT {group_by}, COUNT(*) AS files, SUM(size_bytes) AS total_bytes"
+                f" FROM {CATALOG_TABLE} WHERE {where_clause}"
+                f" GROUP BY {group_by} ORDER BY total_bytes DESC, {group_by} LIMIT :limit"
+            ),
+            parameters,
+        ).mappings().all()
+    return [
+        {
+            group_by: row[group_by],
+            "files": int(row["files"]),
+            "total_bytes": int(row["total_bytes"] or 0),
+        }
+        for row in rows
+    ]
+
+
+def list_recorded_scans(engine: Engine, root: Optional[str] = None) -> list[dict]:
+    """Return the scan_history rows (only those of `root`, if given), newest first."""
+    query = f"SELECT scan_id, root, row_count, recorded_at FROM {SCAN_HISTORY_TABLE}"
+    parameters: dict[str, Any] = {}
+    if root is not None:
+        query += " WHERE root = :root"
+        parameters["root"] = str(Path(root))
+    with engine.connect() as connection:
+        return [dict(row) for row in connection.execute(
+            text(query + " ORDER BY scan_id DESC"), parameters
+        ).mappings()]
+
+
+def catalog_version(engine: Engine) -> str:
+    """
+    Because cached answers are only valid until the catalog changes, this
+    function returns a token that changes whenever it may have: the
+    latest scan_id, plus the database file's (and its WAL's) mtime and
+    size on SQLite, or a SERVER_CATALOG_VERSION_SECONDS time bucket on a
+    server database.
+    """
+    with engine.connect() as connection:
+        latest_scan_id = connection.execute(
+            text(f"SELECT MAX(scan_id) FROM {SCAN_HISTORY_TABLE}")
+        ).scalar()
+    parts: list[Any] = [latest_scan_id or ""]
+
+    database = engine.url.database
+    if engine.dialect.name == "sqlite" and database and database != ":memory:":
+        for path in (database, database + "-wal"):
+            try:
+                path_stat = os.stat(path)
+            except FileNotFoundError:
+                parts.extend((0, 0))
+            else:
+                parts.extend((path_stat.st_mtime_ns, path_stat.st_size))
+    else:
+        parts.append(int(time.time() // SERVER_CATALOG_VERSION_SECONDS))
+    return ":".join(str(part) for part in parts)
+
+
+def catalog_filters(
+    root: Optional[str] = None,
+    file_types: Optional[Iterable[str]] = None,
+    min_size_mb: float = 0.0,
+    stale_days: int = 0,
+    search: str = "",
+) -> CatalogFilters:
+    """Build CatalogFilters from the sidebar-style request parameters."""
+    return CatalogFilters(
+        root=str(Path(root)) if root else None,
+        file_types=list(file_types) if file_types else None,
+        minimum_size_bytes=int(min_size_mb * 1024 * 1024),
+        stale_days=int(stale_days),
+        search_text=search,
+    )
+
+
+def _entity_tags(if_none_match: Optional[str]) -> set[str]:
+    """The ETags listed in an If-None-Match header (weak or strong, "*" kept)."""
+    if not if_none_match:
+        return set()
+    return {
+        tag.strip().removeprefix("W/")
+        for tag in if_none_match.split(",")
+        if tag.strip()
+    }
+
+
+class ResponseCache:
+    """
+    Because many clients repeat the same handful of queries, this LRU
+    keeps the last `max_entries` response bodies. Keys include the catalog
+    version, so entries for an older catalog are never hit again and age
+    out on their own.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@dataclass
+class CatalogResponse:
+    """One answer from CatalogService.respond: 200 with a body, or 304 without."""
+
+    status_code: int
+    etag: str
+    body: bytes = b""
+
+
+class CatalogService:
+    """
+    Because ETags and the response cache are the same for every endpoint,
+    this class wraps them around any function that builds a response.
+
+    Example:
+        service = CatalogService(engine)
+        response = service.respond("/files", [("file_type", "image")], None,
+                                   lambda: query_files_page(engine, filters))
+    """
+
+    def __init__(self, engine: Engine, cache_size: int = RESPONSE_CACHE_SIZE) -> None:
+        self.engine = engine
+        self.cache = ResponseCache(cache_size)
+        # scan_history must exist for catalog_version, even before any scan.
+        ensure_catalog_schema(engine)
+
+    def has_catalog(self) -> bool:
+        return inspect(self.engine).has_table(CATALOG_TABLE)
+
+    def respond(
+        self,
+        path: str,
+        query_items: Iterable[tuple[str, str]],
+        if_none_match: Optional[str],
+        produce: Callable[[], Any],
+    ) -> CatalogResponse:
+        """
+        Return 304 if the client's If-None-Match already names this
+        request's ETag, the cached body if there is one, or else build the
+        body with `produce()` (anything json.dumps can write) and cache it.
+        """
+        query_items = sorted(query_items)
+        if any(name == "stale_days" and value not in ("", "0") for name, value in query_items):
+            # "Not opened for N days" moves with the clock; re-evaluate every minute.
+            query_items.append(("_minute", str(int(time.time() // 60))))
+
+        key = json.dumps([catalog_version(self.engine), path, query_items])
+        etag = '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+        client_tags = _entity_tags(if_none_match)
+        if etag in client_tags or "*" in client_tags:
+            return CatalogResponse(status_code=304, etag=etag)
+
+        body = self.cache.get(key)
+        if body is None:
+            body = json.dumps(produce(), default=str).encode("utf-8")
+            self.cache.put(key, body)
+        return CatalogResponse(status_code=200, etag=etag, body=body)
+
+
+def create_app(database: Optional[str] = None):
+    """
+    Build the FastAPI application over `database` (a URL or a SQLite path;
+    default: DATABASE_URL, then DEFAULT_DB_PATH).
+    """
+    from fastapi import FastAPI, HTTPException, Query, Request, Response
+
+    service = CatalogService(get_engine(database, default_sqlite_path=DEFAULT_DB_PATH))
+    app = FastAPI(title="File Commander catalog")
+    app.state.catalog_service = service
+
+    def cached_response(
+        request: Request, produce: Callable[[], Any], needs_catalog: bool = True
+    ) -> Response:
+        if needs_catalog and not service.has_catalog():
+            raise HTTPException(status_code=404, detail="No catalog yet; run a scan first.")
+
+        def produce_or_reject() -> Any:
+            try:
+                return produce()
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+        response = service.respond(
+            request.url.path,
+            request.query_params.multi_items(),
+            request.headers.get("if-none-match"),
+            produce_or_reject,
+        )
+        # no-cache: clients may store the body but must revalidate it
+        # (If-None-Match) before reusing it.
+        headers = {"ETag": response.etag, "Cache-Control": "no-cache"}
+        if response.status_code == 304:
+            return Response(status_code=304, headers=headers)
+        return Response(content=response.body, media_type="application/json", headers=headers)
+
+    @app.get("/files")
+    def files(
+        request: Request,
+        root: Optional[str] = None,
+        file_type: Optional[list[str]] = Query(None),
+        min_size_mb: float = Query(0.0, ge=0.0),
+        stale_days: int = Query(0, ge=0),
+        search: str = "",
+        sort: str = "modified_at",
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+    ) -> Response:
+        """Files matching the filters, one page at a time (follow next_cursor)."""
+        filters = catalog_filters(root, file_type, min_size_mb, stale_days, search)
+        return cached_response(
+            request, lambda: query_files_page(service.engine, filters, sort, limit, cursor)
+        )
+
+    @app.get("/files/count")
+    def files_count(
+        request: Request,
+        root: Optional[str] = None,
+        file_type: Optional[list[str]] = Query(None),
+        min_size_mb: float = Query(0.0, ge=0.0),
+        stale_days: int = Query(0, ge=0),
+        search: str = "",
+    ) -> Response:
+        """How many files match the filters."""
+        filters = catalog_filters(root, file_type, min_size_mb, stale_days, search)
+        return cached_response(
+            request, lambda: {"count": count_catalog_rows(service.engine, filters)}
+        )
+
+    @app.get("/aggregates")
+    def aggregates(
+        request: Request,
+        group_by: str = "file_type",
+        root: Optional[str] = None,
+        file_type: Optional[list[str]] = Query(None),
+        min_size_mb: float = Query(0.0, ge=0.0),
+        stale_days: int = Query(0, ge=0),
+        search: str = "",
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ) -> Response:
+        """File count and bytes per file_type, extension or directory."""
+        filters = catalog_filters(root, file_type, min_size_mb, stale_days, search)
+        return cached_response(
+            request, lambda: {"groups": aggregate_files(service.engine, filters, group_by, limit)}
+        )
+
+    @app.get("/scans")
+    def scans(request: Request, root: Optional[str] = None) -> Response:
+        """Recorded scans, newest first."""
+        return cached_response(
+            request, lambda: {"scans": list_recorded_scans(service.engine, root)},
+            needs_catalog=False,
+        )
+
+    return app
+
+
+def serve_catalog_api(
+    database: Optional[str] = None, host: str = "127.0.0.1", port: int = 8000
+) -> None:
+    """Serve create_app(database) with uvicorn until interrupted."""
+    import uvicorn
+
+    uvicorn.run(create_app(database), host=host, port=port)
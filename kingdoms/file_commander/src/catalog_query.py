@@ -0,0 +1,275 @@
+# src/catalog_query.py
+
+"""
+This module answers the Streamlit sidebar's questions straight from the
+SQLite `file_catalog` table instead of from a DataFrame in memory. The
+filters (file type, minimum size, stale days, text search) compile to one
+parameterized WHERE clause, and results come back one page at a time, so
+a rerun only reads the rows that are actually on screen.
+
+Text search goes through the `file_catalog_search` FTS5 trigram index
+when it exists, so a search is an index lookup instead of a scan of
+every name. The same index also powers a typo-tolerant fuzzy search.
+"""
+
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.catalog_sql import (  # noqa: F401
+    CATALOG_TABLE,
+    MIN_INDEXED_SEARCH_LENGTH,
+    SEARCH_TABLE,
+    SEARCH_VOCABULARY_TABLE,
+    SORT_ORDERS,
+    CatalogFilters,
+    _fts_phrase,
+    compile_catalog_filters,
+)
+from src.catalog_store import ensure_catalog_indexes, ensure_search_index
+from src.scanner import CATALOG_COLUMNS
+
+
+def has_search_index(engine: Engine) -> bool:
+    """Return True if the catalog database has the FTS5 search table."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as connection:
+        return bool(connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :table"), {"table": SEARCH_TABLE}
+        ).first())
+
+
+def _typed_catalog_page(rows: pd.DataFrame) -> pd.DataFrame:
+    """Give a page read from SQLite the same dtypes as build_file_catalog's output."""
+    for datetime_column in ["created_at", "modified_at", "last_accessed_at"]:
+        rows[datetime_column] = pd.to_datetime(rows[datetime_column])
+    for categorical_column in ["directory", "extension", "file_type"]:
+        rows[categorical_column] = rows[categorical_column].astype("category")
+    return rows
+
+
+def query_catalog_page(
+    engine: Engine,
+    filters: CatalogFilters,
+    limit: int = 100,
+    offset: int = 0,
+    sort_by: str = "modified_at",
+) -> pd.DataFrame:
+    """
+    Because the UI only ever shows one page, this function returns just
+    the `limit` rows starting at `offset` that match `filters`, sorted by
+    `sort_by` (one of SORT_ORDERS).
+    """
+    if sort_by not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort column {sort_by!r}; choose from {sorted(SORT_ORDERS)}")
+
+    where_clause, parameters = compile_catalog_filters(
+        filters, has_search_index(engine), engine.dialect.name
+    )
+    parameters.update({"limit": int(limit), "offset": int(offset)})
+
+    rows = pd.read_sql(
+        text(
+            f"SELECT {', '.join(CATALOG_COLUMNS)} FROM {CATALOG_TABLE}"
+            f" WHERE {where_clause}"
+            f" ORDER BY {SORT_ORDERS[sort_by]}"
+            " LIMIT :limit OFFSET :offset"
+        ),
+        con=engine,
+        params=parameters,
+    )
+    return _typed_catalog_page(rows)
+
+
+def iter_catalog_query(
+    engine: Engine,
+    filters: CatalogFilters,
+    batch_size: int = 50_000,
+    sort_by: str = "modified_at",
+) -> Iterator[pd.DataFrame]:
+    """
+    Because an export needs *every* matching row but not all at once, this
+    generator streams them from one cursor in DataFrames of `batch_size`
+    rows (ready for src.export.write_catalog_csv).
+    """
+    if sort_by not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort column {sort_by!r}; choose from {sorted(SORT_ORDERS)}")
+
+    where_clause, parameters = compile_catalog_filters(
+        filters, has_search_index(engine), engine.dialect.name
+    )
+    with engine.connect() as connection:
+        for rows in pd.read_sql(
+            text(
+                f"SELECT {', '.join(CATALOG_COLUMNS)} FROM {CATALOG_TABLE}"
+                f" WHERE {where_clause} ORDER BY {SORT_ORDERS[sort_by]}"
+            ),
+            con=connection,
+            params=parameters,
+            chunksize=batch_size,
+        ):
+            yield _typed_catalog_page(rows)
+
+
+def count_catalog_rows(engine: Engine, filters: CatalogFilters) -> int:
+    """Return how many rows match `filters` (for "Showing X of Y" and paging)."""
+    where_clause, parameters = compile_catalog_filters(
+        filters, has_search_index(engine), engine.dialect.name
+    )
+    with engine.connect() as connection:
+        return int(connection.execute(
+            text(f"SELECT COUNT(*) FROM {CATALOG_TABLE} WHERE {where_clause}"), parameters
+        ).scalar_one())
+
+
+def _fuzzy_score(search_text: str, name: str, directory: str) -> float:
+    """
+    Because "reprot" should still find "report_1.pdf", this helper scores
+    how close `search_text` is to the file name or its folder's name
+    (0.0 - 1.0). A plain substring hit always scores 1.0.
+    """
+    name = name.lower()
+    folder_name = Path(directory).name.lower()
+    if search_text in name or search_text in folder_name:
+        return 1.0
+    return max(
+        SequenceMatcher(None, search_text, Path(name).stem).ratio(),
+        SequenceMatcher(None, search_text, folder_name).ratio(),
+    )
+
+
+def _selective_trigrams(engine: Engine, search_text: str, row_budget: int) -> list[str]:
+    """
+    Return the trigrams of `search_text` that appear in the catalog, rarest
+    first, stopping once their row counts add up to more than `row_budget`
+    (the rarest one is always kept).
+    """
+    trigrams = sorted({search_text[start:start + 3] for start in range(len(search_text) - 2)})
+    placeholders = ", ".join(f":trigram_{position}" for position in range(len(trigrams)))
+    with engine.connect() as connection:
+        row_counts = connection.execute(
+            text(
+                f"SELECT term, doc FROM {SEARCH_VOCABULARY_TABLE}"
+                f" WHERE term IN ({placeholders}) ORDER BY doc, term"
+            ),
+            {f"trigram_{position}": trigram for position, trigram in enumerate(trigrams)},
+        ).all()
+
+    selected: list[str] = []
+    total_rows = 0
+    for trigram, row_count in row_counts:
+        total_rows += row_count
+        if selected and total_rows > row_budget:
+            break
+        selected.append(trigram)
+    return selected
+
+
+def fuzzy_search_catalog(
+    engine: Engine,
+    filters: CatalogFilters,
+    limit: int = 100,
+    threshold: float = 0.6,
+    candidate_limit: int = 2_000,
+    common_trigram_rows: int = 100_000,
+) -> pd.DataFrame:
+    """
+    Because exact substring search misses typos, this function finds rows
+    whose name or folder is *close* to `filters.search_text`:
+
+      1. The trigram index returns the `candidate_limit` rows sharing the
+         most 3-letter pieces with the search text (bm25 rank), so we
+         never compare against every file in Python. Pieces that nearly
+         every row has (like "fil" in "file_123") are left out of that
+         lookup while the rarer ones add up to at most
+         `common_trigram_rows` rows, because ranking them would mean
+         ranking the whole catalog.
+      2. The other filters (root, type, size, stale) narrow those down.
+      3. Each candidate gets a SequenceMatcher score; rows scoring at
+         least `threshold` come back best first, with a `match_score`
+         column.
+
+    Without the search index (or for searches shorter than 3 characters)
+    this is the same as query_catalog_page plus a `match_score` of 1.0.
+    """
+    search_text = filters.search_text.strip().lower()
+    other_filters = CatalogFilters(
+        root=filters.root,
+        file_types=filters.file_types,
+        minimum_size_bytes=filters.minimum_size_bytes,
+        stale_days=filters.stale_days,
+        now=filters.now,
+    )
+
+    if len(search_text) < MIN_INDEXED_SEARCH_LENGTH or not has_search_index(engine):
+        rows = query_catalog_page(engine, filters, limit=limit)
+        return rows.assign(match_score=1.0)
+
+    trigrams = _selective_trigrams(engine, search_text, common_trigram_rows)
+    if not trigrams:
+        rows = query_catalog_page(engine, filters, limit=0)
+        return rows.assign(match_score=pd.Series(dtype=float))
+
+    where_clause, parameters = compile_catalog_filters(other_filters)
+    parameters.update({
+        "fuzzy_match": " OR ".join(_fts_phrase(trigram) for trigram in trigrams),
+        "candidate_limit": int(candidate_limit),
+    })
+
+    rows = pd.read_sql(
+        text(
+            f"WITH candidates AS ("
+            f" SELECT rowid AS catalog_rowid, rank AS search_rank FROM {SEARCH_TABLE}"
+            f" WHERE {SEARCH_TABLE} MATCH :fuzzy_match"
+            " ORDER BY rank LIMIT :candidate_limit)"
+            f" SELECT {', '.join(CATALOG_COLUMNS)} FROM {CATALOG_TABLE}"
+            f" JOIN candidates ON {CATALOG_TABLE}.rowid = candidates.catalog_rowid"
+            f" WHERE {where_clause}"
+        ),
+        con=engine,
+        params=parameters,
+    )
+
+    rows["match_score"] = [
+        _fuzzy_score(search_text, name, directory)
+        for name, directory in zip(rows["name"], rows["directory"])
+    ]
+    rows = (
+        rows[rows["match_score"] >= threshold]
+        .sort_values(["match_score", "path"], ascending=[False, True])
+        .head(limit)
+        .reset_index(drop=True)
+    )
+    return _typed_catalog_page(rows)
+
+
+def list_catalog_file_types(engine: Engine, root: Optional[str] = None) -> list[str]:
+    """Return the distinct file types under `root`, for the sidebar multiselect."""
+    where_clause, parameters = compile_catalog_filters(CatalogFilters(root=root))
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                f"SELECT DISTINCT file_type FROM {CATALOG_TABLE}"
+                f" WHERE {where_clause} ORDER BY file_type"
+            ),
+            parameters,
+        )
+        return [file_type for (file_type,) in rows]
+
+
+def prepare_catalog_queries(engine: Engine) -> None:
+    """
+    Because a catalog written by an older version has no indexes (and no
+    search index), this helper adds them (a no-op when they already
+    exist). Call it once after a scan or when the app starts.
+    """
+    with engine.begin() as connection:
+        ensure_catalog_indexes(connection)
+        ensure_search_index(connection)
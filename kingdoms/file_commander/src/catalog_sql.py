@@ -0,0 +1,192 @@
+# src/catalog_sql.py
+
+"""
+This module holds the plain-SQL half of the catalog: table names, the
+subtree bounds used for "everything under this folder" queries, and the
+compiler that turns CatalogFilters into a parameterized WHERE clause.
+
+It imports neither pandas nor SQLAlchemy, so the command line can answer
+`file_commander query` with nothing but the standard library's sqlite3
+(its `:name` parameters are the same ones SQLAlchemy's text() uses).
+src.catalog_store and src.catalog_query re-export everything here.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Optional
+
+CATALOG_TABLE = "file_catalog"
+
+# SQLite FTS5 table (trigram tokenizer) that indexes name/directory/extension
+# of every file_catalog row for fast substring and fuzzy search. It is an
+# "external content" table: it stores only the index, and reads the text
+# from file_catalog by rowid.
+SEARCH_TABLE = "file_catalog_search"
+SEARCH_COLUMNS = ["name", "directory", "extension"]
+# Read-only fts5vocab view of the search index: how many rows contain each
+# trigram. Fuzzy search uses it to skip trigrams almost every row has.
+SEARCH_VOCABULARY_TABLE = "file_catalog_search_vocab"
+
+# Columns the UI may sort by, mapped to the ORDER BY clause we send. Only
+# these strings ever reach the SQL text; user input never does.
+SORT_ORDERS = {
+    "modified_at": "modified_at DESC, path",
+    "size_bytes": "size_bytes DESC, path",
+    "last_accessed_at": "last_accessed_at ASC, path",
+    "path": "path",
+}
+
+# The same orders as (column, direction) for keyset pagination. Every order
+# ends with `path` ascending, which is unique, so "the rows after this one"
+# is always well defined. The "path" order has no column of its own.
+SORT_KEYS = {
+    "modified_at": ("modified_at", "DESC"),
+    "size_bytes": ("size_bytes", "DESC"),
+    "last_accessed_at": ("last_accessed_at", "ASC"),
+    "path": (None, "ASC"),
+}
+
+# Same text format SQLAlchemy uses for DATETIME columns in SQLite, so
+# cutoffs compare correctly as strings.
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# The trigram index can only answer searches of at least 3 characters;
+# shorter ones fall back to instr() over every row.
+MIN_INDEXED_SEARCH_LENGTH = 3
+
+# "Position of a substring" (0 = not found) per SQL dialect, both called as
+# f(haystack, needle).
+SUBSTRING_FUNCTIONS = {"sqlite": "instr", "postgresql": "strpos"}
+
+
+def subtree_bounds(directory: str) -> tuple[str, str]:
+    """
+    Because "everything under /a/b" is a prefix query, this helper returns
+    the (low, high) string bounds for `column > low AND column < high`,
+    which SQLite can answer from an index (unlike LIKE with escaping).
+    """
+    separator = os.sep
+    return directory + separator, directory + chr(ord(separator) + 1)
+
+
+@dataclass
+class CatalogFilters:
+    """
+    Because the sidebar has several independent filters, this record keeps
+    them together. Empty/zero values mean "do not filter on this".
+    """
+
+    root: Optional[str] = None
+    file_types: Optional[list[str]] = None
+    minimum_size_bytes: int = 0
+    stale_days: int = 0
+    search_text: str = ""
+    now: datetime = field(default_factory=datetime.now)
+
+
+def _fts_phrase(search_text: str) -> str:
+    """Quote `search_text` as one FTS5 phrase, so its characters are never FTS syntax."""
+    return '"' + search_text.replace('"', '""') + '"'
+
+
+def compile_catalog_filters(
+    filters: CatalogFilters,
+    use_search_index: bool = False,
+    dialect: str = "sqlite",
+) -> tuple[str, dict[str, Any]]:
+    """
+    Because every query (page, count, export) must apply the same filters,
+    this function turns a CatalogFilters into a SQL WHERE clause plus its
+    bound parameters. Values are always passed as parameters, never
+    pasted into the SQL text.
+
+    With `use_search_index=True` (see has_search_index) the text search
+    is answered by the trigram index instead of instr() on every row. Both
+    give the same rows: a case-insensitive substring match on name,
+    folder or extension. `dialect` (engine.dialect.name) picks the
+    substring function for the fallback.
+
+    :return: (where_clause, parameters). The clause is "1 = 1" when there
+             is nothing to filter on.
+    """
+    conditions: list[str] = []
+    parameters: dict[str, Any] = {}
+
+    if filters.root:
+        low, high = subtree_bounds(str(Path(filters.root)))
+        conditions.append(
+            "(directory = :root OR (directory > :root_low AND directory < :root_high))"
+        )
+        parameters.update({"root": str(Path(filters.root)), "root_low": low, "root_high": high})
+
+    if filters.file_types is not None:
+        if not filters.file_types:
+            # Nothing selected means nothing matches (same as isin([])).
+            conditions.append("0 = 1")
+        else:
+            placeholders = []
+            for position, file_type in enumerate(filters.file_types):
+                placeholders.append(f":file_type_{position}")
+                parameters[f"file_type_{position}"] = file_type
+            conditions.append(f"file_type IN ({', '.join(placeholders)})")
+
+    if filters.minimum_size_bytes > 0:
+        conditions.append("size_bytes >= :minimum_size_bytes")
+        parameters["minimum_size_bytes"] = int(filters.minimum_size_bytes)
+
+    if filters.stale_days > 0:
+        cutoff = filters.now - timedelta(days=filters.stale_days)
+        conditions.append("last_accessed_at < :stale_cutoff")
+        parameters["stale_cutoff"] = cutoff.strftime(_SQLITE_DATETIME_FORMAT)
+
+    search_text = filters.search_text.strip().lower()
+    if use_search_index and len(search_text) >= MIN_INDEXED_SEARCH_LENGTH:
+        # The trigram tokenizer matches a quoted phrase anywhere inside a
+        # column, ignoring case, so this is the same substring match.
+        conditions.append(
+            f"rowid IN (SELECT rowid FROM {SEARCH_TABLE}"
+            f" WHERE {SEARCH_TABLE} MATCH :search_match)"
+        )
+        parameters["search_match"] = _fts_phrase(search_text)
+    elif search_text:
+        # Case-insensitive substring match on name, folder or extension.
+        position = SUBSTRING_FUNCTIONS.get(dialect, "instr")
+        conditions.append(
+            f"({position}(lower(name), :search_text) > 0"
+            f" OR {position}(lower(directory), :search_text) > 0"
+            f" OR {position}(lower(extension), :search_text) > 0)"
+        )
+        parameters["search_text"] = search_text
+
+    where_clause = " AND ".join(conditions) if conditions else "1 = 1"
+    return where_clause, parameters
+
+
+def compile_keyset_condition(sort_by: str, after: tuple[Any, str]) -> tuple[str, dict[str, Any]]:
+    """
+    Because OFFSET makes the database walk past every skipped row, this
+    function returns the condition for "rows after `after`" in the
+    `sort_by` order instead, where `after` is the (sort value, path) of
+    the last row already seen. With the catalog indexes it is a range
+    seek, so page 1000 costs the same as page 1.
+
+    :return: (condition, parameters), to AND onto compile_catalog_filters.
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort column {sort_by!r}; choose from {sorted(SORT_KEYS)}")
+
+    after_value, after_path = after
+    column, direction = SORT_KEYS[sort_by]
+    if column is None:
+        return "path > :after_path", {"after_path": after_path}
+
+    comparison = "<" if direction == "DESC" else ">"
+    return (
+        f"({column} {comparison} :after_value"
+        f" OR ({column} = :after_value AND path > :after_path))",
+        {"after_value": after_value, "after_path": after_path},
+    )
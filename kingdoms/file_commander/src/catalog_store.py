@@ -0,0 +1,811 @@
+# src/catalog_store.py
+
+"""
+This module owns the SQLite side of the file catalog: writing a fresh scan
+into the `file_catalog` table, rescanning a tree incrementally (only the
+folders that changed since last time), and loading a catalog back out.
+
+Next to `file_catalog` we keep two small index tables:
+  - scan_directory_index: one row per folder with its mtime (in ns)
+  - scan_file_index: one row per file with (size, mtime, inode)
+
+and `scan_history`, one row per saved scan (scan_id, root, row count and
+the Parquet snapshot holding it), so older versions of a catalog can be
+found again and compared (src.scan_diff).
+
+A folder's mtime changes whenever an entry is added, removed or renamed
+inside it, so a folder whose mtime has not changed still has the same
+files and subfolders as last time and does not need to be listed again.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import stat
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from shared.database.database import (
+    BulkLoadReport,
+    bulk_load_postgres,
+    bulk_load_sqlite,
+    text_column_type,
+)
+from src.scan_metrics import ScanMetrics
+from src.scanner import (
+    CATALOG_COLUMNS,
+    CatalogColumnBuffers,
+    FileEntry,
+    _validate_root,
+    iter_file_entries,
+    list_directory,
+)
+
+# The table names, subtree_bounds and the filter compiler live in
+# src.catalog_sql (no pandas or SQLAlchemy there); re-exported here.
+from src.catalog_sql import (  # noqa: F401
+    CATALOG_TABLE,
+    SEARCH_COLUMNS,
+    SEARCH_TABLE,
+    SEARCH_VOCABULARY_TABLE,
+    subtree_bounds,
+)
+
+DIRECTORY_INDEX_TABLE = "scan_directory_index"
+FILE_INDEX_TABLE = "scan_file_index"
+SCAN_HISTORY_TABLE = "scan_history"
+
+# Columns of the tables above, in CREATE TABLE order (the upserts bind these).
+DIRECTORY_INDEX_COLUMNS = ["directory", "parent", "mtime_ns"]
+FILE_INDEX_COLUMNS = ["path", "directory", "size_bytes", "mtime_ns", "inode"]
+SCAN_HISTORY_COLUMNS = ["scan_id", "root", "row_count", "snapshot_path", "recorded_at"]
+
+# Columns of `file_catalog` that get an index after every load: path and
+# directory for incremental updates, the rest for the UI's filters and sort.
+CATALOG_INDEX_COLUMNS = [
+    "path",
+    "directory",
+    "file_type",
+    "size_bytes",
+    "last_accessed_at",
+    "modified_at",
+]
+
+# Folders modified this close to the start of a scan might change again
+# within the same mtime tick, so we never trust them on the next rescan.
+RACY_MTIME_WINDOW_NS = 2 * 1_000_000_000
+
+# Marker stored instead of a real mtime for "always relist this folder".
+UNTRUSTED_MTIME_NS = -1
+
+
+@dataclass
+class IncrementalScanResult:
+    """
+    Because the UI wants to tell the user what a rescan actually did, this
+    small record counts folders listed vs skipped and rows changed.
+    """
+
+    directories_listed: int = 0
+    directories_skipped: int = 0
+    directories_removed: int = 0
+    files_inserted: int = 0
+    files_updated: int = 0
+    files_deleted: int = 0
+    elapsed_seconds: float = 0.0
+
+
+@dataclass
+class CatalogChangeResult:
+    """
+    Because the watcher logs every batch it applies, this record counts
+    what one apply_catalog_changes call did.
+    """
+
+    paths_checked: int = 0
+    files_written: int = 0
+    paths_removed: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def ensure_catalog_schema(engine: Engine) -> None:
+    """
+    Because the incremental scan needs its index tables (and fast lookups
+    by path), this helper creates them if they are missing. It is safe to
+    call on every scan.
+
+    Counters are BIGINT: the same type on SQLite (INTEGER affinity), and
+    64-bit on PostgreSQL, where INTEGER would overflow on a nanosecond
+    mtime. Paths use text_column_type, so subtree ranges compare bytes.
+    """
+    text_type = text_column_type(engine.dialect.name)
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {DIRECTORY_INDEX_TABLE} ("
+            f" directory {text_type} PRIMARY KEY,"
+            f" parent {text_type},"
+            " mtime_ns BIGINT NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{DIRECTORY_INDEX_TABLE}_parent"
+            f" ON {DIRECTORY_INDEX_TABLE} (parent)"
+        ))
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {FILE_INDEX_TABLE} ("
+            f" path {text_type} PRIMARY KEY,"
+            f" directory {text_type} NOT NULL,"
+            " size_bytes BIGINT NOT NULL,"
+            " mtime_ns BIGINT NOT NULL,"
+            " inode BIGINT NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{FILE_INDEX_TABLE}_directory"
+            f" ON {FILE_INDEX_TABLE} (directory)"
+        ))
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCAN_HISTORY_TABLE} ("
+            " scan_id TEXT PRIMARY KEY,"
+            " root TEXT NOT NULL,"
+            " row_count BIGINT NOT NULL,"
+            " snapshot_path TEXT NOT NULL,"
+            # DOUBLE PRECISION: REAL is only 32-bit on PostgreSQL, too
+            # coarse for a Unix timestamp.
+            " recorded_at DOUBLE PRECISION NOT NULL)"
+        ))
+
+
+def _upsert_sql(table: str, columns: list[str], key_column: str) -> str:
+    """
+    INSERT ... ON CONFLICT (key) DO UPDATE for `columns`, with one
+    :column parameter each. Unlike SQLite's INSERT OR REPLACE, both SQLite
+    (3.24+) and PostgreSQL accept it.
+    """
+    updates = ", ".join(
+        f"{column} = excluded.{column}" for column in columns if column != key_column
+    )
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)})"
+        f" VALUES ({', '.join(':' + column for column in columns)})"
+        f" ON CONFLICT ({key_column}) DO UPDATE SET {updates}"
+    )
+
+
+def ensure_catalog_indexes(connection: Connection) -> None:
+    """
+    Add the CATALOG_INDEX_COLUMNS indexes to `file_catalog` if it exists
+    (a table written by an older to_sql scan has none).
+    """
+    if not inspect(connection).has_table(CATALOG_TABLE):
+        return
+    for indexed_column in CATALOG_INDEX_COLUMNS:
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{CATALOG_TABLE}_{indexed_column}"
+            f" ON {CATALOG_TABLE} ({indexed_column})"
+        ))
+
+
+def search_index_supported(connection: Connection) -> bool:
+    """
+    Because the trigram tokenizer needs SQLite 3.34+ built with FTS5, this
+    helper checks both before we try to create the search table.
+    """
+    if connection.dialect.name != "sqlite" or sqlite3.sqlite_version_info < (3, 34, 0):
+        return False
+    compile_options = {row[0] for row in connection.execute(text("PRAGMA compile_options"))}
+    return "ENABLE_FTS5" in compile_options
+
+
+def _search_triggers(connection: Connection) -> set[str]:
+    rows = connection.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = :table"),
+        {"table": CATALOG_TABLE},
+    )
+    return {name for (name,) in rows}
+
+
+def ensure_search_index(connection: Connection, rebuild: bool = False) -> bool:
+    """
+    Because the search box should hit an index instead of scanning every
+    row, this function makes sure `file_catalog_search` exists and is in
+    sync with `file_catalog`:
+
+      - it creates the FTS5 table (and its fts5vocab view) if missing,
+      - it (re)creates the triggers that mirror every insert, update and
+        delete on file_catalog into the index,
+      - it rebuilds the whole index in one pass when the table is new,
+        when `rebuild=True`, or when the triggers were gone (which means
+        file_catalog was dropped and re-created by a full scan).
+
+    :return: True if the search index is available afterwards.
+    """
+    if not search_index_supported(connection):
+        return False
+    if not inspect(connection).has_table(CATALOG_TABLE):
+        return False
+
+    expected_triggers = {f"{SEARCH_TABLE}_{suffix}" for suffix in ("insert", "delete", "update")}
+    search_tables = {name for (name,) in connection.execute(
+        text("SELECT name FROM sqlite_master WHERE name IN (:search, :vocabulary)"),
+        {"search": SEARCH_TABLE, "vocabulary": SEARCH_VOCABULARY_TABLE},
+    )}
+    has_search_table = SEARCH_TABLE in search_tables
+    has_triggers = expected_triggers <= _search_triggers(connection)
+
+    if not has_search_table or SEARCH_VOCABULARY_TABLE not in search_tables:
+        rebuild = True
+    if has_triggers and not rebuild:
+        return True
+
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_columns = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_columns = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+    if not has_search_table:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            f"{columns}, content='{CATALOG_TABLE}', content_rowid='rowid',"
+            " tokenize='trigram')"
+        ))
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_VOCABULARY_TABLE}"
+        f" USING fts5vocab({SEARCH_TABLE}, 'row')"
+    ))
+
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON {CATALOG_TABLE} BEGIN"
+        f" INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.rowid, {new_columns});"
+        " END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON {CATALOG_TABLE} BEGIN"
+        f" INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns})"
+        f" VALUES ('delete', old.rowid, {old_columns});"
+        " END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE ON {CATALOG_TABLE} BEGIN"
+        f" INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns})"
+        f" VALUES ('delete', old.rowid, {old_columns});"
+        f" INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.rowid, {new_columns});"
+        " END"
+    ))
+
+    # One pass over file_catalog is far cheaper than firing the triggers
+    # row by row during a bulk load.
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"))
+    return True
+
+
+def replace_catalog(engine: Engine, file_catalog: pd.DataFrame) -> BulkLoadReport:
+    """
+    Because a full scan replaces everything, this function drops and
+    recreates the `file_catalog` table (the original behaviour) and clears
+    the incremental index tables, since they no longer describe the table.
+    """
+    return replace_catalog_from_batches(engine, [file_catalog])
+
+
+def _at_least_one_batch(batches: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield `batches`, or a single empty catalog if there were none."""
+    yielded_any = False
+    for batch in batches:
+        yielded_any = True
+        yield batch
+    if not yielded_any:
+        yield CatalogColumnBuffers().to_frame()
+
+
+def replace_catalog_from_batches(
+    engine: Engine,
+    batches: Iterable[pd.DataFrame],
+    batch_size: int = 10_000,
+    metrics: Optional[ScanMetrics] = None,
+) -> BulkLoadReport:
+    """
+    Because a full rewrite should not need the whole catalog in memory,
+    this function does the same as `replace_catalog` but consumes catalog
+    batches (e.g. from `iter_file_records`) one at a time.
+
+    On SQLite it uses `bulk_load_sqlite` (WAL, one transaction, indexes
+    built after the load), and on PostgreSQL `bulk_load_postgres` (COPY
+    into an unlogged staging table that is swapped in), so either way
+    readers keep seeing the previous catalog until the new one is
+    committed. Other databases go through to_sql.
+
+    With `metrics`, the load's own time (without the time spent producing
+    the batches, i.e. scanning) is recorded as the "write" stage and the
+    metrics are finished.
+
+    :return: A BulkLoadReport with row counts, timings and rows/s.
+    """
+    if metrics is not None:
+        upstream_seconds = metrics.upstream_seconds
+        report = replace_catalog_from_batches(engine, metrics.time_upstream(batches), batch_size)
+        scan_seconds = metrics.upstream_seconds - upstream_seconds
+        metrics.add_stage("write", max(report.total_seconds - scan_seconds, 0.0))
+        metrics.finish()
+        return report
+
+    ensure_catalog_schema(engine)
+
+    # Clear the incremental index first: if the load below fails halfway,
+    # the next incremental scan simply starts from scratch.
+    with engine.begin() as connection:
+        connection.execute(text(f"DELETE FROM {DIRECTORY_INDEX_TABLE}"))
+        connection.execute(text(f"DELETE FROM {FILE_INDEX_TABLE}"))
+
+    if engine.dialect.name == "sqlite":
+        report = bulk_load_sqlite(
+            engine,
+            CATALOG_TABLE,
+            _at_least_one_batch(batches),
+            batch_size=batch_size,
+            index_columns=CATALOG_INDEX_COLUMNS,
+        )
+
+        # The load dropped and re-created file_catalog, so the search
+        # index is rebuilt in one pass (timed with the index builds).
+        index_start = time.perf_counter()
+        with engine.begin() as connection:
+            ensure_search_index(connection)
+        report.index_seconds += time.perf_counter() - index_start
+
+        return report
+
+    if engine.dialect.name == "postgresql":
+        return bulk_load_postgres(
+            engine,
+            CATALOG_TABLE,
+            _at_least_one_batch(batches),
+            index_columns=CATALOG_INDEX_COLUMNS,
+        )
+
+    report = BulkLoadReport(table_name=CATALOG_TABLE)
+    load_start = time.perf_counter()
+    with engine.begin() as connection:
+        if_exists = "replace"
+        for batch in _at_least_one_batch(batches):
+            batch.to_sql(
+                CATALOG_TABLE, con=connection, if_exists=if_exists, index=False,
+                chunksize=batch_size,
+            )
+            if_exists = "append"
+            report.rows_written += len(batch)
+            report.batches_written += 1
+        ensure_catalog_indexes(connection)
+    report.load_seconds = time.perf_counter() - load_start
+
+    return report
+
+
+def _load_directory_index(
+    connection: Connection, root_directory: str
+) -> dict[str, tuple[Optional[str], int]]:
+    """Return {directory: (parent, mtime_ns)} for `root_directory` and everything below it."""
+    low, high = subtree_bounds(root_directory)
+    rows = connection.execute(
+        text(
+            f"SELECT directory, parent, mtime_ns FROM {DIRECTORY_INDEX_TABLE}"
+            " WHERE directory = :root OR (directory > :low AND directory < :high)"
+        ),
+        {"root": root_directory, "low": low, "high": high},
+    )
+    return {directory: (parent, mtime_ns) for directory, parent, mtime_ns in rows}
+
+
+def _load_file_signatures(
+    connection: Connection, directory: str
+) -> dict[str, tuple[int, int, int]]:
+    """Return {path: (size_bytes, mtime_ns, inode)} for the files stored directly in `directory`."""
+    rows = connection.execute(
+        text(
+            f"SELECT path, size_bytes, mtime_ns, inode FROM {FILE_INDEX_TABLE}"
+            " WHERE directory = :directory"
+        ),
+        {"directory": directory},
+    )
+    return {path: (size_bytes, mtime_ns, inode) for path, size_bytes, mtime_ns, inode in rows}
+
+
+def _delete_subtree(connection: Connection, directory: str, catalog_exists: bool) -> None:
+    """Remove a vanished folder (and everything below it) from all three tables."""
+    low, high = subtree_bounds(directory)
+    bounds = {"directory": directory, "low": low, "high": high}
+    subtree_filter = "(directory = :directory OR (directory > :low AND directory < :high))"
+
+    if catalog_exists:
+        connection.execute(text(f"DELETE FROM {CATALOG_TABLE} WHERE {subtree_filter}"), bounds)
+    connection.execute(text(f"DELETE FROM {FILE_INDEX_TABLE} WHERE {subtree_filter}"), bounds)
+    connection.execute(text(f"DELETE FROM {DIRECTORY_INDEX_TABLE} WHERE {subtree_filter}"), bounds)
+
+
+def incremental_scan(
+    engine: Engine, root: Path | str, verify_files: bool = False
+) -> IncrementalScanResult:
+    """
+    Because rescanning a mostly-static archive from scratch (and rewriting
+    the whole table) takes minutes, this function only does the work the
+    changes require:
+
+      1. It `stat`s every known folder once. A folder whose mtime matches
+         the stored one is skipped: its subfolders come from the index and
+         its files are assumed unchanged.
+      2. New or changed folders are listed; their files are compared with
+         the stored (size, mtime, inode) and only inserted, updated or
+         deleted rows are written to `file_catalog`.
+      3. Stored folders that were not seen any more are deleted together
+         with their files.
+
+    Editing a file in place does not change its folder's mtime, so the
+    quick mode cannot see it (and last_accessed_at is only refreshed for
+    rows that changed). Pass `verify_files=True` to list every folder and
+    compare every file's stat — still far cheaper than a full rewrite.
+
+    :param engine: SQLAlchemy engine for the catalog database.
+    :param root: The directory to scan (Path or string).
+    :param verify_files: Re-check files even in folders whose mtime is unchanged.
+    :return: An IncrementalScanResult with counts and timing.
+    """
+    start_seconds = time.perf_counter()
+    scan_start_ns = time.time_ns()
+    root_directory = str(_validate_root(root))
+    result = IncrementalScanResult()
+
+    ensure_catalog_schema(engine)
+
+    with engine.begin() as connection:
+        catalog_exists = inspect(connection).has_table(CATALOG_TABLE)
+        ensure_catalog_indexes(connection)
+        # Before we change any rows, so the triggers keep the index in sync.
+        ensure_search_index(connection)
+
+        stored_directories = _load_directory_index(connection, root_directory)
+        stored_children: dict[str, list[str]] = defaultdict(list)
+        for directory, (parent, _mtime_ns) in stored_directories.items():
+            if parent is not None:
+                stored_children[parent].append(directory)
+
+        if not stored_directories and catalog_exists:
+            # First incremental scan of this root: whatever rows a previous
+            # full scan left under it are about to be re-inserted.
+            _delete_subtree(connection, root_directory, catalog_exists)
+
+        seen_directories: set[str] = set()
+        directory_rows: list[dict] = []
+        changed_entries: list[FileEntry] = []
+        updated_paths: list[str] = []
+        deleted_paths: list[str] = []
+        file_index_rows: list[dict] = []
+
+        pending_directories: list[tuple[str, Optional[str]]] = [(root_directory, None)]
+        while pending_directories:
+            directory, parent = pending_directories.pop()
+
+            try:
+                directory_mtime_ns = os.stat(directory).st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            seen_directories.add(directory)
+
+            stored = stored_directories.get(directory)
+            if stored is not None and stored[1] == directory_mtime_ns and not verify_files:
+                result.directories_skipped += 1
+                pending_directories.extend(
+                    (child, directory) for child in stored_children[directory]
+                )
+                continue
+
+            result.directories_listed += 1
+            files, subdirectories = list_directory(directory, with_stat=True)
+            # A folder new to the index can still have file rows written by
+            # the watcher (apply_catalog_changes); only a first scan has none.
+            stored_signatures = (
+                _load_file_signatures(connection, directory) if stored_directories else {}
+            )
+
+            for file_entry in files:
+                file_path, _directory, _name, file_stat = file_entry
+                signature = (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino)
+                stored_signature = stored_signatures.pop(file_path, None)
+                if stored_signature == signature:
+                    continue
+
+                changed_entries.append(file_entry)
+                if stored_signature is None:
+                    result.files_inserted += 1
+                else:
+                    result.files_updated += 1
+                    updated_paths.append(file_path)
+                file_index_rows.append({
+                    "path": file_path,
+                    "directory": directory,
+                    "size_bytes": signature[0],
+                    "mtime_ns": signature[1],
+                    "inode": signature[2],
+                })
+
+            # Whatever is left in stored_signatures is gone from disk.
+            deleted_paths.extend(stored_signatures)
+
+            # A folder touched moments ago may change again within the same
+            # mtime tick; store a marker so the next scan relists it.
+            is_racy = directory_mtime_ns >= scan_start_ns - RACY_MTIME_WINDOW_NS
+            directory_rows.append({
+                "directory": directory,
+                "parent": parent,
+                "mtime_ns": UNTRUSTED_MTIME_NS if is_racy else directory_mtime_ns,
+            })
+            pending_directories.extend(
+                (subdirectory, directory) for subdirectory in reversed(subdirectories)
+            )
+
+        # ---- Apply the changes ------------------------------------------------
+        for vanished_directory in set(stored_directories) - seen_directories:
+            result.directories_removed += 1
+            _delete_subtree(connection, vanished_directory, catalog_exists)
+
+        result.files_deleted = len(deleted_paths)
+        paths_to_remove = [{"path": path} for path in deleted_paths + updated_paths]
+        if paths_to_remove:
+            if catalog_exists:
+                connection.execute(
+                    text(f"DELETE FROM {CATALOG_TABLE} WHERE path = :path"), paths_to_remove
+                )
+            connection.execute(
+                text(f"DELETE FROM {FILE_INDEX_TABLE} WHERE path = :path"), paths_to_remove
+            )
+
+        if changed_entries or not catalog_exists:
+            column_buffers = CatalogColumnBuffers()
+            for file_path, directory, name, file_stat in changed_entries:
+                column_buffers.append(file_path, directory, name, file_stat)
+            column_buffers.to_frame().to_sql(
+                CATALOG_TABLE, con=connection, if_exists="append", index=False
+            )
+            ensure_catalog_indexes(connection)
+            ensure_search_index(connection)
+
+        if file_index_rows:
+            connection.execute(
+                text(_upsert_sql(FILE_INDEX_TABLE, FILE_INDEX_COLUMNS, "path")),
+                file_index_rows,
+            )
+
+        if directory_rows:
+            connection.execute(
+                text(_upsert_sql(DIRECTORY_INDEX_TABLE, DIRECTORY_INDEX_COLUMNS, "directory")),
+                directory_rows,
+            )
+
+    result.elapsed_seconds = time.perf_counter() - start_seconds
+    return result
+
+
+def _outermost_paths(paths: Iterable[str]) -> list[str]:
+    """Drop every path that lies inside another path of the set (it is rescanned with it)."""
+    path_set = set(paths)
+    outermost: list[str] = []
+    for path in sorted(path_set):
+        ancestor, parent = path, os.path.dirname(path)
+        while parent != ancestor and parent not in path_set:
+            ancestor, parent = parent, os.path.dirname(parent)
+        if parent == ancestor:
+            # Reached the filesystem root without meeting another path.
+            outermost.append(path)
+    return outermost
+
+
+def apply_catalog_changes(engine: Engine, paths: Iterable[str]) -> CatalogChangeResult:
+    """
+    Because a filesystem event only says *that* a path changed, this
+    function looks at each path as it is now and rewrites just its rows:
+
+      - a path that is gone loses its row (or its whole subtree, if it
+        was a folder),
+      - a file gets its row replaced with a fresh stat,
+      - a folder (new, or moved in) is walked and its subtree replaced.
+
+    Since only the current state matters, any sequence of events for a
+    path (create, modify, delete, move) collapses to one check here.
+    The scan_file_index rows are kept in step, so a later incremental
+    scan finds these files already stored.
+
+    :param engine: SQLAlchemy engine for the catalog database.
+    :param paths: Absolute paths of files or folders that changed.
+    :return: A CatalogChangeResult.
+    """
+    start_seconds = time.perf_counter()
+    result = CatalogChangeResult()
+
+    removed_paths: list[dict] = []
+    replaced_subtrees: list[str] = []
+    column_buffers = CatalogColumnBuffers()
+    file_index_rows: list[dict] = []
+
+    def add_file(file_path: str, directory: str, name: str, file_stat: os.stat_result) -> None:
+        column_buffers.append(file_path, directory, name, file_stat)
+        file_index_rows.append({
+            "path": file_path,
+            "directory": directory,
+            "size_bytes": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+            "inode": file_stat.st_ino,
+        })
+
+    for path in _outermost_paths(os.path.normpath(path) for path in paths):
+        result.paths_checked += 1
+        removed_paths.append({"path": path})
+        replaced_subtrees.append(path)
+        try:
+            path_stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            result.paths_removed += 1
+            continue
+
+        if stat.S_ISREG(path_stat.st_mode):
+            add_file(path, os.path.dirname(path), os.path.basename(path), path_stat)
+        elif stat.S_ISDIR(path_stat.st_mode):
+            try:
+                for file_path, directory, name, file_stat in iter_file_entries(path):
+                    add_file(file_path, directory, name, file_stat)
+            except (FileNotFoundError, NotADirectoryError):
+                # Removed again while we walked it; its own event follows.
+                pass
+
+    if not removed_paths:
+        return result
+
+    ensure_catalog_schema(engine)
+    with engine.begin() as connection:
+        catalog_exists = inspect(connection).has_table(CATALOG_TABLE)
+        ensure_catalog_indexes(connection)
+        ensure_search_index(connection)
+
+        if catalog_exists:
+            connection.execute(
+                text(f"DELETE FROM {CATALOG_TABLE} WHERE path = :path"), removed_paths
+            )
+        connection.execute(
+            text(f"DELETE FROM {FILE_INDEX_TABLE} WHERE path = :path"), removed_paths
+        )
+        for subtree in replaced_subtrees:
+            _delete_subtree(connection, subtree, catalog_exists)
+
+        if len(column_buffers) or not catalog_exists:
+            column_buffers.to_frame().to_sql(
+                CATALOG_TABLE, con=connection, if_exists="append", index=False
+            )
+            ensure_catalog_indexes(connection)
+            ensure_search_index(connection)
+
+        if file_index_rows:
+            connection.execute(
+                text(_upsert_sql(FILE_INDEX_TABLE, FILE_INDEX_COLUMNS, "path")),
+                file_index_rows,
+            )
+
+    result.files_written = len(column_buffers)
+    result.elapsed_seconds = time.perf_counter() - start_seconds
+    return result
+
+
+def apply_catalog_moves(engine: Engine, moves: Iterable[tuple[str, str]]) -> int:
+    """
+    Because a move only changes where a file lives, this function rewrites
+    the path, directory and name of each moved file's `file_catalog` row
+    (and its scan_file_index row) in place instead of asking for a rescan.
+    The search triggers keep the trigram index in sync.
+
+    The next incremental scan still relists the source and destination
+    folders (their mtimes changed), but finds the moved rows already there.
+
+    :param engine: SQLAlchemy engine for the catalog database.
+    :param moves: (old path, new path) pairs of files that were moved.
+    :return: The number of catalog rows updated.
+    """
+    rows = [
+        {
+            "old_path": old_path,
+            "path": new_path,
+            "directory": os.path.dirname(new_path),
+            "name": os.path.basename(new_path),
+        }
+        for old_path, new_path in moves
+    ]
+    if not rows:
+        return 0
+
+    ensure_catalog_schema(engine)
+    with engine.begin() as connection:
+        updated_rows = 0
+        if inspect(connection).has_table(CATALOG_TABLE):
+            updated_rows = connection.execute(
+                text(
+                    f"UPDATE {CATALOG_TABLE}"
+                    " SET path = :path, directory = :directory, name = :name"
+                    " WHERE path = :old_path"
+                ),
+                rows,
+            ).rowcount
+        connection.execute(
+            text(
+                f"UPDATE {FILE_INDEX_TABLE} SET path = :path, directory = :directory"
+                " WHERE path = :old_path"
+            ),
+            rows,
+        )
+    return updated_rows
+
+
+def load_catalog(engine: Engine, root: Path | str) -> pd.DataFrame:
+    """
+    Because an incremental scan only touches the database, this function
+    reads the rows for `root` back into the same DataFrame shape that
+    `build_file_catalog` returns (datetimes and categoricals included).
+    """
+    root_directory = str(Path(root))
+    low, high = subtree_bounds(root_directory)
+
+    file_catalog = pd.read_sql(
+        text(
+            f"SELECT {', '.join(CATALOG_COLUMNS)} FROM {CATALOG_TABLE}"
+            " WHERE directory = :root OR (directory > :low AND directory < :high)"
+            " ORDER BY directory, name"
+        ),
+        con=engine,
+        params={"root": root_directory, "low": low, "high": high},
+        parse_dates=["created_at", "modified_at", "last_accessed_at"],
+    )
+
+    for categorical_column in ["directory", "extension", "file_type"]:
+        file_catalog[categorical_column] = file_catalog[categorical_column].astype("category")
+
+    return file_catalog
+
+
+def record_scan(
+    engine: Engine,
+    scan_id: str,
+    root: Path | str,
+    row_count: int,
+    snapshot_path: Path | str,
+) -> None:
+    """
+    Because a snapshot file on its own is easy to lose track of, this
+    function registers a finished scan in `scan_history` under its
+    scan_id (recording the same scan_id again replaces its row).
+    """
+    ensure_catalog_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            text(_upsert_sql(SCAN_HISTORY_TABLE, SCAN_HISTORY_COLUMNS, "scan_id")),
+            {
+                "scan_id": scan_id,
+                "root": str(root),
+                "row_count": int(row_count),
+                "snapshot_path": str(snapshot_path),
+                "recorded_at": time.time(),
+            },
+        )
+
+
+def list_scans(engine: Engine, root: Optional[Path | str] = None) -> pd.DataFrame:
+    """
+    Return the recorded scans (only those of `root`, if given), newest
+    first, as a DataFrame with the scan_history columns.
+    """
+    ensure_catalog_schema(engine)
+    query = f"SELECT {', '.join(SCAN_HISTORY_COLUMNS)} FROM {SCAN_HISTORY_TABLE}"
+    params = {}
+    if root is not None:
+        query += " WHERE root = :root"
+        params["root"] = str(root)
+    return pd.read_sql(text(query + " ORDER BY scan_id DESC"), con=engine, params=params)
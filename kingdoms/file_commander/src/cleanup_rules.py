@@ -0,0 +1,602 @@
+# src/cleanup_rules.py
+
+"""
+This module evaluates cleanup policies ("installers older than 90 days",
+"videos over 1 GB nobody opened in a year", ...) against the catalog.
+
+Policies are data, not code: a JSON or YAML file with a list of rules,
+each a name plus conditions on catalog columns that must all hold:
+
+    rules:
+      - name: old-installers
+        file_type: installer
+        not_modified_days: 90
+      - name: forgotten-videos
+        file_type: video
+        min_size: 1 GB
+        not_accessed_days: 365
+      - name: duplicate-downloads
+        file_type: archive
+        directory: ~/Downloads
+        duplicate: true
+
+The conditions are listed in RULE_CONDITIONS. A key that takes a list
+(file_type, extension, directory, name_glob) also takes a single value,
+and a file matches if any of the listed values does. Sizes are bytes
+or strings like "500 MB" (binary units, like the rest of the app).
+
+However many rules there are, the catalog is read once:
+
+  - evaluate_cleanup_rules works on a catalog DataFrame. Every distinct
+    condition becomes one boolean mask, computed once and shared by all
+    the rules that use it. Conditions on categorical columns (file_type,
+    extension, directory) are answered once per category and spread over
+    the rows through the category codes.
+  - evaluate_cleanup_rules_sql sends one SELECT with a CASE column per
+    rule, so the database makes one pass over file_catalog and returns
+    only the files at least one rule matches.
+
+Both give a CleanupReport: every matching file tagged with the rules it
+matches, plus the count and bytes per rule.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from src.catalog_sql import CATALOG_TABLE, _SQLITE_DATETIME_FORMAT, subtree_bounds
+from src.duplicates import DUPLICATE_FILES_TABLE
+from src.file_types import normalize_extension
+
+# Tables store_cleanup_report writes: one row per tagged file, and the
+# per-rule totals of the last run.
+CLEANUP_MATCHES_TABLE = "cleanup_rule_matches"
+CLEANUP_SUMMARY_TABLE = "cleanup_rule_summary"
+
+CLEANUP_MATCH_COLUMNS = ["path", "size_bytes", "rules"]
+CLEANUP_SUMMARY_COLUMNS = ["rule", "description", "files", "bytes"]
+
+# Separates rule names in the `rules` column of a tagged file.
+RULE_TAG_SEPARATOR = ","
+
+# Condition keys a rule may use, mapped to the CleanupRule field they set.
+RULE_CONDITIONS = {
+    "file_type": "file_types",
+    "extension": "extensions",
+    "min_size": "minimum_size_bytes",
+    "max_size": "maximum_size_bytes",
+    "not_accessed_days": "not_accessed_days",
+    "not_modified_days": "not_modified_days",
+    "directory": "directories",
+    "name_glob": "name_patterns",
+    "duplicate": "duplicates_only",
+}
+
+# Size units accepted in min_size / max_size, in bytes.
+SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 1024,
+    "MB": 1024 ** 2,
+    "GB": 1024 ** 3,
+    "TB": 1024 ** 4,
+}
+
+# SQL dialects whose GLOB operator matches name_glob like fnmatch does.
+GLOB_DIALECTS = {"sqlite"}
+
+# Matching rows read from the database per DataFrame chunk.
+SQL_CHUNK_ROWS = 100_000
+
+
+@dataclass
+class CleanupRule:
+    """
+    Because a policy is a handful of optional conditions, this record
+    keeps one rule. None (or False) means "no condition on this"; a rule
+    needs at least one condition.
+    """
+
+    name: str
+    description: str = ""
+    file_types: Optional[list[str]] = None
+    extensions: Optional[list[str]] = None
+    minimum_size_bytes: Optional[int] = None
+    maximum_size_bytes: Optional[int] = None
+    not_accessed_days: Optional[float] = None
+    not_modified_days: Optional[float] = None
+    directories: Optional[list[str]] = None
+    name_patterns: Optional[list[str]] = None
+    duplicates_only: bool = False
+
+
+@dataclass
+class CleanupReport:
+    """
+    Because a nightly run wants both the files and the totals, this record
+    holds:
+
+      - files: one row per file that at least one rule matches
+               (CLEANUP_MATCH_COLUMNS), `rules` naming every rule it
+               matches in policy order, joined by RULE_TAG_SEPARATOR
+      - rules: one row per rule in policy order (CLEANUP_SUMMARY_COLUMNS),
+               files and bytes it matches (a file can count for several
+               rules)
+    """
+
+    files: pd.DataFrame
+    rules: pd.DataFrame
+    rows_scanned: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def tagged_bytes(self) -> int:
+        """Bytes of all tagged files, each counted once."""
+        return int(self.files["size_bytes"].sum()) if len(self.files) else 0
+
+
+# ---------------------------------------------------------------------------
+# Rule format
+# ---------------------------------------------------------------------------
+
+def parse_size(size: int | float | str) -> int:
+    """
+    Because "1 GB" reads better in a policy than 1073741824, this helper
+    turns a number of bytes or a string like "1.5 GB" / "500MB" into bytes.
+    """
+    if isinstance(size, bool):
+        raise ValueError(f"Invalid size: {size!r}")
+    if isinstance(size, (int, float)):
+        size_bytes = int(size)
+    else:
+        match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([A-Za-z]*)\s*", str(size))
+        unit = match.group(2).upper() if match else None
+        if unit not in SIZE_UNITS:
+            raise ValueError(f"Invalid size {size!r}; use bytes or e.g. '500 MB', '1 GB'")
+        size_bytes = int(float(match.group(1)) * SIZE_UNITS[unit])
+    if size_bytes < 0:
+        raise ValueError(f"Invalid size: {size!r}")
+    return size_bytes
+
+
+def _as_list(key: str, value: Any) -> list[str]:
+    values = value if isinstance(value, list) else [value]
+    if not values or not all(isinstance(item, str) and item for item in values):
+        raise ValueError(f"{key!r} must be a non-empty string or list of strings")
+    return values
+
+
+def _parse_rule(document: dict) -> CleanupRule:
+    if not isinstance(document, dict) or not document.get("name"):
+        raise ValueError(f"Every cleanup rule needs a name: {document!r}")
+    name = str(document["name"])
+    unknown_keys = set(document) - set(RULE_CONDITIONS) - {"name", "description"}
+    if unknown_keys:
+        raise ValueError(
+            f"Rule {name!r}: unknown keys {sorted(unknown_keys)}; "
+            f"conditions are {sorted(RULE_CONDITIONS)}"
+        )
+    if RULE_TAG_SEPARATOR in name:
+        raise ValueError(f"Rule {name!r}: names cannot contain {RULE_TAG_SEPARATOR!r}")
+
+    rule = CleanupRule(name=name, description=str(document.get("description", "")))
+    for key, value in document.items():
+        if key in ("name", "description"):
+            continue
+        if key == "file_type":
+            rule.file_types = _as_list(key, value)
+        elif key == "extension":
+            rule.extensions = [normalize_extension(item) for item in _as_list(key, value)]
+        elif key == "directory":
+            rule.directories = [str(Path(item).expanduser()) for item in _as_list(key, value)]
+        elif key == "name_glob":
+            rule.name_patterns = _as_list(key, value)
+        elif key in ("min_size", "max_size"):
+            setattr(rule, RULE_CONDITIONS[key], parse_size(value))
+        elif key in ("not_accessed_days", "not_modified_days"):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"Rule {name!r}: {key!r} must be a number of days >= 0")
+            setattr(rule, key, value)
+        elif key == "duplicate":
+            if not isinstance(value, bool):
+                raise ValueError(f"Rule {name!r}: 'duplicate' must be true or false")
+            rule.duplicates_only = value
+
+    if not rule_conditions(rule, datetime.now()):
+        # A rule without conditions would tag every file for cleanup.
+        raise ValueError(f"Rule {name!r} has no conditions")
+    return rule
+
+
+def parse_cleanup_rules(document: Any) -> list[CleanupRule]:
+    """
+    Turn a loaded policy document (a list of rules, or {"rules": [...]})
+    into CleanupRules. Raises ValueError on unknown keys, bad values,
+    rules without conditions and repeated names.
+    """
+    if isinstance(document, dict):
+        document = document.get("rules")
+    if not isinstance(document, list):
+        raise ValueError("A cleanup policy is a list of rules, or a mapping with a 'rules' list")
+
+    rules = [_parse_rule(rule_document) for rule_document in document]
+    names = [rule.name for rule in rules]
+    repeated = sorted({name for name in names if names.count(name) > 1})
+    if repeated:
+        raise ValueError(f"Rule names must be unique; repeated: {repeated}")
+    return rules
+
+
+def load_cleanup_rules(policy_path: Path | str) -> list[CleanupRule]:
+    """
+    Read a cleanup policy from a .json, .yaml or .yml file. YAML needs
+    PyYAML, which is only imported for YAML files.
+    """
+    policy_path = Path(policy_path)
+    with open(policy_path, encoding="utf-8") as policy_file:
+        if policy_path.suffix.lower() in (".yaml", ".yml"):
+            import yaml
+
+            document = yaml.safe_load(policy_file)
+        else:
+            document = json.load(policy_file)
+    return parse_cleanup_rules(document)
+
+
+def rule_conditions(rule: CleanupRule, now: datetime) -> list[tuple]:
+    """
+    Because many rules repeat the same conditions ("file_type: video",
+    "not_accessed_days: 365"), this function turns a rule into hashable
+    condition tuples, so each distinct one is evaluated only once.
+    """
+    conditions: list[tuple] = []
+    if rule.file_types is not None:
+        conditions.append(("file_type", tuple(sorted(set(rule.file_types)))))
+    if rule.extensions is not None:
+        conditions.append(("extension", tuple(sorted(set(rule.extensions)))))
+    if rule.minimum_size_bytes is not None:
+        conditions.append(("min_size", rule.minimum_size_bytes))
+    if rule.maximum_size_bytes is not None:
+        conditions.append(("max_size", rule.maximum_size_bytes))
+    if rule.not_accessed_days is not None:
+        conditions.append(
+            ("before", "last_accessed_at", now - timedelta(days=rule.not_accessed_days))
+        )
+    if rule.not_modified_days is not None:
+        conditions.append(("before", "modified_at", now - timedelta(days=rule.not_modified_days)))
+    if rule.directories is not None:
+        conditions.append(("directory", tuple(sorted(set(rule.directories)))))
+    if rule.name_patterns is not None:
+        conditions.append(("name_glob", tuple(sorted(set(rule.name_patterns)))))
+    if rule.duplicates_only:
+        conditions.append(("duplicate",))
+    return conditions
+
+
+# ---------------------------------------------------------------------------
+# Tagging and totals (shared by both evaluators)
+# ---------------------------------------------------------------------------
+
+def _build_report(
+    rules: list[CleanupRule],
+    paths: np.ndarray,
+    sizes: np.ndarray,
+    matches: np.ndarray,
+    rows_scanned: int,
+    start_time: float,
+) -> CleanupReport:
+    """
+    Build the report from the tagged files: their paths and sizes, and a
+    (tagged files x rules) boolean matrix. Files with the same set of
+    matching rules share one tag string: the tags are built once per
+    distinct row of the matrix, not once per file.
+    """
+    sizes = sizes.astype(np.int64, copy=False)
+    rule_summary = pd.DataFrame({
+        "rule": [rule.name for rule in rules],
+        "description": [rule.description for rule in rules],
+        "files": matches.sum(axis=0).astype(np.int64),
+        "bytes": sizes @ matches.astype(np.int64),
+    }, columns=CLEANUP_SUMMARY_COLUMNS)
+
+    if len(matches):
+        combinations, combination_index = np.unique(matches, axis=0, return_inverse=True)
+        tags = np.array([
+            RULE_TAG_SEPARATOR.join(rule.name for rule, hit in zip(rules, combination) if hit)
+            for combination in combinations
+        ], dtype=object)[combination_index.reshape(-1)]
+    else:
+        tags = np.array([], dtype=object)
+
+    tagged_files = pd.DataFrame({
+        "path": np.asarray(paths, dtype=object),
+        "size_bytes": sizes,
+        "rules": tags,
+    }, columns=CLEANUP_MATCH_COLUMNS)
+    return CleanupReport(
+        files=tagged_files,
+        rules=rule_summary,
+        rows_scanned=rows_scanned,
+        elapsed_seconds=time.perf_counter() - start_time,
+    )
+
+
+def _check_duplicates_needed(rules: list[CleanupRule], available: bool) -> None:
+    if not available and any(rule.duplicates_only for rule in rules):
+        raise ValueError(
+            "A rule uses 'duplicate: true', but no duplicate results are available; "
+            "run find_duplicates (`dupes`) first."
+        )
+
+
+# ---------------------------------------------------------------------------
+# DataFrame evaluation
+# ---------------------------------------------------------------------------
+
+def _per_distinct(
+    catalog: pd.DataFrame,
+    column_name: str,
+    matches_values,
+    distinct_columns: dict[str, tuple[np.ndarray, pd.Series]],
+) -> np.ndarray:
+    """
+    Because folders, extensions and file types repeat across millions of
+    rows, this helper evaluates `matches_values` (a vectorized test on a
+    Series of distinct values) once per distinct value and maps the
+    answer back to the rows through their codes. The codes of each column
+    are worked out once per evaluation and kept in `distinct_columns`.
+    """
+    if column_name not in distinct_columns:
+        column = catalog[column_name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            values = pd.Series(column.cat.categories, dtype=object)
+        else:
+            codes, uniques = pd.factorize(column)
+            values = pd.Series(uniques, dtype=object)
+        distinct_columns[column_name] = codes, values
+
+    codes, values = distinct_columns[column_name]
+    value_matches = np.append(np.asarray(matches_values(values), dtype=bool), False)
+    # Code -1 (missing value) picks the trailing False.
+    return value_matches[codes]
+
+
+def _directory_matcher(directories: tuple[str, ...]):
+    prefixes = tuple(subtree_bounds(directory)[0] for directory in directories)
+
+    def matches(values: pd.Series) -> pd.Series:
+        return values.isin(directories) | values.str.startswith(prefixes)
+
+    return matches
+
+
+def _glob_regex(patterns: tuple[str, ...]) -> str:
+    return "|".join(fnmatch.translate(pattern) for pattern in patterns)
+
+
+def _condition_mask(
+    catalog: pd.DataFrame,
+    condition: tuple,
+    duplicate_paths: Optional[pd.Index],
+    distinct_columns: dict[str, tuple[np.ndarray, pd.Series]],
+) -> np.ndarray:
+    kind = condition[0]
+    if kind == "file_type":
+        return _per_distinct(
+            catalog, "file_type", lambda values: values.isin(condition[1]), distinct_columns
+        )
+    if kind == "extension":
+        return _per_distinct(
+            catalog, "extension", lambda values: values.str.lower().isin(condition[1]),
+            distinct_columns,
+        )
+    if kind == "min_size":
+        return catalog["size_bytes"].to_numpy() >= condition[1]
+    if kind == "max_size":
+        return catalog["size_bytes"].to_numpy() <= condition[1]
+    if kind == "before":
+        # NaT compares False, like NULL in the SQL version.
+        return (catalog[condition[1]] < pd.Timestamp(condition[2])).to_numpy(dtype=bool)
+    if kind == "directory":
+        return _per_distinct(
+            catalog, "directory", _directory_matcher(condition[1]), distinct_columns
+        )
+    if kind == "name_glob":
+        return catalog["name"].str.match(_glob_regex(condition[1])).to_numpy(dtype=bool)
+    if kind == "duplicate":
+        return catalog["path"].isin(duplicate_paths).to_numpy()
+    raise ValueError(f"Unknown condition {condition!r}")
+
+
+def evaluate_cleanup_rules(
+    catalog: pd.DataFrame,
+    rules: list[CleanupRule],
+    now: Optional[datetime] = None,
+    duplicate_paths: Optional[Iterable[str]] = None,
+) -> CleanupReport:
+    """
+    Because nightly policies can number in the dozens, this function
+    evaluates all `rules` over a catalog DataFrame (as from
+    build_file_catalog or load_catalog) together: each distinct condition
+    is one vectorized mask, shared by every rule that uses it, and each
+    rule is the AND of its masks.
+
+    :param now: Reference time for the *_days conditions (default: now).
+    :param duplicate_paths: Paths with an identical copy (e.g.
+                            DuplicateReport.files["path"]); required if
+                            a rule uses `duplicate: true`.
+    :return: The CleanupReport.
+    """
+    start_time = time.perf_counter()
+    now = now or datetime.now()
+    _check_duplicates_needed(rules, duplicate_paths is not None)
+    duplicate_index = pd.Index(duplicate_paths) if duplicate_paths is not None else None
+
+    condition_masks: dict[tuple, np.ndarray] = {}
+    distinct_columns: dict[str, tuple[np.ndarray, pd.Series]] = {}
+    rule_masks = []
+    tagged = np.zeros(len(catalog), dtype=bool)
+    for rule in rules:
+        rule_mask = None
+        for condition in rule_conditions(rule, now):
+            if condition not in condition_masks:
+                condition_masks[condition] = _condition_mask(
+                    catalog, condition, duplicate_index, distinct_columns
+                )
+            mask = condition_masks[condition]
+            rule_mask = mask if rule_mask is None else rule_mask & mask
+        rule_masks.append(rule_mask)
+        tagged |= rule_mask
+
+    # Only the tagged rows go on: usually a small part of the catalog.
+    tagged_rows = np.flatnonzero(tagged)
+    matches = np.empty((len(tagged_rows), len(rules)), dtype=bool, order="F")
+    for position, rule_mask in enumerate(rule_masks):
+        matches[:, position] = rule_mask[tagged_rows]
+
+    return _build_report(
+        rules,
+        catalog["path"].to_numpy(dtype=object)[tagged_rows],
+        catalog["size_bytes"].to_numpy()[tagged_rows],
+        matches,
+        rows_scanned=len(catalog),
+        start_time=start_time,
+    )
+
+
+# ---------------------------------------------------------------------------
+# SQL evaluation
+# ---------------------------------------------------------------------------
+
+def _condition_sql(condition: tuple, parameters: dict[str, Any], dialect: str) -> str:
+    """Compile one condition to SQL, adding its bound values to `parameters`."""
+
+    def bind(value: Any) -> str:
+        name = f"p{len(parameters)}"
+        parameters[name] = value
+        return f":{name}"
+
+    kind = condition[0]
+    if kind == "file_type":
+        return f"file_type IN ({', '.join(bind(value) for value in condition[1])})"
+    if kind == "extension":
+        return f"lower(extension) IN ({', '.join(bind(value) for value in condition[1])})"
+    if kind == "min_size":
+        return f"size_bytes >= {bind(condition[1])}"
+    if kind == "max_size":
+        return f"size_bytes <= {bind(condition[1])}"
+    if kind == "before":
+        return f"{condition[1]} < {bind(condition[2].strftime(_SQLITE_DATETIME_FORMAT))}"
+    if kind == "directory":
+        alternatives = []
+        for directory in condition[1]:
+            low, high = subtree_bounds(directory)
+            alternatives.append(
+                f"directory = {bind(directory)}"
+                f" OR (directory > {bind(low)} AND directory < {bind(high)})"
+            )
+        return " OR ".join(alternatives)
+    if kind == "name_glob":
+        if dialect not in GLOB_DIALECTS:
+            raise ValueError(f"name_glob is not supported on {dialect}")
+        return " OR ".join(f"name GLOB {bind(pattern)}" for pattern in condition[1])
+    if kind == "duplicate":
+        return f"path IN (SELECT path FROM {DUPLICATE_FILES_TABLE})"
+    raise ValueError(f"Unknown condition {condition!r}")
+
+
+def compile_cleanup_rules(
+    rules: list[CleanupRule],
+    now: datetime,
+    dialect: str = "sqlite",
+) -> tuple[str, dict[str, Any]]:
+    """
+    Because the database should read file_catalog once for all rules, this
+    function compiles `rules` into one SELECT: path, size_bytes and a 0/1
+    column rule_<i> per rule, for the rows at least one rule matches.
+    Each distinct condition is bound once, so its parameters are shared.
+
+    :return: (sql, parameters) for sqlalchemy.text().
+    """
+    parameters: dict[str, Any] = {}
+    condition_sql: dict[tuple, str] = {}
+    rule_columns = []
+    for position, rule in enumerate(rules):
+        clauses = []
+        for condition in rule_conditions(rule, now):
+            if condition not in condition_sql:
+                condition_sql[condition] = _condition_sql(condition, parameters, dialect)
+            clauses.append(f"({condition_sql[condition]})")
+        rule_columns.append(
+            f"CASE WHEN {' AND '.join(clauses)} THEN 1 ELSE 0 END AS rule_{position}"
+        )
+
+    any_rule = " OR ".join(f"rule_{position} = 1" for position in range(len(rules)))
+    sql = (
+        f"SELECT * FROM (SELECT path, size_bytes, {', '.join(rule_columns)}"
+        f" FROM {CATALOG_TABLE}) AS rule_matches WHERE {any_rule}"
+    )
+    return sql, parameters
+
+
+def evaluate_cleanup_rules_sql(
+    engine: Engine,
+    rules: list[CleanupRule],
+    now: Optional[datetime] = None,
+) -> CleanupReport:
+    """
+    Evaluate all `rules` against the saved catalog in one pass over
+    file_catalog (see compile_cleanup_rules), reading back only the
+    tagged files. Gives the same report as evaluate_cleanup_rules on the
+    same rows; `duplicate: true` uses the duplicate_files table from the
+    last find_duplicates run.
+    """
+    start_time = time.perf_counter()
+    now = now or datetime.now()
+    inspector = inspect(engine)
+    _check_duplicates_needed(rules, inspector.has_table(DUPLICATE_FILES_TABLE))
+    rule_columns = [f"rule_{position}" for position in range(len(rules))]
+
+    if not rules or not inspector.has_table(CATALOG_TABLE):
+        return _build_report(
+            rules, np.array([], dtype=object), np.zeros(0, dtype=np.int64),
+            np.zeros((0, len(rules)), dtype=bool), rows_scanned=0, start_time=start_time,
+        )
+
+    sql, parameters = compile_cleanup_rules(rules, now, dialect=engine.dialect.name)
+    with engine.connect() as connection:
+        rows_scanned = connection.execute(text(f"SELECT COUNT(*) FROM {CATALOG_TABLE}")).scalar()
+        chunks = list(pd.read_sql(text(sql), connection, params=parameters,
+                                  chunksize=SQL_CHUNK_ROWS))
+    tagged = (
+        pd.concat(chunks, ignore_index=True) if chunks
+        else pd.DataFrame(columns=["path", "size_bytes", *rule_columns])
+    )
+    return _build_report(
+        rules,
+        tagged["path"].to_numpy(dtype=object),
+        tagged["size_bytes"].to_numpy(dtype=np.int64),
+        tagged[rule_columns].to_numpy(dtype=np.int64).astype(bool),
+        rows_scanned=int(rows_scanned or 0),
+        start_time=start_time,
+    )
+
+
+def store_cleanup_report(engine: Engine, report: CleanupReport) -> None:
+    """Replace the cleanup_rule_matches / cleanup_rule_summary tables with `report`."""
+    with engine.begin() as connection:
+        report.files.to_sql(CLEANUP_MATCHES_TABLE, con=connection, if_exists="replace", index=False)
+        report.rules.to_sql(CLEANUP_SUMMARY_TABLE, con=connection, if_exists="replace", index=False)
@@ -0,0 +1,561 @@
+# src/cli.py
+
+"""
+Because some File Commander jobs are long-running services rather than
+something to click through in the Streamlit app, this module is the
+`file_commander` command line.
+
+Run it from kingdoms/file_commander:
+
+    python -m src.cli scan ~/Documents > documents.ndjson
+    python -m src.cli scan ~/Documents --db file_commander.db
+    python -m src.cli query --type image --min-size-mb 10 --sort size_bytes
+    python -m src.cli dupes ~/Documents
+    python -m src.cli export --root ~/Documents --format csv --output documents.csv
+    python -m src.cli watch ~/Documents
+    python -m src.cli diff ~/Documents
+    python -m src.cli cleanup cleanup_policy.yaml --output tagged.csv
+    python -m src.cli serve --port 8000
+
+Startup time matters for a command line, so nothing here imports pandas
+or SQLAlchemy at module level: `--help`, `scan` (without --db) and `query`
+run on the standard library (src.walker, src.catalog_sql and sqlite3),
+and the other commands import the DataFrame stack when they run.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+
+import click
+
+if TYPE_CHECKING:
+    from src.catalog_sql import CatalogFilters
+
+# `src` and `shared` must be importable whether we run as `python -m src.cli`
+# or as a script: kingdoms/file_commander and the project root on sys.path.
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = FILE_COMMANDER_ROOT.parents[1]
+for import_path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
+    if str(import_path) not in sys.path:
+        sys.path.insert(0, str(import_path))
+
+from src.catalog_sql import SORT_ORDERS  # noqa: E402
+
+# The same database the Streamlit app reads.
+DEFAULT_DB_PATH = FILE_COMMANDER_ROOT / "file_commander.db"
+
+TIMESTAMP_COLUMNS = ["created_at", "modified_at", "last_accessed_at"]
+
+ROW_FORMATS = ["ndjson", "csv"]
+
+
+def _row_writer(output_format: str, output_stream: IO[str]) -> Callable[[tuple], None]:
+    """
+    Return a function that writes one catalog row (a tuple in
+    CATALOG_COLUMNS order) to `output_stream` as NDJSON or CSV. The CSV
+    header is written right away, so an empty result is still a table.
+    """
+    from src.walker import CATALOG_COLUMNS
+
+    if output_format == "csv":
+        import csv
+
+        csv_writer = csv.writer(output_stream, lineterminator="\n")
+        csv_writer.writerow(CATALOG_COLUMNS)
+        return csv_writer.writerow
+
+    import json
+
+    def write_json_line(row: tuple) -> None:
+        output_stream.write(json.dumps(dict(zip(CATALOG_COLUMNS, row)), ensure_ascii=False))
+        output_stream.write("\n")
+
+    return write_json_line
+
+
+def _batch_rows(batch) -> Iterator[tuple]:
+    """Turn a catalog DataFrame into the same plain tuples src.walker.iter_catalog_rows yields."""
+    from src.walker import CATALOG_COLUMNS
+
+    columns = [
+        [timestamp.isoformat() for timestamp in batch[column]]
+        if column in TIMESTAMP_COLUMNS else batch[column].tolist()
+        for column in CATALOG_COLUMNS
+    ]
+    return zip(*columns)
+
+
+def _format_size(size_bytes: int) -> str:
+    size = float(size_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:,.1f} {unit}" if unit != "B" else f"{size_bytes} B"
+
+
+def _require_database(db_path: Path) -> None:
+    # get_sqlite_engine / sqlite3.connect would quietly create an empty file.
+    if not db_path.exists():
+        raise click.ClickException(
+            f"No catalog database at {db_path}; run `scan ROOT --db {db_path}` first."
+        )
+
+
+def catalog_filter_options(command: Callable) -> Callable:
+    """Add the filter options shared by `query` and `export` (see CatalogFilters)."""
+    options = [
+        click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path),
+                     default=DEFAULT_DB_PATH, show_default=True, help="SQLite catalog database."),
+        click.option("--root", type=click.Path(file_okay=False, path_type=Path),
+                     help="Only files under this folder."),
+        click.option("--type", "file_types", multiple=True,
+                     help="Only this file type (repeat for several), e.g. --type image."),
+        click.option("--min-size-mb", type=click.FloatRange(min=0.0), default=0.0,
+                     help="Only files at least this big."),
+        click.option("--stale-days", type=click.IntRange(min=0), default=0,
+                     help="Only files not opened for this many days."),
+        click.option("--search", "search_text", default="",
+                     help="Case-insensitive text in the name, folder or extension."),
+        click.option("--sort", "sort_by", type=click.Choice(list(SORT_ORDERS)),
+                     default="modified_at", show_default=True, help="Sort order."),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _catalog_filters(
+    root: Optional[Path],
+    file_types: tuple[str, ...],
+    min_size_mb: float,
+    stale_days: int,
+    search_text: str,
+) -> CatalogFilters:
+    from src.catalog_sql import CatalogFilters
+
+    return CatalogFilters(
+        root=str(root.expanduser()) if root else None,
+        file_types=list(file_types) or None,
+        minimum_size_bytes=int(min_size_mb * 1024 * 1024),
+        stale_days=stale_days,
+        search_text=search_text,
+    )
+
+
+@click.group(name="file_commander")
+def cli() -> None:
+    """Scan, search and organize files from the command line."""
+
+
+@cli.command()
+@click.argument("root", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option("--format", "output_format", type=click.Choice(ROW_FORMATS), default="ndjson",
+              show_default=True, help="One JSON object per line, or CSV with a header.")
+@click.option("--output", "output_stream", type=click.File("w", encoding="utf-8"), default="-",
+              show_default=True, help="Where the rows go ('-' is stdout).")
+@click.option("--workers", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Threads listing directories.")
+@click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path),
+              help="Also save the scan as the catalog in this SQLite database.")
+@click.option("--sniff", is_flag=True,
+              help="Read the first bytes of 'other' files and set their type from the contents.")
+def scan(
+    root: Path,
+    output_format: str,
+    output_stream: IO[str],
+    workers: int,
+    db_path: Optional[Path],
+    sniff: bool,
+) -> None:
+    """
+    Walk ROOT and write one row per file while walking.
+
+    Without --db and --sniff no DataFrame is built: each file is written
+    as soon as it is stat'ed, so the output can be piped straight into
+    jq, grep or a database loader.
+    """
+    root = root.expanduser()
+    write_row = _row_writer(output_format, output_stream)
+
+    if db_path is None and sniff:
+        from src.content_types import content_type_batches
+        from src.scanner import iter_file_records
+
+        reports: list = []
+        row_count = 0
+        for batch in content_type_batches(iter_file_records(root, workers=workers), None,
+                                          reports=reports):
+            for row in _batch_rows(batch):
+                write_row(row)
+                row_count += 1
+            output_stream.flush()
+        sniffed_count = sum(len(report.content_types) for report in reports)
+        click.echo(f"[scan] {row_count:,} files under {root} "
+                   f"({sniffed_count:,} typed by contents)", err=True)
+        return
+
+    if db_path is None:
+        from src.walker import iter_catalog_rows
+
+        row_count = 0
+        for row in iter_catalog_rows(root, workers=workers):
+            write_row(row)
+            row_count += 1
+        output_stream.flush()
+        click.echo(f"[scan] {row_count:,} files under {root}", err=True)
+        return
+
+    from shared.database.database import get_sqlite_engine
+    from src.catalog_store import replace_catalog_from_batches
+    from src.directory_tree import (
+        DirectoryTreeBuilder,
+        directory_tree_batches,
+        store_directory_tree,
+    )
+    from src.scan_metrics import ScanMetrics
+    from src.scanner import iter_file_records
+
+    def written(batches: Iterable) -> Iterator:
+        # Rows still go out batch by batch while the catalog is written.
+        for batch in batches:
+            for row in _batch_rows(batch):
+                write_row(row)
+            output_stream.flush()
+            yield batch
+
+    engine = get_sqlite_engine(db_path)
+    metrics = ScanMetrics(root)
+    tree_builder = DirectoryTreeBuilder(root)
+    batches = iter_file_records(root, workers=workers, metrics=metrics)
+    reports: list = []
+    if sniff:
+        from src.content_types import content_type_batches
+
+        # The database doubles as the content-type cache, so a rescan
+        # reads no headers for files that did not change.
+        batches = content_type_batches(batches, engine, reports=reports)
+    batches = directory_tree_batches(batches, tree_builder)
+    load_report = replace_catalog_from_batches(engine, written(batches), metrics=metrics)
+    store_directory_tree(engine, tree_builder.finish())
+    sniffed = ""
+    if sniff:
+        sniffed_count = sum(len(report.content_types) for report in reports)
+        sniffed = f", {sniffed_count:,} typed by contents"
+    click.echo(
+        f"[scan] {metrics.files:,} files under {root} saved to {db_path} "
+        f"in {metrics.wall_seconds:.1f}s ({load_report.rows_per_second:,.0f} rows/s{sniffed})",
+        err=True,
+    )
+
+
+@cli.command()
+@catalog_filter_options
+@click.option("--limit", type=click.IntRange(min=0), default=20, show_default=True,
+              help="Rows to show (0 = all).")
+@click.option("--format", "output_format", type=click.Choice(["table", *ROW_FORMATS]),
+              default="table", show_default=True, help="Output format.")
+def query(
+    db_path: Path,
+    root: Optional[Path],
+    file_types: tuple[str, ...],
+    min_size_mb: float,
+    stale_days: int,
+    search_text: str,
+    sort_by: str,
+    limit: int,
+    output_format: str,
+) -> None:
+    """Search the saved catalog and print the matching files."""
+    import sqlite3
+
+    from src.catalog_sql import CATALOG_TABLE, SEARCH_TABLE, compile_catalog_filters
+    from src.walker import CATALOG_COLUMNS
+
+    _require_database(db_path)
+    filters = _catalog_filters(root, file_types, min_size_mb, stale_days, search_text)
+
+    # Plain sqlite3, read-only: the same WHERE clause the app sends through
+    # SQLAlchemy, without loading SQLAlchemy or pandas.
+    connection = sqlite3.connect(db_path.resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        has_search_index = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,)
+        ).fetchone() is not None
+        where_clause, parameters = compile_catalog_filters(filters, has_search_index)
+        sql = (
+            f"SELECT {', '.join(CATALOG_COLUMNS)} FROM {CATALOG_TABLE}"
+            f" WHERE {where_clause} ORDER BY {SORT_ORDERS[sort_by]}"
+        )
+        if limit:
+            sql += " LIMIT :limit"
+            parameters["limit"] = limit
+        rows = connection.execute(sql, parameters)
+
+        if output_format == "table":
+            row_count = 0
+            for row in rows:
+                size = _format_size(row[CATALOG_COLUMNS.index("size_bytes")])
+                modified_at = row[CATALOG_COLUMNS.index("modified_at")][:16]
+                file_type = row[CATALOG_COLUMNS.index("file_type")]
+                click.echo(f"{size:>12}  {modified_at}  {file_type:<12} {row[0]}")
+                row_count += 1
+            click.echo(f"[query] {row_count:,} files", err=True)
+            return
+
+        # SQLite stores "YYYY-MM-DD HH:MM:SS.ffffff"; write ISO 8601 like `scan`.
+        timestamp_positions = [CATALOG_COLUMNS.index(column) for column in TIMESTAMP_COLUMNS]
+        write_row = _row_writer(output_format, click.get_text_stream("stdout"))
+        for row in rows:
+            row = list(row)
+            for position in timestamp_positions:
+                if row[position] is not None:
+                    row[position] = row[position].replace(" ", "T", 1)
+            write_row(tuple(row))
+    except sqlite3.OperationalError as exc:
+        raise click.ClickException(f"Could not query {db_path}: {exc}") from exc
+    finally:
+        connection.close()
+
+
+@cli.command()
+@click.argument("root", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path),
+              default=DEFAULT_DB_PATH, show_default=True, help="SQLite catalog database.")
+@click.option("--workers", type=click.IntRange(min=1), default=None,
+              help="Processes used for hashing (default: one per CPU).")
+@click.option("--min-size-mb", type=click.FloatRange(min=0.0), default=0.0,
+              help="Ignore files smaller than this (empty files are always ignored).")
+@click.option("--limit", type=click.IntRange(min=0), default=20, show_default=True,
+              help="Duplicate groups shown, biggest reclaimable space first.")
+def dupes(
+    root: Path,
+    db_path: Path,
+    workers: Optional[int],
+    min_size_mb: float,
+    limit: int,
+) -> None:
+    """Find files with identical contents among the cataloged files under ROOT."""
+    _require_database(db_path)
+
+    from shared.database.database import get_sqlite_engine
+    from src.catalog_store import load_catalog
+    from src.duplicates import find_duplicates
+
+    root = root.expanduser()
+    engine = get_sqlite_engine(db_path)
+    catalog = load_catalog(engine, root)
+    if catalog.empty:
+        raise click.ClickException(
+            f"No cataloged files under {root}; run `scan {root} --db {db_path}` first."
+        )
+
+    report = find_duplicates(
+        catalog, engine, workers=workers,
+        minimum_size_bytes=max(1, int(min_size_mb * 1024 * 1024)),
+    )
+    click.echo(
+        f"[dupes] {root}: {len(report.groups):,} groups, {len(report.files):,} files, "
+        f"{report.reclaimable_bytes / (1024 * 1024):,.1f} MB reclaimable "
+        f"({report.full_hashed:,} files fully hashed, {report.cache_hits:,} hash cache hits)"
+    )
+    for group in report.groups.head(limit).itertuples(index=False):
+        click.echo(
+            f"\n{group.file_count} x {group.size_bytes / (1024 * 1024):,.1f} MB "
+            f"({group.reclaimable_bytes / (1024 * 1024):,.1f} MB reclaimable):"
+        )
+        for path in report.files.loc[report.files["group_id"] == group.group_id, "path"]:
+            click.echo(f"  {path}")
+
+
+@cli.command()
+@catalog_filter_options
+@click.option("--format", "output_format", type=click.Choice(ROW_FORMATS), default="csv",
+              show_default=True, help="Output format.")
+@click.option("--output", "output_path", type=click.Path(dir_okay=False, allow_dash=True),
+              default="-", show_default=True, help="File to write ('-' is stdout).")
+def export(
+    db_path: Path,
+    root: Optional[Path],
+    file_types: tuple[str, ...],
+    min_size_mb: float,
+    stale_days: int,
+    search_text: str,
+    sort_by: str,
+    output_format: str,
+    output_path: str,
+) -> None:
+    """Export every catalog row matching the filters, one batch at a time."""
+    _require_database(db_path)
+
+    from shared.database.database import get_sqlite_engine
+    from src.catalog_query import iter_catalog_query
+    from src.export import write_catalog_csv, write_catalog_ndjson
+
+    filters = _catalog_filters(root, file_types, min_size_mb, stale_days, search_text)
+    write_catalog = write_catalog_csv if output_format == "csv" else write_catalog_ndjson
+    destination = click.get_text_stream("stdout") if output_path == "-" else output_path
+    row_count = write_catalog(
+        iter_catalog_query(get_sqlite_engine(db_path), filters, sort_by=sort_by), destination
+    )
+    click.echo(f"[export] {row_count:,} rows written to {output_path}", err=True)
+
+
+@cli.command()
+@click.argument("root", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path),
+              default=DEFAULT_DB_PATH, show_default=True, help="SQLite catalog database.")
+@click.option("--seed/--no-seed", default=True, show_default=True,
+              help="Rebuild the catalog with a full scan before watching.")
+@click.option("--workers", type=click.IntRange(min=1), default=1, show_default=True,
+              help="Threads for the seed scan.")
+@click.option("--debounce", "debounce_seconds", type=click.FloatRange(min=0.0), default=1.0,
+              show_default=True, help="Seconds of quiet before a batch of changes is applied.")
+@click.option("--max-delay", "max_delay_seconds", type=click.FloatRange(min=0.1), default=10.0,
+              show_default=True, help="Longest a change waits before it is applied.")
+def watch(
+    root: Path,
+    db_path: Path,
+    seed: bool,
+    workers: int,
+    debounce_seconds: float,
+    max_delay_seconds: float,
+) -> None:
+    """Keep the catalog of ROOT up to date as files change (Ctrl+C to stop)."""
+    from shared.database.database import get_sqlite_engine
+    from src.catalog_store import CatalogChangeResult
+    from src.watcher import watch_catalog
+
+    root = root.expanduser()
+
+    def report(result: CatalogChangeResult) -> None:
+        click.echo(
+            f"[watch] {result.paths_checked} paths checked: "
+            f"{result.files_written} files written, {result.paths_removed} removed "
+            f"({result.elapsed_seconds * 1000:.0f} ms)"
+        )
+
+    click.echo(f"[watch] Watching {root} -> {db_path}" + (" (seeding first)" if seed else ""))
+    watch_catalog(
+        get_sqlite_engine(db_path),
+        root,
+        seed=seed,
+        workers=workers,
+        debounce_seconds=debounce_seconds,
+        max_delay_seconds=max_delay_seconds,
+        ignored_paths=(db_path,),
+        on_batch=report,
+    )
+    click.echo("[watch] Stopped.")
+
+
+@cli.command()
+@click.argument("root", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path),
+              default=DEFAULT_DB_PATH, show_default=True, help="SQLite catalog database.")
+@click.option("--old", "old_scan_id", help="Earlier scan id (default: the scan before --new).")
+@click.option("--new", "new_scan_id", help="Later scan id (default: the latest scan).")
+@click.option("--limit", type=click.IntRange(min=0), default=20, show_default=True,
+              help="Rows shown per kind of change.")
+def diff(
+    root: Path,
+    db_path: Path,
+    old_scan_id: str | None,
+    new_scan_id: str | None,
+    limit: int,
+) -> None:
+    """Show what changed in ROOT between two saved scans."""
+    from shared.database.database import get_sqlite_engine
+    from src.scan_diff import diff_scans
+
+    root = root.expanduser()
+    try:
+        scan_diff = diff_scans(get_sqlite_engine(db_path), root, old_scan_id, new_scan_id)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+    counts = ", ".join(f"{count:,} {kind}" for kind, count in scan_diff.counts.items())
+    click.echo(
+        f"[diff] {root}: {scan_diff.old_scan_id} -> {scan_diff.new_scan_id}: {counts}, "
+        f"{scan_diff.bytes_delta / (1024 * 1024):+,.1f} MB "
+        f"({scan_diff.elapsed_seconds * 1000:.0f} ms)"
+    )
+    for title, frame in [
+        ("Added", scan_diff.added),
+        ("Removed", scan_diff.removed),
+        ("Modified", scan_diff.modified),
+        ("Moved", scan_diff.moved),
+        ("Directory growth", scan_diff.directory_growth),
+    ]:
+        if limit and len(frame):
+            click.echo(f"\n{title} ({len(frame):,}):")
+            click.echo(frame.head(limit).to_string(index=False))
+
+
+@cli.command()
+@click.argument("policy_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path),
+              default=DEFAULT_DB_PATH, show_default=True, help="SQLite catalog database.")
+@click.option("--output", "output_path", type=click.Path(dir_okay=False, allow_dash=True),
+              help="Also write every tagged file with its rules as CSV ('-' is stdout).")
+@click.option("--save/--no-save", default=True, show_default=True,
+              help="Store the tagged files and per-rule totals in the database.")
+def cleanup(policy_path: Path, db_path: Path, output_path: Optional[str], save: bool) -> None:
+    """
+    Evaluate the cleanup rules in POLICY_PATH (JSON or YAML, see
+    src.cleanup_rules) against the saved catalog, in one pass over it.
+    """
+    _require_database(db_path)
+
+    from shared.database.database import get_sqlite_engine
+    from src.cleanup_rules import (
+        evaluate_cleanup_rules_sql,
+        load_cleanup_rules,
+        store_cleanup_report,
+    )
+
+    try:
+        rules = load_cleanup_rules(policy_path)
+        engine = get_sqlite_engine(db_path)
+        report = evaluate_cleanup_rules_sql(engine, rules)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    if save:
+        store_cleanup_report(engine, report)
+
+    click.echo(
+        f"[cleanup] {len(rules)} rules over {report.rows_scanned:,} files: "
+        f"{len(report.files):,} files tagged, {_format_size(report.tagged_bytes)} "
+        f"({report.elapsed_seconds * 1000:.0f} ms)",
+        err=True,
+    )
+    name_width = max((len(rule.name) for rule in rules), default=0)
+    for summary in report.rules.itertuples(index=False):
+        click.echo(
+            f"{summary.rule:<{name_width}}  {summary.files:>10,} files  "
+            f"{_format_size(summary.bytes):>12}",
+            err=output_path == "-",
+        )
+    if output_path:
+        destination = click.get_text_stream("stdout") if output_path == "-" else output_path
+        report.files.to_csv(destination, index=False)
+
+
+@cli.command()
+@click.option("--database", help="Database URL or SQLite file (default: DATABASE_URL, "
+                                 "then the app's file_commander.db).")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to listen on.")
+@click.option("--port", type=click.IntRange(min=1, max=65535), default=8000, show_default=True,
+              help="Port to listen on.")
+def serve(database: Optional[str], host: str, port: int) -> None:
+    """Serve the catalog as a JSON HTTP API (see src.catalog_api)."""
+    from src.catalog_api import serve_catalog_api
+
+    serve_catalog_api(database, host=host, port=port)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,161 @@
+# src/compact_catalog.py
+
+"""
+This module keeps a catalog in memory in a compact form, for sessions
+that hold millions of rows.
+
+The regular catalog (build_file_catalog) stores one Python string object
+per row for `path` and `name`, although `path` is only `directory` +
+`name`, and three datetime64[ns] columns. The compact form:
+
+  - drops `path`; catalog_paths rebuilds it for the rows that need it,
+  - keeps `directory` as a categorical, i.e. an int32 directory id per
+    row pointing at a table of distinct directories (its categories),
+  - keeps `extension` and `file_type` as categoricals,
+  - stores `name` as an Arrow-backed string column (one buffer, no
+    Python object per row),
+  - stores timestamps as uint32 epoch seconds (1970 to 2106; anything
+    outside is clamped), half the size of datetime64[ns].
+
+expand_catalog turns it back into the regular shape, and
+catalog_memory_report measures what each column costs.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.scanner import (
+    CATALOG_COLUMNS,
+    DEFAULT_BATCH_SIZE,
+    CatalogColumnBuffers,
+    iter_file_records,
+)
+
+COMPACT_CATALOG_COLUMNS = [column for column in CATALOG_COLUMNS if column != "path"]
+
+TIMESTAMP_COLUMNS = ["created_at", "modified_at", "last_accessed_at"]
+
+# Epoch seconds in an unsigned 32-bit integer.
+EPOCH_SECONDS_DTYPE = np.uint32
+
+# Arrow-backed strings: one data buffer plus offsets instead of a Python
+# object per row.
+NAME_DTYPE = pd.StringDtype("pyarrow")
+
+
+def _to_epoch_seconds(timestamps: pd.Series) -> np.ndarray:
+    seconds = timestamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    limits = np.iinfo(EPOCH_SECONDS_DTYPE)
+    return np.clip(seconds, limits.min, limits.max).astype(EPOCH_SECONDS_DTYPE)
+
+
+def _as_categorical(values: pd.Series) -> pd.Categorical:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.array
+    return pd.Categorical(values)
+
+
+def compact_catalog(file_catalog: pd.DataFrame) -> pd.DataFrame:
+    """
+    Because most of a catalog's memory goes to repeated strings and wide
+    timestamps, this function converts a regular catalog DataFrame to the
+    compact form (COMPACT_CATALOG_COLUMNS, same index).
+    """
+    columns = {
+        "directory": _as_categorical(file_catalog["directory"]),
+        "name": file_catalog["name"].astype(NAME_DTYPE),
+        "extension": _as_categorical(file_catalog["extension"]),
+        "file_type": _as_categorical(file_catalog["file_type"]),
+        "size_bytes": file_catalog["size_bytes"].to_numpy(dtype=np.int64),
+    }
+    for column in TIMESTAMP_COLUMNS:
+        columns[column] = _to_epoch_seconds(file_catalog[column])
+    return pd.DataFrame(columns, index=file_catalog.index)
+
+
+def compact_catalog_batches(batches: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Compact catalog batches (e.g. from iter_file_records) one at a time
+    and stitch them together, so the regular form of the whole catalog is
+    never in memory at once.
+    """
+    compact_batches = [compact_catalog(batch) for batch in batches]
+    if not compact_batches:
+        return compact_catalog(CatalogColumnBuffers().to_frame())
+    if len(compact_batches) == 1:
+        return compact_batches[0]
+
+    columns = {}
+    for column in COMPACT_CATALOG_COLUMNS:
+        column_parts = [batch[column] for batch in compact_batches]
+        if isinstance(column_parts[0].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(column_parts, sort_categories=True)
+        else:
+            columns[column] = pd.concat(column_parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def build_compact_catalog(
+    root: Path | str, workers: int = 1, batch_size: int = DEFAULT_BATCH_SIZE
+) -> pd.DataFrame:
+    """Scan `root` like build_file_catalog, but return the compact form."""
+    return compact_catalog_batches(
+        iter_file_records(root, batch_size=batch_size, workers=workers)
+    )
+
+
+def catalog_paths(compact: pd.DataFrame) -> pd.Series:
+    """
+    Because the compact form does not store `path`, this function builds
+    it for the given rows (pass a slice to build only what you show).
+    Each distinct directory gets its separator once; rows then only join
+    two strings.
+    """
+    directories = compact["directory"].array
+    prefixes = pd.Index(directories.categories.astype(str))
+    prefixes = prefixes.where(prefixes.str.endswith(os.sep), prefixes + os.sep)
+    row_prefixes = np.asarray(prefixes, dtype=object)[directories.codes]
+    names = compact["name"].to_numpy(dtype=object)
+    return pd.Series(row_prefixes + names, index=compact.index, name="path", dtype=object)
+
+
+def expand_catalog(compact: pd.DataFrame) -> pd.DataFrame:
+    """Turn a compact catalog back into the regular CATALOG_COLUMNS shape."""
+    columns = {
+        "path": catalog_paths(compact),
+        "directory": compact["directory"],
+        "name": compact["name"].to_numpy(dtype=object),
+        "extension": compact["extension"],
+        "file_type": compact["file_type"],
+        "size_bytes": compact["size_bytes"],
+    }
+    for column in TIMESTAMP_COLUMNS:
+        columns[column] = pd.to_datetime(compact[column].to_numpy(dtype=np.int64), unit="s")
+    return pd.DataFrame(columns, index=compact.index)[CATALOG_COLUMNS]
+
+
+def catalog_memory_report(file_catalog: pd.DataFrame) -> pd.DataFrame:
+    """
+    Because "how big is this catalog?" depends on each column's dtype,
+    this function measures every column (deep, so strings count) and
+    returns: column, dtype, bytes, bytes_per_row, share (of the total).
+    The index is included as its own row.
+    """
+    memory = file_catalog.memory_usage(deep=True)
+    row_count = max(len(file_catalog), 1)
+    report = pd.DataFrame({
+        "column": memory.index.astype(str),
+        "dtype": ["index" if column == "Index" else str(file_catalog[column].dtype)
+                  for column in memory.index],
+        "bytes": memory.to_numpy(dtype=np.int64),
+    })
+    report["bytes_per_row"] = report["bytes"] / row_count
+    report["share"] = report["bytes"] / max(int(report["bytes"].sum()), 1)
+    return report
@@ -0,0 +1,398 @@
+# src/content_types.py
+
+"""
+This module classifies files by their *contents* instead of their name.
+
+classify_file_type only looks at the extension, so a file without one (or
+with a wrong one) ends up as "other". Most file formats start with a fixed
+"magic number", so reading the first SNIFF_BYTES of a file is enough to
+tell a PDF from a PNG from a ZIP. detect_content_type does that matching,
+and classify_by_content runs it over a catalog (content_type_batches does
+the same for each batch of a scan, see `scan --sniff` and the app's
+"Recognize files by content" option):
+
+  1. Only the rows we want to refine are considered (by default the
+     "other" ones), and each is stat'ed once for its cache key.
+  2. Results are cached in `file_content_type_cache`, keyed by
+     (device, inode, size, mtime_ns) like src.hash_cache, so a second run
+     reads nothing for unchanged files.
+  3. The remaining files are read on a thread pool, one bounded `pread`
+     each (this is I/O, not CPU work, so threads are the right tool).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import BigInteger, inspect, text
+from sqlalchemy.engine import Engine
+
+from src.file_types import UNKNOWN_FILE_TYPE
+from src.hash_cache import _KEY_COLUMNS, HashCacheStats, HashKey, _stage_keys, hash_key
+
+CONTENT_TYPE_CACHE_TABLE = "file_content_type_cache"
+
+# How much of each file is read. Every signature below fits in it.
+SNIFF_BYTES = 512
+
+# Default threads for reading headers; generous because they mostly wait on disk.
+DEFAULT_SNIFF_WORKERS = 16
+
+# Stored for files no signature matched, so they are not read again either.
+NO_CONTENT_TYPE = ""
+
+# (offset, magic bytes, content type), checked in order; the first match wins.
+MAGIC_SIGNATURES: list[tuple[int, bytes, str]] = [
+    (0, b"%PDF-", "pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (0, b"II*\x00", "tiff"),
+    (0, b"MM\x00*", "tiff"),
+    (0, b"BM", "bmp"),
+    (0, b"SQLite format 3\x00", "sqlite"),
+    (0, b"PAR1", "parquet"),
+    (0, b"\x1f\x8b", "gzip"),
+    (0, b"BZh", "bzip2"),
+    (0, b"\xfd7zXZ\x00", "xz"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7z"),
+    (0, b"Rar!\x1a\x07", "rar"),
+    (257, b"ustar", "tar"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole"),  # legacy .doc/.xls/.ppt
+    (0, b"{\\rtf", "rtf"),
+    (0, b"ID3", "mp3"),
+    (0, b"fLaC", "flac"),
+    (0, b"OggS", "ogg"),
+    (0, b"\x1aE\xdf\xa3", "matroska"),
+    (0, b"\x00asm", "wasm"),
+    (0, b"<?xml", "xml"),
+]
+
+# MP4-family brands (bytes 8-12 after "ftyp") that are not plain video.
+_FTYP_BRANDS = {
+    b"M4A ": "m4a",
+    b"heic": "heic",
+    b"heix": "heic",
+    b"mif1": "heic",
+    b"qt  ": "quicktime",
+}
+
+# Broad file_type of every content type detect_content_type can return.
+CONTENT_TYPE_FILE_TYPES = {
+    "pdf": "document",
+    "rtf": "document",
+    "ole": "document",
+    "ooxml": "document",
+    "epub": "document",
+    "text": "document",
+    "png": "image",
+    "jpeg": "image",
+    "gif": "image",
+    "tiff": "image",
+    "bmp": "image",
+    "webp": "image",
+    "heic": "image",
+    "mp4": "video",
+    "quicktime": "video",
+    "matroska": "video",
+    "avi": "video",
+    "mp3": "audio",
+    "m4a": "audio",
+    "flac": "audio",
+    "ogg": "audio",
+    "wav": "audio",
+    "sqlite": "data",
+    "parquet": "data",
+    "xml": "data",
+    "wasm": "code",
+    "zip": "archive",
+    "gzip": "archive",
+    "bzip2": "archive",
+    "xz": "archive",
+    "7z": "archive",
+    "rar": "archive",
+    "tar": "archive",
+}
+
+
+def detect_content_type(header: bytes) -> Optional[str]:
+    """
+    Because most formats announce themselves in their first bytes, this
+    function matches `header` (the start of a file) against
+    MAGIC_SIGNATURES and a few container formats that need a closer look
+    (ZIP-based Office/EPUB files, RIFF, MP4's "ftyp" box), and finally
+    recognises plain UTF-8 text.
+
+    :return: A key of CONTENT_TYPE_FILE_TYPES, or None if nothing matched.
+    """
+    if header.startswith(b"PK\x03\x04"):
+        # A ZIP's first entry name starts at byte 30. EPUB requires an
+        # uncompressed "mimetype" entry first; Office Open XML files
+        # start with "[Content_Types].xml" (or their word/xl/ppt parts).
+        first_entry = header[30:100]
+        if first_entry.startswith(b"mimetypeapplication/epub+zip"):
+            return "epub"
+        if first_entry.startswith((b"[Content_Types].xml", b"word/", b"xl/", b"ppt/")):
+            return "ooxml"
+        return "zip"
+
+    if header.startswith(b"RIFF") and len(header) >= 12:
+        return {b"WEBP": "webp", b"WAVE": "wav", b"AVI ": "avi"}.get(header[8:12])
+
+    if header[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(header[8:12], "mp4")
+
+    for offset, magic, content_type in MAGIC_SIGNATURES:
+        if header.startswith(magic, offset):
+            return content_type
+
+    if header and b"\x00" not in header:
+        try:
+            header.decode("utf-8")
+        except UnicodeDecodeError as error:
+            # The read can cut a multi-byte character at the very end.
+            if error.start < len(header) - 3:
+                return None
+        return "text"
+    return None
+
+
+def sniff_file(path: str) -> Optional[tuple[str, HashKey]]:
+    """
+    Read at most SNIFF_BYTES from the start of `path` and detect its type.
+
+    :return: (content type or NO_CONTENT_TYPE, cache key of the version
+             we read), or None if the file can no longer be read.
+    """
+    try:
+        file_descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        file_stat = os.fstat(file_descriptor)
+        header = os.pread(file_descriptor, SNIFF_BYTES, 0)
+    except OSError:
+        return None
+    finally:
+        os.close(file_descriptor)
+    return detect_content_type(header) or NO_CONTENT_TYPE, hash_key(file_stat)
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def ensure_content_type_cache(engine: Engine) -> None:
+    """
+    Create the content-type cache table if it is missing, replacing one
+    whose key columns are not 64-bit (it is only a cache, so nothing is
+    lost but a re-read).
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if inspector.has_table(CONTENT_TYPE_CACHE_TABLE):
+            column_types = {
+                column["name"]: column["type"]
+                for column in inspector.get_columns(CONTENT_TYPE_CACHE_TABLE)
+            }
+            if not all(
+                isinstance(column_types.get(name), BigInteger) for name in _KEY_COLUMNS
+            ):
+                connection.execute(text(f"DROP TABLE {CONTENT_TYPE_CACHE_TABLE}"))
+
+        # BIGINT: an mtime in nanoseconds overflows PostgreSQL's INTEGER.
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {CONTENT_TYPE_CACHE_TABLE} ("
+            " device BIGINT NOT NULL,"
+            " inode BIGINT NOT NULL,"
+            " size_bytes BIGINT NOT NULL,"
+            " mtime_ns BIGINT NOT NULL,"
+            " content_type TEXT NOT NULL,"
+            " PRIMARY KEY (device, inode, size_bytes, mtime_ns))"
+        ))
+
+
+def lookup_content_types(
+    engine: Engine,
+    keys: Iterable[HashKey],
+    stats: Optional[HashCacheStats] = None,
+) -> dict[HashKey, str]:
+    """Return {key: content type} for the `keys` that are cached (one joined query)."""
+    keys = list(dict.fromkeys(keys))
+    found: dict[HashKey, str] = {}
+    if keys:
+        with engine.begin() as connection:
+            _stage_keys(connection, keys)
+            rows = connection.execute(text(
+                "SELECT cache.device, cache.inode, cache.size_bytes, cache.mtime_ns,"
+                " cache.content_type"
+                f" FROM hash_cache_lookup AS wanted JOIN {CONTENT_TYPE_CACHE_TABLE} AS cache"
+                " USING (device, inode, size_bytes, mtime_ns)"
+            ))
+            for device, inode, size_bytes, mtime_ns, content_type in rows:
+                found[(device, inode, size_bytes, mtime_ns)] = content_type
+            connection.execute(text("DELETE FROM hash_cache_lookup"))
+
+    if stats is not None:
+        stats.lookups += len(keys)
+        stats.hits += len(found)
+    return found
+
+
+def store_content_types(engine: Engine, content_types: dict[HashKey, str]) -> None:
+    """
+    Upsert {key: content type}, dropping entries for older versions of the
+    same (device, inode), which can never hit again.
+    """
+    if not content_types:
+        return
+    with engine.begin() as connection:
+        _stage_keys(connection, content_types)
+        connection.execute(text(
+            f"DELETE FROM {CONTENT_TYPE_CACHE_TABLE} WHERE (device, inode) IN"
+            " (SELECT device, inode FROM hash_cache_lookup)"
+            " AND (device, inode, size_bytes, mtime_ns) NOT IN"
+            " (SELECT device, inode, size_bytes, mtime_ns FROM hash_cache_lookup)"
+        ))
+        connection.execute(text("DELETE FROM hash_cache_lookup"))
+        connection.execute(
+            text(
+                f"INSERT INTO {CONTENT_TYPE_CACHE_TABLE}"
+                " (device, inode, size_bytes, mtime_ns, content_type)"
+                " VALUES (:device, :inode, :size_bytes, :mtime_ns, :content_type)"
+                " ON CONFLICT (device, inode, size_bytes, mtime_ns) DO UPDATE SET"
+                " content_type = excluded.content_type"
+            ),
+            [
+                {**dict(zip(_KEY_COLUMNS, key)), "content_type": content_type}
+                for key, content_type in content_types.items()
+            ],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Deep classification stage
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ContentClassificationReport:
+    """
+    Because the caller decides what to do with the refined types, this
+    record holds them next to the counters for the work done.
+
+      - file_types: the catalog's file_type column with every row we could
+        sniff replaced by its content-based type (same index, categorical)
+      - content_types: {path: content type} for the rows that were sniffed
+    """
+
+    file_types: pd.Series
+    content_types: dict[str, str] = field(default_factory=dict)
+    files_considered: int = 0
+    files_read: int = 0
+    bytes_read: int = 0
+    cache: HashCacheStats = field(default_factory=HashCacheStats)
+    elapsed_seconds: float = 0.0
+
+
+def classify_by_content(
+    file_catalog: pd.DataFrame,
+    engine: Optional[Engine] = None,
+    workers: int = DEFAULT_SNIFF_WORKERS,
+    only_file_types: Optional[Iterable[str]] = (UNKNOWN_FILE_TYPE,),
+) -> ContentClassificationReport:
+    """
+    Because the extension is only a hint, this function looks inside the
+    files of `file_catalog` (by default only the "other" ones) and returns
+    their content-based file types.
+
+    Example:
+        report = classify_by_content(catalog, engine)
+        catalog["file_type"] = report.file_types
+
+    :param file_catalog: DataFrame with at least `path` and `file_type`.
+    :param engine: SQLite engine for the content-type cache (optional).
+    :param workers: Threads reading file headers.
+    :param only_file_types: Only sniff rows with one of these file types
+                            (None = every row).
+    :return: A ContentClassificationReport.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    start_seconds = time.perf_counter()
+
+    file_types = file_catalog["file_type"].astype(object)
+    if only_file_types is None:
+        candidate_paths = file_catalog["path"].astype(str)
+    else:
+        candidate_paths = file_catalog.loc[
+            file_types.isin(list(only_file_types)), "path"
+        ].astype(str)
+    report = ContentClassificationReport(
+        file_types=file_catalog["file_type"], files_considered=len(candidate_paths)
+    )
+
+    signatures: dict[str, HashKey] = {}
+    for path in candidate_paths:
+        try:
+            signatures[path] = hash_key(os.stat(path))
+        except OSError:
+            continue
+
+    content_types: dict[str, str] = {}
+    if engine is not None:
+        ensure_content_type_cache(engine)
+        cached = lookup_content_types(engine, signatures.values(), report.cache)
+        content_types = {
+            path: cached[key] for path, key in signatures.items() if key in cached
+        }
+
+    to_read = [path for path in signatures if path not in content_types]
+    new_entries: dict[HashKey, str] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sniffer") as executor:
+        for path, result in zip(to_read, executor.map(sniff_file, to_read)):
+            if result is None:
+                continue
+            content_type, key_read = result
+            report.files_read += 1
+            report.bytes_read += min(key_read[2], SNIFF_BYTES)
+            new_entries[key_read] = content_type
+            if key_read == signatures[path]:
+                content_types[path] = content_type
+
+    if engine is not None:
+        store_content_types(engine, new_entries)
+
+    report.content_types = {
+        path: content_type for path, content_type in content_types.items() if content_type
+    }
+    sniffed_file_types = file_catalog["path"].astype(str).map(
+        {path: CONTENT_TYPE_FILE_TYPES[content_type]
+         for path, content_type in report.content_types.items()}
+    )
+    report.file_types = sniffed_file_types.fillna(file_types).astype("category").rename("file_type")
+    report.elapsed_seconds = time.perf_counter() - start_seconds
+    return report
+
+
+def content_type_batches(
+    batches: Iterable[pd.DataFrame],
+    engine: Optional[Engine] = None,
+    workers: int = DEFAULT_SNIFF_WORKERS,
+    reports: Optional[list[ContentClassificationReport]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Pass catalog batches through with `file_type` rewritten by
+    classify_by_content for every "other" file whose contents it
+    recognises. Each batch's report is appended to `reports` if given.
+    """
+    for batch in batches:
+        report = classify_by_content(batch, engine, workers=workers)
+        if reports is not None:
+            reports.append(report)
+        yield batch.assign(file_type=report.file_types) if report.content_types else batch
@@ -0,0 +1,317 @@
+# src/directory_tree.py
+
+"""
+This module answers "where did my disk go?" without touching every file
+row: it keeps a precomputed directory tree next to the catalog.
+
+Two tables, rebuilt after every scan:
+  - directory_tree: one row per folder under the scanned root with its
+    parent, its depth below the root, the bytes/files directly inside it
+    ("own") and in its whole subtree ("total"),
+  - directory_tree_file_types: the subtree totals split by file_type.
+
+Building the tree costs one pass over the catalog (a groupby on
+(directory, file_type), then each distinct folder adds its totals to its
+ancestors). After that, a folder's summary is one primary-key lookup, its
+children one indexed lookup on `parent`, and the way back to the root one
+lookup per level: O(depth) instead of a groupby over all N files.
+
+A full scan feeds the tree while its batches stream by
+(directory_tree_batches); after an incremental rescan, a watch batch or a
+move, rebuild_directory_tree recomputes it from `file_catalog`.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from shared.database.database import text_column_type
+from src.catalog_store import CATALOG_TABLE, subtree_bounds
+
+DIRECTORY_TREE_TABLE = "directory_tree"
+DIRECTORY_TREE_FILE_TYPES_TABLE = "directory_tree_file_types"
+
+DIRECTORY_TREE_COLUMNS = [
+    "directory", "parent", "depth", "own_bytes", "own_files", "total_bytes", "total_files",
+]
+DIRECTORY_TREE_FILE_TYPE_COLUMNS = ["directory", "file_type", "total_bytes", "total_files"]
+
+
+@dataclass
+class DirectoryTree:
+    """
+    Because the tree has a per-folder part and a per-(folder, file_type)
+    part, this record holds both as DataFrames (DIRECTORY_TREE_COLUMNS and
+    DIRECTORY_TREE_FILE_TYPE_COLUMNS) for the scanned `root`.
+    """
+
+    root: str
+    directories: pd.DataFrame
+    file_types: pd.DataFrame
+    build_seconds: float = 0.0
+
+
+class DirectoryTreeBuilder:
+    """
+    Because a full scan already streams every file past us in batches,
+    this builder sums each batch by (directory, file_type) as it goes, so
+    the tree costs no extra pass over the catalog.
+
+    Example:
+        builder = DirectoryTreeBuilder(root)
+        replace_catalog_from_batches(engine, directory_tree_batches(batches, builder))
+        store_directory_tree(engine, builder.finish())
+    """
+
+    def __init__(self, root: Path | str) -> None:
+        self.root = os.path.normpath(str(root))
+        self._own: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])
+        self._start_seconds = time.perf_counter()
+
+    def add(self, batch: pd.DataFrame) -> None:
+        if not len(batch):
+            return
+        groups = batch.groupby(["directory", "file_type"], observed=True, sort=False)
+        sums = groups["size_bytes"].agg(["sum", "size"])
+        self.add_totals(sums.index, sums["sum"].to_numpy(), sums["size"].to_numpy())
+
+    def add_totals(
+        self,
+        keys: Iterable[tuple[str, str]],
+        byte_counts: Iterable[int],
+        file_counts: Iterable[int],
+    ) -> None:
+        """Add (directory, file_type) -> (bytes, files) totals, e.g. from a SQL GROUP BY."""
+        for key, byte_count, file_count in zip(keys, byte_counts, file_counts):
+            own = self._own[(str(key[0]), str(key[1]))]
+            own[0] += int(byte_count)
+            own[1] += int(file_count)
+
+    def _ancestors(self, directory: str) -> Iterator[str]:
+        """Yield `directory` and its parents, up to and including the root."""
+        while True:
+            yield directory
+            if directory == self.root:
+                return
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return
+            directory = parent
+
+    def finish(self) -> DirectoryTree:
+        own_totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        subtree_totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        type_totals: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0, 0])
+
+        for (directory, file_type), (byte_count, file_count) in self._own.items():
+            own = own_totals[directory]
+            own[0] += byte_count
+            own[1] += file_count
+            for ancestor in self._ancestors(directory):
+                subtree = subtree_totals[ancestor]
+                subtree[0] += byte_count
+                subtree[1] += file_count
+                by_type = type_totals[(ancestor, file_type)]
+                by_type[0] += byte_count
+                by_type[1] += file_count
+
+        root_depth = self.root.count(os.sep)
+        directories = pd.DataFrame(
+            [
+                (
+                    directory,
+                    os.path.dirname(directory),
+                    directory.count(os.sep) - root_depth,
+                    own_totals[directory][0] if directory in own_totals else 0,
+                    own_totals[directory][1] if directory in own_totals else 0,
+                    byte_count,
+                    file_count,
+                )
+                for directory, (byte_count, file_count) in subtree_totals.items()
+            ],
+            columns=DIRECTORY_TREE_COLUMNS,
+        )
+        file_types = pd.DataFrame(
+            [
+                (directory, file_type, byte_count, file_count)
+                for (directory, file_type), (byte_count, file_count) in type_totals.items()
+            ],
+            columns=DIRECTORY_TREE_FILE_TYPE_COLUMNS,
+        )
+        return DirectoryTree(
+            root=self.root,
+            directories=directories,
+            file_types=file_types,
+            build_seconds=time.perf_counter() - self._start_seconds,
+        )
+
+
+def directory_tree_batches(
+    batches: Iterable[pd.DataFrame], builder: DirectoryTreeBuilder
+) -> Iterator[pd.DataFrame]:
+    """Pass catalog batches through unchanged while adding them to `builder`."""
+    for batch in batches:
+        builder.add(batch)
+        yield batch
+
+
+def build_directory_tree(file_catalog: pd.DataFrame, root: Path | str) -> DirectoryTree:
+    """Build the tree of `root` from a catalog DataFrame in memory."""
+    builder = DirectoryTreeBuilder(root)
+    builder.add(file_catalog)
+    return builder.finish()
+
+
+def ensure_directory_tree_schema(engine: Engine) -> None:
+    text_type = text_column_type(engine.dialect.name)
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {DIRECTORY_TREE_TABLE} ("
+            f" directory {text_type} PRIMARY KEY,"
+            f" parent {text_type} NOT NULL,"
+            " depth BIGINT NOT NULL,"
+            " own_bytes BIGINT NOT NULL,"
+            " own_files BIGINT NOT NULL,"
+            " total_bytes BIGINT NOT NULL,"
+            " total_files BIGINT NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{DIRECTORY_TREE_TABLE}_parent"
+            f" ON {DIRECTORY_TREE_TABLE} (parent, total_bytes)"
+        ))
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {DIRECTORY_TREE_FILE_TYPES_TABLE} ("
+            f" directory {text_type} NOT NULL,"
+            " file_type TEXT NOT NULL,"
+            " total_bytes BIGINT NOT NULL,"
+            " total_files BIGINT NOT NULL,"
+            " PRIMARY KEY (directory, file_type))"
+        ))
+
+
+def store_directory_tree(engine: Engine, tree: DirectoryTree) -> None:
+    """
+    Replace the stored tree under `tree.root` (the root and everything
+    below it) with `tree`, in one transaction. Trees of other roots in the
+    same database are left alone.
+    """
+    ensure_directory_tree_schema(engine)
+    low, high = subtree_bounds(tree.root)
+    subtree = {"root": tree.root, "low": low, "high": high}
+    with engine.begin() as connection:
+        for table in (DIRECTORY_TREE_TABLE, DIRECTORY_TREE_FILE_TYPES_TABLE):
+            connection.execute(
+                text(
+                    f"DELETE FROM {table}"
+                    " WHERE directory = :root OR (directory > :low AND directory < :high)"
+                ),
+                subtree,
+            )
+        if len(tree.directories):
+            connection.execute(
+                text(
+                    f"INSERT INTO {DIRECTORY_TREE_TABLE} ({', '.join(DIRECTORY_TREE_COLUMNS)})"
+                    f" VALUES ({', '.join(':' + column for column in DIRECTORY_TREE_COLUMNS)})"
+                ),
+                tree.directories.to_dict("records"),
+            )
+        if len(tree.file_types):
+            connection.execute(
+                text(
+                    f"INSERT INTO {DIRECTORY_TREE_FILE_TYPES_TABLE}"
+                    f" ({', '.join(DIRECTORY_TREE_FILE_TYPE_COLUMNS)})"
+                    " VALUES ("
+                    + ", ".join(":" + column for column in DIRECTORY_TREE_FILE_TYPE_COLUMNS)
+                    + ")"
+                ),
+                tree.file_types.to_dict("records"),
+            )
+
+
+def rebuild_directory_tree(engine: Engine, root: Path | str) -> DirectoryTree:
+    """
+    Because an incremental rescan (or the watcher, or a move) only edits
+    some catalog rows, this function recomputes the tree of `root` from
+    `file_catalog` with one GROUP BY and stores it.
+    """
+    builder = DirectoryTreeBuilder(root)
+    low, high = subtree_bounds(builder.root)
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                f"SELECT directory, file_type, SUM(size_bytes), COUNT(*) FROM {CATALOG_TABLE}"
+                " WHERE directory = :root OR (directory > :low AND directory < :high)"
+                " GROUP BY directory, file_type"
+            ),
+            {"root": builder.root, "low": low, "high": high},
+        ).fetchall()
+    builder.add_totals(
+        [(row[0], row[1]) for row in rows], [row[2] for row in rows], [row[3] for row in rows]
+    )
+    tree = builder.finish()
+    store_directory_tree(engine, tree)
+    return tree
+
+
+def directory_summary(engine: Engine, directory: Path | str) -> Optional[dict]:
+    """Return one folder's directory_tree row as a dict (None if it is not in the tree)."""
+    ensure_directory_tree_schema(engine)
+    with engine.connect() as connection:
+        row = connection.execute(
+            text(
+                f"SELECT {', '.join(DIRECTORY_TREE_COLUMNS)} FROM {DIRECTORY_TREE_TABLE}"
+                " WHERE directory = :directory"
+            ),
+            {"directory": os.path.normpath(str(directory))},
+        ).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def directory_children(
+    engine: Engine, directory: Path | str, limit: Optional[int] = None
+) -> pd.DataFrame:
+    """Return the subfolders of `directory`, biggest subtree first."""
+    ensure_directory_tree_schema(engine)
+    query = (
+        f"SELECT {', '.join(DIRECTORY_TREE_COLUMNS)} FROM {DIRECTORY_TREE_TABLE}"
+        " WHERE parent = :directory AND directory != parent"
+        " ORDER BY total_bytes DESC"
+    )
+    params = {"directory": os.path.normpath(str(directory))}
+    if limit is not None:
+        query += " LIMIT :limit"
+        params["limit"] = int(limit)
+    return pd.read_sql(text(query), con=engine, params=params)
+
+
+def directory_file_types(engine: Engine, directory: Path | str) -> pd.DataFrame:
+    """Return the subtree of `directory` split by file_type, biggest first."""
+    ensure_directory_tree_schema(engine)
+    return pd.read_sql(
+        text(
+            f"SELECT file_type, total_bytes, total_files FROM {DIRECTORY_TREE_FILE_TYPES_TABLE}"
+            " WHERE directory = :directory ORDER BY total_bytes DESC"
+        ),
+        con=engine,
+        params={"directory": os.path.normpath(str(directory))},
+    )
+
+
+def directory_breadcrumbs(directory: Path | str, root: Path | str) -> list[str]:
+    """Return the folders from `root` down to `directory` (both included)."""
+    root = os.path.normpath(str(root))
+    directory = os.path.normpath(str(directory))
+    breadcrumbs = [directory]
+    while directory != root and os.path.dirname(directory) != directory:
+        directory = os.path.dirname(directory)
+        breadcrumbs.append(directory)
+    return breadcrumbs[::-1]
@@ -0,0 +1,335 @@
+# src/duplicates.py
+
+"""
+This module finds files with identical contents in a file catalog.
+
+Hashing every file would read the whole disk, so we narrow the candidates
+down in stages and only read as much as we need to tell files apart:
+
+  1. Size: files with a size nobody else has cannot be duplicates.
+  2. Edges: hash the first and last 64 KiB of each remaining file. Most
+     same-size files already differ here (different headers, trailers).
+  3. Full: hash the complete contents of the files whose edges still
+     collide. Those with the same full hash are duplicates.
+
+Hashes are cached in SQLite through src.hash_cache, keyed by each file's
+(device, inode, size, mtime_ns), so a second run only reads files that
+are new or changed, even if they were moved in between.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import pandas as pd
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from src.hash_cache import (
+    HashCacheStats,
+    HashKey,
+    ensure_hash_cache,
+    hash_key,
+    lookup_hashes,
+    store_hashes,
+)
+
+DUPLICATE_FILES_TABLE = "duplicate_files"
+DUPLICATE_GROUPS_TABLE = "duplicate_groups"
+
+# How much of each end of a file the edge hash reads.
+EDGE_BYTES = 64 * 1024
+
+# Full hashes read files in pieces of this size (large reads, few syscalls).
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Below this many files to hash, a process pool costs more to start than
+# it saves, so we hash in this process.
+MIN_FILES_FOR_POOL = 64
+
+DUPLICATE_FILE_COLUMNS = ["group_id", "content_hash", "size_bytes", "path"]
+DUPLICATE_GROUP_COLUMNS = [
+    "group_id",
+    "content_hash",
+    "size_bytes",
+    "file_count",
+    "reclaimable_bytes",
+]
+
+
+def _new_hash():
+    """BLAKE2b is in the standard library and faster than SHA-256 and MD5."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_file_edges(path: str) -> Optional[tuple[str, HashKey]]:
+    """
+    Because two files of the same size usually differ near the start or
+    the end, this function hashes only the first and last EDGE_BYTES of
+    `path`. Files up to 2 * EDGE_BYTES are hashed completely, so for them
+    the edge hash *is* the full hash.
+
+    :return: (hex digest, cache key of the version we read), or None if
+             the file can no longer be read.
+    """
+    try:
+        with open(path, "rb", buffering=0) as file_handle:
+            file_stat = os.fstat(file_handle.fileno())
+            digest = _new_hash()
+            if file_stat.st_size <= 2 * EDGE_BYTES:
+                digest.update(file_handle.read())
+            else:
+                digest.update(file_handle.read(EDGE_BYTES))
+                file_handle.seek(-EDGE_BYTES, os.SEEK_END)
+                digest.update(file_handle.read(EDGE_BYTES))
+    except OSError:
+        return None
+    return digest.hexdigest(), hash_key(file_stat)
+
+
+def hash_file_contents(path: str) -> Optional[tuple[str, HashKey]]:
+    """
+    Because only a full hash can prove two files are identical, this
+    function hashes all of `path`, reading it in READ_CHUNK_BYTES pieces
+    into one reused buffer (no new bytes object per chunk).
+
+    :return: (hex digest, cache key of the version we read), or None if
+             the file can no longer be read.
+    """
+    buffer = bytearray(READ_CHUNK_BYTES)
+    view = memoryview(buffer)
+    try:
+        with open(path, "rb", buffering=0) as file_handle:
+            file_stat = os.fstat(file_handle.fileno())
+            digest = _new_hash()
+            while True:
+                bytes_read = file_handle.readinto(buffer)
+                if not bytes_read:
+                    break
+                digest.update(view[:bytes_read])
+    except OSError:
+        return None
+    return digest.hexdigest(), hash_key(file_stat)
+
+
+@dataclass
+class DuplicateReport:
+    """
+    Because we want both the answer and how much work it took, this record
+    holds the duplicate tables plus counters for each stage.
+
+      - files: one row per duplicate file (DUPLICATE_FILE_COLUMNS)
+      - groups: one row per set of identical files, biggest
+                reclaimable_bytes first (DUPLICATE_GROUP_COLUMNS)
+    """
+
+    files: pd.DataFrame
+    groups: pd.DataFrame
+    size_candidates: int = 0
+    edge_hashed: int = 0
+    full_hashed: int = 0
+    bytes_read: int = 0
+    cache: HashCacheStats = field(default_factory=HashCacheStats)
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def cache_hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        return self.cache.hit_ratio
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        return int(self.groups["reclaimable_bytes"].sum()) if len(self.groups) else 0
+
+
+# ---------------------------------------------------------------------------
+# Staged detection
+# ---------------------------------------------------------------------------
+
+def _colliding(keys: dict[str, object]) -> list[list[str]]:
+    """Group paths by their key and keep only the groups with 2+ paths."""
+    groups: dict[object, list[str]] = defaultdict(list)
+    for path, key in keys.items():
+        groups[key].append(path)
+    return [sorted(paths) for paths in groups.values() if len(paths) > 1]
+
+
+def _hash_many(
+    hash_function: Callable[[str], Optional[tuple[str, HashKey]]],
+    paths: list[str],
+    workers: Optional[int],
+) -> dict[str, Optional[tuple[str, HashKey]]]:
+    """
+    Because hashing is CPU work (and the GIL would serialize threads), this
+    helper runs `hash_function` over `paths` in a process pool. Small jobs
+    and workers=1 run in this process.
+    """
+    if workers == 1 or len(paths) < MIN_FILES_FOR_POOL:
+        return {path: hash_function(path) for path in paths}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Big chunks keep the inter-process traffic per file small.
+        chunk_size = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        return dict(zip(paths, executor.map(hash_function, paths, chunksize=chunk_size)))
+
+
+def find_duplicates(
+    file_catalog: pd.DataFrame,
+    engine: Optional[Engine] = None,
+    workers: Optional[int] = None,
+    minimum_size_bytes: int = 1,
+) -> DuplicateReport:
+    """
+    Because duplicates are the biggest cleanup win, this function finds
+    every set of files in `file_catalog` with identical contents, using
+    the size -> edge hash -> full hash stages described at the top.
+
+    Example:
+        report = find_duplicates(build_file_catalog("~/Downloads"), engine)
+        print(report.groups.head())
+        print(f"{report.reclaimable_bytes / 1e9:.1f} GB reclaimable")
+
+    :param file_catalog: DataFrame with at least `path` and `size_bytes`.
+    :param engine: SQLite engine for the hash cache. When given, the
+                   duplicate tables are also written to
+                   `duplicate_files` and `duplicate_groups`.
+    :param workers: Processes used for hashing (None = one per CPU).
+    :param minimum_size_bytes: Ignore smaller files. The default skips
+                               empty files, which are all "identical".
+    :return: A DuplicateReport.
+    """
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
+    report = DuplicateReport(
+        files=pd.DataFrame(columns=DUPLICATE_FILE_COLUMNS),
+        groups=pd.DataFrame(columns=DUPLICATE_GROUP_COLUMNS),
+    )
+
+    # -- Stage 1: group by size (no file is opened) ------------------------
+    stage_start = time.perf_counter()
+    sizes = file_catalog[["path", "size_bytes"]]
+    sizes = sizes[sizes["size_bytes"] >= minimum_size_bytes]
+    sizes = sizes[sizes["size_bytes"].duplicated(keep=False)]
+    candidate_paths = sizes["path"].astype(str).tolist()
+
+    # Current cache key of each candidate, which also guards against files
+    # that changed or vanished since the scan. key[2] is the size.
+    signatures: dict[str, HashKey] = {}
+    for path in candidate_paths:
+        try:
+            signatures[path] = hash_key(os.stat(path))
+        except OSError:
+            continue
+
+    size_groups = _colliding({path: signature[2] for path, signature in signatures.items()})
+    candidates = [path for group in size_groups for path in group]
+    report.size_candidates = len(candidates)
+    report.stage_seconds["size"] = time.perf_counter() - stage_start
+
+    edge_hashes: dict[str, str] = {}
+    full_hashes: dict[str, str] = {}
+    if engine is not None:
+        ensure_hash_cache(engine)
+        cached = lookup_hashes(engine, (signatures[path] for path in candidates), report.cache)
+        for path in candidates:
+            edge_hash, full_hash = cached.get(signatures[path], (None, None))
+            if edge_hash is not None:
+                edge_hashes[path] = edge_hash
+            if full_hash is not None:
+                full_hashes[path] = full_hash
+
+    def record(results: dict[str, Optional[tuple[str, HashKey]]], target: dict[str, str]) -> None:
+        for path, result in results.items():
+            if result is None:
+                continue
+            digest, key_read = result
+            if key_read != signatures[path]:
+                # Changed while we were hashing: leave it out of this run.
+                continue
+            target[path] = digest
+
+    # -- Stage 2: hash the first and last 64 KiB ---------------------------
+    stage_start = time.perf_counter()
+    to_edge_hash = [path for path in candidates if path not in edge_hashes]
+    report.edge_hashed = len(to_edge_hash)
+    record(_hash_many(hash_file_edges, to_edge_hash, workers), edge_hashes)
+    report.bytes_read += sum(min(signatures[path][2], 2 * EDGE_BYTES) for path in to_edge_hash)
+
+    # For small files the edge hash already covered the whole file.
+    for path, edge_hash in edge_hashes.items():
+        if signatures[path][2] <= 2 * EDGE_BYTES:
+            full_hashes[path] = edge_hash
+
+    edge_groups = _colliding({
+        path: (signatures[path][2], edge_hashes[path])
+        for path in candidates if path in edge_hashes
+    })
+    report.stage_seconds["edge_hash"] = time.perf_counter() - stage_start
+
+    # -- Stage 3: full hash of the files whose edges still collide ---------
+    stage_start = time.perf_counter()
+    edge_colliding = [path for group in edge_groups for path in group]
+    to_full_hash = [path for path in edge_colliding if path not in full_hashes]
+    report.full_hashed = len(to_full_hash)
+    record(_hash_many(hash_file_contents, to_full_hash, workers), full_hashes)
+    report.bytes_read += sum(signatures[path][2] for path in to_full_hash)
+
+    duplicate_groups = _colliding({
+        path: (signatures[path][2], full_hashes[path])
+        for path in edge_colliding if path in full_hashes
+    })
+    report.stage_seconds["full_hash"] = time.perf_counter() - stage_start
+
+    # -- Result tables, biggest savings first ------------------------------
+    # Hard links share one (device, inode) and one copy on disk, so only
+    # distinct inodes count towards the bytes a cleanup could free.
+    def reclaimable(paths: list[str]) -> int:
+        distinct_files = len({signatures[path][:2] for path in paths})
+        return signatures[paths[0]][2] * (distinct_files - 1)
+
+    duplicate_groups = [paths for paths in duplicate_groups if reclaimable(paths) > 0]
+    duplicate_groups.sort(key=lambda paths: (-reclaimable(paths), paths[0]))
+    file_rows = []
+    group_rows = []
+    for group_id, paths in enumerate(duplicate_groups, start=1):
+        size_bytes = signatures[paths[0]][2]
+        content_hash = full_hashes[paths[0]]
+        group_rows.append((group_id, content_hash, size_bytes, len(paths), reclaimable(paths)))
+        file_rows.extend((group_id, content_hash, size_bytes, path) for path in paths)
+
+    report.files = pd.DataFrame(file_rows, columns=DUPLICATE_FILE_COLUMNS)
+    report.groups = pd.DataFrame(group_rows, columns=DUPLICATE_GROUP_COLUMNS)
+
+    if engine is not None:
+        store_hashes(
+            engine,
+            {
+                signatures[path]: (edge_hashes[path], full_hashes.get(path))
+                for path in to_edge_hash + to_full_hash if path in edge_hashes
+            },
+            paths={signatures[path]: path for path in candidates},
+        )
+        with engine.begin() as connection:
+            report.files.to_sql(DUPLICATE_FILES_TABLE, con=connection,
+                                if_exists="replace", index=False)
+            report.groups.to_sql(DUPLICATE_GROUPS_TABLE, con=connection,
+                                 if_exists="replace", index=False)
+
+    return report
+
+
+def load_duplicate_groups(engine: Engine) -> pd.DataFrame:
+    """Return the `duplicate_groups` table written by the last find_duplicates run."""
+    if not inspect(engine).has_table(DUPLICATE_GROUPS_TABLE):
+        return pd.DataFrame(columns=DUPLICATE_GROUP_COLUMNS)
+    return pd.read_sql_table(DUPLICATE_GROUPS_TABLE, con=engine)
@@ -0,0 +1,81 @@
+# src/export.py
+
+"""
+This module writes file catalogs out to plain files. Every writer takes an
+iterable of catalog batches (as yielded by `iter_file_records`), so a whole
+tree can be exported while only one batch is held in memory at a time.
+"""
+
+from __future__ import annotations
+
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import IO, Iterable
+
+import pandas as pd
+
+from src.scanner import CatalogColumnBuffers
+
+
+def _open_text_destination(destination: Path | str | IO[str]):
+    """Open a path for writing, or pass an already-open text stream through."""
+    if hasattr(destination, "write"):
+        return nullcontext(destination)
+    return open(destination, "w", newline="", encoding="utf-8")
+
+
+def write_catalog_csv(
+    batches: Iterable[pd.DataFrame], destination: Path | str | IO[str] = sys.stdout
+) -> int:
+    """
+    Because a CSV export of a multi-million-row catalog should not need the
+    whole catalog in memory, this function appends one batch at a time to
+    `destination` (a path or an open text stream), writing the header only
+    once.
+
+    :param batches: Catalog DataFrames, e.g. from iter_file_records(...).
+    :param destination: Where to write the CSV (defaults to stdout).
+    :return: Number of rows written.
+    """
+    rows_written = 0
+    header_written = False
+
+    with _open_text_destination(destination) as output_stream:
+        for batch in batches:
+            batch.to_csv(output_stream, index=False, header=not header_written)
+            header_written = True
+            rows_written += len(batch)
+
+        if not header_written:
+            # An empty tree still gets a header so the file is a valid table.
+            CatalogColumnBuffers().to_frame().to_csv(output_stream, index=False)
+
+    return rows_written
+
+
+def write_catalog_ndjson(
+    batches: Iterable[pd.DataFrame], destination: Path | str | IO[str] = sys.stdout
+) -> int:
+    """
+    Because tools like jq read one JSON object per line, this function
+    writes each catalog row as one line of newline-delimited JSON, a batch
+    at a time. Timestamps are ISO 8601 strings (to the microsecond).
+
+    :param batches: Catalog DataFrames, e.g. from iter_catalog_query(...).
+    :param destination: Where to write the lines (defaults to stdout).
+    :return: Number of rows written.
+    """
+    rows_written = 0
+
+    with _open_text_destination(destination) as output_stream:
+        for batch in batches:
+            if not len(batch):
+                continue
+            # to_json(lines=True) ends the last line with a newline too.
+            output_stream.write(
+                batch.to_json(orient="records", lines=True, date_format="iso", date_unit="us")
+            )
+            rows_written += len(batch)
+
+    return rows_written
@@ -0,0 +1,134 @@
+# src/file_types.py
+
+"""
+This module decides the broad `file_type` of a file ("image", "code", ...)
+from its extension.
+
+The taxonomy lives in `file_types.json` next to this file, as
+{file_type: [extensions]}, and is loaded once into EXTENSION_FILE_TYPES,
+a flat {extension: file_type} dict. To add or override extensions
+without touching code, point the FILE_COMMANDER_FILE_TYPES environment
+variable at your own JSON file in the same format; its entries win over
+the defaults. Anything not in the mapping is "other".
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_FILE_TYPES_PATH = Path(__file__).with_name("file_types.json")
+
+# Environment variable naming an extra taxonomy file to merge over the defaults.
+FILE_TYPES_ENVIRONMENT_VARIABLE = "FILE_COMMANDER_FILE_TYPES"
+
+# What every extension outside the taxonomy is classified as.
+UNKNOWN_FILE_TYPE = "other"
+
+
+def normalize_extension(extension: str) -> str:
+    """Lower-case, strip spaces, and make sure a non-empty extension starts with a dot."""
+    normalized_extension = extension.lower().strip()
+    if normalized_extension and not normalized_extension.startswith("."):
+        normalized_extension = "." + normalized_extension
+    return normalized_extension
+
+
+def load_file_type_taxonomy(config_paths: Optional[Iterable[Path | str]] = None) -> dict[str, str]:
+    """
+    Because the classification should be data, not code, this function
+    reads one or more {file_type: [extensions]} JSON files and flattens
+    them into {extension: file_type}. Later files override earlier ones.
+
+    :param config_paths: Files to read (default: file_types.json, then the
+                         file named by FILE_COMMANDER_FILE_TYPES, if set).
+    :return: The {normalized extension: file_type} mapping.
+    """
+    if config_paths is None:
+        config_paths = [DEFAULT_FILE_TYPES_PATH]
+        user_config_path = os.environ.get(FILE_TYPES_ENVIRONMENT_VARIABLE)
+        if user_config_path:
+            config_paths.append(Path(user_config_path).expanduser())
+
+    extension_file_types: dict[str, str] = {}
+    for config_path in config_paths:
+        with open(config_path, encoding="utf-8") as config_file:
+            taxonomy = json.load(config_file)
+        for file_type, extensions in taxonomy.items():
+            for extension in extensions:
+                extension_file_types[normalize_extension(extension)] = file_type
+    return extension_file_types
+
+
+# The taxonomy every scan uses. It is a plain dict, so code can also add
+# entries at runtime: EXTENSION_FILE_TYPES[".ipynb"] = "code".
+EXTENSION_FILE_TYPES: dict[str, str] = load_file_type_taxonomy()
+
+
+def classify_file_type(extension: str) -> str:
+    """
+    Because we want to group files by their general purpose instead of just
+    their raw extension, this helper takes a file extension like ".jpg"
+    and returns a broader category such as "image" or "code".
+
+    Unknown extensions are "other", so we can analyze them later.
+    """
+    return EXTENSION_FILE_TYPES.get(normalize_extension(extension), UNKNOWN_FILE_TYPE)
+
+
+def _classify_extension_categorical(extension_column: pd.Categorical) -> pd.Categorical:
+    """
+    Classify each distinct extension (category) once and map every row
+    through the category codes. The result's categories are the sorted
+    file types present.
+    """
+    # Imported here so the per-file classify_file_type (and the walker
+    # that uses it) never pull in numpy and pandas.
+    import numpy as np
+    import pandas as pd
+
+    normalized_categories = (
+        pd.Series(extension_column.categories, dtype=object).str.strip().str.lower()
+    )
+    needs_dot = (normalized_categories != "") & ~normalized_categories.str.startswith(".")
+    normalized_categories = normalized_categories.where(~needs_dot, "." + normalized_categories)
+    category_file_types = normalized_categories.map(EXTENSION_FILE_TYPES).fillna(UNKNOWN_FILE_TYPE)
+
+    file_type_categories = sorted(set(category_file_types))
+    file_type_codes = pd.Index(file_type_categories).get_indexer(category_file_types)
+    return pd.Categorical.from_codes(
+        file_type_codes[extension_column.codes]
+        if len(extension_column) else np.zeros(0, dtype=np.int64),
+        categories=file_type_categories,
+    )
+
+
+def classify_file_types(extensions: pd.Series) -> pd.Series:
+    """
+    Because calling classify_file_type per row is a Python call per file,
+    this function classifies a whole `extension` column at once: one
+    lookup per *distinct* extension, then a categorical code mapping.
+
+    Example:
+        catalog["file_type"] = classify_file_types(catalog["extension"])
+
+    :param extensions: Extensions (plain strings or a categorical column).
+    :return: A categorical Series of file types with the same index.
+    """
+    import pandas as pd
+
+    if isinstance(extensions.dtype, pd.CategoricalDtype) and not extensions.hasnans:
+        extension_column = extensions.array
+    else:
+        # A missing extension is the same as no extension.
+        extension_column = pd.Categorical(extensions.astype(object).fillna(""))
+    return pd.Series(
+        _classify_extension_categorical(extension_column),
+        index=extensions.index,
+        name="file_type",
+    )
@@ -0,0 +1,355 @@
+# src/hash_cache.py
+
+"""
+This module keeps content hashes in `file_commander.db` so a cleanup pass
+never reads a file again unless it changed.
+
+An entry is keyed by the file's identity on disk rather than its path:
+
+    (device, inode, size_bytes, mtime_ns)
+
+Renaming or moving a file inside one filesystem keeps its device and
+inode (and mtime), so the entry stays valid wherever the file goes. Any
+write changes size or mtime_ns, so a changed file never matches its old
+entry. Moves across filesystems get a new inode; move_file hands the
+entry over to the new identity (see record_move).
+
+Every lookup hit refreshes `last_used_at`, so evict_hash_cache can drop the
+least recently used entries (and entries unused for N days).
+
+The statements are plain SQL that SQLite (3.24+) and PostgreSQL both
+accept, so the cache can live in whatever database get_engine picks.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+HASH_CACHE_TABLE = "file_hash_cache"
+
+# (device, inode, size_bytes, mtime_ns) of one file version.
+HashKey = tuple[int, int, int, int]
+
+# (edge_hash, full_hash); either may be None if not computed yet.
+HashEntry = tuple[Optional[str], Optional[str]]
+
+_HASH_CACHE_COLUMNS = {
+    "device", "inode", "size_bytes", "mtime_ns",
+    "edge_hash", "full_hash", "path", "last_used_at",
+}
+
+_KEY_COLUMNS = ["device", "inode", "size_bytes", "mtime_ns"]
+
+
+@dataclass
+class HashCacheStats:
+    """
+    Because the cache is only worth having if it hits, this record counts
+    lookups and hits across one or more lookup_hashes calls.
+    """
+
+    lookups: int = 0
+    hits: int = 0
+
+    @property
+    def misses(self) -> int:
+        return self.lookups - self.hits
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+def _signed_64(value: int) -> int:
+    """SQLite integers are signed 64-bit; fold larger device/inode numbers into range."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def hash_key(file_stat: os.stat_result) -> HashKey:
+    """Build the cache key for the file version described by `file_stat`."""
+    return (
+        _signed_64(file_stat.st_dev),
+        _signed_64(file_stat.st_ino),
+        file_stat.st_size,
+        file_stat.st_mtime_ns,
+    )
+
+
+def ensure_hash_cache(engine: Engine) -> None:
+    """
+    Because the first version of the cache was keyed by path, this function
+    creates the table, replacing a path-keyed one (it is only a cache, so
+    nothing is lost but a re-hash).
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if inspector.has_table(HASH_CACHE_TABLE):
+            existing_columns = {
+                column["name"] for column in inspector.get_columns(HASH_CACHE_TABLE)
+            }
+            if existing_columns != _HASH_CACHE_COLUMNS:
+                connection.execute(text(f"DROP TABLE {HASH_CACHE_TABLE}"))
+
+        # BIGINT and DOUBLE PRECISION: 64-bit on PostgreSQL too (an mtime in
+        # nanoseconds overflows INTEGER, and REAL there is only 32-bit).
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {HASH_CACHE_TABLE} ("
+            " device BIGINT NOT NULL,"
+            " inode BIGINT NOT NULL,"
+            " size_bytes BIGINT NOT NULL,"
+            " mtime_ns BIGINT NOT NULL,"
+            " edge_hash TEXT,"
+            " full_hash TEXT,"
+            " path TEXT,"
+            " last_used_at DOUBLE PRECISION NOT NULL,"
+            " PRIMARY KEY (device, inode, size_bytes, mtime_ns))"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS idx_{HASH_CACHE_TABLE}_last_used_at"
+            f" ON {HASH_CACHE_TABLE} (last_used_at)"
+        ))
+
+
+def _stage_keys(connection: Connection, keys: Iterable[HashKey]) -> None:
+    """Load `keys` into a temporary table, so lookups are one indexed join."""
+    connection.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS hash_cache_lookup ("
+        " device BIGINT, inode BIGINT, size_bytes BIGINT, mtime_ns BIGINT,"
+        " PRIMARY KEY (device, inode, size_bytes, mtime_ns))"
+    ))
+    connection.execute(text("DELETE FROM hash_cache_lookup"))
+    rows = [dict(zip(_KEY_COLUMNS, key)) for key in keys]
+    if rows:
+        connection.execute(
+            text(
+                "INSERT INTO hash_cache_lookup (device, inode, size_bytes, mtime_ns)"
+                " VALUES (:device, :inode, :size_bytes, :mtime_ns)"
+                " ON CONFLICT (device, inode, size_bytes, mtime_ns) DO NOTHING"
+            ),
+            rows,
+        )
+
+
+def lookup_hashes(
+    engine: Engine,
+    keys: Iterable[HashKey],
+    stats: Optional[HashCacheStats] = None,
+) -> dict[HashKey, HashEntry]:
+    """
+    Because a dedup run asks about thousands of files at once, this
+    function looks all of `keys` up in one query (a join against a
+    temporary table instead of one SELECT per file) and marks the hits as
+    just used.
+
+    :param stats: Optional HashCacheStats to add this lookup's counts to.
+    :return: {key: (edge_hash, full_hash)} for the keys that were cached.
+    """
+    keys = list(dict.fromkeys(keys))
+    found: dict[HashKey, HashEntry] = {}
+
+    if keys:
+        with engine.begin() as connection:
+            _stage_keys(connection, keys)
+            rows = connection.execute(text(
+                f"SELECT cache.device, cache.inode, cache.size_bytes, cache.mtime_ns,"
+                f" cache.edge_hash, cache.full_hash"
+                f" FROM hash_cache_lookup AS wanted JOIN {HASH_CACHE_TABLE} AS cache"
+                " USING (device, inode, size_bytes, mtime_ns)"
+            ))
+            for device, inode, size_bytes, mtime_ns, edge_hash, full_hash in rows:
+                found[(device, inode, size_bytes, mtime_ns)] = (edge_hash, full_hash)
+
+            connection.execute(
+                text(
+                    f"UPDATE {HASH_CACHE_TABLE} SET last_used_at = :now"
+                    " WHERE (device, inode, size_bytes, mtime_ns) IN"
+                    " (SELECT device, inode, size_bytes, mtime_ns FROM hash_cache_lookup)"
+                ),
+                {"now": time.time()},
+            )
+            connection.execute(text("DELETE FROM hash_cache_lookup"))
+
+    if stats is not None:
+        stats.lookups += len(keys)
+        stats.hits += len(found)
+    return found
+
+
+def store_hashes(
+    engine: Engine,
+    entries: dict[HashKey, HashEntry],
+    paths: Optional[dict[HashKey, str]] = None,
+) -> None:
+    """
+    Because a file version's hashes never change, this function upserts
+    `entries` ({key: (edge_hash, full_hash)}) and drops entries for older
+    versions of the same (device, inode), which can never hit again.
+
+    A None hash does not overwrite one that is already stored.
+
+    :param paths: Optional {key: path}, stored for people reading the table.
+    """
+    if not entries:
+        return
+
+    now = time.time()
+    paths = paths or {}
+    rows = [
+        {
+            "device": key[0], "inode": key[1], "size_bytes": key[2], "mtime_ns": key[3],
+            "edge_hash": edge_hash, "full_hash": full_hash,
+            "path": paths.get(key), "last_used_at": now,
+        }
+        for key, (edge_hash, full_hash) in entries.items()
+    ]
+
+    with engine.begin() as connection:
+        _stage_keys(connection, entries)
+        connection.execute(text(
+            f"DELETE FROM {HASH_CACHE_TABLE} WHERE (device, inode) IN"
+            " (SELECT device, inode FROM hash_cache_lookup)"
+            " AND (device, inode, size_bytes, mtime_ns) NOT IN"
+            " (SELECT device, inode, size_bytes, mtime_ns FROM hash_cache_lookup)"
+        ))
+        connection.execute(text("DELETE FROM hash_cache_lookup"))
+        connection.execute(
+            text(
+                f"INSERT INTO {HASH_CACHE_TABLE}"
+                " (device, inode, size_bytes, mtime_ns, edge_hash, full_hash, path, last_used_at)"
+                " VALUES (:device, :inode, :size_bytes, :mtime_ns,"
+                " :edge_hash, :full_hash, :path, :last_used_at)"
+                " ON CONFLICT (device, inode, size_bytes, mtime_ns) DO UPDATE SET"
+                " edge_hash = coalesce(excluded.edge_hash, edge_hash),"
+                " full_hash = coalesce(excluded.full_hash, full_hash),"
+                " path = coalesce(excluded.path, path),"
+                " last_used_at = excluded.last_used_at"
+            ),
+            rows,
+        )
+
+
+def record_move(
+    engine: Engine,
+    source_stat: os.stat_result,
+    destination_path: str,
+) -> None:
+    """
+    Because a move across filesystems copies the file (new device and
+    inode), this function hands the cached hashes of the file described by
+    `source_stat` over to the file now at `destination_path`. The old
+    entry is removed, so a future file that reuses the freed inode can
+    never pick up these hashes.
+
+    Same-filesystem moves keep the inode, so only the stored path changes.
+    The destination is only trusted if its size and mtime match the source
+    (shutil.move keeps mtime when it copies).
+    """
+    old_key = hash_key(source_stat)
+    try:
+        new_key = hash_key(os.stat(destination_path))
+    except OSError:
+        new_key = None
+
+    with engine.begin() as connection:
+        if not inspect(connection).has_table(HASH_CACHE_TABLE):
+            return
+
+        parameters = dict(zip(_KEY_COLUMNS, old_key))
+        entry = connection.execute(
+            text(
+                f"SELECT edge_hash, full_hash FROM {HASH_CACHE_TABLE}"
+                " WHERE device = :device AND inode = :inode"
+                " AND size_bytes = :size_bytes AND mtime_ns = :mtime_ns"
+            ),
+            parameters,
+        ).first()
+        if entry is None:
+            return
+
+        connection.execute(
+            text(
+                f"DELETE FROM {HASH_CACHE_TABLE}"
+                " WHERE device = :device AND inode = :inode"
+            ),
+            parameters,
+        )
+        if new_key is None or new_key[2:] != old_key[2:]:
+            # Destination is gone or differs: forget the hashes.
+            return
+
+        connection.execute(
+            text(
+                f"INSERT INTO {HASH_CACHE_TABLE}"
+                " (device, inode, size_bytes, mtime_ns, edge_hash, full_hash, path, last_used_at)"
+                " VALUES (:device, :inode, :size_bytes, :mtime_ns,"
+                " :edge_hash, :full_hash, :path, :last_used_at)"
+                " ON CONFLICT (device, inode, size_bytes, mtime_ns) DO UPDATE SET"
+                " edge_hash = excluded.edge_hash,"
+                " full_hash = excluded.full_hash,"
+                " path = excluded.path,"
+                " last_used_at = excluded.last_used_at"
+            ),
+            {
+                **dict(zip(_KEY_COLUMNS, new_key)),
+                "edge_hash": entry[0],
+                "full_hash": entry[1],
+                "path": str(destination_path),
+                "last_used_at": time.time(),
+            },
+        )
+
+
+def evict_hash_cache(
+    engine: Engine,
+    max_entries: Optional[int] = None,
+    max_age_days: Optional[float] = None,
+) -> int:
+    """
+    Because the cache would otherwise grow forever (every file version
+    ever hashed), this function removes:
+
+      - entries not used in the last `max_age_days` days, then
+      - the least recently used entries beyond `max_entries`.
+
+    :return: How many entries were removed.
+    """
+    removed = 0
+    with engine.begin() as connection:
+        if max_age_days is not None:
+            removed += connection.execute(
+                text(f"DELETE FROM {HASH_CACHE_TABLE} WHERE last_used_at < :cutoff"),
+                {"cutoff": time.time() - max_age_days * 24 * 60 * 60},
+            ).rowcount
+        if max_entries is not None:
+            entry_count = connection.execute(
+                text(f"SELECT COUNT(*) FROM {HASH_CACHE_TABLE}")
+            ).scalar_one()
+            excess = entry_count - int(max_entries)
+            if excess > 0:
+                # The oldest `excess` entries by last_used_at, found by key
+                # (the key columns break ties, so exactly `excess` go).
+                removed += connection.execute(
+                    text(
+                        f"DELETE FROM {HASH_CACHE_TABLE}"
+                        " WHERE (device, inode, size_bytes, mtime_ns) IN ("
+                        f" SELECT device, inode, size_bytes, mtime_ns FROM {HASH_CACHE_TABLE}"
+                        " ORDER BY last_used_at, device, inode, size_bytes, mtime_ns"
+                        " LIMIT :excess)"
+                    ),
+                    {"excess": excess},
+                ).rowcount
+    return removed
+
+
+def count_hash_cache_entries(engine: Engine) -> int:
+    """Return how many file versions the cache holds."""
+    with engine.connect() as connection:
+        return int(connection.execute(
+            text(f"SELECT COUNT(*) FROM {HASH_CACHE_TABLE}")
+        ).scalar_one())
@@ -0,0 +1,196 @@
+# src/move_jobs.py
+
+"""
+This module runs a batch of moves (src.operations.move_files) on a
+background thread, so the Streamlit script can start thousands of moves
+and keep rerunning while they happen.
+
+The UI never touches the thread directly. It keeps the MoveJob in
+st.session_state and calls `job.progress()` on each rerun, which returns
+a consistent MoveJobProgress snapshot (files and bytes done, throughput,
+errors so far).
+
+Moved files are written back to `file_catalog` in small batches while the
+job runs (src.catalog_store.apply_catalog_moves), so the table shows the
+new paths without a rescan.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+
+from src.catalog_store import apply_catalog_moves
+from src.operations import MoveReport, move_files
+
+# Moved paths are written to the catalog every this many files (and at the end).
+CATALOG_UPDATE_EVERY = 500
+
+# The UI only shows the first errors; the journal has all of them.
+MAX_REPORTED_ERRORS = 200
+
+
+@dataclass
+class MoveJobProgress:
+    """
+    Because the UI reads progress while the worker writes it, this is a
+    copy taken under the job's lock: safe to display as-is.
+    """
+
+    total_files: int
+    total_bytes: int
+    files_done: int = 0
+    files_failed: int = 0
+    bytes_done: int = 0
+    elapsed_seconds: float = 0.0
+    finished: bool = False
+    errors: list[tuple[str, str]] = field(default_factory=list)
+    fatal_error: Optional[str] = None
+
+    @property
+    def fraction_done(self) -> float:
+        if self.total_files == 0:
+            return 1.0
+        return (self.files_done + self.files_failed) / self.total_files
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_done / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.bytes_done / (1024 * 1024) / self.elapsed_seconds
+
+
+class MoveJob:
+    """
+    Because a big move can take minutes, this class runs move_files on a
+    daemon thread and collects its per-file progress callbacks.
+
+    Example:
+        job = MoveJob(plan, engine, journal_path="moves.journal", total_bytes=sizes)
+        job.start()
+        ...
+        snapshot = job.progress()
+    """
+
+    def __init__(
+        self,
+        plan: list[tuple[str, str]],
+        engine: Optional[Engine],
+        journal_path: Optional[str | Path] = None,
+        workers: int = 4,
+        total_bytes: int = 0,
+    ) -> None:
+        """
+        :param plan: (source file, destination directory) pairs.
+        :param engine: Catalog database to update as files move (and whose
+                       hash cache is kept in sync), or None.
+        :param journal_path: Where move_files writes its journal.
+        :param workers: Threads used for cross-device copies.
+        :param total_bytes: Size of all files in the plan, for the progress bar.
+        """
+        self.plan = plan
+        self.engine = engine
+        self.journal_path = journal_path
+        self.workers = workers
+        self.report: Optional[MoveReport] = None
+
+        self._lock = threading.Lock()
+        self._catalog_lock = threading.Lock()
+        self._pending_catalog_moves: list[tuple[str, str]] = []
+        self._progress = MoveJobProgress(total_files=len(plan), total_bytes=total_bytes)
+        self._start_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="move-job", daemon=True)
+
+    def start(self) -> None:
+        self._start_seconds = time.perf_counter()
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def wait(self, timeout: Optional[float] = None) -> MoveJobProgress:
+        """Block until the job finishes (or `timeout` seconds pass); return its progress."""
+        self._thread.join(timeout)
+        return self.progress()
+
+    def progress(self) -> MoveJobProgress:
+        """Return a snapshot of the progress so far."""
+        with self._lock:
+            snapshot = replace(self._progress, errors=list(self._progress.errors))
+        if not snapshot.finished:
+            snapshot.elapsed_seconds = time.perf_counter() - self._start_seconds
+        return snapshot
+
+    def _file_done(
+        self, source_path: str, destination_path: str, bytes_moved: int, error: Optional[str]
+    ) -> None:
+        """MoveProgressCallback for move_files; runs on the mover threads."""
+        flush = False
+        with self._lock:
+            if error is None:
+                self._progress.files_done += 1
+                self._progress.bytes_done += bytes_moved
+                self._pending_catalog_moves.append((source_path, destination_path))
+                flush = len(self._pending_catalog_moves) >= CATALOG_UPDATE_EVERY
+            else:
+                self._progress.files_failed += 1
+                if len(self._progress.errors) < MAX_REPORTED_ERRORS:
+                    self._progress.errors.append((source_path, error))
+        if flush:
+            try:
+                self._flush_catalog_moves()
+            except Exception:
+                # The moves stay queued; the final flush retries and reports.
+                pass
+
+    def _flush_catalog_moves(self) -> None:
+        # One writer at a time; SQLite would serialize us anyway.
+        with self._catalog_lock:
+            with self._lock:
+                moves = self._pending_catalog_moves
+                self._pending_catalog_moves = []
+            if not moves or self.engine is None:
+                return
+            try:
+                apply_catalog_moves(self.engine, moves)
+            except Exception:
+                with self._lock:
+                    self._pending_catalog_moves[:0] = moves
+                raise
+
+    def _run(self) -> None:
+        fatal_error = None
+        try:
+            self.report = move_files(
+                self.plan,
+                journal_path=self.journal_path,
+                workers=self.workers,
+                hash_cache=self.engine,
+                progress=self._file_done,
+            )
+        except Exception as exc:
+            # e.g. the journal could not be created (then nothing moved),
+            # or an error part-way through: files reported done may already
+            # have moved, and the catalog may already list some of them
+            # (it is updated every CATALOG_UPDATE_EVERY files). The flush
+            # below records the rest; the journal has every move.
+            fatal_error = str(exc)
+        finally:
+            try:
+                self._flush_catalog_moves()
+            except Exception as exc:
+                fatal_error = fatal_error or f"Could not update the catalog: {exc}"
+            with self._lock:
+                self._progress.fatal_error = fatal_error
+                self._progress.elapsed_seconds = time.perf_counter() - self._start_seconds
+                self._progress.finished = True
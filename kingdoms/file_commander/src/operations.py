@@ -4,10 +4,68 @@ management actions, this module defines small, focused functions for
 operations like moving files.
 """
 
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Iterable, Optional
+import errno
+import json
+import os
 import shutil
+import stat
+import threading
+import time
+import uuid
+
+from sqlalchemy.engine import Engine
+
+from src.hash_cache import record_move
+
+# (source file, destination directory) pairs: what move_files should do.
+MovePlan = Iterable[tuple[str | Path, str | Path]]
+
+# Called once per file as move_files finishes it, from whichever thread did
+# the work: (source path, destination path, bytes moved, error or None).
+MoveProgressCallback = Callable[[str, str, int, Optional[str]], None]
+
+# Buffer for cross-device copies when the kernel cannot copy for us.
+COPY_BUFFER_BYTES = 1024 * 1024
+
+# Journal records are fsync'ed every this many moves (and at the end).
+# Losing the last few "done" records in a crash is harmless: resume_moves
+# re-checks those entries against the filesystem.
+JOURNAL_SYNC_EVERY = 1_000
 
-def move_file(source:Path, destination_directory:Path) -> Path:
+# Suffix of the temporary file a cross-device copy writes before it is
+# linked into place, so a half-copied file never has the final name.
+PARTIAL_SUFFIX = ".file-commander-part"
+
+# errno values of os.link on filesystems without hard links (FAT, exFAT,
+# some network shares).
+LINK_UNSUPPORTED_ERRORS = {errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV}
+
+
+def _validate_destination_directory(destination_directory: Path) -> os.stat_result:
+    """Raise the same errors as move_file if `destination_directory` is unusable."""
+    try:
+        destination_stat = os.stat(destination_directory)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Destination directory does not exist {destination_directory}"
+        ) from None
+
+    if not stat.S_ISDIR(destination_stat.st_mode):
+        raise NotADirectoryError(f"Destination is not a directory: {destination_directory}")
+    return destination_stat
+
+
+def move_file(
+    source: Path,
+    destination_directory: Path,
+    hash_cache: Optional[Engine] = None,
+) -> Path:
     """ Because we want to move a single file into a new directory in a clear
     and testable way, this function:
 
@@ -15,27 +73,31 @@ def move_file(source:Path, destination_directory:Path) -> Path:
       2. Validates that the destination directory exists.
       3. Constructs the new path (destination_directory / source.name).
       4. Uses shutil.move() to perform the move.
-      5. Returns the new Path to the moved file.
+      5. If `hash_cache` is given, moves the file's cached content hashes
+         along with it (src.hash_cache.record_move), so a move across
+         filesystems neither loses them nor leaves them on a freed inode.
+      6. Returns the new Path to the moved file.
 
     :param source: Path to the existing file to move.
     :param destination_directory: Path to the directory where the file
                                   should be moved.
+    :param hash_cache: Engine of the database holding the hash cache.
     :return: Path to the file at its new location.
     """
     source_path = Path(source)
     destination_dir_path = Path(destination_directory)
 
-    if not source_path.exists():
-        raise FileNotFoundError(f"Source file does not exist: {source_path}")
+    # One stat per path answers "exists?" and "file or directory?" at once
+    # (and the source stat is the file's identity for the hash cache).
+    try:
+        source_stat = os.stat(source_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Source file does not exist: {source_path}") from None
 
-    if not source_path.is_file():
+    if not stat.S_ISREG(source_stat.st_mode):
         raise ValueError(f"Source path is not a file {source_path}")
 
-    if not destination_dir_path.exists():
-        raise FileNotFoundError(f"Destination directory does not exist {destination_dir_path}")
-
-    if not destination_dir_path.is_dir():
-        raise NotADirectoryError(f"Destination is not a directory: {destination_dir_path}")
+    _validate_destination_directory(destination_dir_path)
 
 
     destination_path = destination_dir_path / source_path.name
@@ -44,5 +106,550 @@ def move_file(source:Path, destination_directory:Path) -> Path:
     # but we wrap it back into a Path for consistency.
 
     result_path_str = shutil.move(str(source_path), str(destination_path))
+
+    if hash_cache is not None:
+        record_move(hash_cache, source_stat, result_path_str)
+
     return Path(result_path_str)
 
+
+# ---------------------------------------------------------------------------
+# Batch moves
+# ---------------------------------------------------------------------------
+
+@dataclass
+class MoveReport:
+    """
+    Because a batch can partly fail, this record says what happened to
+    every file: how many were renamed in place (same filesystem), how many
+    had to be copied across filesystems, and which failed and why.
+    """
+
+    journal_path: Optional[Path] = None
+    renamed: int = 0
+    copied: int = 0
+    bytes_copied: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def moved(self) -> int:
+        return self.renamed + self.copied
+
+
+class MoveJournal:
+    """
+    Because a 100k-file reorganization can be interrupted (crash, reboot,
+    Ctrl+C), every batch writes a JSON-lines journal:
+
+        {"op": "plan", "id": 0, "source": "...", "destination": "..."}
+        ...
+        {"op": "done", "id": 0, "method": "rename"}
+        {"op": "failed", "id": 7, "error": "..."}
+        {"op": "rolled_back", "id": 0}
+
+    All "plan" records are written (and fsync'ed) before the first file
+    moves, so the journal always knows every move that might have happened.
+
+    Move ids start at 0 in every batch, so one journal holds one batch:
+    with `new=True` (what move_files uses) an existing file is refused
+    with FileExistsError instead of being appended to. resume_moves and
+    rollback_moves reopen a batch's journal with `new=False`.
+    """
+
+    def __init__(self, journal_path: Path, new: bool = False) -> None:
+        self.journal_path = Path(journal_path)
+        self._lock = threading.Lock()
+        self._unsynced_records = 0
+        self._file = open(self.journal_path, "x" if new else "a", encoding="utf-8")
+        # A crash can leave the last line half-written; start on a fresh
+        # line so the next record is not glued onto it.
+        if self._file.tell() > 0:
+            with open(self.journal_path, "rb") as journal_file:
+                journal_file.seek(-1, os.SEEK_END)
+                if journal_file.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def write(self, record: dict, sync: bool = False) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._unsynced_records += 1
+            if sync or self._unsynced_records >= JOURNAL_SYNC_EVERY:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_records = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+
+def new_journal_path(directory: str | Path, prefix: str = ".file-commander-moves") -> Path:
+    """
+    Because every batch needs a journal of its own, this helper returns a
+    path in `directory` that no other batch uses: the time (readable, so
+    journals sort by age) plus a random suffix, since two batches can start
+    in the same second.
+    """
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    return Path(directory) / f"{prefix}-{timestamp}-{uuid.uuid4().hex[:12]}.journal"
+
+
+def read_move_journal(
+    journal_path: str | Path,
+) -> tuple[dict[int, tuple[str, str]], dict[int, str]]:
+    """
+    Read a journal back.
+
+    :return: ({id: (source, destination)}, {id: last state}), where the
+             state is "plan", "done", "failed" or "rolled_back".
+    """
+    moves: dict[int, tuple[str, str]] = {}
+    states: dict[int, str] = {}
+    with open(journal_path, encoding="utf-8") as journal_file:
+        for line in journal_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave the last line half-written.
+                continue
+            if record["op"] == "plan":
+                moves[record["id"]] = (record["source"], record["destination"])
+            states[record["id"]] = record["op"]
+    return moves, states
+
+
+def _copy_file_contents(source_fd: int, destination_fd: int, size_bytes: int) -> None:
+    """
+    Because copying through Python buffers is the slow way, this helper
+    lets the kernel copy: `os.copy_file_range` first (which can even share
+    blocks on btrfs/XFS or copy server-side on NFS), then `os.sendfile`,
+    and only then a plain read/write loop with a large buffer.
+    """
+    copied = 0
+    for kernel_copy in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+        if kernel_copy is None:
+            continue
+        # sendfile writes at the destination's file position.
+        os.lseek(destination_fd, copied, os.SEEK_SET)
+        try:
+            while copied < size_bytes:
+                if kernel_copy is os.sendfile:
+                    sent = os.sendfile(destination_fd, source_fd, copied,
+                                       min(size_bytes - copied, 1 << 30))
+                else:
+                    sent = os.copy_file_range(source_fd, destination_fd,
+                                              min(size_bytes - copied, 1 << 30),
+                                              copied, copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return
+        except OSError as error:
+            # Not supported for this pair of filesystems: try the next way.
+            if error.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                                   errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF):
+                raise
+
+    buffer = bytearray(COPY_BUFFER_BYTES)
+    view = memoryview(buffer)
+    os.lseek(source_fd, copied, os.SEEK_SET)
+    os.lseek(destination_fd, copied, os.SEEK_SET)
+    while True:
+        bytes_read = os.readv(source_fd, [buffer])
+        if not bytes_read:
+            break
+        written = 0
+        while written < bytes_read:
+            written += os.write(destination_fd, view[written:bytes_read])
+
+
+def partial_copy_path(destination_path: str, move_id: Optional[int] = None) -> str:
+    """
+    The temporary name copy_then_remove writes to. Each move of a batch
+    gets its own (by journal id), so two copies never share a partial file.
+    """
+    if move_id is None:
+        return destination_path + PARTIAL_SUFFIX
+    return f"{destination_path}.{move_id}{PARTIAL_SUFFIX}"
+
+
+def _place_without_overwriting(partial_path: str, destination_path: str) -> None:
+    """
+    Give the finished copy its final name, refusing to replace a file that
+    is already there (FileExistsError). os.link fails if the name exists,
+    unlike os.rename, which would silently overwrite it.
+    """
+    try:
+        os.link(partial_path, destination_path)
+    except FileExistsError:
+        raise FileExistsError(f"Destination already exists: {destination_path}") from None
+    except OSError as error:
+        if error.errno not in LINK_UNSUPPORTED_ERRORS:
+            raise
+        # No hard links here: check, then rename. move_files has already
+        # rejected plans where two moves share a destination, so only
+        # another program could take the name in between.
+        if os.path.lexists(destination_path):
+            raise FileExistsError(f"Destination already exists: {destination_path}") from None
+        os.rename(partial_path, destination_path)
+        return
+    os.unlink(partial_path)
+
+
+def copy_then_remove(
+    source_path: str,
+    destination_path: str,
+    partial_path: Optional[str] = None,
+) -> int:
+    """
+    Because a move across filesystems is really copy + delete, this
+    function does it crash-safely:
+
+      1. Copies into `partial_path` (default: partial_copy_path), with a
+         kernel copy and fsync.
+      2. Copies the timestamps and permissions (so the hash cache can
+         recognise the file by size and mtime).
+      3. Links the copy to its final name, which fails with
+         FileExistsError instead of overwriting an existing file.
+      4. Only then removes the source.
+
+    On any error the partial copy is removed and the source is kept.
+
+    :return: Bytes copied.
+    """
+    partial_path = partial_path or partial_copy_path(destination_path)
+    # "x": never truncate a partial file some other copy is writing.
+    with open(source_path, "rb") as source_file, open(partial_path, "xb") as destination_file:
+        try:
+            size_bytes = os.fstat(source_file.fileno()).st_size
+            _copy_file_contents(source_file.fileno(), destination_file.fileno(), size_bytes)
+            destination_file.flush()
+            os.fsync(destination_file.fileno())
+        except BaseException:
+            os.unlink(partial_path)
+            raise
+    try:
+        shutil.copystat(source_path, partial_path)
+        _place_without_overwriting(partial_path, destination_path)
+    except BaseException:
+        if os.path.lexists(partial_path):
+            os.unlink(partial_path)
+        raise
+    os.unlink(source_path)
+    return size_bytes
+
+
+def _check_unique_destinations(moves: dict[int, tuple[str, str]]) -> None:
+    """
+    Raise ValueError if two moves of a plan have the same destination
+    (e.g. a/IMG.jpg and b/IMG.jpg into one folder): both would pass the
+    "destination exists?" check before either is placed.
+    """
+    seen: dict[str, str] = {}
+    clashes = []
+    for source_path, destination_path in moves.values():
+        if destination_path in seen:
+            clashes.append(f"{seen[destination_path]} and {source_path} -> {destination_path}")
+        else:
+            seen[destination_path] = source_path
+    if clashes:
+        shown = "; ".join(clashes[:5])
+        if len(clashes) > 5:
+            shown += f"; ... ({len(clashes)} in total)"
+        raise ValueError(f"Several files would be moved to the same path: {shown}")
+
+
+def _run_moves(
+    moves: dict[int, tuple[str, str]],
+    journal: MoveJournal,
+    workers: int,
+    hash_cache: Optional[Engine],
+    report: MoveReport,
+    done_state: str = "done",
+    progress: Optional[MoveProgressCallback] = None,
+) -> None:
+    """
+    Because renames are cheap metadata updates but copies are long I/O,
+    this helper renames same-filesystem files right here (in plan order)
+    and hands cross-filesystem copies to a thread pool of `workers`.
+    """
+    # st_dev of each destination directory, looked up once per directory.
+    directory_devices: dict[str, int] = {}
+    copies: list[tuple[int, str, str, os.stat_result]] = []
+    report_lock = threading.Lock()
+
+    def fail(move_id: int, source_path: str, error: Exception) -> None:
+        journal.write({"op": "failed", "id": move_id, "error": str(error)})
+        with report_lock:
+            report.failed.append((source_path, str(error)))
+        if progress is not None:
+            progress(source_path, moves[move_id][1], 0, str(error))
+
+    for move_id, (source_path, destination_path) in moves.items():
+        try:
+            destination_directory = os.path.dirname(destination_path)
+            if destination_directory not in directory_devices:
+                directory_devices[destination_directory] = _validate_destination_directory(
+                    Path(destination_directory)
+                ).st_dev
+
+            source_stat = os.stat(source_path)
+            if not stat.S_ISREG(source_stat.st_mode):
+                raise ValueError(f"Source path is not a file {source_path}")
+            if os.path.lexists(destination_path):
+                # Never overwrite: an overwritten file could not be rolled back.
+                raise FileExistsError(f"Destination already exists: {destination_path}")
+
+            if source_stat.st_dev == directory_devices[destination_directory]:
+                try:
+                    os.rename(source_path, destination_path)
+                except OSError as error:
+                    if error.errno != errno.EXDEV:
+                        raise
+                    # Same st_dev but still two mounts (bind mounts, some
+                    # overlay filesystems): the kernel wants a copy.
+                    copies.append((move_id, source_path, destination_path, source_stat))
+                    continue
+                journal.write({"op": done_state, "id": move_id, "method": "rename"})
+                report.renamed += 1
+                if progress is not None:
+                    progress(source_path, destination_path, source_stat.st_size, None)
+            else:
+                copies.append((move_id, source_path, destination_path, source_stat))
+        except OSError as error:
+            fail(move_id, source_path, error)
+        except ValueError as error:
+            fail(move_id, source_path, error)
+
+    def copy_one(move_id: int, source_path: str, destination_path: str,
+                 source_stat: os.stat_result) -> None:
+        # Runs on the pool: an exception here would end executor.map and
+        # with it the rest of the batch, so every error is kept per file.
+        try:
+            bytes_copied = copy_then_remove(
+                source_path, destination_path, partial_copy_path(destination_path, move_id)
+            )
+        except Exception as error:
+            fail(move_id, source_path, error)
+            return
+        journal.write({"op": done_state, "id": move_id, "method": "copy"})
+        with report_lock:
+            report.copied += 1
+            report.bytes_copied += bytes_copied
+            if hash_cache is not None:
+                try:
+                    record_move(hash_cache, source_stat, destination_path)
+                except Exception as error:
+                    # The file did move (and is journaled as moved); only
+                    # its cached hashes are lost, which a rehash recovers.
+                    report.failed.append((
+                        source_path,
+                        f"moved to {destination_path}, but the hash cache was not updated: {error}",
+                    ))
+        if progress is not None:
+            progress(source_path, destination_path, bytes_copied, None)
+
+    if copies:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-mover") as executor:
+            # map() with the copies spread over the workers, rather than
+            # one Future per file.
+            list(executor.map(lambda copy: copy_one(*copy), copies))
+
+
+def _recover_interrupted_move(
+    move_id: int,
+    source_path: str,
+    destination_path: str,
+) -> Optional[str]:
+    """
+    Because a crash can stop a move at any step, this helper looks at the
+    filesystem and finishes what it can:
+
+      - a leftover partial copy is deleted (the move is redone),
+      - source gone + destination present means the move completed,
+      - both present with the same size and mtime_ns (copy_then_remove
+        copies the timestamps) means only the delete of the source was
+        missed, so the source is deleted.
+
+    :return: "done" if the move is already complete, else None (redo it).
+    """
+    partial_path = partial_copy_path(destination_path, move_id)
+    if os.path.lexists(partial_path):
+        os.unlink(partial_path)
+
+    source_exists = os.path.lexists(source_path)
+    destination_exists = os.path.lexists(destination_path)
+    if not source_exists and destination_exists:
+        return "done"
+    if source_exists and destination_exists:
+        source_stat = os.stat(source_path)
+        destination_stat = os.stat(destination_path)
+        if (source_stat.st_size, source_stat.st_mtime_ns) == (
+            destination_stat.st_size, destination_stat.st_mtime_ns
+        ) and not os.path.samefile(source_path, destination_path):
+            os.unlink(source_path)
+            return "done"
+    return None
+
+
+def move_files(
+    plan: MovePlan,
+    journal_path: Optional[str | Path] = None,
+    workers: int = 4,
+    hash_cache: Optional[Engine] = None,
+    progress: Optional[MoveProgressCallback] = None,
+) -> MoveReport:
+    """
+    Because moving thousands of files one move_file call at a time repeats
+    every check per file and silently copies when crossing filesystems,
+    this function moves a whole plan at once:
+
+      1. Validates each destination directory once (not once per file).
+      2. Uses os.rename when the source and destination directory are on
+         the same device (st_dev): a metadata update, no data copied.
+      3. Copies across devices on a thread pool of `workers`, with kernel
+         copies (copy_file_range / sendfile) and fsync before the link
+         into place; the source is deleted only after that.
+      4. Records every step in a journal, so an interrupted batch can be
+         finished with resume_moves or undone with rollback_moves.
+
+    Files whose destination already exists are not overwritten; they are
+    listed in `report.failed` along with any other per-file error. A plan
+    that moves two files to the same path is rejected (ValueError) before
+    anything moves.
+
+    Example:
+        report = move_files([(path, "/mnt/archive") for path in old_paths],
+                            journal_path="moves.journal")
+
+    :param plan: (source file, destination directory) pairs.
+    :param journal_path: Where to write the journal; must not exist yet
+                         (default: a new_journal_path next to the first
+                         destination directory).
+    :param workers: Threads used for cross-device copies.
+    :param hash_cache: Engine holding the hash cache, kept in sync.
+    :param progress: Optional MoveProgressCallback, called once per file
+                     (from the worker threads for copies).
+    :return: A MoveReport.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
+    start = time.perf_counter()
+    # Plain os.path string work: building 100k Path objects costs more
+    # than renaming the files.
+    moves = {
+        move_id: (
+            os.path.normpath(os.fspath(source)),
+            os.path.join(
+                os.path.normpath(os.fspath(destination_directory)),
+                os.path.basename(os.fspath(source)),
+            ),
+        )
+        for move_id, (source, destination_directory) in enumerate(plan)
+    }
+    if journal_path is None:
+        first_destination = next(iter(moves.values()), ("", "moves"))[1]
+        journal_path = new_journal_path(os.path.dirname(first_destination))
+
+    report = MoveReport(journal_path=Path(journal_path))
+    if not moves:
+        return report
+    _check_unique_destinations(moves)
+
+    journal = MoveJournal(Path(journal_path), new=True)
+    try:
+        for move_id, (source_path, destination_path) in moves.items():
+            journal.write({"op": "plan", "id": move_id,
+                           "source": source_path, "destination": destination_path})
+        journal.write({"op": "start", "id": -1}, sync=True)
+        _run_moves(moves, journal, workers, hash_cache, report, progress=progress)
+    finally:
+        journal.close()
+
+    report.elapsed_seconds = time.perf_counter() - start
+    return report
+
+
+def resume_moves(
+    journal_path: str | Path,
+    workers: int = 4,
+    hash_cache: Optional[Engine] = None,
+) -> MoveReport:
+    """
+    Because a batch may have been interrupted, this function finishes the
+    moves in `journal_path` that are not recorded as done, after checking
+    on disk how far each of them got (see _recover_interrupted_move).
+    """
+    start = time.perf_counter()
+    report = MoveReport(journal_path=Path(journal_path))
+    moves, states = read_move_journal(journal_path)
+
+    journal = MoveJournal(Path(journal_path))
+    try:
+        remaining: dict[int, tuple[str, str]] = {}
+        for move_id, (source_path, destination_path) in moves.items():
+            state = states.get(move_id)
+            if state in ("done", "rolled_back"):
+                continue
+            # Only a move with no recorded outcome can be half-done; a
+            # "failed" one (e.g. destination existed) is simply retried.
+            if state == "plan" and _recover_interrupted_move(
+                move_id, source_path, destination_path
+            ) == "done":
+                journal.write({"op": "done", "id": move_id, "method": "recovered"})
+                report.renamed += 1
+                continue
+            remaining[move_id] = (source_path, destination_path)
+        _check_unique_destinations(remaining)
+        _run_moves(remaining, journal, workers, hash_cache, report)
+    finally:
+        journal.close()
+
+    report.elapsed_seconds = time.perf_counter() - start
+    return report
+
+
+def rollback_moves(
+    journal_path: str | Path,
+    workers: int = 4,
+    hash_cache: Optional[Engine] = None,
+) -> MoveReport:
+    """
+    Because a reorganization can turn out to be a mistake, this function
+    moves every file recorded as moved in `journal_path` back to where it
+    came from (newest first), with the same rename/copy engine.
+    """
+    start = time.perf_counter()
+    report = MoveReport(journal_path=Path(journal_path))
+    moves, states = read_move_journal(journal_path)
+
+    journal = MoveJournal(Path(journal_path))
+    try:
+        reverse_moves: dict[int, tuple[str, str]] = {}
+        for move_id in sorted(moves, reverse=True):
+            source_path, destination_path = moves[move_id]
+            state = states.get(move_id)
+            # A move that was interrupted half-way is first brought to a
+            # known state, so it is either fully moved or not at all.
+            if state == "plan":
+                state = _recover_interrupted_move(move_id, source_path, destination_path)
+            elif state == "failed" and not os.path.lexists(source_path) \
+                    and os.path.lexists(destination_path):
+                # An earlier rollback of this file failed: try again.
+                state = "done"
+            if state != "done":
+                continue
+            reverse_moves[move_id] = (destination_path, source_path)
+        _check_unique_destinations(reverse_moves)
+        _run_moves(reverse_moves, journal, workers, hash_cache, report, done_state="rolled_back")
+    finally:
+        journal.close()
+
+    report.elapsed_seconds = time.perf_counter() - start
+    return report
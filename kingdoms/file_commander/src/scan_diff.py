@@ -0,0 +1,348 @@
+# src/scan_diff.py
+
+"""
+This module compares two versions of a catalog (two Parquet snapshots,
+see src.snapshots, usually found through `scan_history`) and tells what
+happened in between:
+
+  - added / removed: paths only in the new / old scan,
+  - modified: same path, but a different size, mtime or inode,
+  - moved: a removed path and an added path that are the same file,
+  - directory growth: bytes and files gained or lost per folder.
+
+Both scans can hold millions of rows, so nothing here loops over files
+in Python. Paths are joined with one hash lookup (pandas Index
+get_indexer), and moves are found by joining the leftover removed and
+added rows on keys that identify a file, in this order:
+
+  1. (inode, size, mtime): a rename or move inside one filesystem keeps
+     the inode and mtime,
+  2. (name, size, mtime): a move across filesystems gets a new inode,
+     but shutil.move keeps the name and mtime,
+  3. (full content hash, size), when an engine with a hash cache is
+     given and both paths were hashed before (src.hash_cache).
+
+Each row is used by at most one move, so hard links or many identical
+copies never turn one removal into several moves.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from src.catalog_store import list_scans
+from src.hash_cache import HASH_CACHE_TABLE
+from src.scanner import INODE_COLUMN
+from src.snapshots import read_snapshot_info
+
+# Columns a diff reads from each snapshot. modified_at is read as integer
+# nanoseconds, which compare (and hash) faster than timestamps.
+DIFF_COLUMNS = ["path", "directory", "name", "size_bytes", "modified_at", INODE_COLUMN]
+
+# Inode value for "not known" (snapshots written without inodes). No real
+# file has inode 0.
+UNKNOWN_INODE = 0
+
+
+@dataclass
+class ScanDiff:
+    """
+    Because a diff is several lists of very different shapes, this record
+    holds one DataFrame per kind of change plus the per-folder growth.
+
+      - added / removed: path, directory, size_bytes, modified_at
+      - modified: path, size_bytes_old, size_bytes_new, size_delta,
+        modified_at_old, modified_at_new
+      - moved: old_path, new_path, size_bytes, detected_by
+      - directory_growth: directory, bytes_old, bytes_new, bytes_delta,
+        files_old, files_new, files_delta (only folders that changed,
+        biggest absolute byte change first)
+    """
+
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    modified: pd.DataFrame
+    moved: pd.DataFrame
+    directory_growth: pd.DataFrame
+    old_scan_id: str = ""
+    new_scan_id: str = ""
+    elapsed_seconds: float = 0.0
+
+    @property
+    def counts(self) -> dict[str, int]:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "modified": len(self.modified),
+            "moved": len(self.moved),
+        }
+
+    @property
+    def bytes_delta(self) -> int:
+        if not len(self.directory_growth):
+            return 0
+        return int(self.directory_growth["bytes_delta"].sum())
+
+
+def load_diff_columns(path: Path | str) -> pd.DataFrame:
+    """
+    Read the DIFF_COLUMNS of one snapshot (memory-mapped). modified_at
+    comes back as int64 nanoseconds and a missing inode as UNKNOWN_INODE,
+    so older snapshots without inodes can still be compared.
+    """
+    available_columns = set(pq.read_schema(path, memory_map=True).names)
+    table = pq.read_table(
+        path,
+        columns=[column for column in DIFF_COLUMNS if column in available_columns],
+        memory_map=True,
+    )
+    columns = {
+        "path": table.column("path").to_numpy(zero_copy_only=False),
+        "directory": table.column("directory").to_numpy(zero_copy_only=False),
+        "name": table.column("name").to_numpy(zero_copy_only=False),
+        "size_bytes": table.column("size_bytes").to_numpy(zero_copy_only=False).astype(np.int64),
+        "modified_at": pc.cast(table.column("modified_at"), pa.int64())
+                         .to_numpy(zero_copy_only=False).astype(np.int64),
+    }
+    if INODE_COLUMN in available_columns:
+        columns[INODE_COLUMN] = (
+            pc.fill_null(table.column(INODE_COLUMN), UNKNOWN_INODE)
+            .to_numpy(zero_copy_only=False).astype(np.uint64)
+        )
+    else:
+        columns[INODE_COLUMN] = np.full(table.num_rows, UNKNOWN_INODE, dtype=np.uint64)
+    return pd.DataFrame(columns)
+
+
+def _match_moves(
+    removed: pd.DataFrame, added: pd.DataFrame, keys: list[str]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Join removed and added rows on `keys` (a hash join). Duplicate keys
+    on either side keep only their first row, so every row is matched at
+    most once. Returns the (removed, added) index labels of the matches.
+    """
+    if removed.empty or added.empty:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    left = removed[keys].drop_duplicates(keep="first").reset_index(names="removed_row")
+    right = added[keys].drop_duplicates(keep="first").reset_index(names="added_row")
+    pairs = left.merge(right, on=keys, how="inner", validate="one_to_one")
+    return pairs["removed_row"].to_numpy(), pairs["added_row"].to_numpy()
+
+
+def _cached_full_hashes(engine: Engine) -> pd.Series:
+    """Return {path: full_hash} for every fully hashed entry in the hash cache."""
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(HASH_CACHE_TABLE):
+            return pd.Series(dtype=object)
+        cached = pd.read_sql(
+            text(
+                f"SELECT path, full_hash FROM {HASH_CACHE_TABLE}"
+                " WHERE full_hash IS NOT NULL AND path IS NOT NULL"
+            ),
+            con=connection,
+        )
+    return cached.drop_duplicates("path", keep="last").set_index("path")["full_hash"]
+
+
+def _directory_totals(catalog: pd.DataFrame) -> pd.DataFrame:
+    return catalog.groupby("directory", sort=False).agg(
+        bytes=("size_bytes", "sum"), files=("size_bytes", "size")
+    )
+
+
+def directory_growth(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Because "what grew?" is usually asked per folder, this function sums
+    size and file count per directory in both scans and returns the folders
+    whose totals changed, biggest absolute byte change first.
+    """
+    totals = _directory_totals(old).join(
+        _directory_totals(new), how="outer", lsuffix="_old", rsuffix="_new"
+    ).fillna(0).astype(np.int64)
+    totals["bytes_delta"] = totals["bytes_new"] - totals["bytes_old"]
+    totals["files_delta"] = totals["files_new"] - totals["files_old"]
+    totals = totals[(totals["bytes_delta"] != 0) | (totals["files_delta"] != 0)]
+    totals = totals.iloc[np.argsort(-totals["bytes_delta"].abs().to_numpy(), kind="stable")]
+    return totals.rename_axis("directory").reset_index()[[
+        "directory", "bytes_old", "bytes_new", "bytes_delta",
+        "files_old", "files_new", "files_delta",
+    ]]
+
+
+def diff_catalogs(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    engine: Optional[Engine] = None,
+) -> ScanDiff:
+    """
+    Compare two catalogs in the load_diff_columns shape.
+
+    :param old: The earlier scan.
+    :param new: The later scan.
+    :param engine: Catalog database; if given, its hash cache is used to
+                   match moves that inode and name cannot explain.
+    :return: A ScanDiff (scan ids left empty; see diff_snapshots).
+    """
+    start_seconds = time.perf_counter()
+
+    # 1. Join on path: position of each new path in the old scan, or -1.
+    old_positions = pd.Index(old["path"]).get_indexer(new["path"])
+    new_matched = np.flatnonzero(old_positions >= 0)
+    old_matched = old_positions[new_matched]
+
+    old_size = old["size_bytes"].to_numpy()
+    new_size = new["size_bytes"].to_numpy()
+    old_mtime = old["modified_at"].to_numpy()
+    new_mtime = new["modified_at"].to_numpy()
+    old_inode = old[INODE_COLUMN].to_numpy()
+    new_inode = new[INODE_COLUMN].to_numpy()
+
+    replaced = (
+        (old_inode[old_matched] != new_inode[new_matched])
+        & (old_inode[old_matched] != UNKNOWN_INODE)
+        & (new_inode[new_matched] != UNKNOWN_INODE)
+    )
+    changed = (
+        (old_size[old_matched] != new_size[new_matched])
+        | (old_mtime[old_matched] != new_mtime[new_matched])
+        | replaced
+    )
+    modified = pd.DataFrame({
+        "path": new["path"].to_numpy()[new_matched[changed]],
+        "size_bytes_old": old_size[old_matched[changed]],
+        "size_bytes_new": new_size[new_matched[changed]],
+        "modified_at_old": pd.to_datetime(old_mtime[old_matched[changed]], unit="ns"),
+        "modified_at_new": pd.to_datetime(new_mtime[new_matched[changed]], unit="ns"),
+    })
+    modified.insert(3, "size_delta", modified["size_bytes_new"] - modified["size_bytes_old"])
+
+    # 2. Everything unmatched is a removal or an addition, unless it moved.
+    old_unmatched = np.ones(len(old), dtype=bool)
+    old_unmatched[old_matched] = False
+    removed = old.iloc[np.flatnonzero(old_unmatched)].reset_index(drop=True)
+    added = new.iloc[np.flatnonzero(old_positions < 0)].reset_index(drop=True)
+
+    moved_parts = []
+    still_removed = np.ones(len(removed), dtype=bool)
+    still_added = np.ones(len(added), dtype=bool)
+
+    def record_moves(detected_by: str, removed_rows: np.ndarray, added_rows: np.ndarray) -> None:
+        still_removed[removed_rows] = False
+        still_added[added_rows] = False
+        moved_parts.append(pd.DataFrame({
+            "old_path": removed["path"].to_numpy()[removed_rows],
+            "new_path": added["path"].to_numpy()[added_rows],
+            "size_bytes": added["size_bytes"].to_numpy()[added_rows],
+            "detected_by": detected_by,
+        }))
+
+    record_moves("inode", *_match_moves(
+        removed[removed[INODE_COLUMN] != UNKNOWN_INODE],
+        added[added[INODE_COLUMN] != UNKNOWN_INODE],
+        [INODE_COLUMN, "size_bytes", "modified_at"],
+    ))
+    record_moves("name", *_match_moves(
+        removed[still_removed], added[still_added], ["name", "size_bytes", "modified_at"]
+    ))
+
+    if engine is not None and still_removed.any() and still_added.any():
+        full_hashes = _cached_full_hashes(engine)
+        if len(full_hashes):
+            removed_candidates = removed[still_removed].assign(
+                full_hash=removed.loc[still_removed, "path"].map(full_hashes)
+            ).dropna(subset=["full_hash"])
+            added_candidates = added[still_added].assign(
+                full_hash=added.loc[still_added, "path"].map(full_hashes)
+            ).dropna(subset=["full_hash"])
+            record_moves("hash", *_match_moves(
+                removed_candidates, added_candidates, ["full_hash", "size_bytes"]
+            ))
+
+    moved = pd.concat(moved_parts, ignore_index=True)
+    moved["size_bytes"] = moved["size_bytes"].astype(np.int64)
+
+    def change_frame(rows: pd.DataFrame) -> pd.DataFrame:
+        return pd.DataFrame({
+            "path": rows["path"].to_numpy(),
+            "directory": rows["directory"].to_numpy(),
+            "size_bytes": rows["size_bytes"].to_numpy(),
+            "modified_at": pd.to_datetime(rows["modified_at"].to_numpy(), unit="ns"),
+        })
+
+    return ScanDiff(
+        added=change_frame(added[still_added]),
+        removed=change_frame(removed[still_removed]),
+        modified=modified,
+        moved=moved,
+        directory_growth=directory_growth(old, new),
+        elapsed_seconds=time.perf_counter() - start_seconds,
+    )
+
+
+def diff_snapshots(
+    old_path: Path | str,
+    new_path: Path | str,
+    engine: Optional[Engine] = None,
+) -> ScanDiff:
+    """
+    Compare two snapshot files (old first).
+
+    Example:
+        scan_diff = diff_snapshots(older.path, newer.path)
+        print(scan_diff.counts, scan_diff.directory_growth.head())
+    """
+    scan_diff = diff_catalogs(load_diff_columns(old_path), load_diff_columns(new_path), engine)
+    scan_diff.old_scan_id = read_snapshot_info(old_path).scan_id
+    scan_diff.new_scan_id = read_snapshot_info(new_path).scan_id
+    return scan_diff
+
+
+def diff_scans(
+    engine: Engine,
+    root: Path | str,
+    old_scan_id: Optional[str] = None,
+    new_scan_id: Optional[str] = None,
+) -> ScanDiff:
+    """
+    Because scans are versioned by scan_id in `scan_history`, this
+    function compares two of them for `root`. Without ids it compares the
+    two most recent scans; with only `old_scan_id` it compares that scan
+    to the latest one.
+
+    :raises ValueError: If a scan id is unknown, fewer than two scans of
+                        `root` were recorded, or only `old_scan_id` is
+                        given and it is already the latest scan.
+    """
+    scans = list_scans(engine, root)
+    snapshot_paths = dict(zip(scans["scan_id"], scans["snapshot_path"]))
+    if new_scan_id is None:
+        if scans.empty:
+            raise ValueError(f"No scans of {root} recorded to compare.")
+        new_scan_id = scans["scan_id"].iloc[0]
+        if old_scan_id == new_scan_id:
+            raise ValueError(
+                f"Scan {old_scan_id} is already the latest scan of {root}; "
+                "there is no newer scan to compare it to."
+            )
+    if old_scan_id is None:
+        older = [scan_id for scan_id in scans["scan_id"] if scan_id < new_scan_id]
+        if not older:
+            raise ValueError(f"No scan of {root} recorded before {new_scan_id}.")
+        old_scan_id = older[0]
+
+    for scan_id in (old_scan_id, new_scan_id):
+        if scan_id not in snapshot_paths:
+            raise ValueError(f"Unknown scan id for {root}: {scan_id}")
+    return diff_snapshots(snapshot_paths[old_scan_id], snapshot_paths[new_scan_id], engine)
@@ -0,0 +1,267 @@
+# src/scan_metrics.py
+
+"""
+This module measures where a scan spends its time, so a slow scan can be
+explained (and a regression alerted on) instead of just waited for.
+
+Pass a ScanMetrics to build_file_catalog / iter_file_records /
+replace_catalog_from_batches and it collects:
+
+  - per-stage seconds: listing directories, stat calls, file-type
+    classification, DataFrame construction, and the SQLite write,
+  - counts of directories, files, bytes and errors (unreadable folders,
+    files that vanished before their stat),
+  - a histogram of stat latencies (fixed buckets, Prometheus style),
+  - the slowest directories (listing + stat time).
+
+Listing and stat run on worker threads when workers > 1, so their stage
+seconds are summed over threads and can exceed `wall_seconds`.
+
+Metrics export as Prometheus text format (to_prometheus, e.g. for the
+node_exporter textfile collector) or as one JSON object per scan
+(to_json_line / append_json_lines).
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Stage names, in pipeline order.
+SCAN_STAGES = ["list", "stat", "classify", "frame", "write"]
+
+# Upper bounds (seconds) of the stat latency histogram buckets; the last
+# bucket (+Inf) catches everything slower.
+STAT_LATENCY_BUCKETS = (
+    0.000_01, 0.000_05, 0.000_1, 0.000_5, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, math.inf,
+)
+
+# How many of the slowest directories are kept.
+SLOWEST_DIRECTORY_COUNT = 20
+
+PROMETHEUS_PREFIX = "file_commander_scan"
+
+
+@dataclass(order=True)
+class DirectoryTiming:
+    """
+    Because "which folder was slow?" is the first question about a slow
+    scan, this record keeps one directory's listing + stat time.
+    """
+
+    seconds: float
+    directory: str = ""
+    files: int = 0
+
+
+class ScanMetrics:
+    """
+    Because the walk runs on several threads, this collector keeps all
+    counters under one lock. Every record_* call is cheap (a few adds and
+    at most one heap push), so it can stay on for production scans.
+
+    Example:
+        metrics = ScanMetrics(root)
+        catalog = build_file_catalog(root, metrics=metrics)
+        print(metrics.summary())
+    """
+
+    def __init__(self, root: Path | str = "") -> None:
+        self.root = str(root)
+        self.started_at = time.time()
+        self.stage_seconds = {stage: 0.0 for stage in SCAN_STAGES}
+        self.directories = 0
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.stat_latency_counts = [0] * len(STAT_LATENCY_BUCKETS)
+        self.stat_latency_sum = 0.0
+        self.wall_seconds = 0.0
+        self.upstream_seconds = 0.0
+        self._slowest: list[DirectoryTiming] = []
+        self._lock = threading.Lock()
+        self._start_seconds = time.perf_counter()
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the body of a `with` block as `stage`."""
+        start_seconds = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(stage, time.perf_counter() - start_seconds)
+
+    def record_directory(
+        self,
+        directory: str,
+        list_seconds: float,
+        stat_latencies: list[float],
+        file_count: int,
+        byte_count: int,
+        error_count: int = 0,
+    ) -> None:
+        """Add one listed directory: its timings, its stat latencies and its counts."""
+        bucket_indexes = [
+            bisect.bisect_left(STAT_LATENCY_BUCKETS, latency) for latency in stat_latencies
+        ]
+        stat_seconds = 0.0
+        with self._lock:
+            for latency, bucket_index in zip(stat_latencies, bucket_indexes):
+                self.stat_latency_counts[bucket_index] += 1
+                stat_seconds += latency
+            self.stat_latency_sum += stat_seconds
+            self.stage_seconds["list"] += list_seconds
+            self.stage_seconds["stat"] += stat_seconds
+            self.directories += 1
+            self.files += file_count
+            self.bytes += byte_count
+            self.errors += error_count
+
+            timing = DirectoryTiming(list_seconds + stat_seconds, directory, file_count)
+            if len(self._slowest) < SLOWEST_DIRECTORY_COUNT:
+                heapq.heappush(self._slowest, timing)
+            elif timing > self._slowest[0]:
+                heapq.heapreplace(self._slowest, timing)
+
+    def time_upstream(self, batches: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Pass batches through, counting the time spent *producing* them
+        (scanning) in `upstream_seconds`, so a writer that consumes a lazy
+        scan can report its own time as total minus upstream.
+        """
+        iterator = iter(batches)
+        while True:
+            start_seconds = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                self.upstream_seconds += time.perf_counter() - start_seconds
+                return
+            self.upstream_seconds += time.perf_counter() - start_seconds
+            yield batch
+
+    def finish(self) -> ScanMetrics:
+        """Stop the wall clock (call once the scan and write are done)."""
+        self.wall_seconds = time.perf_counter() - self._start_seconds
+        return self
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def slowest_directories(self) -> list[DirectoryTiming]:
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
+
+    def stat_latency_quantile(self, quantile: float) -> float:
+        """Upper bucket bound below which `quantile` of the stat calls fell."""
+        total = sum(self.stat_latency_counts)
+        if total == 0:
+            return 0.0
+        running = 0
+        for bound, count in zip(STAT_LATENCY_BUCKETS, self.stat_latency_counts):
+            running += count
+            if running >= quantile * total:
+                return bound
+        return math.inf
+
+    def summary(self) -> dict:
+        """All metrics as one JSON-friendly dict."""
+        return {
+            "root": self.root,
+            "started_at": self.started_at,
+            "wall_seconds": self.wall_seconds,
+            "directories": self.directories,
+            "files": self.files,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "files_per_second": self.files_per_second,
+            "stage_seconds": dict(self.stage_seconds),
+            "stat_latency_buckets": {
+                ("+Inf" if math.isinf(bound) else repr(bound)): count
+                for bound, count in zip(STAT_LATENCY_BUCKETS, self.stat_latency_counts)
+            },
+            "stat_latency_sum": self.stat_latency_sum,
+            "slowest_directories": [
+                {"directory": timing.directory, "seconds": timing.seconds, "files": timing.files}
+                for timing in self.slowest_directories
+            ],
+        }
+
+    def to_json_line(self) -> str:
+        return json.dumps(self.summary(), sort_keys=True)
+
+    def append_json_lines(self, path: Path | str) -> None:
+        """Append this scan as one line to a JSON lines file (one scan per line)."""
+        with open(path, "a", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.to_json_line() + "\n")
+
+    def to_prometheus(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        root_label = self.root.replace("\\", "\\\\").replace('"', '\\"')
+        labels = f'root="{root_label}"'
+        lines = [
+            f"# HELP {prefix}_wall_seconds Wall-clock duration of the last scan.",
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds{{{labels}}} {self.wall_seconds:.6f}",
+            f"# HELP {prefix}_stage_seconds Seconds spent per scan stage (summed over threads).",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [
+            f'{prefix}_stage_seconds{{{labels},stage="{stage}"}} {seconds:.6f}'
+            for stage, seconds in self.stage_seconds.items()
+        ]
+        for name, value, description in [
+            ("directories", self.directories, "Directories listed."),
+            ("files", self.files, "Files cataloged."),
+            ("bytes", self.bytes, "Total size of the cataloged files."),
+            ("errors", self.errors, "Unreadable directories and files that vanished."),
+        ]:
+            lines += [
+                f"# HELP {prefix}_{name} {description}",
+                f"# TYPE {prefix}_{name} gauge",
+                f"{prefix}_{name}{{{labels}}} {value}",
+            ]
+
+        lines += [
+            f"# HELP {prefix}_stat_latency_seconds Latency of stat calls.",
+            f"# TYPE {prefix}_stat_latency_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(STAT_LATENCY_BUCKETS, self.stat_latency_counts):
+            cumulative += count
+            bound_label = "+Inf" if math.isinf(bound) else repr(bound)
+            lines.append(
+                f'{prefix}_stat_latency_seconds_bucket{{{labels},le="{bound_label}"}} {cumulative}'
+            )
+        lines += [
+            f"{prefix}_stat_latency_seconds_sum{{{labels}}} {self.stat_latency_sum:.6f}",
+            f"{prefix}_stat_latency_seconds_count{{{labels}}} {cumulative}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path | str, prefix: str = PROMETHEUS_PREFIX) -> None:
+        """
+        Write the metrics to a .prom file, atomically (write, then rename),
+        so a collector never reads half a file.
+        """
+        path = Path(path)
+        partial_path = path.with_name(path.name + ".partial")
+        partial_path.write_text(self.to_prometheus(prefix), encoding="utf-8")
+        partial_path.replace(path)
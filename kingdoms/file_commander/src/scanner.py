@@ -4,192 +4,308 @@
 This module walks through a folder tree and returns every file path,
 then turns those paths into a DataFrame that describes each file with
 size and timestamps for our file catalog pipeline.
+
+The walk itself lives in src.walker (no pandas there, so the command
+line can start quickly); this module builds the DataFrames on top of it.
 """
 
+import os
+import time
+from array import array
 from pathlib import Path
-from datetime import datetime
-from typing import Union
+from typing import Iterable, Iterator, Optional, Union
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from src.scan_metrics import ScanMetrics
+
+# Re-exported: the catalog code (and its callers) have always imported
+# classify_file_type from here.
+from src.file_types import (  # noqa: F401
+    _classify_extension_categorical,
+    classify_file_type,
+    classify_file_types,
+)
+
+# The walk itself (and the column order) live in src.walker, which does not
+# import pandas; they are re-exported here for the catalog code.
+from src.walker import (  # noqa: F401
+    CATALOG_COLUMNS,
+    FileEntry,
+    _iter_file_entries_threaded,
+    _list_directory_measured,
+    _suffix_of,
+    _validate_root,
+    iter_catalog_rows,
+    iter_file_entries,
+    list_directory,
+    list_files,
+)
+
+
+# How many rows `iter_file_records` collects before yielding a DataFrame.
+DEFAULT_BATCH_SIZE = 50_000
+
+# Optional extra column (to_frame(with_inode=True)): the file's inode
+# number, which survives renames and moves within one filesystem. Catalog
+# snapshots keep it so scan-to-scan diffs can recognise moved files.
+INODE_COLUMN = "inode"
+
+
+def _local_utc_offsets(epoch_seconds: np.ndarray) -> np.ndarray:
+    """
+    Because `datetime.fromtimestamp` gives *local* wall-clock times and we
+    want to keep that behaviour without calling it millions of times, this
+    helper returns the local UTC offset (in seconds) for every epoch value.
+
+    Offsets only change at daylight-saving transitions, so we check the
+    offset at the start and end of each *distinct day in the data* (not
+    every day between the oldest and newest value, which for an epoch-0
+    or far-future mtime is tens of thousands of days), bisect any day where
+    it changed down to the exact second, and then assign offsets to all
+    values at once with `np.searchsorted`. Values the platform cannot
+    convert get the standard local offset.
+    """
+    if epoch_seconds.size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    standard_offset = -time.timezone
+
+    def offset_at(epoch: int) -> int:
+        try:
+            return time.localtime(epoch).tm_gmtoff
+        except (OverflowError, OSError, ValueError):
+            return standard_offset
+
+    day_seconds = 24 * 60 * 60
+    finite_epochs = epoch_seconds[np.isfinite(epoch_seconds)]
+    day_numbers = np.unique(np.floor_divide(finite_epochs, day_seconds))
+
+    # Breakpoints in ascending order: every data day's start, plus the
+    # exact second of any transition inside that day.
+    breakpoint_epochs: list[float] = []
+    breakpoint_offsets: list[int] = []
+    for day_number in day_numbers.tolist():
+        day_start = int(day_number) * day_seconds
+        day_end = day_start + day_seconds - 1
+        start_offset = offset_at(day_start)
+        breakpoint_epochs.append(day_start)
+        breakpoint_offsets.append(start_offset)
+        if offset_at(day_end) != start_offset:
+            # Bisect to the first second that has the new offset.
+            low, high = day_start, day_end
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset_at(middle) == start_offset:
+                    low = middle
+                else:
+                    high = middle
+            breakpoint_epochs.append(high)
+            breakpoint_offsets.append(offset_at(high))
+
+    # Every finite value is at or after its own day's start. The extra
+    # standard offset at the end is only reached by an all-NaN input
+    # (index -1), which stat never produces.
+    breakpoint_index = np.searchsorted(
+        np.asarray(breakpoint_epochs, dtype=np.float64), epoch_seconds, side="right"
+    ) - 1
+    return np.asarray(breakpoint_offsets + [standard_offset], dtype=np.int64)[breakpoint_index]
+
+
+def _epoch_to_local_datetimes(epoch_seconds: np.ndarray) -> pd.DatetimeIndex:
+    """
+    Because we want the same local, timezone-naive datetimes that
+    `datetime.fromtimestamp` produced, this helper shifts the epoch values
+    by the local UTC offset and converts them in one vectorized call.
+    """
+    local_seconds = epoch_seconds + _local_utc_offsets(epoch_seconds)
+    return pd.to_datetime(local_seconds, unit="s")
 
 
-def list_files(root: Path) -> list[Path]:
+class CatalogColumnBuffers:
+    """
+    Because a dict per file (plus a DataFrame copy at the end) dominates
+    memory on big scans, this class collects the catalog column by column:
+    typed `array` buffers for numbers and plain lists for strings.
+    `to_frame` then builds the DataFrame in one shot.
     """
-    Because we want a simple way to see every file inside a directory
-    and its subdirectories, this function walks the folder tree and
-    returns a list of file paths (no directories).
 
-    :param root: The directory to scan (can be a Path or a string).
-    :return: A list of Path objects, one for each file found.
+    def __init__(self) -> None:
+        self.paths: list[str] = []
+        self.directories: list[str] = []
+        self.names: list[str] = []
+        self.extensions: list[str] = []
+        self.sizes = array("q")
+        self.created_epochs = array("d")
+        self.modified_epochs = array("d")
+        self.accessed_epochs = array("d")
+        self.inodes = array("Q")
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def append(self, file_path: str, directory: str, name: str, file_stat: os.stat_result) -> None:
+        """Add one file (as yielded by `iter_file_entries`) to the buffers."""
+        self.paths.append(file_path)
+        self.directories.append(directory)
+        self.names.append(name)
+        self.extensions.append(_suffix_of(name).lower())
+        self.sizes.append(file_stat.st_size)
+        self.created_epochs.append(file_stat.st_ctime)
+        self.modified_epochs.append(file_stat.st_mtime)
+        self.accessed_epochs.append(file_stat.st_atime)
+        self.inodes.append(file_stat.st_ino)
+
+    def to_frame(
+        self, with_inode: bool = False, metrics: Optional[ScanMetrics] = None
+    ) -> pd.DataFrame:
+        """
+        Build the catalog DataFrame from the buffers:
+          - numeric buffers are wrapped with `np.frombuffer` (no copy),
+          - timestamps are converted with one vectorized call per column,
+          - extension / file_type / directory become categoricals,
+          - with_inode=True adds INODE_COLUMN after CATALOG_COLUMNS.
+
+        With `metrics`, the classification and the rest of the build are
+        timed as the "classify" and "frame" stages.
+        """
+        start_seconds = time.perf_counter()
+        extension_column = pd.Categorical(self.extensions)
+
+        # Each *distinct* extension is classified once; the per-file result
+        # is then a lookup on the categorical codes.
+        classify_start = time.perf_counter()
+        file_type_column = _classify_extension_categorical(extension_column)
+        classify_seconds = time.perf_counter() - classify_start
+
+        columns = {
+            "path": np.array(self.paths, dtype=object),
+            "directory": pd.Categorical(self.directories),
+            "name": np.array(self.names, dtype=object),
+            "extension": extension_column,
+            "file_type": file_type_column,
+            "size_bytes": np.frombuffer(self.sizes, dtype=np.int64),
+            "created_at": _epoch_to_local_datetimes(
+                np.frombuffer(self.created_epochs, dtype=np.float64)
+            ),
+            "modified_at": _epoch_to_local_datetimes(
+                np.frombuffer(self.modified_epochs, dtype=np.float64)
+            ),
+            "last_accessed_at": _epoch_to_local_datetimes(
+                np.frombuffer(self.accessed_epochs, dtype=np.float64)
+            ),
+        }
+        if with_inode:
+            columns[INODE_COLUMN] = np.frombuffer(self.inodes, dtype=np.uint64)
+
+        # `columns` is already in CATALOG_COLUMNS order, so there is no
+        # reindexing copy after construction. (Passing `columns=` here as
+        # well sends pandas down a much slower per-column path.)
+        file_catalog = pd.DataFrame(columns)
+        if metrics is not None:
+            metrics.add_stage("classify", classify_seconds)
+            metrics.add_stage("frame", time.perf_counter() - start_seconds - classify_seconds)
+        return file_catalog
+
+
+def iter_file_records(
+    root: Path | str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    with_inode: bool = False,
+    metrics: Optional[ScanMetrics] = None,
+) -> Iterator[pd.DataFrame]:
     """
-    # Normalize the input to a Path object even if a string was passed in.
-    root_path = Path(root)
+    Because collecting the whole catalog before anyone sees a row makes
+    peak memory grow with the tree, this generator yields the catalog in
+    small DataFrames of at most `batch_size` rows (same columns and dtypes
+    as `build_file_catalog`). A consumer that writes each batch out and
+    drops it (SQLite, CSV, ...) runs in constant memory.
 
-    # Guardrail: the starting path must exist.
-    if not root_path.exists():
-        raise FileNotFoundError(f"Root path does not exist: {root_path}")
+    :param root: The directory to scan (Path or string).
+    :param batch_size: Maximum number of rows per yielded DataFrame.
+    :param workers: Threads used to list directories in parallel.
+    :param with_inode: Add the INODE_COLUMN (for catalog snapshots).
+    :param metrics: Optional ScanMetrics to record per-stage timings,
+                    counts and stat latencies in.
+    :return: An iterator of catalog DataFrames. An empty tree yields nothing.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    column_buffers = CatalogColumnBuffers()
 
-    # Guardrail: the starting path must actually be a directory.
-    if not root_path.is_dir():
-        raise NotADirectoryError(f"Root path is not a directory: {root_path}")
+    # One stat per file: iter_file_entries already did it for us.
+    file_entries = iter_file_entries(root, workers=workers, metrics=metrics)
+    for file_path, directory, name, file_stat in file_entries:
+        column_buffers.append(file_path, directory, name, file_stat)
 
-    # We'll collect all file paths in this list.
-    file_paths: list[Path] = []
+        if len(column_buffers) >= batch_size:
+            yield column_buffers.to_frame(with_inode, metrics)
+            column_buffers = CatalogColumnBuffers()
 
-    # root_path.rglob("*") walks the directory recursively and yields
-    # both files and directories. We only keep the files.
-    for candidate_path in root_path.rglob("*"):
-        if candidate_path.is_file():
-            file_paths.append(candidate_path)
+    if len(column_buffers):
+        yield column_buffers.to_frame(with_inode, metrics)
 
-    return file_paths
 
-def build_file_catalog(root: Path | str) -> pd.DataFrame:
+def concat_catalog_batches(batches: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Because a plain `pd.concat` turns categoricals with different
+    categories back into object columns, this helper stitches catalog
+    batches together column by column, merging categoricals with
+    `union_categoricals` so the result matches a single-batch catalog.
+    """
+    batch_list = list(batches)
+    if not batch_list:
+        return CatalogColumnBuffers().to_frame()
+    if len(batch_list) == 1:
+        return batch_list[0]
+
+    columns = {}
+    for column in CATALOG_COLUMNS:
+        column_parts = [batch[column] for batch in batch_list]
+        if isinstance(column_parts[0].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(column_parts, sort_categories=True)
+        else:
+            columns[column] = pd.concat(column_parts, ignore_index=True)
+
+    return pd.DataFrame(columns)
+
+
+def build_file_catalog(
+    root: Path | str,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    metrics: Optional[ScanMetrics] = None,
+) -> pd.DataFrame:
     """
     :param root: The directory to scan (Path or string).
+    :param workers: Threads used to list directories in parallel. Helps on
+                    network shares and spinning disks; the resulting
+                    DataFrame is identical for any value.
+    :param batch_size: Rows per internal batch (see `iter_file_records`).
+    :param metrics: Optional ScanMetrics, filled in (and finished) with
+                    the scan's timings and counts.
     Because we want a table-like catalog of our files that is easy to query,
     this function walks the directory tree starting at `root`, collects
     metadata for each file, and returns a pandas DataFrame.
 
     Each row in the DataFrame describes one file with columns:
       - path: full path to the file (string)
-      - directory: parent directory of the file (string)
+      - directory: parent directory of the file (categorical)
       - name: file name with extension
-      - extension: file extension (e.g. ".txt", ".pdf")
+      - extension: file extension (e.g. ".txt", ".pdf"), categorical
+      - file_type: broad category from classify_file_type, categorical
       - size_bytes: size of the file in bytes (integer)
       - created_at: file creation time as a datetime
       - modified_at: last modified time as a datetime
+      - last_accessed_at: last access time as a datetime
     """
-    root_path =Path(root)
-
-    file_paths: list[Path] = list_files(root_path)
-
-    file_records: list[dict] = []
-
-    for file_path in file_paths:
-        file_stat = file_path.stat()
-        file_extension = file_path.suffix.lower()
-
-        file_record = {
-            "path": str(file_path),
-            "directory": str(file_path.parent),
-            "name": file_path.name,
-            "extension": file_extension,
-            "file_type": classify_file_type(file_extension),
-            "size_bytes": file_stat.st_size,
-            "created_at": datetime.fromtimestamp(file_stat.st_ctime),
-            "modified_at": datetime.fromtimestamp(file_stat.st_mtime),
-            "last_accessed_at": datetime.fromtimestamp(file_stat.st_atime)
-        }
-
-        file_records.append(file_record)
-
-
-    expected_column_order = [
-        "path",
-        "directory",
-        "name",
-        "extension",
-        "file_type",
-        "size_bytes",
-        "created_at",
-        "modified_at",
-        "last_accessed_at",
-    ]
-
-    file_catalog = pd.DataFrame.from_records(file_records) [expected_column_order]
-
+    file_catalog = concat_catalog_batches(
+        iter_file_records(root, batch_size=batch_size, workers=workers, metrics=metrics)
+    )
+    if metrics is not None:
+        metrics.finish()
     return file_catalog
-
-
-
-def classify_file_type(extension: str) -> str:
-    """
-    Because we want to group files by their general purpose instead of just
-    their raw extension, this helper takes a file extension like ".jpg"
-    and returns a broader category such as "image" or "code".
-
-    This version is "Kingdom 1.5" – it uses what we learned from the
-    real catalog ('other' analysis) to classify more extensions correctly.
-    """
-
-    # Normalize to lower-case, strip spaces, and ensure it starts with a dot.
-    normalized_extension = extension.lower().strip()
-    if normalized_extension and not normalized_extension.startswith("."):
-        normalized_extension = "." + normalized_extension
-
-    # ---- Core media types ---------------------------------------------------
-    image_extensions = {
-        ".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp",
-        ".heic", ".heif", ".tiff", ".tif", ".nef", ".svg",
-    }
-
-    video_extensions = {
-        ".mp4", ".mkv", ".mov", ".avi", ".3gp",
-    }
-
-    audio_extensions = {
-        ".mp3", ".wav", ".flac", ".aac", ".m4a", ".ogg",
-    }
-
-    # ---- Documents / reading ------------------------------------------------
-    document_extensions = {
-        ".txt", ".md", ".pdf", ".doc", ".docx", ".rtf",
-        ".ppt", ".pptx",
-        ".epub", ".mobi",
-    }
-
-    # ---- Data / analytics ---------------------------------------------------
-    data_extensions = {
-        ".csv", ".tsv",
-        ".xls", ".xlsx",
-        ".parquet",
-        ".json",
-        ".xml",
-    }
-
-    # ---- Code & web artifacts ----------------------------------------------
-    code_extensions = {
-        # General programming
-        ".py", ".js", ".ts", ".java", ".c", ".cpp", ".go", ".rs",
-        ".rb", ".sh",
-
-        # Node / web build artifacts
-        ".cjs", ".mjs", ".map", ".node", ".wasm",
-        ".css", ".html",
-    }
-
-    # ---- Archives / compressed ---------------------------------------------
-    archive_extensions = {
-        ".zip", ".tar", ".gz", ".bz2", ".7z", ".rar",
-    }
-
-    # ---- Installers & disk images ------------------------------------------
-    installer_extensions = {
-        ".dmg",           # macOS disk image
-        ".pkg",           # macOS installer package
-        ".msi",           # Windows installer
-        ".ova",           # VM image
-        ".vbox-extpack",  # VirtualBox extension
-    }
-
-    # ---- Classification -----------------------------------------------------
-    if normalized_extension in image_extensions:
-        return "image"
-    if normalized_extension in video_extensions:
-        return "video"
-    if normalized_extension in audio_extensions:
-        return "audio"
-    if normalized_extension in document_extensions:
-        return "document"
-    if normalized_extension in data_extensions:
-        return "data"
-    if normalized_extension in code_extensions:
-        return "code"
-    if normalized_extension in archive_extensions:
-        return "archive"
-    if normalized_extension in installer_extensions:
-        return "installer"
-
-    # Fallback: keep anything unknown in 'other' so we can analyze it later.
-    return "other"
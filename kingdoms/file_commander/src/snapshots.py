@@ -0,0 +1,320 @@
+# src/snapshots.py
+
+"""
+This module keeps every scan as a Parquet file ("snapshot") next to the
+SQLite catalog, so a catalog can be reopened without walking the disk
+again, and old scans are still around to compare against.
+
+A snapshot is a plain Parquet file:
+  - one per scan: `catalog-<scan_id>.parquet` in the snapshot directory,
+    where scan_id is the scan's UTC start time (sortable, unique),
+  - zstd-compressed; directory / extension / file_type are
+    dictionary-encoded and come back as pandas categoricals,
+  - written batch by batch while the scan runs (constant memory),
+  - rows are sorted by (file_type, size_bytes) inside each batch and cut
+    into small row groups, so the min/max statistics of each row group
+    let a filter on file_type or size_bytes skip most of the file,
+  - the inode of each file is kept when the batches carry it
+    (iter_file_records(with_inode=True)), so src.scan_diff can tell a
+    moved file from a deleted one plus a new one,
+  - root, scan_id and row count are stored in the file's metadata, so
+    listing snapshots reads only their footers.
+
+Loading memory-maps the file instead of reading it into a buffer first.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.scanner import CATALOG_COLUMNS, INODE_COLUMN, CatalogColumnBuffers
+
+SNAPSHOT_PREFIX = "catalog-"
+SNAPSHOT_SUFFIX = ".parquet"
+
+# Key of our entry in the Parquet file (footer) metadata.
+SNAPSHOT_METADATA_KEY = b"file_commander"
+
+# Columns stored with a dictionary (few distinct values, many repeats).
+DICTIONARY_COLUMNS = ["directory", "extension", "file_type"]
+
+# Rows per Parquet row group. Smaller groups mean finer min/max statistics
+# (better skipping) at the cost of a slightly bigger footer.
+ROW_GROUP_ROWS = 16_384
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ("path", pa.string()),
+    ("directory", pa.string()),
+    ("name", pa.string()),
+    ("extension", pa.string()),
+    ("file_type", pa.string()),
+    ("size_bytes", pa.int64()),
+    ("created_at", pa.timestamp("ns")),
+    ("modified_at", pa.timestamp("ns")),
+    ("last_accessed_at", pa.timestamp("ns")),
+    (INODE_COLUMN, pa.uint64()),
+])
+
+
+@dataclass
+class SnapshotInfo:
+    """
+    Because a snapshot list should not open every file, this record holds
+    what the footer tells us about one snapshot.
+    """
+
+    path: Path
+    scan_id: str
+    root: str
+    row_count: int
+    size_bytes: int
+    write_seconds: float = 0.0
+
+
+def new_scan_id() -> str:
+    """A sortable, unique id for a scan: its UTC start time to the microsecond."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def snapshot_path(snapshot_directory: Path | str, scan_id: str) -> Path:
+    return Path(snapshot_directory) / f"{SNAPSHOT_PREFIX}{scan_id}{SNAPSHOT_SUFFIX}"
+
+
+def _batch_to_table(batch: pd.DataFrame) -> pa.Table:
+    """Sort a catalog batch for row-group pruning and convert it to SNAPSHOT_SCHEMA."""
+    columns = {}
+    sort_keys = batch[["file_type", "size_bytes"]].astype({"file_type": str})
+    order = sort_keys.sort_values(["file_type", "size_bytes"], kind="stable").index
+    for column in CATALOG_COLUMNS:
+        values = batch[column].loc[order]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(str)
+        columns[column] = pa.array(values.to_numpy(), type=SNAPSHOT_SCHEMA.field(column).type)
+    if INODE_COLUMN in batch:
+        columns[INODE_COLUMN] = pa.array(batch[INODE_COLUMN].loc[order].to_numpy(), pa.uint64())
+    else:
+        columns[INODE_COLUMN] = pa.nulls(len(batch), pa.uint64())
+    return pa.Table.from_pydict(columns, schema=SNAPSHOT_SCHEMA)
+
+
+class CatalogSnapshotWriter:
+    """
+    Because a scan produces its catalog in batches, this writer appends
+    each batch to one Parquet file as it arrives. The file is written
+    under a temporary name and renamed into place on close, so a crashed
+    scan never leaves a half-written snapshot behind.
+
+    Example:
+        with CatalogSnapshotWriter(SNAPSHOT_DIRECTORY, root) as writer:
+            for batch in iter_file_records(root):
+                writer.write(batch)
+        print(writer.info.path)
+    """
+
+    def __init__(
+        self,
+        snapshot_directory: Path | str,
+        root: Path | str,
+        scan_id: Optional[str] = None,
+        compression: str = "zstd",
+    ) -> None:
+        self.scan_id = scan_id or new_scan_id()
+        self.root = str(root)
+        self.path = snapshot_path(snapshot_directory, self.scan_id)
+        self.compression = compression
+        self.row_count = 0
+        self.info: Optional[SnapshotInfo] = None
+        self._partial_path = self.path.with_name(self.path.name + ".partial")
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._start_seconds = 0.0
+
+    def __enter__(self) -> CatalogSnapshotWriter:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._start_seconds = time.perf_counter()
+        self._writer = pq.ParquetWriter(
+            self._partial_path,
+            SNAPSHOT_SCHEMA,
+            compression=self.compression,
+            use_dictionary=DICTIONARY_COLUMNS,
+        )
+        return self
+
+    def write(self, batch: pd.DataFrame) -> None:
+        if len(batch):
+            self._writer.write_table(_batch_to_table(batch), row_group_size=ROW_GROUP_ROWS)
+            self.row_count += len(batch)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self._writer.close()
+            self._partial_path.unlink(missing_ok=True)
+            return
+
+        # The metadata goes into the footer, written by close().
+        self._writer.add_key_value_metadata({
+            SNAPSHOT_METADATA_KEY: json.dumps({
+                "scan_id": self.scan_id, "root": self.root, "row_count": self.row_count,
+            }),
+        })
+        self._writer.close()
+        os.replace(self._partial_path, self.path)
+        self.info = SnapshotInfo(
+            path=self.path,
+            scan_id=self.scan_id,
+            root=self.root,
+            row_count=self.row_count,
+            size_bytes=self.path.stat().st_size,
+            write_seconds=time.perf_counter() - self._start_seconds,
+        )
+
+
+def snapshot_batches(
+    batches: Iterable[pd.DataFrame], writer: CatalogSnapshotWriter
+) -> Iterator[pd.DataFrame]:
+    """
+    Pass catalog batches through while also writing them to `writer` (an
+    open CatalogSnapshotWriter), so one scan can feed SQLite and a
+    snapshot at the same time. The INODE_COLUMN only goes to the snapshot.
+    """
+    for batch in batches:
+        writer.write(batch)
+        yield batch.drop(columns=INODE_COLUMN) if INODE_COLUMN in batch else batch
+
+
+def write_catalog_snapshot(
+    batches: Iterable[pd.DataFrame] | pd.DataFrame,
+    snapshot_directory: Path | str,
+    root: Path | str,
+    scan_id: Optional[str] = None,
+) -> SnapshotInfo:
+    """
+    Write a catalog (one DataFrame, or batches from iter_file_records) as a
+    new snapshot of `root` and return its SnapshotInfo.
+    """
+    if isinstance(batches, pd.DataFrame):
+        batches = [batches]
+    with CatalogSnapshotWriter(snapshot_directory, root, scan_id=scan_id) as writer:
+        for batch in batches:
+            writer.write(batch)
+    return writer.info
+
+
+def read_snapshot_info(path: Path | str) -> SnapshotInfo:
+    """Read a snapshot's SnapshotInfo from its footer (no data is read)."""
+    path = Path(path)
+    metadata = pq.read_metadata(path, memory_map=True).metadata or {}
+    details = json.loads(metadata.get(SNAPSHOT_METADATA_KEY, b"{}"))
+    return SnapshotInfo(
+        path=path,
+        scan_id=details.get("scan_id", path.stem.removeprefix(SNAPSHOT_PREFIX)),
+        root=details.get("root", ""),
+        row_count=details.get("row_count", 0),
+        size_bytes=path.stat().st_size,
+    )
+
+
+def list_catalog_snapshots(
+    snapshot_directory: Path | str, root: Optional[Path | str] = None
+) -> list[SnapshotInfo]:
+    """
+    Return the snapshots in `snapshot_directory` (only those of `root`, if
+    given), newest first.
+    """
+    snapshot_directory = Path(snapshot_directory)
+    if not snapshot_directory.is_dir():
+        return []
+    snapshots = [
+        read_snapshot_info(path)
+        for path in snapshot_directory.glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}")
+    ]
+    if root is not None:
+        snapshots = [snapshot for snapshot in snapshots if snapshot.root == str(root)]
+    return sorted(snapshots, key=lambda snapshot: snapshot.scan_id, reverse=True)
+
+
+def _snapshot_filters(
+    file_types: Optional[Iterable[str]],
+    minimum_size_bytes: Optional[int],
+    maximum_size_bytes: Optional[int],
+) -> Optional[list[tuple]]:
+    """Build the pyarrow `filters` list (an AND of conditions) for the given limits."""
+    filters: list[tuple] = []
+    if file_types is not None:
+        filters.append(("file_type", "in", list(file_types)))
+    if minimum_size_bytes is not None:
+        filters.append(("size_bytes", ">=", int(minimum_size_bytes)))
+    if maximum_size_bytes is not None:
+        filters.append(("size_bytes", "<=", int(maximum_size_bytes)))
+    return filters or None
+
+
+def _table_to_catalog(table: pa.Table) -> pd.DataFrame:
+    """Convert a snapshot table to the catalog DataFrame shape (categoricals included)."""
+    file_catalog = table.to_pandas()
+    for column in DICTIONARY_COLUMNS:
+        if column not in file_catalog:
+            continue
+        if not isinstance(file_catalog[column].dtype, pd.CategoricalDtype):
+            file_catalog[column] = file_catalog[column].astype("category")
+    return file_catalog
+
+
+def load_catalog_snapshot(
+    path: Path | str,
+    columns: Optional[list[str]] = None,
+    file_types: Optional[Iterable[str]] = None,
+    minimum_size_bytes: Optional[int] = None,
+    maximum_size_bytes: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Because a snapshot is already a column store, this function opens it
+    memory-mapped and only decodes what is asked for:
+
+      - `columns` limits the columns read,
+      - `file_types` / `minimum_size_bytes` / `maximum_size_bytes` are
+        pushed down to Parquet: row groups whose statistics cannot match
+        are skipped without being decompressed.
+
+    Example:
+        videos = load_catalog_snapshot(path, file_types=["video"],
+                                       minimum_size_bytes=100 * 1024**2)
+
+    :return: A catalog DataFrame (same columns and dtypes as
+             build_file_catalog, unless `columns` says otherwise), rows
+             grouped by file_type.
+    """
+    if columns is None:
+        columns = CATALOG_COLUMNS
+    table = pq.read_table(
+        path,
+        columns=columns,
+        filters=_snapshot_filters(file_types, minimum_size_bytes, maximum_size_bytes),
+        memory_map=True,
+        read_dictionary=[column for column in DICTIONARY_COLUMNS if column in columns],
+    )
+    if table.num_rows == 0 and columns == CATALOG_COLUMNS:
+        return CatalogColumnBuffers().to_frame()
+    return _table_to_catalog(table)
+
+
+def iter_catalog_snapshot(
+    path: Path | str, batch_size: int = 50_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield a snapshot as catalog DataFrames of at most `batch_size` rows,
+    e.g. to reload it into SQLite (replace_catalog_from_batches) without
+    holding all of it in memory.
+    """
+    parquet_file = pq.ParquetFile(path, memory_map=True, read_dictionary=DICTIONARY_COLUMNS)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=CATALOG_COLUMNS):
+        yield _table_to_catalog(pa.Table.from_batches([record_batch]))
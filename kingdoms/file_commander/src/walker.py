@@ -0,0 +1,313 @@
+# src/walker.py
+
+"""
+This module walks a folder tree with `os.scandir` and hands back one raw
+record per file, without importing numpy or pandas.
+
+src.scanner builds catalog DataFrames on top of this walk; the command
+line (src.cli) uses it directly, so `file_commander scan` can stream rows
+to stdout as it walks and start up without paying for the DataFrame
+stack.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from src.file_types import classify_file_type
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from src.scan_metrics import ScanMetrics
+
+# One raw record per file, as produced by `iter_file_entries`:
+#   (path, directory, name, stat_result)
+# We keep these as plain strings instead of Path objects because building
+# millions of Path objects is a measurable chunk of a large scan.
+FileEntry = tuple[str, str, str, Optional[os.stat_result]]
+
+# How many directories per worker the threaded walk lists ahead of the
+# directory it is yielding. Enough to keep every worker busy while the
+# consumer catches up, without holding the listings of a whole tree.
+LISTING_LOOKAHEAD_PER_WORKER = 4
+
+
+def _validate_root(root: Path | str) -> Path:
+    """
+    Because every scanner entry point needs the same guardrails, this helper
+    normalizes `root` to a Path and checks that it is an existing directory.
+    """
+    # Normalize the input to a Path object even if a string was passed in.
+    root_path = Path(root)
+
+    # Guardrail: the starting path must exist.
+    if not root_path.exists():
+        raise FileNotFoundError(f"Root path does not exist: {root_path}")
+
+    # Guardrail: the starting path must actually be a directory.
+    if not root_path.is_dir():
+        raise NotADirectoryError(f"Root path is not a directory: {root_path}")
+
+    return root_path
+
+
+def _suffix_of(name: str) -> str:
+    """
+    Because we no longer build a Path for every file, this helper returns
+    the same thing `Path(name).suffix` would (e.g. ".txt", or "" for
+    ".bashrc" and "archive.") using plain string operations.
+    """
+    dot_index = name.rfind(".")
+    if 0 < dot_index < len(name) - 1:
+        return name[dot_index:]
+    return ""
+
+
+def list_directory(
+    directory: str, with_stat: bool, metrics: Optional[ScanMetrics] = None
+) -> tuple[list[FileEntry], list[str]]:
+    """
+    Because both the serial and the threaded walk need to read one folder
+    at a time, this helper lists a single directory with `os.scandir` and
+    returns its files and its subdirectories, each sorted by name so the
+    walk order never depends on the filesystem's listing order.
+
+    Behaviour matches the old `rglob` walk:
+      - symlinks to files are included (and stat'ed through the link),
+      - symlinked directories are not descended into,
+      - directories we are not allowed to read are skipped.
+
+    With `metrics`, each stat call is timed and the directory's listing
+    time, stat latencies and counts are recorded (see src.scan_metrics).
+    """
+    if metrics is not None:
+        return _list_directory_measured(directory, with_stat, metrics)
+
+    files: list[FileEntry] = []
+    subdirectories: list[str] = []
+
+    try:
+        directory_iterator = os.scandir(directory)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        # Same as rglob: unreadable or vanished directories are skipped.
+        return files, subdirectories
+
+    with directory_iterator:
+        for entry in directory_iterator:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                    continue
+
+                if not entry.is_file():
+                    continue
+
+                entry_stat = entry.stat() if with_stat else None
+            except FileNotFoundError:
+                # The file disappeared between listing and stat.
+                continue
+
+            files.append((entry.path, directory, entry.name, entry_stat))
+
+    files.sort(key=lambda file_entry: file_entry[2])
+    subdirectories.sort()
+    return files, subdirectories
+
+
+def _list_directory_measured(
+    directory: str, with_stat: bool, metrics: ScanMetrics
+) -> tuple[list[FileEntry], list[str]]:
+    """list_directory with timers around the listing and every stat call."""
+    start_seconds = time.perf_counter()
+    files: list[FileEntry] = []
+    subdirectories: list[str] = []
+    stat_latencies: list[float] = []
+    byte_count = 0
+    error_count = 0
+
+    try:
+        directory_iterator = os.scandir(directory)
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        metrics.record_directory(directory, time.perf_counter() - start_seconds, [], 0, 0, 1)
+        return files, subdirectories
+
+    with directory_iterator:
+        for entry in directory_iterator:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                    continue
+
+                if not entry.is_file():
+                    continue
+
+                entry_stat = None
+                if with_stat:
+                    stat_start = time.perf_counter()
+                    entry_stat = entry.stat()
+                    stat_latencies.append(time.perf_counter() - stat_start)
+                    byte_count += entry_stat.st_size
+            except FileNotFoundError:
+                error_count += 1
+                continue
+
+            files.append((entry.path, directory, entry.name, entry_stat))
+
+    files.sort(key=lambda file_entry: file_entry[2])
+    subdirectories.sort()
+    list_seconds = time.perf_counter() - start_seconds - sum(stat_latencies)
+    metrics.record_directory(
+        directory, list_seconds, stat_latencies, len(files), byte_count, error_count
+    )
+    return files, subdirectories
+
+
+def _iter_file_entries_threaded(
+    root_directory: str, with_stat: bool, workers: int, metrics: Optional[ScanMetrics] = None
+) -> Iterator[FileEntry]:
+    """
+    Because network shares and spinning disks spend most of a scan waiting
+    on `stat`, this generator lists directories on a thread pool.
+
+    The generator walks the tree in exactly the same order as the serial
+    walk, and keeps the next LISTING_LOOKAHEAD_PER_WORKER * `workers`
+    directories of that order listed (or being listed) ahead of it. That
+    keeps the output identical to `workers=1`, keeps the pool busy, and
+    bounds how many finished listings wait in memory when the consumer is
+    slower than the pool (e.g. a pipe, or a batch being written to SQLite).
+    """
+    # Imported here: concurrent.futures (and the logging it pulls in) is a
+    # noticeable share of the command line's startup, and serial walks
+    # never need it.
+    from concurrent.futures import ThreadPoolExecutor
+
+    lookahead = workers * LISTING_LOOKAHEAD_PER_WORKER
+    listings: dict[str, Future] = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-scanner")
+
+    try:
+        # The same stack as the serial walk; its top is visited next.
+        pending_directories: list[str] = [root_directory]
+        while pending_directories:
+            # Top up: submit the next directories in walk order until
+            # `lookahead` listings are queued, running or unread.
+            for directory in reversed(pending_directories[-lookahead:]):
+                if len(listings) >= lookahead:
+                    break
+                if directory not in listings:
+                    listings[directory] = executor.submit(
+                        list_directory, directory, with_stat, metrics
+                    )
+
+            files, subdirectories = listings.pop(pending_directories.pop()).result()
+            yield from files
+            pending_directories.extend(reversed(subdirectories))
+    finally:
+        # If the caller stops early, drop whatever is still queued.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_file_entries(
+    root: Path | str,
+    with_stat: bool = True,
+    workers: int = 1,
+    metrics: Optional[ScanMetrics] = None,
+) -> Iterator[FileEntry]:
+    """
+    Because `rglob("*")` + `is_file()` + `stat()` costs two or three syscalls
+    and a new Path object per file, this generator walks the tree with
+    `os.scandir` instead. Each `DirEntry` already knows whether it is a file
+    or a directory (from the directory listing itself), so the only extra
+    syscall we pay per file is a single `stat()` — and none at all when
+    `with_stat=False`.
+
+    Files come out depth-first: a folder's files (sorted by name), then each
+    of its subfolders (sorted by name). The order is the same for any
+    number of `workers`.
+
+    :param root: The directory to scan (Path or string).
+    :param with_stat: When False, the stat slot of each tuple is None.
+    :param workers: How many threads list directories in parallel
+                    (1 = walk on the calling thread).
+    :param metrics: Optional ScanMetrics to record listing/stat timings in.
+    :return: An iterator of (path, directory, name, stat_result) tuples.
+    """
+    root_path = _validate_root(root)
+
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
+    if workers > 1:
+        yield from _iter_file_entries_threaded(str(root_path), with_stat, workers, metrics)
+        return
+
+    # A simple stack of directories still to visit (depth-first).
+    pending_directories: list[str] = [str(root_path)]
+
+    while pending_directories:
+        files, subdirectories = list_directory(pending_directories.pop(), with_stat, metrics)
+        yield from files
+        pending_directories.extend(reversed(subdirectories))
+
+
+def list_files(root: Path) -> list[Path]:
+    """
+    Because we want a simple way to see every file inside a directory
+    and its subdirectories, this function walks the folder tree and
+    returns a list of file paths (no directories).
+
+    :param root: The directory to scan (can be a Path or a string).
+    :return: A list of Path objects, one for each file found.
+    """
+    # The walker only hands us plain strings and we skip the stat call
+    # entirely, so this is the one place we pay for Path objects.
+    file_paths: list[Path] = [
+        Path(file_path)
+        for file_path, _directory, _name, _stat in iter_file_entries(root, with_stat=False)
+    ]
+
+    return file_paths
+
+
+# The column order every catalog DataFrame uses, whichever path built it.
+CATALOG_COLUMNS = [
+    "path",
+    "directory",
+    "name",
+    "extension",
+    "file_type",
+    "size_bytes",
+    "created_at",
+    "modified_at",
+    "last_accessed_at",
+]
+
+
+def iter_catalog_rows(root: Path | str, workers: int = 1) -> Iterator[tuple]:
+    """
+    Because a pipe (`file_commander scan ~/Documents | jq ...`) wants each
+    file as soon as it is stat'ed, this generator yields one plain tuple
+    per file in CATALOG_COLUMNS order instead of collecting DataFrames.
+
+    Timestamps are local ISO 8601 strings (what `datetime.fromtimestamp`
+    gives, the same wall-clock times build_file_catalog stores), so every
+    value is ready for JSON or CSV as is.
+    """
+    for file_path, directory, name, file_stat in iter_file_entries(root, workers=workers):
+        extension = _suffix_of(name).lower()
+        yield (
+            file_path,
+            directory,
+            name,
+            extension,
+            classify_file_type(extension),
+            file_stat.st_size,
+            datetime.fromtimestamp(file_stat.st_ctime).isoformat(),
+            datetime.fromtimestamp(file_stat.st_mtime).isoformat(),
+            datetime.fromtimestamp(file_stat.st_atime).isoformat(),
+        )
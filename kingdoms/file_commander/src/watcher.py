@@ -0,0 +1,243 @@
+# src/watcher.py
+
+"""
+This module keeps the SQLite catalog live: instead of rescanning a tree
+every so often, it scans it once and then listens for filesystem events
+(inotify on Linux, FSEvents on macOS, ... through `watchdog`).
+
+Events are not applied one by one. A burst of them (an unzip, a `git
+checkout`, an editor saving a file three times) is collected into a set
+of touched paths, and only after `debounce_seconds` of quiet (or at the
+latest `max_delay_seconds` after the first event) is that set handed to
+src.catalog_store.apply_catalog_changes, which re-stats each path and
+rewrites only its rows. Any number of events for one path cost a single
+stat and a single row write.
+
+`watchdog` is only imported by watch_catalog, so the rest of the package
+works without it.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from src.catalog_store import (
+    CatalogChangeResult,
+    apply_catalog_changes,
+    replace_catalog_from_batches,
+)
+from src.directory_tree import rebuild_directory_tree
+from src.scanner import _validate_root, iter_file_records
+
+# Quiet time after the last event before a batch is applied.
+DEFAULT_DEBOUNCE_SECONDS = 1.0
+
+# A steady trickle of events never goes quiet; apply it at least this often.
+DEFAULT_MAX_DELAY_SECONDS = 10.0
+
+# After the observer stops, a batch that keeps failing (e.g. "database is
+# locked") is tried this many times, this far apart, before it is dropped.
+FINAL_BATCH_ATTEMPTS = 5
+FINAL_BATCH_RETRY_SECONDS = 1.0
+
+# watchdog event types that can change a catalog row. "opened" and
+# "closed_no_write" never do, and a folder's own "modified" only means an
+# entry inside it changed, which arrives as its own event.
+_CHANGE_EVENT_TYPES = {"created", "modified", "deleted", "moved", "closed"}
+
+
+class PendingCatalogChanges:
+    """
+    Because events arrive on watchdog's thread and are applied on ours,
+    this class collects touched paths under a lock and decides when a
+    batch is ready (debounced, with an upper bound on the delay).
+    """
+
+    def __init__(
+        self,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+    ) -> None:
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._lock = threading.Lock()
+        self._paths: set[str] = set()
+        self._first_event_at = 0.0
+        self._last_event_at = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._paths)
+
+    def add(self, path: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._paths:
+                self._first_event_at = now
+            self._paths.add(os.path.normpath(path))
+            self._last_event_at = now
+
+    def take_ready(self, now: Optional[float] = None, force: bool = False) -> set[str]:
+        """Return (and forget) the pending paths if the batch is due, else an empty set."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if not self._paths:
+                return set()
+            quiet = now - self._last_event_at >= self.debounce_seconds
+            overdue = now - self._first_event_at >= self.max_delay_seconds
+            if not (force or quiet or overdue):
+                return set()
+            paths, self._paths = self._paths, set()
+            return paths
+
+
+class CatalogEventHandler:
+    """
+    Because we only need to know *which* paths changed, this handler turns
+    every relevant watchdog event into one or two touched paths (a move
+    touches both ends). watchdog calls `dispatch(event)` for every event.
+
+    Paths outside `root` (a move out of the tree) and paths under
+    `ignored_prefixes` (the catalog database itself, if it lives inside
+    the watched tree) are skipped.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        pending: PendingCatalogChanges,
+        ignored_prefixes: tuple[str, ...] = (),
+    ) -> None:
+        self.root = root
+        self.pending = pending
+        self.ignored_prefixes = ignored_prefixes
+
+    def _touch(self, path: str | bytes) -> None:
+        path = os.fsdecode(path)
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return
+        if self.ignored_prefixes and path.startswith(self.ignored_prefixes):
+            return
+        self.pending.add(path)
+
+    def dispatch(self, event) -> None:
+        if event.event_type not in _CHANGE_EVENT_TYPES:
+            return
+        if event.is_directory and event.event_type == "modified":
+            return
+        self._touch(event.src_path)
+        if event.event_type == "moved":
+            self._touch(event.dest_path)
+
+
+def watch_catalog(
+    engine: Engine,
+    root: Path | str,
+    seed: bool = True,
+    workers: int = 1,
+    debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+    max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+    ignored_paths: tuple[Path | str, ...] = (),
+    stop_event: Optional[threading.Event] = None,
+    on_batch: Optional[Callable[[CatalogChangeResult], None]] = None,
+    on_error: Optional[Callable[[OperationalError], None]] = None,
+) -> None:
+    """
+    Because a periodic full rescan costs a full walk even when nothing
+    changed, this function keeps the catalog for `root` current by:
+
+      1. Starting a recursive watchdog observer on `root`.
+      2. Seeding `file_catalog` with a full scan (the same streaming load
+         as the UI's full scan). The observer is already running, so a
+         change made during the scan is applied right after it.
+      3. Applying the touched paths in debounced batches until
+         `stop_event` is set (or Ctrl+C).
+
+    The directory tree of `root` is rebuilt after the seed scan and after
+    every applied batch, so its folder totals follow the catalog.
+
+    A batch that fails with an OperationalError (typically "database is
+    locked" while another process writes the catalog) is reported to
+    `on_error` and its paths go back into the queue, so it is tried again
+    with the next batch instead of stopping the watcher.
+
+    Example:
+        watch_catalog(get_sqlite_engine(DB_PATH), "~/Documents",
+                      ignored_paths=(DB_PATH,), on_batch=print)
+
+    :param engine: SQLAlchemy engine for the catalog database.
+    :param root: The directory to watch.
+    :param seed: Rebuild the catalog with a full scan first.
+    :param workers: Threads used by the seed scan.
+    :param debounce_seconds: Quiet time before a batch is applied.
+    :param max_delay_seconds: Longest time a change waits to be applied.
+    :param ignored_paths: Paths (and their siblings with a suffix, like
+                          SQLite's -wal/-shm files) whose events are ignored.
+    :param stop_event: Set it (from another thread) to stop watching.
+    :param on_batch: Called with the CatalogChangeResult of every batch.
+    :param on_error: Called with the error of every failed batch
+                     (default: a line on stderr).
+    """
+    from watchdog.observers import Observer
+
+    root_directory = os.path.abspath(_validate_root(root))
+    stop_event = stop_event or threading.Event()
+    pending = PendingCatalogChanges(debounce_seconds, max_delay_seconds)
+    handler = CatalogEventHandler(
+        root_directory,
+        pending,
+        ignored_prefixes=tuple(os.path.abspath(path) for path in ignored_paths),
+    )
+    if on_error is None:
+        def on_error(error: OperationalError) -> None:
+            print(f"[watch] Batch failed, will retry: {error}", file=sys.stderr)
+
+    def apply_batch(paths: set[str]) -> bool:
+        """Apply `paths` and rebuild the tree; on failure, queue them again."""
+        try:
+            result = apply_catalog_changes(engine, paths)
+            rebuild_directory_tree(engine, root_directory)
+        except OperationalError as error:
+            on_error(error)
+            for path in paths:
+                pending.add(path)
+            return False
+        if on_batch is not None:
+            on_batch(result)
+        return True
+
+    observer = Observer()
+    observer.schedule(handler, root_directory, recursive=True)
+    observer.start()
+    try:
+        if seed:
+            replace_catalog_from_batches(engine, iter_file_records(root_directory, workers=workers))
+            rebuild_directory_tree(engine, root_directory)
+
+        # Wake up often enough to honour the debounce, but no busier.
+        poll_seconds = min(debounce_seconds, max_delay_seconds) / 2
+        while not stop_event.wait(poll_seconds):
+            paths = pending.take_ready()
+            if paths:
+                apply_batch(paths)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
+
+    # Whatever arrived before the observer stopped.
+    for attempt in range(FINAL_BATCH_ATTEMPTS):
+        paths = pending.take_ready(force=True)
+        if not paths or apply_batch(paths):
+            break
+        if attempt + 1 < FINAL_BATCH_ATTEMPTS:
+            time.sleep(FINAL_BATCH_RETRY_SECONDS)
@@ -0,0 +1,162 @@
+"""
+In this file we prove that the catalog API pages through every matching
+file exactly once with keyset cursors, aggregates like a groupby, and
+answers repeated requests from its ETag / LRU cache until the catalog
+changes.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from shared.database.database import get_sqlite_engine
+from src.catalog_api import (
+    CatalogService,
+    ResponseCache,
+    aggregate_files,
+    catalog_filters,
+    catalog_version,
+    decode_cursor,
+    encode_cursor,
+    query_files_page,
+)
+from src.catalog_store import record_scan, replace_catalog_from_batches
+from src.scanner import build_file_catalog, iter_file_records
+
+
+def _make_tree(tree: Path) -> None:
+    (tree / "photos").mkdir(parents=True)
+    (tree / "docs").mkdir()
+    for index in range(7):
+        (tree / "photos" / f"photo_{index}.jpg").write_bytes(bytes(100 * (index % 3 + 1)))
+    for index in range(5):
+        (tree / "docs" / f"report_{index}.pdf").write_bytes(bytes(50 * (index % 2 + 1)))
+
+
+def _catalog_engine(tmp_path: Path):
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    engine = get_sqlite_engine(tmp_path / "catalog.db")
+    replace_catalog_from_batches(engine, iter_file_records(tree))
+    return engine, tree
+
+
+@pytest.mark.parametrize("sort_by", ["modified_at", "size_bytes", "last_accessed_at", "path"])
+def test_keyset_pages_cover_every_row_once(tmp_path: Path, sort_by: str) -> None:
+    engine, tree = _catalog_engine(tmp_path)
+    filters = catalog_filters(root=str(tree))
+
+    paths: list[str] = []
+    cursor = None
+    while True:
+        page = query_files_page(engine, filters, sort_by=sort_by, limit=5, cursor=cursor)
+        assert len(page["files"]) <= 5
+        paths += [record["path"] for record in page["files"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(paths) == 12
+    assert sorted(paths) == sorted(build_file_catalog(tree)["path"])
+    if sort_by == "size_bytes":
+        sizes = [Path(path).stat().st_size for path in paths]
+        assert sizes == sorted(sizes, reverse=True)
+    assert "T" in page["files"][0]["modified_at"]
+
+
+def test_filters_and_aggregates_match_the_catalog(tmp_path: Path) -> None:
+    engine, tree = _catalog_engine(tmp_path)
+
+    images = query_files_page(engine, catalog_filters(file_types=["image"], search="PHOTO_1"))
+    assert [record["name"] for record in images["files"]] == ["photo_1.jpg"]
+
+    catalog = build_file_catalog(tree)
+    groups = aggregate_files(engine, catalog_filters(root=str(tree)), group_by="file_type")
+    expected = catalog.groupby("file_type", observed=True)["size_bytes"].sum().to_dict()
+    assert {group["file_type"]: group["total_bytes"] for group in groups} == expected
+    assert groups[0]["total_bytes"] >= groups[-1]["total_bytes"]
+
+    with pytest.raises(ValueError):
+        aggregate_files(engine, catalog_filters(), group_by="name; DROP TABLE file_catalog")
+    with pytest.raises(ValueError):
+        query_files_page(engine, catalog_filters(), cursor="not a cursor")
+
+
+def test_cursor_round_trips() -> None:
+    cursor = encode_cursor("2024-01-02 03:04:05.000000", "/a/b c")
+    assert "=" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == ("2024-01-02 03:04:05.000000", "/a/b c")
+    assert decode_cursor(encode_cursor(None, "/x")) == (None, "/x")
+
+
+def test_etag_and_cache_follow_the_catalog_version(tmp_path: Path) -> None:
+    engine, tree = _catalog_engine(tmp_path)
+    service = CatalogService(engine)
+    calls = []
+
+    def produce():
+        calls.append(1)
+        return {"count": 12}
+
+    first = service.respond("/files/count", [("root", str(tree))], None, produce)
+    again = service.respond("/files/count", [("root", str(tree))], None, produce)
+    assert first.status_code == again.status_code == 200
+    assert first.etag == again.etag and again.body == b'{"count": 12}'
+    assert len(calls) == 1 and service.cache.hits == 1
+
+    not_modified = service.respond(
+        "/files/count", [("root", str(tree))], f'W/{first.etag}', produce
+    )
+    assert not_modified.status_code == 304 and not_modified.body == b""
+
+    version = catalog_version(engine)
+    record_scan(engine, "20260101T000000000000Z", tree, 12, tmp_path / "snapshot.parquet")
+    assert catalog_version(engine) != version
+    after_scan = service.respond("/files/count", [("root", str(tree))], first.etag, produce)
+    assert after_scan.status_code == 200 and after_scan.etag != first.etag
+    assert len(calls) == 2
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+
+
+def test_http_endpoints(tmp_path: Path) -> None:
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from src.catalog_api import create_app
+
+    engine, tree = _catalog_engine(tmp_path)
+    client = TestClient(create_app(str(tmp_path / "catalog.db")))
+
+    response = client.get("/files", params={"root": str(tree), "limit": 10, "sort": "path"})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["files"]) == 10 and page["next_cursor"]
+    response = client.get("/files", params={
+        "root": str(tree), "limit": 10, "sort": "path", "cursor": page["next_cursor"],
+    })
+    assert len(response.json()["files"]) == 2 and response.json()["next_cursor"] is None
+
+    response = client.get("/files/count", params={"file_type": ["image", "document"]})
+    assert response.json() == {"count": 12}
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/files/count", params={"file_type": ["image", "document"]},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+    response = client.get("/aggregates", params={"group_by": "extension"})
+    assert {group["extension"] for group in response.json()["groups"]} == {".jpg", ".pdf"}
+    assert client.get("/aggregates", params={"group_by": "path"}).status_code == 400
+    assert client.get("/files", params={"limit": 0}).status_code == 422
+    assert client.get("/scans").json() == {"scans": []}
@@ -0,0 +1,186 @@
+"""
+In this file we prove that the SQL query layer returns the same rows as
+the old in-memory pandas filters, one page at a time.
+"""
+
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.catalog_query import (
+    CatalogFilters,
+    compile_catalog_filters,
+    count_catalog_rows,
+    fuzzy_search_catalog,
+    has_search_index,
+    iter_catalog_query,
+    list_catalog_file_types,
+    query_catalog_page,
+)
+from src.catalog_store import incremental_scan, replace_catalog, search_index_supported
+from src.scanner import build_file_catalog
+
+
+@pytest.fixture
+def catalog_engine(tmp_path: Path):
+    """
+    A SQLite catalog for a small tree: three documents of growing size,
+    one image that was last accessed 400 days ago, and one script.
+    """
+    tree = tmp_path / "tree"
+    (tree / "docs").mkdir(parents=True)
+    for index in range(3):
+        (tree / "docs" / f"report_{index}.pdf").write_bytes(b"x" * (1000 * (index + 1)))
+    (tree / "holiday.jpg").write_bytes(b"x" * 50)
+    (tree / "build.sh").write_text("echo hi")
+
+    old_epoch = (datetime.now() - timedelta(days=400)).timestamp()
+    os.utime(tree / "holiday.jpg", (old_epoch, old_epoch))
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    replace_catalog(engine, build_file_catalog(tree))
+    return engine, tree
+
+
+def test_filters_match_pandas_semantics(catalog_engine) -> None:
+    """
+    Because the sidebar used to filter in pandas, each SQL filter should
+    keep exactly the rows the pandas version kept.
+    """
+    engine, tree = catalog_engine
+
+    def names_for(filters: CatalogFilters) -> list[str]:
+        return sorted(query_catalog_page(engine, filters, limit=100)["name"])
+
+    assert names_for(CatalogFilters(root=str(tree), file_types=["image", "code"])) == [
+        "build.sh", "holiday.jpg"
+    ]
+    assert names_for(CatalogFilters(root=str(tree), minimum_size_bytes=2000)) == [
+        "report_1.pdf", "report_2.pdf"
+    ]
+    assert names_for(CatalogFilters(root=str(tree), stale_days=365)) == ["holiday.jpg"]
+    assert names_for(CatalogFilters(root=str(tree), search_text="DOCS")) == [
+        "report_0.pdf", "report_1.pdf", "report_2.pdf"
+    ]
+    assert names_for(CatalogFilters(root=str(tree), file_types=[])) == []
+    assert list_catalog_file_types(engine, str(tree)) == ["code", "document", "image"]
+
+
+def test_pages_cover_all_rows_in_sort_order(catalog_engine) -> None:
+    """
+    Because the UI pages through results with LIMIT/OFFSET, consecutive
+    pages must neither skip nor repeat rows, and the count must agree.
+    """
+    engine, tree = catalog_engine
+    filters = CatalogFilters(root=str(tree))
+
+    pages = [
+        query_catalog_page(engine, filters, limit=2, offset=offset, sort_by="size_bytes")
+        for offset in (0, 2, 4)
+    ]
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    sizes = [size for page in pages for size in page["size_bytes"]]
+    assert sizes == sorted(sizes, reverse=True)
+    assert count_catalog_rows(engine, filters) == 5
+    assert pages[0]["modified_at"].dtype == "datetime64[ns]"
+
+
+def test_search_text_is_a_parameter_not_sql(catalog_engine) -> None:
+    """Because search text comes from the user, it must never be run as SQL."""
+    engine, tree = catalog_engine
+
+    page = query_catalog_page(
+        engine, CatalogFilters(root=str(tree), search_text="'; DROP TABLE file_catalog; --")
+    )
+
+    assert page.empty
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM file_catalog")).scalar_one() == 5
+
+
+def test_iter_catalog_query_streams_every_matching_row(catalog_engine) -> None:
+    """Because exports stream in batches, every matching row must appear exactly once."""
+    engine, tree = catalog_engine
+    filters = CatalogFilters(root=str(tree), file_types=["document"])
+
+    batches = list(iter_catalog_query(engine, filters, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert sorted(name for batch in batches for name in batch["name"]) == [
+        "report_0.pdf", "report_1.pdf", "report_2.pdf"
+    ]
+
+
+def _requires_search_index(engine) -> None:
+    with engine.connect() as connection:
+        if not search_index_supported(connection):
+            pytest.skip("this SQLite build has no FTS5 trigram tokenizer")
+
+
+def test_indexed_search_matches_substring_search(catalog_engine) -> None:
+    """
+    Because the trigram index replaces instr() on every row, it must find
+    exactly the rows the plain substring search finds.
+    """
+    engine, tree = catalog_engine
+    _requires_search_index(engine)
+    assert has_search_index(engine)
+
+    for search_text in ["DOCS", "port_1", ".pdf", "holi", '"quoted"']:
+        filters = CatalogFilters(root=str(tree), search_text=search_text)
+        where_clause, _ = compile_catalog_filters(filters, use_search_index=True)
+        assert "MATCH" in where_clause
+
+        indexed = sorted(query_catalog_page(engine, filters)["name"])
+        with engine.connect() as connection:
+            scan_clause, parameters = compile_catalog_filters(filters)
+            scanned = sorted(
+                name for (name,) in connection.execute(
+                    text(f"SELECT name FROM file_catalog WHERE {scan_clause}"), parameters
+                )
+            )
+        assert indexed == scanned
+
+
+def test_fuzzy_search_tolerates_typos(catalog_engine) -> None:
+    """Because people mistype names, "reprot" should still find the reports first."""
+    engine, tree = catalog_engine
+    _requires_search_index(engine)
+
+    matches = fuzzy_search_catalog(engine, CatalogFilters(root=str(tree), search_text="reprot"))
+
+    assert sorted(matches["name"]) == ["report_0.pdf", "report_1.pdf", "report_2.pdf"]
+    assert matches["match_score"].between(0.6, 1.0).all()
+
+    only_big = fuzzy_search_catalog(
+        engine, CatalogFilters(root=str(tree), search_text="reprot", minimum_size_bytes=3000)
+    )
+    assert list(only_big["name"]) == ["report_2.pdf"]
+
+
+def test_search_index_follows_incremental_scans(catalog_engine) -> None:
+    """
+    Because the index is kept in sync by triggers, files added or removed
+    by an incremental rescan must show up in (or vanish from) searches.
+    """
+    engine, tree = catalog_engine
+    _requires_search_index(engine)
+
+    (tree / "docs" / "report_0.pdf").unlink()
+    (tree / "docs" / "invoice_march.pdf").write_bytes(b"x")
+    # Move the folder mtime far away, so the scan cannot trust it.
+    os.utime(tree / "docs", (1_000_000, 1_000_000))
+    incremental_scan(engine, tree)
+
+    def names_for(search_text: str) -> list[str]:
+        return sorted(query_catalog_page(
+            engine, CatalogFilters(root=str(tree), search_text=search_text)
+        )["name"])
+
+    assert names_for("invoice") == ["invoice_march.pdf"]
+    assert names_for("report_0") == []
+    assert names_for("report") == ["report_1.pdf", "report_2.pdf"]
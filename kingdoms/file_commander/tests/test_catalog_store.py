@@ -0,0 +1,213 @@
+"""
+In this file we prove that the SQLite catalog store can rescan a folder
+tree incrementally: unchanged folders are skipped, and only the rows for
+added, modified and deleted files are written.
+"""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from src.catalog_store import (
+    apply_catalog_changes,
+    apply_catalog_moves,
+    incremental_scan,
+    list_scans,
+    load_catalog,
+    record_scan,
+    replace_catalog,
+    replace_catalog_from_batches,
+)
+from src.scanner import build_file_catalog, iter_file_records
+
+# A fixed point in the past, so the folders are not "racy" (modified in the
+# last couple of seconds) and the incremental scan is allowed to trust them.
+PAST_MTIME_NS = 1_600_000_000 * 1_000_000_000
+
+
+def _make_tree(base_directory: Path) -> None:
+    """Create a small tree with two subfolders and age every folder's mtime."""
+    (base_directory / "photos").mkdir()
+    (base_directory / "photos" / "cat.jpg").write_text("meow")
+    (base_directory / "docs").mkdir()
+    (base_directory / "docs" / "notes.txt").write_text("hello")
+    (base_directory / "top.csv").write_text("a,b")
+    _age_directories(base_directory)
+
+
+def _age_directories(base_directory: Path) -> None:
+    """Push every folder's mtime into the past (files keep their own mtimes)."""
+    for directory, _subdirectories, _files in os.walk(base_directory):
+        os.utime(directory, ns=(PAST_MTIME_NS, PAST_MTIME_NS))
+
+
+def test_incremental_scan_first_run_matches_full_scan(tmp_path: Path) -> None:
+    """
+    Because the first incremental run has nothing to compare against, it
+    should list every folder and store the same rows a full scan would.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+
+    result = incremental_scan(engine, tree)
+
+    assert result.directories_listed == 3
+    assert result.files_inserted == 3
+    stored_catalog = load_catalog(engine, tree)
+    expected_catalog = build_file_catalog(tree)
+    assert sorted(stored_catalog["path"]) == sorted(expected_catalog["path"])
+    assert isinstance(stored_catalog["file_type"].dtype, pd.CategoricalDtype)
+    assert stored_catalog["modified_at"].dtype == "datetime64[ns]"
+
+
+def test_incremental_scan_skips_unchanged_and_applies_changes(tmp_path: Path) -> None:
+    """
+    Because the point of the incremental mode is to do O(changes) work, we
+    scan once, then add, delete and remove a folder, and check that the
+    second run only listed the folders that changed and only wrote the
+    affected rows.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    incremental_scan(engine, tree)
+
+    # Nothing changed: every folder is skipped.
+    unchanged_result = incremental_scan(engine, tree)
+    assert unchanged_result.directories_listed == 0
+    assert unchanged_result.directories_skipped == 3
+
+    # Add a file to docs/, delete the photos/ folder entirely.
+    (tree / "docs" / "todo.md").write_text("buy milk")
+    (tree / "photos" / "cat.jpg").unlink()
+    (tree / "photos").rmdir()
+    # The folders we touched now have a *different* (but still old) mtime.
+    os.utime(tree / "docs", ns=(PAST_MTIME_NS + 10**9, PAST_MTIME_NS + 10**9))
+    os.utime(tree, ns=(PAST_MTIME_NS + 10**9, PAST_MTIME_NS + 10**9))
+
+    changed_result = incremental_scan(engine, tree)
+
+    assert changed_result.directories_listed == 2  # root and docs/
+    assert changed_result.directories_removed == 1
+    assert changed_result.files_inserted == 1
+    stored_paths = sorted(load_catalog(engine, tree)["path"])
+    assert stored_paths == sorted(build_file_catalog(tree)["path"])
+
+
+def test_incremental_scan_verify_files_detects_in_place_edits(tmp_path: Path) -> None:
+    """
+    Because editing a file does not touch its folder's mtime, only the
+    verify mode can see it; the row should then be updated, not duplicated.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    incremental_scan(engine, tree)
+
+    (tree / "top.csv").write_text("a,b\n1,2\n")
+
+    assert incremental_scan(engine, tree).files_updated == 0
+    verify_result = incremental_scan(engine, tree, verify_files=True)
+
+    assert verify_result.files_updated == 1
+    stored_catalog = load_catalog(engine, tree)
+    top_rows = stored_catalog.loc[stored_catalog["name"] == "top.csv"]
+    assert len(top_rows) == 1
+    assert top_rows.iloc[0]["size_bytes"] == len("a,b\n1,2\n")
+
+
+def test_replace_catalog_resets_incremental_index(tmp_path: Path) -> None:
+    """
+    Because a full scan rewrites the table, the next incremental scan must
+    not trust the old index and should list everything again.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    incremental_scan(engine, tree)
+
+    replace_catalog(engine, build_file_catalog(tree))
+    result = incremental_scan(engine, tree)
+
+    assert result.directories_listed == 3
+    assert len(load_catalog(engine, tree)) == 3
+
+
+def test_replace_catalog_from_batches_streams_every_batch(tmp_path: Path) -> None:
+    """
+    Because the batch writer must not drop or duplicate rows at batch
+    boundaries, we write a tree in batches of one row and read it back.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+
+    report = replace_catalog_from_batches(engine, iter_file_records(tree, batch_size=1))
+
+    assert report.rows_written == 3
+    assert sorted(load_catalog(engine, tree)["path"]) == sorted(build_file_catalog(tree)["path"])
+
+
+def test_apply_catalog_moves_updates_rows_in_place(tmp_path: Path) -> None:
+    """
+    Because a move only changes a file's location, its catalog row should
+    follow it, and the next incremental scan should find nothing to add.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    incremental_scan(engine, tree)
+
+    old_path = str(tree / "top.csv")
+    new_path = str(tree / "docs" / "top.csv")
+    os.rename(old_path, new_path)
+
+    assert apply_catalog_moves(engine, [(old_path, new_path)]) == 1
+    stored_catalog = load_catalog(engine, tree).set_index("path")
+    assert old_path not in stored_catalog.index
+    assert stored_catalog.loc[new_path, "directory"] == str(tree / "docs")
+
+    rescan_result = incremental_scan(engine, tree)
+    assert (rescan_result.files_inserted, rescan_result.files_deleted) == (0, 0)
+
+
+def test_catalog_store_works_on_postgresql(tmp_path: Path, postgres_engine) -> None:
+    """
+    Because DATABASE_URL can point the app at PostgreSQL, a full load,
+    recording a scan (twice, under one id), incremental rescans and
+    watcher updates must all run there too, with subtree queries that
+    find exactly the rows under a folder.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    (tmp_path / "tree0").mkdir()
+    (tmp_path / "tree0" / "neighbour.txt").write_text("not under tree/")
+
+    replace_catalog_from_batches(postgres_engine, iter_file_records(tmp_path / "tree0"))
+    record_scan(postgres_engine, "scan-1", tree, 1, tmp_path / "one.parquet")
+    record_scan(postgres_engine, "scan-1", tree, 3, tmp_path / "one.parquet")
+    assert list_scans(postgres_engine, tree)["row_count"].tolist() == [3]
+
+    incremental_scan(postgres_engine, tree)
+    (tree / "docs" / "todo.md").write_text("buy milk")
+    os.utime(tree / "docs", ns=(PAST_MTIME_NS + 10**9, PAST_MTIME_NS + 10**9))
+    result = incremental_scan(postgres_engine, tree)
+    assert result.files_inserted == 1
+    assert sorted(load_catalog(postgres_engine, tree)["path"]) == sorted(
+        build_file_catalog(tree)["path"]
+    )
+
+    (tree / "docs" / "todo.md").write_text("buy oat milk")
+    change = apply_catalog_changes(postgres_engine, [str(tree / "docs" / "todo.md")])
+    assert change.files_written == 1
+    assert len(load_catalog(postgres_engine, tmp_path / "tree0")) == 1
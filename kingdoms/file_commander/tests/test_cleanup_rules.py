@@ -0,0 +1,222 @@
+"""
+In this file we prove that cleanup policies parse from JSON and YAML, tag
+each file with every rule it matches, and give the same files and totals
+whether they are evaluated as pandas masks or as one SQL query.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shared.database.database import get_sqlite_engine
+from src.catalog_store import replace_catalog
+from src.cleanup_rules import (
+    CLEANUP_MATCHES_TABLE,
+    CleanupRule,
+    compile_cleanup_rules,
+    evaluate_cleanup_rules,
+    evaluate_cleanup_rules_sql,
+    load_cleanup_rules,
+    parse_cleanup_rules,
+    parse_size,
+    store_cleanup_report,
+)
+from src.duplicates import find_duplicates
+from src.scanner import build_file_catalog
+
+NOW = datetime(2026, 6, 1, 12, 0)
+
+POLICY = {
+    "rules": [
+        {"name": "old-installers", "file_type": "installer", "not_modified_days": 90},
+        {"name": "forgotten-videos", "file_type": "video", "min_size": "2 KB",
+         "not_accessed_days": 365},
+        {"name": "duplicate-downloads", "file_type": "archive", "directory": "DOWNLOADS",
+         "duplicate": True},
+        {"name": "big-downloads", "directory": "DOWNLOADS", "min_size": 1024},
+        {"name": "setup-files", "name_glob": ["setup*", "*.tmp"], "extension": ["DMG", ".tmp"]},
+    ]
+}
+
+
+def _touch(path: Path, size: int, days_old: float, contents: bytes = b"") -> None:
+    path.write_bytes(contents or bytes(size))
+    timestamp = (NOW - timedelta(days=days_old)).timestamp()
+    os.utime(path, (timestamp, timestamp))
+
+
+def _make_tree(tree: Path) -> Path:
+    downloads = tree / "Downloads"
+    videos = tree / "Videos"
+    downloads.mkdir(parents=True)
+    videos.mkdir()
+    _touch(downloads / "setup.dmg", 4096, days_old=200)
+    _touch(downloads / "fresh.dmg", 10, days_old=5)
+    _touch(downloads / "a.zip", 0, days_old=1, contents=b"same archive" * 100)
+    _touch(downloads / "a copy.zip", 0, days_old=1, contents=b"same archive" * 100)
+    _touch(downloads / "unique.zip", 0, days_old=1, contents=b"different")
+    _touch(videos / "holiday.mp4", 3000, days_old=400)
+    _touch(videos / "clip.mp4", 100, days_old=400)
+    _touch(videos / "new.mp4", 3000, days_old=3)
+    _touch(tree / "setup.tmp", 5, days_old=1)
+    return tree
+
+
+def _policy(tree: Path) -> list[CleanupRule]:
+    document = json.loads(json.dumps(POLICY).replace("DOWNLOADS", str(tree / "Downloads")))
+    return parse_cleanup_rules(document)
+
+
+def _tags(report) -> dict[str, str]:
+    files = report.files
+    return {Path(path).name: rules for path, rules in zip(files["path"], files["rules"])}
+
+
+def test_rules_tag_files_the_same_in_pandas_and_sql(tmp_path: Path) -> None:
+    tree = _make_tree(tmp_path / "tree")
+    rules = _policy(tree)
+    catalog = build_file_catalog(tree)
+    engine = get_sqlite_engine(tmp_path / "catalog.db")
+    replace_catalog(engine, catalog)
+    duplicates = find_duplicates(catalog, engine, workers=1)
+
+    report = evaluate_cleanup_rules(
+        catalog, rules, now=NOW, duplicate_paths=duplicates.files["path"]
+    )
+    assert _tags(report) == {
+        "setup.dmg": "old-installers,big-downloads,setup-files",
+        "holiday.mp4": "forgotten-videos",
+        "a.zip": "duplicate-downloads,big-downloads",
+        "a copy.zip": "duplicate-downloads,big-downloads",
+        "setup.tmp": "setup-files",
+    }
+    assert report.rules["files"].tolist() == [1, 1, 2, 3, 2]
+    assert report.rules["bytes"].tolist() == [4096, 3000, 2400, 4096 + 2400, 4096 + 5]
+    assert report.tagged_bytes == 4096 + 3000 + 2400 + 5
+    assert report.rows_scanned == len(catalog)
+
+    sql_report = evaluate_cleanup_rules_sql(engine, rules, now=NOW)
+    assert _tags(sql_report) == _tags(report)
+    pd.testing.assert_frame_equal(sql_report.rules, report.rules)
+    assert sql_report.rows_scanned == len(catalog)
+
+    store_cleanup_report(engine, sql_report)
+    stored = pd.read_sql_table(CLEANUP_MATCHES_TABLE, con=engine)
+    assert sorted(stored["path"]) == sorted(report.files["path"])
+
+
+def test_duplicate_rules_need_duplicate_results(tmp_path: Path) -> None:
+    tree = _make_tree(tmp_path / "tree")
+    rules = _policy(tree)
+    catalog = build_file_catalog(tree)
+    engine = get_sqlite_engine(tmp_path / "catalog.db")
+    replace_catalog(engine, catalog)
+
+    with pytest.raises(ValueError, match="duplicate"):
+        evaluate_cleanup_rules(catalog, rules, now=NOW)
+    with pytest.raises(ValueError, match="duplicate"):
+        evaluate_cleanup_rules_sql(engine, rules, now=NOW)
+
+    without_duplicates = [rule for rule in rules if not rule.duplicates_only]
+    report = evaluate_cleanup_rules_sql(engine, without_duplicates, now=NOW)
+    assert "a.zip" in _tags(report)
+
+
+def test_many_rules_match_a_per_rule_loop() -> None:
+    """
+    Because shared masks and categorical shortcuts are easy to get wrong,
+    we check 50 random rules on a synthetic catalog against evaluating
+    each rule on its own with plain pandas.
+    """
+    generator = np.random.default_rng(7)
+    row_count = 20_000
+    file_types = ["image", "video", "archive", "installer", "document", "other"]
+    extensions = [".jpg", ".JPG", ".mp4", ".zip", ".dmg", ".pdf", ""]
+    directories = [f"/data/d{index}" for index in range(40)] + ["/data/d1/sub", "/data/d10"]
+    catalog = pd.DataFrame({
+        "path": [f"/data/file_{index}" for index in range(row_count)],
+        "directory": pd.Categorical(generator.choice(directories, row_count)),
+        "name": [f"file_{index}" for index in range(row_count)],
+        "extension": pd.Categorical(generator.choice(extensions, row_count)),
+        "file_type": pd.Categorical(generator.choice(file_types, row_count)),
+        "size_bytes": generator.integers(0, 10_000_000, row_count),
+        "modified_at": NOW - pd.to_timedelta(generator.integers(0, 800, row_count), unit="D"),
+        "last_accessed_at": NOW - pd.to_timedelta(generator.integers(0, 800, row_count), unit="D"),
+    })
+
+    rules = []
+    for index in range(50):
+        rule = {"name": f"rule-{index}", "file_type": list(generator.choice(file_types, 2))}
+        if index % 2:
+            rule["min_size"] = int(generator.integers(0, 5_000_000))
+        if index % 3 == 0:
+            rule["not_accessed_days"] = int(generator.integers(0, 700))
+        if index % 5 == 0:
+            rule["directory"] = str(generator.choice(["/data/d1", "/data/d10"]))
+        if index % 7 == 0:
+            rule["extension"] = ["jpg"]
+        rules.append(rule)
+    report = evaluate_cleanup_rules(catalog, parse_cleanup_rules(rules), now=NOW)
+
+    expected_files = []
+    for rule in rules:
+        mask = catalog["file_type"].isin(rule["file_type"])
+        mask &= catalog["size_bytes"] >= rule.get("min_size", 0)
+        if "not_accessed_days" in rule:
+            mask &= catalog["last_accessed_at"] < NOW - timedelta(days=rule["not_accessed_days"])
+        if "directory" in rule:
+            directory = catalog["directory"].astype(str)
+            under = directory.str.startswith(rule["directory"] + "/")
+            mask &= (directory == rule["directory"]) | under
+        if "extension" in rule:
+            mask &= catalog["extension"].astype(str).str.lower() == ".jpg"
+        expected_files.append(int(mask.sum()))
+    assert report.rules["files"].tolist() == expected_files
+    assert report.files["rules"].str.split(",").str.len().sum() == sum(expected_files)
+
+
+def test_policy_files_and_validation(tmp_path: Path) -> None:
+    assert parse_size("1 GB") == 1024 ** 3
+    assert parse_size("1.5kb") == 1536
+    assert parse_size(10) == 10
+    with pytest.raises(ValueError):
+        parse_size("ten gigs")
+
+    policy_path = tmp_path / "policy.json"
+    policy_path.write_text(json.dumps(POLICY))
+    assert [rule.name for rule in load_cleanup_rules(policy_path)][:2] == [
+        "old-installers", "forgotten-videos",
+    ]
+
+    yaml = pytest.importorskip("yaml")
+    yaml_path = tmp_path / "policy.yaml"
+    yaml_path.write_text(yaml.safe_dump(POLICY))
+    assert load_cleanup_rules(yaml_path) == load_cleanup_rules(policy_path)
+
+    for bad_policy in [
+        [{"name": "everything"}],
+        [{"name": "typo", "file_typ": "video"}],
+        [{"name": "twice", "file_type": "video"}, {"name": "twice", "file_type": "image"}],
+        [{"name": "size", "min_size": "lots"}],
+        {"policies": []},
+    ]:
+        with pytest.raises(ValueError):
+            parse_cleanup_rules(bad_policy)
+
+
+def test_compiled_sql_binds_shared_conditions_once() -> None:
+    rules = parse_cleanup_rules([
+        {"name": "a", "file_type": "video", "not_accessed_days": 30},
+        {"name": "b", "file_type": "video", "min_size": 5},
+    ])
+    sql, parameters = compile_cleanup_rules(rules, NOW)
+    assert list(parameters.values()).count("video") == 1
+    assert sql.count("FROM file_catalog") == 1
+    with pytest.raises(ValueError):
+        compile_cleanup_rules(parse_cleanup_rules([{"name": "g", "name_glob": "*.iso"}]),
+                              NOW, dialect="postgresql")
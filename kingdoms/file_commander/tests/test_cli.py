@@ -0,0 +1,182 @@
+"""
+In this file we prove that the `file_commander` command line streams a
+scan as NDJSON or CSV, answers queries and exports from the saved catalog,
+finds duplicates, and starts without importing pandas or SQLAlchemy.
+"""
+
+import csv
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from src.cli import cli
+from src.scanner import CATALOG_COLUMNS, build_file_catalog
+
+FILE_COMMANDER_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _invoke(arguments: list[str]):
+    # Rows go to stdout and progress to stderr; keep them apart like a pipe would.
+    return CliRunner(mix_stderr=False).invoke(cli, arguments)
+
+
+def _make_tree(tree: Path) -> None:
+    (tree / "photos").mkdir(parents=True)
+    (tree / "photos" / "beach.jpg").write_bytes(bytes(3000))
+    (tree / "photos" / "beach copy.jpg").write_bytes(bytes(3000))
+    (tree / "notes.txt").write_text("hello")
+    (tree / "script.py").write_text("print('hi')")
+
+
+def test_scan_streams_the_same_rows_as_the_catalog(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+
+    result = _invoke(["scan", str(tree)])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+
+    catalog = build_file_catalog(tree)
+    assert [row["path"] for row in rows] == list(catalog["path"])
+    assert list(rows[0]) == CATALOG_COLUMNS
+    assert [row["size_bytes"] for row in rows] == list(catalog["size_bytes"])
+    assert [row["file_type"] for row in rows] == list(catalog["file_type"].astype(str))
+    # Same local wall-clock time (the catalog keeps nanoseconds, NDJSON microseconds).
+    assert [row["modified_at"][:19] for row in rows] == [
+        timestamp.isoformat()[:19] for timestamp in catalog["modified_at"]
+    ]
+
+    result = _invoke(["scan", str(tree), "--format", "csv", "--workers", "2"])
+    csv_rows = list(csv.DictReader(io.StringIO(result.stdout)))
+    assert [row["path"] for row in csv_rows] == list(catalog["path"])
+
+
+def test_query_and_export_read_the_saved_catalog(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    db_path = tmp_path / "catalog.db"
+
+    result = _invoke(["scan", str(tree), "--db", str(db_path)])
+    assert result.exit_code == 0, result.output
+    assert len(result.stdout.splitlines()) == 4
+
+    result = _invoke(["query", "--db", str(db_path), "--type", "image", "--format", "ndjson"])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    assert sorted(row["name"] for row in rows) == ["beach copy.jpg", "beach.jpg"]
+    assert "T" in rows[0]["modified_at"]
+
+    result = _invoke(["query", "--db", str(db_path), "--search", "NOTES", "--root", str(tree)])
+    assert result.exit_code == 0, result.output
+    assert str(tree / "notes.txt") in result.stdout
+    assert "5 B" in result.stdout
+
+    export_path = tmp_path / "export.csv"
+    result = _invoke([
+        "export", "--db", str(db_path), "--sort", "path", "--output", str(export_path),
+    ])
+    assert result.exit_code == 0, result.output
+    exported = list(csv.DictReader(export_path.open(encoding="utf-8")))
+    assert [row["path"] for row in exported] == sorted(row["path"] for row in exported)
+    assert len(exported) == 4
+
+    result = _invoke(["query", "--db", str(tmp_path / "missing.db")])
+    assert result.exit_code != 0
+    assert "No catalog database" in result.stderr
+
+
+def test_scan_sniff_types_files_by_their_contents(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    (tree / "scan_0001").write_bytes(b"%PDF-1.4\n" + bytes(100))
+    db_path = tmp_path / "catalog.db"
+
+    result = _invoke(["scan", str(tree), "--sniff"])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.stdout.splitlines()]
+    file_types = {row["name"]: row["file_type"] for row in rows}
+    assert file_types["scan_0001"] == "document" and file_types["beach.jpg"] == "image"
+    assert "1 typed by contents" in result.stderr
+
+    result = _invoke(["scan", str(tree), "--db", str(db_path), "--sniff"])
+    assert result.exit_code == 0, result.output
+    result = _invoke(["query", "--db", str(db_path), "--type", "document", "--format", "ndjson"])
+    names = sorted(json.loads(line)["name"] for line in result.stdout.splitlines())
+    assert names == ["notes.txt", "scan_0001"]
+
+
+def test_dupes_lists_identical_files(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    db_path = tmp_path / "catalog.db"
+    _invoke(["scan", str(tree), "--db", str(db_path)])
+
+    result = _invoke(["dupes", str(tree), "--db", str(db_path), "--workers", "1"])
+    assert result.exit_code == 0, result.output
+    assert "1 groups, 2 files" in result.output
+    assert str(tree / "photos" / "beach copy.jpg") in result.output
+
+    result = _invoke(["dupes", str(tmp_path / "elsewhere"), "--db", str(db_path)])
+    assert result.exit_code != 0
+    assert "No cataloged files" in result.stderr
+
+
+def test_help_query_and_scan_do_not_import_pandas(tmp_path: Path) -> None:
+    """
+    Because startup time is the point of the light commands, we run them
+    in a fresh interpreter and check that the DataFrame stack never loads.
+    """
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    db_path = tmp_path / "catalog.db"
+    _invoke(["scan", str(tree), "--db", str(db_path)])
+
+    script = (
+        "import sys\n"
+        "from src.cli import cli\n"
+        "for arguments in sys.argv[1:]:\n"
+        "    try:\n"
+        "        cli.main(arguments.split('|'), standalone_mode=False)\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        "heavy = sorted({'pandas', 'numpy', 'sqlalchemy'} & set(sys.modules))\n"
+        "print('HEAVY', heavy, file=sys.stderr)\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script, "--help", f"query|--db|{db_path}", f"scan|{tree}"],
+        cwd=FILE_COMMANDER_ROOT, capture_output=True, text=True, check=True,
+    )
+    assert "HEAVY []" in completed.stderr
+    assert str(tree / "notes.txt") in completed.stdout
+
+
+def test_cleanup_reports_and_tags_files(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    db_path = tmp_path / "catalog.db"
+    _invoke(["scan", str(tree), "--db", str(db_path)])
+    policy_path = tmp_path / "policy.json"
+    policy_path.write_text(json.dumps({"rules": [
+        {"name": "big-images", "file_type": "image", "min_size": "2 KB"},
+        {"name": "beach", "name_glob": "beach*"},
+        {"name": "videos", "file_type": "video"},
+    ]}))
+
+    result = _invoke(["cleanup", str(policy_path), "--db", str(db_path), "--output", "-"])
+    assert result.exit_code == 0, result.output
+    tagged = list(csv.DictReader(io.StringIO(result.stdout)))
+    assert {Path(row["path"]).name: row["rules"] for row in tagged} == {
+        "beach.jpg": "big-images,beach",
+        "beach copy.jpg": "big-images,beach",
+    }
+    assert "3 rules over 4 files: 2 files tagged" in result.stderr
+    assert "big-images" in result.stderr
+
+    policy_path.write_text(json.dumps([{"name": "dupes", "duplicate": True}]))
+    result = _invoke(["cleanup", str(policy_path), "--db", str(db_path)])
+    assert result.exit_code != 0
+    assert "dupes" in result.stderr
@@ -0,0 +1,86 @@
+"""
+In this file we prove that the compact catalog keeps every value of the
+regular catalog (only timestamps lose their sub-second part) and that it
+really is smaller.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.compact_catalog import (
+    build_compact_catalog,
+    catalog_memory_report,
+    catalog_paths,
+    compact_catalog,
+    expand_catalog,
+)
+from src.scanner import build_file_catalog
+
+
+def _make_tree(base_directory: Path) -> None:
+    for folder in ("docs", "photos/2024"):
+        (base_directory / folder).mkdir(parents=True)
+    for index in range(4):
+        (base_directory / "photos" / "2024" / f"img_{index}.jpg").write_bytes(bytes(10 * index))
+    (base_directory / "docs" / "notes.txt").write_text("hello")
+    (base_directory / "README").write_text("top level")
+
+
+def test_compact_catalog_round_trips(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    catalog = build_file_catalog(tmp_path)
+
+    compact = build_compact_catalog(tmp_path, batch_size=2)
+    assert "path" not in compact.columns
+    assert compact["modified_at"].dtype == np.uint32
+    assert compact["directory"].array.codes.dtype.itemsize <= 4
+
+    expanded = expand_catalog(compact).sort_values("path").reset_index(drop=True)
+    expected = catalog.sort_values("path").reset_index(drop=True)
+    assert list(expanded.columns) == list(expected.columns)
+    assert list(expanded["path"]) == list(expected["path"])
+    assert list(expanded["size_bytes"]) == list(expected["size_bytes"])
+    assert (expanded["modified_at"] == expected["modified_at"].dt.floor("s")).all()
+
+
+def test_catalog_paths_handles_the_filesystem_root() -> None:
+    compact = compact_catalog(pd.DataFrame({
+        "path": ["/a.txt", "/data/b.txt"],
+        "directory": pd.Categorical(["/", "/data"]),
+        "name": ["a.txt", "b.txt"],
+        "extension": pd.Categorical([".txt", ".txt"]),
+        "file_type": pd.Categorical(["document", "document"]),
+        "size_bytes": [1, 2],
+        "created_at": pd.to_datetime([0, 0], unit="s"),
+        "modified_at": pd.to_datetime([0, 0], unit="s"),
+        "last_accessed_at": pd.to_datetime([0, 0], unit="s"),
+    }))
+    assert list(catalog_paths(compact)) == ["/a.txt", "/data/b.txt"]
+    assert list(catalog_paths(compact.iloc[1:])) == ["/data/b.txt"]
+
+
+def test_memory_report_shows_the_compact_form_is_smaller() -> None:
+    row_count = 20_000
+    directories = np.array([f"/data/projects/folder_{index}" for index in range(200)])
+    directory_codes = np.arange(row_count) % 200
+    names = [f"file_{index}.txt" for index in range(row_count)]
+    catalog = pd.DataFrame({
+        "path": [f"{directories[code]}/{name}" for code, name in zip(directory_codes, names)],
+        "directory": pd.Categorical(directories[directory_codes]),
+        "name": names,
+        "extension": pd.Categorical([".txt"] * row_count),
+        "file_type": pd.Categorical(["document"] * row_count),
+        "size_bytes": np.arange(row_count),
+        "created_at": pd.to_datetime(np.full(row_count, 1.6e9), unit="s"),
+        "modified_at": pd.to_datetime(np.full(row_count, 1.6e9), unit="s"),
+        "last_accessed_at": pd.to_datetime(np.full(row_count, 1.6e9), unit="s"),
+    })
+
+    regular_report = catalog_memory_report(catalog)
+    compact_report = catalog_memory_report(compact_catalog(catalog))
+
+    assert list(regular_report.columns) == ["column", "dtype", "bytes", "bytes_per_row", "share"]
+    assert abs(regular_report["share"].sum() - 1) < 1e-9
+    assert compact_report["bytes"].sum() < regular_report["bytes"].sum() / 3
@@ -0,0 +1,93 @@
+"""
+In this file we prove that content sniffing recognises common formats
+from their first bytes, refines "other" rows of a catalog, and caches its
+answers so a second run reads nothing.
+"""
+
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from src.content_types import (
+    SNIFF_BYTES,
+    classify_by_content,
+    detect_content_type,
+    ensure_content_type_cache,
+    lookup_content_types,
+    store_content_types,
+)
+from src.scanner import build_file_catalog
+
+
+def test_detect_content_type_signatures() -> None:
+    """Because the extension may lie, the magic bytes decide."""
+    assert detect_content_type(b"%PDF-1.7\n...") == "pdf"
+    assert detect_content_type(b"\x89PNG\r\n\x1a\n\x00\x00") == "png"
+    assert detect_content_type(b"\xff\xd8\xff\xe0\x00\x10JFIF") == "jpeg"
+    assert detect_content_type(b"SQLite format 3\x00" + b"\x10\x00") == "sqlite"
+    assert detect_content_type(b"\x00\x00\x00\x18ftypisom\x00\x00") == "mp4"
+    assert detect_content_type(b"\x00\x00\x00\x18ftypM4A \x00\x00") == "m4a"
+    assert detect_content_type(b"RIFF\x24\x00\x00\x00WAVEfmt ") == "wav"
+    docx_header = b"PK\x03\x04" + bytes(26) + b"[Content_Types].xml"
+    assert detect_content_type(docx_header) == "ooxml"
+    assert detect_content_type(b"PK\x03\x04" + bytes(26) + b"notes.txt") == "zip"
+    assert detect_content_type(bytes(257) + b"ustar\x0000") == "tar"
+    assert detect_content_type("plain text, café".encode("utf-8")) == "text"
+    assert detect_content_type(b"\x00\x01\x02\xfe\xff binary") is None
+    assert detect_content_type(b"") is None
+
+
+def test_classify_by_content_refines_other_and_uses_cache(tmp_path: Path) -> None:
+    """
+    Because only "other" rows are sniffed by default, a mislabeled-but-known
+    extension keeps its type, extensionless files get their real one, and
+    the second run is answered from the cache.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "scan_0001").write_bytes(b"%PDF-1.4\n" + bytes(2000))
+    (tree / "IMG_0001").write_bytes(b"\xff\xd8\xff\xe0" + bytes(100))
+    (tree / "README").write_text("hello\n")
+    (tree / "blob.bin").write_bytes(b"\x00\x01\x02\x03")
+    (tree / "photo.jpg").write_bytes(b"%PDF-1.4\n")
+    catalog = build_file_catalog(tree)
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+
+    report = classify_by_content(catalog, engine, workers=2)
+
+    file_types = dict(zip(catalog["name"], report.file_types))
+    assert file_types == {
+        "scan_0001": "document",
+        "IMG_0001": "image",
+        "README": "document",
+        "blob.bin": "other",
+        "photo.jpg": "image",
+    }
+    assert report.files_considered == 4 and report.files_read == 4
+    assert report.bytes_read == SNIFF_BYTES + 104 + 6 + 4
+    assert report.content_types[str(tree / "scan_0001")] == "pdf"
+
+    second_report = classify_by_content(catalog, engine, workers=2)
+
+    assert second_report.files_read == 0
+    assert second_report.cache.hits == 4
+    assert list(second_report.file_types) == list(report.file_types)
+
+
+def test_content_type_cache_works_on_postgresql(postgres_engine) -> None:
+    """
+    Because the app hands the get_engine engine to the sniffing stage, the
+    cache must take 64-bit keys and upsert on PostgreSQL too, replacing
+    older versions of the same (device, inode).
+    """
+    ensure_content_type_cache(postgres_engine)
+    ensure_content_type_cache(postgres_engine)
+    keys = [(2**62, inode, 10, 1_700_000_000 * 10**9) for inode in range(3)]
+    store_content_types(postgres_engine, {key: "pdf" for key in keys})
+    store_content_types(postgres_engine, {keys[0]: "png"})
+    newer_key = (2**62, 1, 20, 1_800_000_000 * 10**9)
+    store_content_types(postgres_engine, {newer_key: "zip"})
+
+    assert lookup_content_types(postgres_engine, keys + [newer_key, keys[0]]) == {
+        keys[0]: "png", keys[2]: "pdf", newer_key: "zip",
+    }
@@ -0,0 +1,89 @@
+"""
+In this file we prove that the precomputed directory tree has the same
+recursive totals as a groupby over the catalog, whether it is built while
+a scan streams by or rebuilt from file_catalog afterwards.
+"""
+
+import os
+from pathlib import Path
+
+from shared.database.database import get_sqlite_engine
+from src.catalog_store import replace_catalog_from_batches
+from src.directory_tree import (
+    DirectoryTreeBuilder,
+    build_directory_tree,
+    directory_breadcrumbs,
+    directory_children,
+    directory_file_types,
+    directory_summary,
+    directory_tree_batches,
+    rebuild_directory_tree,
+    store_directory_tree,
+)
+from src.scanner import build_file_catalog, iter_file_records
+
+
+def _make_tree(base_directory: Path) -> None:
+    (base_directory / "photos" / "2024").mkdir(parents=True)
+    (base_directory / "photos" / "2024" / "a.jpg").write_bytes(bytes(1000))
+    (base_directory / "photos" / "2024" / "b.jpg").write_bytes(bytes(3000))
+    (base_directory / "photos" / "list.txt").write_text("a, b")
+    (base_directory / "code").mkdir()
+    (base_directory / "code" / "main.py").write_text("print('hi')")
+    (base_directory / "readme.md").write_text("# hello")
+
+
+def test_tree_totals_match_the_catalog(tmp_path: Path) -> None:
+    tree_root = tmp_path / "tree"
+    _make_tree(tree_root)
+    catalog = build_file_catalog(tree_root)
+
+    tree = build_directory_tree(catalog, tree_root)
+    directories = tree.directories.set_index("directory")
+
+    assert directories.loc[str(tree_root), "total_bytes"] == catalog["size_bytes"].sum()
+    assert directories.loc[str(tree_root), "total_files"] == len(catalog)
+    assert directories.loc[str(tree_root), "own_files"] == 1
+    assert directories.loc[str(tree_root / "photos"), "total_bytes"] == 4000 + len("a, b")
+    assert directories.loc[str(tree_root / "photos" / "2024"), "depth"] == 2
+    assert directories.loc[str(tree_root / "photos"), "parent"] == str(tree_root)
+
+    photo_types = tree.file_types[tree.file_types["directory"] == str(tree_root / "photos")]
+    assert dict(zip(photo_types["file_type"], photo_types["total_bytes"])) == {
+        "image": 4000, "document": len("a, b"),
+    }
+
+
+def test_streamed_tree_is_stored_and_queried_by_folder(tmp_path: Path) -> None:
+    tree_root = tmp_path / "tree"
+    _make_tree(tree_root)
+    engine = get_sqlite_engine(tmp_path / "catalog.db")
+
+    builder = DirectoryTreeBuilder(tree_root)
+    replace_catalog_from_batches(
+        engine, directory_tree_batches(iter_file_records(tree_root, batch_size=2), builder)
+    )
+    store_directory_tree(engine, builder.finish())
+
+    summary = directory_summary(engine, tree_root)
+    assert summary["total_files"] == 5
+
+    children = directory_children(engine, tree_root)
+    assert list(children["directory"]) == [str(tree_root / "photos"), str(tree_root / "code")]
+    assert directory_file_types(engine, tree_root)["file_type"].iloc[0] == "image"
+    assert directory_summary(engine, tmp_path / "elsewhere") is None
+
+    # After the catalog changes, a rebuild from file_catalog sees it.
+    (tree_root / "code" / "big.bin").write_bytes(bytes(10_000))
+    replace_catalog_from_batches(engine, iter_file_records(tree_root))
+    rebuild_directory_tree(engine, tree_root)
+    assert directory_children(engine, tree_root)["directory"].iloc[0] == str(tree_root / "code")
+    assert directory_summary(engine, tree_root)["total_files"] == 6
+
+
+def test_breadcrumbs_run_from_root_to_folder() -> None:
+    root = os.sep + os.path.join("data", "home")
+    folder = os.path.join(root, "photos", "2024")
+    assert directory_breadcrumbs(folder, root) == [
+        root, os.path.join(root, "photos"), folder,
+    ]
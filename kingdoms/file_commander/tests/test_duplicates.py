@@ -0,0 +1,104 @@
+"""
+In this file we prove that find_duplicates reports exactly the files with
+identical contents, reads as little as it can, and reuses its hash cache.
+"""
+
+import os
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from src.duplicates import EDGE_BYTES, find_duplicates, load_duplicate_groups
+from src.scanner import build_file_catalog
+
+
+def _make_tree(root: Path) -> Path:
+    """
+    A small tree with:
+      - two copies of a 300 KiB file (same edges, same middle),
+      - a third 300 KiB file that differs only in the middle,
+      - three copies of a small text file,
+      - a unique file and two empty files.
+    """
+    big = bytearray(b"a" * (300 * 1024))
+    (root / "photos").mkdir(parents=True)
+    (root / "backup").mkdir()
+    (root / "photos" / "big.raw").write_bytes(big)
+    (root / "backup" / "big copy.raw").write_bytes(big)
+    big[150 * 1024] = ord("b")
+    (root / "backup" / "big edited.raw").write_bytes(big)
+
+    for folder in ["photos", "backup", "."]:
+        (root / folder / "notes.txt").write_text("same notes")
+    (root / "unique.txt").write_text("only one of me")
+    (root / "empty_1.txt").write_bytes(b"")
+    (root / "empty_2.txt").write_bytes(b"")
+    return root
+
+
+def test_find_duplicates_groups_identical_files(tmp_path: Path) -> None:
+    """
+    Because only identical contents count, the edited big file must not be
+    grouped with its copies even though its size and edges match.
+    """
+    tree = _make_tree(tmp_path / "tree")
+
+    report = find_duplicates(build_file_catalog(tree), workers=1)
+
+    groups = [sorted(Path(path).name for path in group["path"])
+              for _, group in report.files.groupby("group_id")]
+    assert groups == [["big copy.raw", "big.raw"], ["notes.txt", "notes.txt", "notes.txt"]]
+
+    # Biggest savings first: one spare 300 KiB copy, then two tiny ones.
+    assert report.groups["reclaimable_bytes"].tolist() == [300 * 1024, 2 * len("same notes")]
+    assert report.groups["file_count"].tolist() == [2, 3]
+
+    # Empty and unique-size files are never opened; the three big files
+    # get an edge hash, and only they need a full read.
+    assert report.size_candidates == 6
+    assert report.edge_hashed == 6
+    assert report.full_hashed == 3
+    assert report.bytes_read == 3 * 2 * EDGE_BYTES + 3 * len("same notes") + 3 * 300 * 1024
+
+
+def test_hash_cache_skips_unchanged_files(tmp_path: Path) -> None:
+    """
+    Because hashes are cached by (path, size, mtime), a second run reads
+    nothing, and a changed file is hashed again.
+    """
+    tree = _make_tree(tmp_path / "tree")
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+
+    first = find_duplicates(build_file_catalog(tree), engine=engine, workers=1)
+    second = find_duplicates(build_file_catalog(tree), engine=engine, workers=1)
+
+    assert second.cache_hits == 6 and second.cache_hit_ratio == 1.0
+    assert second.edge_hashed == 0 and second.full_hashed == 0
+    assert second.groups["content_hash"].tolist() == first.groups["content_hash"].tolist()
+    assert load_duplicate_groups(engine)["file_count"].tolist() == [2, 3]
+
+    (tree / "photos" / "notes.txt").write_text("different!")
+    third = find_duplicates(build_file_catalog(tree), engine=engine, workers=1)
+
+    assert third.edge_hashed == 1
+    assert third.groups["file_count"].tolist() == [2, 2]
+
+
+def test_hard_links_do_not_count_as_reclaimable(tmp_path: Path) -> None:
+    """
+    Because hard links share one copy on disk, deleting one frees nothing,
+    so a group made only of links to one file is not reported.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "original.bin").write_bytes(b"data" * 100)
+    os.link(tree / "original.bin", tree / "link.bin")
+    (tree / "copy.bin").write_bytes(b"data" * 100)
+
+    report = find_duplicates(build_file_catalog(tree), workers=1)
+
+    assert report.groups["file_count"].tolist() == [3]
+    assert report.reclaimable_bytes == 400
+
+    (tree / "copy.bin").unlink()
+    assert find_duplicates(build_file_catalog(tree), workers=1).groups.empty
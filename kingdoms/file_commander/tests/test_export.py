@@ -0,0 +1,41 @@
+"""
+In this file we prove that the CSV exporter can write a catalog batch by
+batch and still produce one well-formed table with a single header.
+"""
+
+import io
+from pathlib import Path
+
+import pandas as pd
+
+from src.export import write_catalog_csv
+from src.scanner import CATALOG_COLUMNS, iter_file_records
+
+
+def test_write_catalog_csv_writes_header_once(tmp_path: Path) -> None:
+    """
+    Because each batch is written separately, we check that the header
+    appears only once and every file ends up as exactly one CSV row.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    for file_index in range(5):
+        (tree / f"file_{file_index}.txt").write_text("x" * file_index)
+    csv_path = tmp_path / "catalog.csv"
+
+    rows_written = write_catalog_csv(iter_file_records(tree, batch_size=2), csv_path)
+
+    exported_catalog = pd.read_csv(csv_path)
+    assert rows_written == 5
+    assert list(exported_catalog.columns) == CATALOG_COLUMNS
+    assert sorted(exported_catalog["name"]) == [f"file_{index}.txt" for index in range(5)]
+
+
+def test_write_catalog_csv_empty_tree_still_has_header(tmp_path: Path) -> None:
+    """An empty scan should still export a valid (header-only) CSV to a stream."""
+    output_stream = io.StringIO()
+
+    rows_written = write_catalog_csv(iter_file_records(tmp_path), output_stream)
+
+    assert rows_written == 0
+    assert output_stream.getvalue().strip() == ",".join(CATALOG_COLUMNS)
@@ -0,0 +1,50 @@
+"""
+In this file we prove that the extension taxonomy is loaded from its JSON
+config, can be overridden by a user file, and that the vectorized
+classifier agrees with the scalar one.
+"""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from src.file_types import (
+    DEFAULT_FILE_TYPES_PATH,
+    classify_file_type,
+    classify_file_types,
+    load_file_type_taxonomy,
+)
+
+
+def test_classify_file_types_matches_scalar_classifier() -> None:
+    """
+    Because the scanner now classifies whole columns, the vectorized result
+    must be exactly what classify_file_type gives row by row, including
+    odd spellings (upper case, spaces, no dot) and unknown extensions.
+    """
+    extensions = pd.Series(
+        [".jpg", ".JPG", " png", "", ".py", ".unknown", ".vbox-extpack", ".jpg", None],
+        index=range(10, 19),
+    )
+
+    file_types = classify_file_types(extensions)
+
+    assert isinstance(file_types.dtype, pd.CategoricalDtype)
+    assert list(file_types.index) == list(extensions.index)
+    assert list(file_types) == [classify_file_type(extension or "") for extension in extensions]
+    assert list(file_types)[:6] == ["image", "image", "image", "other", "code", "other"]
+    # A categorical column gives the same answer.
+    assert list(classify_file_types(extensions.fillna("").astype("category"))) == list(file_types)
+
+
+def test_user_taxonomy_overrides_defaults(tmp_path: Path) -> None:
+    """Because new extensions should not need code changes, a later config file wins."""
+    user_config = tmp_path / "my_file_types.json"
+    user_config.write_text(json.dumps({"notebook": ["ipynb"], "data": [".TXT"]}))
+
+    taxonomy = load_file_type_taxonomy([DEFAULT_FILE_TYPES_PATH, user_config])
+
+    assert taxonomy[".ipynb"] == "notebook"
+    assert taxonomy[".txt"] == "data"
+    assert taxonomy[".jpg"] == "image"
@@ -0,0 +1,133 @@
+"""
+In this file we prove that the hash cache only answers for the exact file
+version it was filled from, follows files when they move, and evicts the
+least recently used entries.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from src.hash_cache import (
+    HashCacheStats,
+    count_hash_cache_entries,
+    ensure_hash_cache,
+    evict_hash_cache,
+    hash_key,
+    lookup_hashes,
+    record_move,
+    store_hashes,
+)
+from src.operations import move_file
+
+
+def _engine(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    ensure_hash_cache(engine)
+    return engine
+
+
+def test_lookup_hits_only_the_cached_version(tmp_path: Path) -> None:
+    """
+    Because the key includes size and mtime_ns, rewriting a file must turn
+    a hit into a miss, and storing the new version drops the old entry.
+    """
+    engine = _engine(tmp_path)
+    file_path = tmp_path / "a.txt"
+    file_path.write_text("version 1")
+    first_key = hash_key(os.stat(file_path))
+
+    store_hashes(engine, {first_key: ("edge-1", None)})
+    store_hashes(engine, {first_key: (None, "full-1")})
+
+    stats = HashCacheStats()
+    assert lookup_hashes(engine, [first_key], stats) == {first_key: ("edge-1", "full-1")}
+
+    file_path.write_text("version 2!")
+    second_key = hash_key(os.stat(file_path))
+    assert lookup_hashes(engine, [second_key], stats) == {}
+    assert (stats.lookups, stats.hits, stats.hit_ratio) == (2, 1, 0.5)
+
+    store_hashes(engine, {second_key: ("edge-2", "full-2")})
+    assert count_hash_cache_entries(engine) == 1
+
+
+def test_cache_follows_moved_files(tmp_path: Path) -> None:
+    """
+    Because a rename keeps the inode, the entry must still hit after
+    move_file; and a copy-then-delete move (what shutil.move does across
+    filesystems) must hand the entry over to the new inode.
+    """
+    engine = _engine(tmp_path)
+    (tmp_path / "source").mkdir()
+    (tmp_path / "destination").mkdir()
+    file_path = tmp_path / "source" / "photo.jpg"
+    file_path.write_bytes(b"pixels")
+    store_hashes(engine, {hash_key(os.stat(file_path)): ("edge", "full")})
+
+    moved_path = move_file(file_path, tmp_path / "destination", hash_cache=engine)
+    moved_key = hash_key(os.stat(moved_path))
+    assert lookup_hashes(engine, [moved_key]) == {moved_key: ("edge", "full")}
+
+    # Simulate a cross-filesystem move: copy (new inode, same mtime), delete.
+    source_stat = os.stat(moved_path)
+    copied_path = tmp_path / "copied.jpg"
+    shutil.copy2(moved_path, copied_path)
+    moved_path.unlink()
+    record_move(engine, source_stat, str(copied_path))
+
+    copied_key = hash_key(os.stat(copied_path))
+    assert copied_key[:2] != moved_key[:2]
+    assert lookup_hashes(engine, [copied_key, moved_key]) == {copied_key: ("edge", "full")}
+
+
+def test_evict_drops_least_recently_used_and_old_entries(tmp_path: Path) -> None:
+    """Because lookups refresh last_used_at, eviction must keep what was used last."""
+    engine = _engine(tmp_path)
+    keys = [(1, inode, 10, 1_000) for inode in range(5)]
+    for key in keys:
+        store_hashes(engine, {key: ("edge", None)})
+        time.sleep(0.01)
+
+    lookup_hashes(engine, [keys[0]])  # now the most recently used
+
+    assert evict_hash_cache(engine, max_entries=2) == 3
+    assert set(lookup_hashes(engine, keys)) == {keys[0], keys[4]}
+
+    assert evict_hash_cache(engine, max_age_days=1) == 0
+    assert evict_hash_cache(engine, max_age_days=-1) == 2
+    assert count_hash_cache_entries(engine) == 0
+
+
+def test_hash_cache_works_on_postgresql(tmp_path: Path, postgres_engine) -> None:
+    """
+    Because MoveJob and the duplicate finder hand the get_engine engine to
+    the cache, staging, upserts, move hand-overs and eviction must run on
+    PostgreSQL too (with 64-bit device, inode and mtime_ns values).
+    """
+    ensure_hash_cache(postgres_engine)
+    ensure_hash_cache(postgres_engine)
+    keys = [(2**62, inode, 10, 1_700_000_000 * 10**9) for inode in range(4)]
+    for key in keys:
+        store_hashes(postgres_engine, {key: ("edge", None)})
+        time.sleep(0.01)
+    store_hashes(postgres_engine, {keys[1]: (None, "full")})
+    assert lookup_hashes(postgres_engine, [keys[1], keys[1]]) == {keys[1]: ("edge", "full")}
+
+    file_path = tmp_path / "photo.jpg"
+    file_path.write_bytes(b"pixels")
+    source_stat = os.stat(file_path)
+    store_hashes(postgres_engine, {hash_key(source_stat): ("edge", "full")})
+    copied_path = tmp_path / "copied.jpg"
+    shutil.copy2(file_path, copied_path)
+    file_path.unlink()
+    record_move(postgres_engine, source_stat, str(copied_path))
+    copied_key = hash_key(os.stat(copied_path))
+    assert lookup_hashes(postgres_engine, [copied_key]) == {copied_key: ("edge", "full")}
+
+    lookup_hashes(postgres_engine, [keys[2]])
+    assert evict_hash_cache(postgres_engine, max_entries=2) == 3
+    assert set(lookup_hashes(postgres_engine, keys + [copied_key])) == {keys[2], copied_key}
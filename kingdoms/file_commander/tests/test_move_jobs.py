@@ -0,0 +1,48 @@
+"""
+In this file we prove that a MoveJob moves files on a background thread,
+reports its progress and errors, and updates the catalog rows in place.
+"""
+
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from src.catalog_store import load_catalog, replace_catalog
+from src.move_jobs import MoveJob
+from src.scanner import build_file_catalog
+
+
+def test_move_job_moves_files_and_updates_catalog(tmp_path: Path) -> None:
+    """
+    Because the UI only polls the job, the final snapshot must account for
+    every file (moved or failed) and the catalog must show the new paths.
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    for index in range(3):
+        (tree / f"file_{index}.txt").write_text(f"contents {index}")
+    destination = tree / "archive"
+    destination.mkdir()
+    (destination / "file_2.txt").write_text("already here")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    replace_catalog(engine, build_file_catalog(tree))
+
+    move_job = MoveJob(
+        plan=[(str(tree / f"file_{index}.txt"), str(destination)) for index in range(3)],
+        engine=engine,
+        journal_path=tmp_path / "moves.journal",
+        total_bytes=30,
+    )
+    move_job.start()
+    progress = move_job.wait(timeout=30)
+
+    assert progress.finished and progress.fatal_error is None
+    assert (progress.files_done, progress.files_failed) == (2, 1)
+    assert progress.fraction_done == 1.0
+    assert [Path(path).name for path, _error in progress.errors] == ["file_2.txt"]
+
+    stored_paths = set(load_catalog(engine, tree)["path"])
+    assert str(destination / "file_0.txt") in stored_paths
+    assert str(tree / "file_0.txt") not in stored_paths
+    assert str(tree / "file_2.txt") in stored_paths
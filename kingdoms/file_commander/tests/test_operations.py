@@ -4,9 +4,22 @@ directory to another while preserving its contents.
 """
 
 
+import json
+import os
+import shutil
+import tempfile
 from pathlib import Path
 
-from src.operations import move_file
+import pytest
+
+from src.operations import (
+    copy_then_remove,
+    move_file,
+    move_files,
+    partial_copy_path,
+    resume_moves,
+    rollback_moves,
+)
 
 def test_move_file_moves_file_and_preserves_contents(tmp_path:Path) -> None:
     """
@@ -45,3 +58,230 @@ def test_move_file_moves_file_and_preserves_contents(tmp_path:Path) -> None:
 
     #Assert: the new file lives inside the destination directory.
     assert new_path.parent == destination_directory
+
+
+def _make_files(directory: Path, count: int) -> list[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = directory / f"file_{index}.txt"
+        path.write_text(f"contents {index}")
+        paths.append(path)
+    return paths
+
+
+def test_move_files_renames_and_reports_conflicts(tmp_path: Path) -> None:
+    """
+    Because move_files must never overwrite, a file whose destination name
+    is taken stays put and is reported, while the others are renamed.
+    """
+    sources = _make_files(tmp_path / "source", 3)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    (destination / "file_1.txt").write_text("already here")
+
+    report = move_files([(path, destination) for path in sources],
+                        journal_path=tmp_path / "moves.journal")
+
+    assert report.renamed == 2 and report.copied == 0
+    assert [Path(source).name for source, _ in report.failed] == ["file_1.txt"]
+    assert (destination / "file_0.txt").read_text() == "contents 0"
+    assert (destination / "file_1.txt").read_text() == "already here"
+    assert sources[1].exists()
+
+
+def test_copy_then_remove_keeps_contents_and_mtime(tmp_path: Path) -> None:
+    """Because cross-device moves copy, the copy must match the original, mtime included."""
+    source = tmp_path / "big.bin"
+    source.write_bytes(bytes(range(256)) * 10_000)
+    source_stat = source.stat()
+
+    copied = copy_then_remove(str(source), str(tmp_path / "copy.bin"))
+
+    assert copied == 2_560_000
+    assert not source.exists()
+    assert (tmp_path / "copy.bin").read_bytes() == bytes(range(256)) * 10_000
+    assert (tmp_path / "copy.bin").stat().st_mtime_ns == source_stat.st_mtime_ns
+
+
+def test_resume_and_rollback_from_journal(tmp_path: Path) -> None:
+    """
+    Because a batch can be interrupted, resume_moves must finish the moves
+    a journal planned (including a copy that was cut off half-way), and
+    rollback_moves must put every file back.
+    """
+    sources = _make_files(tmp_path / "source", 4)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    journal_path = tmp_path / "moves.journal"
+
+    # Simulate a crash: all four moves planned, file_0 renamed and
+    # journaled, file_1 renamed but not journaled, file_2 left as a
+    # partial copy, file_3 not started.
+    with open(journal_path, "w") as journal_file:
+        for move_id, source in enumerate(sources):
+            journal_file.write(json.dumps({
+                "op": "plan", "id": move_id, "source": str(source),
+                "destination": str(destination / source.name),
+            }) + "\n")
+        journal_file.write(json.dumps({"op": "done", "id": 0, "method": "rename"}) + "\n")
+        journal_file.write('{"op": "done", "id": 1')  # torn last line
+    os.rename(sources[0], destination / "file_0.txt")
+    os.rename(sources[1], destination / "file_1.txt")
+    Path(partial_copy_path(str(destination / "file_2.txt"), 2)).write_text("cont")
+
+    report = resume_moves(journal_path)
+
+    assert report.moved == 3 and not report.failed
+    assert sorted(path.name for path in destination.iterdir()) == [
+        "file_0.txt", "file_1.txt", "file_2.txt", "file_3.txt"
+    ]
+    assert (destination / "file_2.txt").read_text() == "contents 2"
+
+    report = rollback_moves(journal_path)
+
+    assert report.moved == 4 and not report.failed
+    assert not any(destination.iterdir())
+    assert all(source.exists() for source in sources)
+
+
+def test_each_batch_gets_its_own_journal(tmp_path: Path) -> None:
+    """
+    Because move ids restart at 0 in every batch, two batches into the same
+    folder must not share a default journal; otherwise the second plan
+    hides the first and only the second batch could be rolled back.
+    """
+    sources = _make_files(tmp_path / "source", 2)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    first_report = move_files([(sources[0], destination)])
+    second_report = move_files([(sources[1], destination)])
+
+    assert first_report.journal_path != second_report.journal_path
+    for report in (first_report, second_report):
+        assert report.journal_path.parent == destination
+    with pytest.raises(FileExistsError):
+        move_files([(destination / "file_0.txt", tmp_path)],
+                   journal_path=first_report.journal_path)
+
+    assert rollback_moves(first_report.journal_path).moved == 1
+    assert sources[0].read_text() == "contents 0" and not sources[1].exists()
+    assert rollback_moves(second_report.journal_path).moved == 1
+    assert sources[1].read_text() == "contents 1"
+    assert sorted(path.suffix for path in destination.iterdir()) == [".journal", ".journal"]
+
+
+def test_exdev_renames_fall_back_to_copies_and_cache_errors_stay_per_file(
+    tmp_path: Path, monkeypatch
+) -> None:
+    """
+    Because bind mounts share st_dev but still refuse rename (EXDEV), such
+    moves must be copied; and a failing hash-cache update after a copy
+    must be reported for that file without stopping the others.
+    """
+    import errno
+
+    from sqlalchemy.exc import OperationalError
+
+    import src.operations as operations
+
+    sources = _make_files(tmp_path / "source", 3)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    rename = os.rename
+
+    def rename_across_mounts(source, target, *arguments, **keywords):
+        if str(source) in {str(path) for path in sources}:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return rename(source, target, *arguments, **keywords)
+
+    def locked_record_move(engine, source_stat, destination_path):
+        if destination_path.endswith("file_1.txt"):
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(os, "rename", rename_across_mounts)
+    monkeypatch.setattr(operations, "record_move", locked_record_move)
+    report = move_files([(path, destination) for path in sources],
+                        journal_path=tmp_path / "moves.journal", workers=1,
+                        hash_cache=object())
+
+    assert (report.renamed, report.copied) == (0, 3)
+    assert [Path(source).name for source, _ in report.failed] == ["file_1.txt"]
+    assert "hash cache" in report.failed[0][1]
+    assert sorted(path.name for path in destination.iterdir()) == [
+        "file_0.txt", "file_1.txt", "file_2.txt"
+    ]
+    assert not any(source.exists() for source in sources)
+
+
+@pytest.fixture
+def other_device_directory(tmp_path: Path):
+    """A directory on another filesystem than tmp_path (/dev/shm), or None."""
+    if not os.path.isdir("/dev/shm") or os.stat("/dev/shm").st_dev == os.stat(tmp_path).st_dev:
+        yield None
+        return
+    directory = Path(tempfile.mkdtemp(dir="/dev/shm"))
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_copy_then_remove_never_overwrites(tmp_path: Path) -> None:
+    """Because a clash must fail, not replace a file, the source and the existing file survive."""
+    source = tmp_path / "new.txt"
+    source.write_text("new")
+    destination = tmp_path / "taken.txt"
+    destination.write_text("already here")
+
+    with pytest.raises(FileExistsError):
+        copy_then_remove(str(source), str(destination))
+
+    assert source.read_text() == "new"
+    assert destination.read_text() == "already here"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["new.txt", "taken.txt"]
+
+
+def test_same_named_files_into_one_directory_are_rejected(
+    tmp_path: Path, other_device_directory
+) -> None:
+    """
+    Because a/IMG.jpg and b/IMG.jpg would both land on destination/IMG.jpg,
+    the plan is rejected before anything moves, on one device or across two.
+    """
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "IMG.jpg").write_text(f"from {folder}")
+    plan = [(tmp_path / "a" / "IMG.jpg", None), (tmp_path / "b" / "IMG.jpg", None)]
+
+    for destination in [tmp_path / "destination", other_device_directory]:
+        if destination is None:
+            continue
+        destination.mkdir(exist_ok=True)
+        with pytest.raises(ValueError, match="same path"):
+            move_files([(source, destination) for source, _ in plan],
+                       journal_path=tmp_path / "moves.journal")
+        assert not any(destination.iterdir())
+        assert (tmp_path / "a" / "IMG.jpg").read_text() == "from a"
+        assert (tmp_path / "b" / "IMG.jpg").read_text() == "from b"
+
+
+def test_cross_device_copies_use_their_own_partial_files(
+    tmp_path: Path, other_device_directory
+) -> None:
+    """Because copies run in parallel, each one writes its own partial file."""
+    if other_device_directory is None:
+        pytest.skip("needs a second filesystem at /dev/shm")
+    sources = _make_files(tmp_path / "source", 8)
+    destination = other_device_directory
+    (destination / "file_3.txt").write_text("already here")
+
+    report = move_files([(path, destination) for path in sources],
+                        journal_path=tmp_path / "moves.journal", workers=4)
+
+    assert report.copied == 7
+    assert [Path(source).name for source, _ in report.failed] == ["file_3.txt"]
+    assert (destination / "file_3.txt").read_text() == "already here"
+    assert sources[3].exists()
+    assert sorted(path.name for path in destination.iterdir()) == [
+        f"file_{index}.txt" for index in range(8)
+    ]
@@ -0,0 +1,136 @@
+"""
+In this file we prove that a diff between two saved scans finds added,
+removed, modified and moved files (a move is not an add plus a remove),
+and that the per-directory growth adds up.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+from shared.database.database import get_sqlite_engine
+from src.catalog_store import list_scans, record_scan
+from src.cli import cli
+from src.scan_diff import diff_catalogs, diff_scans, diff_snapshots, load_diff_columns
+from src.scanner import iter_file_records
+from src.snapshots import write_catalog_snapshot
+
+
+def _save_scan(engine, tree: Path, snapshot_directory: Path, scan_id: str, with_inode: bool = True):
+    info = write_catalog_snapshot(
+        iter_file_records(tree, batch_size=2, with_inode=with_inode),
+        snapshot_directory, tree, scan_id=scan_id,
+    )
+    record_scan(engine, info.scan_id, tree, info.row_count, info.path)
+    return info
+
+
+def _make_tree(tree: Path) -> None:
+    (tree / "docs").mkdir(parents=True)
+    (tree / "media").mkdir()
+    (tree / "docs" / "keep.txt").write_text("same")
+    (tree / "docs" / "edit.txt").write_text("short")
+    (tree / "docs" / "gone.txt").write_text("bye")
+    (tree / "docs" / "rename_me.txt").write_text("moving day")
+    (tree / "media" / "clip.mp4").write_bytes(bytes(2000))
+
+
+def _change_tree(tree: Path) -> None:
+    (tree / "docs" / "edit.txt").write_text("a much longer text")
+    (tree / "docs" / "gone.txt").unlink()
+    os.rename(tree / "docs" / "rename_me.txt", tree / "media" / "renamed.txt")
+    (tree / "media" / "new.bin").write_bytes(bytes(500))
+
+
+def test_diff_scans_classifies_every_change(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    engine = get_sqlite_engine(tmp_path / "catalog.db")
+    _save_scan(engine, tree, tmp_path / "snapshots", "20260101T000000000000Z")
+    _change_tree(tree)
+    _save_scan(engine, tree, tmp_path / "snapshots", "20260102T000000000000Z")
+
+    assert list(list_scans(engine, tree)["scan_id"]) == [
+        "20260102T000000000000Z", "20260101T000000000000Z",
+    ]
+    scan_diff = diff_scans(engine, tree)
+
+    assert scan_diff.old_scan_id == "20260101T000000000000Z"
+    assert diff_scans(engine, tree, old_scan_id="20260101T000000000000Z").new_scan_id == (
+        "20260102T000000000000Z"
+    )
+    with pytest.raises(ValueError, match="already the latest"):
+        diff_scans(engine, tree, old_scan_id="20260102T000000000000Z")
+    assert list(scan_diff.added["path"]) == [str(tree / "media" / "new.bin")]
+    assert list(scan_diff.removed["path"]) == [str(tree / "docs" / "gone.txt")]
+    assert list(scan_diff.modified["path"]) == [str(tree / "docs" / "edit.txt")]
+    assert scan_diff.modified["size_delta"].iloc[0] == len("a much longer text") - len("short")
+    assert scan_diff.moved[["old_path", "new_path", "detected_by"]].values.tolist() == [
+        [str(tree / "docs" / "rename_me.txt"), str(tree / "media" / "renamed.txt"), "inode"],
+    ]
+
+    growth = scan_diff.directory_growth.set_index("directory")
+    assert growth.loc[str(tree / "media"), "bytes_delta"] == 500 + len("moving day")
+    assert growth.loc[str(tree / "media"), "files_delta"] == 2
+    assert growth.loc[str(tree / "docs"), "files_delta"] == -2
+    assert scan_diff.bytes_delta == 500 + len("a much longer text") - len("short") - len("bye")
+
+
+def test_moves_without_inodes_fall_back_to_name_size_and_mtime(tmp_path: Path) -> None:
+    """
+    Because a move across filesystems changes the inode (and snapshots may
+    not have one), a file with the same name, size and mtime in a new
+    place still counts as moved, but only once even if copies exist.
+    """
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    engine = get_sqlite_engine(tmp_path / "catalog.db")
+    old_info = _save_scan(engine, tree, tmp_path / "snapshots", "20260101T000000000000Z",
+                          with_inode=False)
+    (tree / "archive").mkdir()
+    shutil.move(tree / "media" / "clip.mp4", tree / "archive" / "clip.mp4")
+    shutil.copy2(tree / "archive" / "clip.mp4", tree / "docs" / "clip.mp4")
+    new_info = _save_scan(engine, tree, tmp_path / "snapshots", "20260102T000000000000Z",
+                          with_inode=False)
+
+    assert (load_diff_columns(old_info.path)["inode"] == 0).all()
+    scan_diff = diff_snapshots(old_info.path, new_info.path)
+
+    assert len(scan_diff.moved) == 1
+    assert scan_diff.moved["detected_by"].iloc[0] == "name"
+    assert scan_diff.moved["old_path"].iloc[0] == str(tree / "media" / "clip.mp4")
+    assert len(scan_diff.added) == 1 and scan_diff.removed.empty
+
+
+def test_same_path_with_a_new_inode_is_modified() -> None:
+    old = pd.DataFrame({
+        "path": ["/t/a"], "directory": ["/t"], "name": ["a"],
+        "size_bytes": [10], "modified_at": [1], "inode": pd.array([5], dtype="uint64"),
+    })
+    new = old.assign(inode=pd.array([6], dtype="uint64"))
+    scan_diff = diff_catalogs(old, new)
+    assert list(scan_diff.modified["path"]) == ["/t/a"]
+    assert scan_diff.directory_growth.empty
+
+
+def test_diff_command_reports_the_latest_two_scans(tmp_path: Path) -> None:
+    tree = tmp_path / "tree"
+    _make_tree(tree)
+    db_path = tmp_path / "catalog.db"
+    engine = get_sqlite_engine(db_path)
+    _save_scan(engine, tree, tmp_path / "snapshots", "20260101T000000000000Z")
+    _change_tree(tree)
+    _save_scan(engine, tree, tmp_path / "snapshots", "20260102T000000000000Z")
+
+    result = CliRunner().invoke(cli, ["diff", str(tree), "--db", str(db_path)])
+    assert result.exit_code == 0, result.output
+    assert "1 added, 1 removed, 1 modified, 1 moved" in result.output
+    assert "renamed.txt" in result.output
+
+    result = CliRunner().invoke(cli, ["diff", str(tmp_path / "elsewhere"), "--db", str(db_path)])
+    assert result.exit_code != 0
+    assert "No scans" in result.output
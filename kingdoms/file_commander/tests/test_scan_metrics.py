@@ -0,0 +1,75 @@
+"""
+In this file we prove that an instrumented scan counts what it saw, puts
+time into every stage, and exports the metrics as Prometheus text and
+JSON lines, and that instrumenting it does not change the catalog.
+"""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from shared.database.database import get_sqlite_engine
+from src.catalog_store import replace_catalog_from_batches
+from src.scan_metrics import SCAN_STAGES, ScanMetrics
+from src.scanner import build_file_catalog, iter_file_records
+
+
+def _make_tree(base_directory: Path) -> None:
+    for folder in ("a", "a/b", "c"):
+        (base_directory / folder).mkdir(parents=True)
+    for index, folder in enumerate(("a", "a/b", "c", "c", ".")):
+        (base_directory / folder / f"file_{index}.txt").write_text("x" * (index + 1))
+
+
+def test_instrumented_scan_counts_files_and_stages(tmp_path: Path) -> None:
+    _make_tree(tmp_path)
+    metrics = ScanMetrics(tmp_path)
+    catalog = build_file_catalog(tmp_path, workers=2, batch_size=2, metrics=metrics)
+
+    pd.testing.assert_frame_equal(catalog, build_file_catalog(tmp_path))
+    assert metrics.files == 5
+    assert metrics.directories == 4
+    assert metrics.bytes == 1 + 2 + 3 + 4 + 5
+    assert metrics.errors == 0
+    assert sum(metrics.stat_latency_counts) == 5
+    assert all(metrics.stage_seconds[stage] > 0 for stage in ("list", "stat", "classify", "frame"))
+    assert metrics.wall_seconds > 0
+    assert len(metrics.slowest_directories) == 4
+    assert metrics.slowest_directories[0].seconds >= metrics.slowest_directories[-1].seconds
+
+
+def test_write_stage_excludes_the_scan(tmp_path: Path) -> None:
+    _make_tree(tmp_path / "tree")
+    metrics = ScanMetrics(tmp_path / "tree")
+    report = replace_catalog_from_batches(
+        get_sqlite_engine(tmp_path / "catalog.db"),
+        iter_file_records(tmp_path / "tree", batch_size=2, metrics=metrics),
+        metrics=metrics,
+    )
+
+    assert report.rows_written == 5
+    assert 0 < metrics.stage_seconds["write"] <= report.total_seconds
+    assert metrics.upstream_seconds > 0
+    assert set(metrics.stage_seconds) == set(SCAN_STAGES)
+
+
+def test_metrics_export_formats(tmp_path: Path) -> None:
+    _make_tree(tmp_path / "tree")
+    metrics = ScanMetrics(tmp_path / "tree")
+    build_file_catalog(tmp_path / "tree", metrics=metrics)
+
+    prometheus_text = metrics.to_prometheus()
+    assert "# TYPE file_commander_scan_stat_latency_seconds histogram" in prometheus_text
+    assert 'file_commander_scan_files{root="' in prometheus_text
+    assert 'le="+Inf"} 5' in prometheus_text
+    assert prometheus_text.count('stage="') == len(SCAN_STAGES)
+
+    metrics.append_json_lines(tmp_path / "scans.jsonl")
+    metrics.append_json_lines(tmp_path / "scans.jsonl")
+    lines = (tmp_path / "scans.jsonl").read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["files"] == 5
+
+    metrics.write_prometheus(tmp_path / "scan.prom")
+    assert (tmp_path / "scan.prom").read_text() == prometheus_text
@@ -5,10 +5,19 @@ and that `build_file_catalog` can describe those files as a table of metadata.
 """
 
 # from email.mime import base
+import os
+from datetime import datetime
 from pathlib import Path
 import pandas as pd
+import pytest
 
-from src.scanner import list_files, build_file_catalog
+from src.scanner import (
+    CATALOG_COLUMNS,
+    build_file_catalog,
+    iter_file_entries,
+    iter_file_records,
+    list_files,
+)
 
 
 def test_list_files_returns_all_files(tmp_path: Path) -> None:
@@ -125,3 +134,208 @@ def test_build_file_catalog_file_type_classification(tmp_path: Path) -> None:
     assert get_file_type_for_name("photo.jpg") == "image"
     assert get_file_type_for_name("song.mp3") == "audio"
     assert get_file_type_for_name("script.py") == "code"
+
+
+def test_iter_file_entries_yields_raw_tuples_with_stat(tmp_path: Path) -> None:
+    """
+    Because the scandir walker hands back plain tuples instead of Path
+    objects, this test checks that each tuple carries the path, parent
+    directory, name and a stat result that matches the file on disk.
+    """
+    subdirectory = tmp_path / "subdir"
+    subdirectory.mkdir()
+    nested_file = subdirectory / "notes.md"
+    nested_file.write_text("twelve bytes")
+
+    entries = list(iter_file_entries(tmp_path))
+
+    assert len(entries) == 1
+    file_path, directory, name, file_stat = entries[0]
+    assert file_path == str(nested_file)
+    assert directory == str(subdirectory)
+    assert name == "notes.md"
+    assert file_stat.st_size == len("twelve bytes")
+
+    # Without stat the tuples are the same, just with an empty stat slot.
+    assert list(iter_file_entries(tmp_path, with_stat=False)) == [
+        (str(nested_file), str(subdirectory), "notes.md", None)
+    ]
+
+
+def test_iter_file_entries_does_not_follow_directory_symlinks(tmp_path: Path) -> None:
+    """
+    Because rglob never descended into symlinked folders, the new walker
+    must not either (otherwise a link back to a parent would loop forever).
+    Symlinks to files are still reported, just like before.
+    """
+    real_directory = tmp_path / "real"
+    real_directory.mkdir()
+    real_file = real_directory / "data.csv"
+    real_file.write_text("a,b")
+
+    (tmp_path / "loop").symlink_to(tmp_path, target_is_directory=True)
+    (tmp_path / "link.csv").symlink_to(real_file)
+
+    discovered_path_strings = sorted(str(file_path) for file_path in list_files(tmp_path))
+
+    assert discovered_path_strings == sorted([str(real_file), str(tmp_path / "link.csv")])
+
+
+def test_build_file_catalog_extension_matches_pathlib_suffix(tmp_path: Path) -> None:
+    """
+    Because we now compute extensions from plain strings, this test checks
+    the tricky names where a naive split would disagree with Path.suffix.
+    """
+    for file_name in [".bashrc", "archive.", "Report.Final.PDF", "README"]:
+        (tmp_path / file_name).write_text("x")
+
+    file_catalog = build_file_catalog(tmp_path)
+
+    for _, row in file_catalog.iterrows():
+        assert row["extension"] == Path(row["name"]).suffix.lower()
+
+
+def test_build_file_catalog_columnar_dtypes_and_local_times(tmp_path: Path) -> None:
+    """
+    Because the catalog is now built column by column, this test checks the
+    dtypes we promise (categoricals for the repetitive string columns) and
+    that the vectorized timestamps still equal `datetime.fromtimestamp`.
+    """
+    first_file = tmp_path / "a.txt"
+    first_file.write_text("hello")
+    (tmp_path / "b.TXT").write_text("world")
+
+    file_catalog = build_file_catalog(tmp_path)
+
+    assert list(file_catalog.columns) == CATALOG_COLUMNS
+    for categorical_column in ["directory", "extension", "file_type"]:
+        assert isinstance(file_catalog[categorical_column].dtype, pd.CategoricalDtype)
+    assert file_catalog["size_bytes"].dtype == "int64"
+
+    first_row = file_catalog.loc[file_catalog["name"] == "a.txt"].iloc[0]
+    expected_modified_at = datetime.fromtimestamp(first_file.stat().st_mtime)
+    assert abs(first_row["modified_at"] - pd.Timestamp(expected_modified_at)) < pd.Timedelta("1ms")
+    assert set(file_catalog["file_type"]) == {"document"}
+
+
+def test_build_file_catalog_handles_outlier_timestamps(tmp_path: Path, monkeypatch) -> None:
+    """
+    Because an epoch-0 mtime next to a current one must not mean a
+    localtime() call for every day in between, the offsets are only looked
+    up around the days that occur, and the local times still match
+    `datetime.fromtimestamp`.
+    """
+    import time
+
+    old_file = tmp_path / "old.txt"
+    old_file.write_text("1970")
+    os.utime(old_file, (0, 0))
+    new_file = tmp_path / "new.txt"
+    new_file.write_text("now")
+    localtime_calls: list[float] = []
+    localtime = time.localtime
+
+    def counting_localtime(*arguments):
+        localtime_calls.append(arguments[0] if arguments else None)
+        return localtime(*arguments)
+
+    monkeypatch.setattr(time, "localtime", counting_localtime)
+    file_catalog = build_file_catalog(tmp_path).set_index("name")
+
+    # Two distinct days per column (plus a bisection on a DST day), not ~20,000.
+    assert len(localtime_calls) < 100
+    for file_path in (old_file, new_file):
+        expected_modified_at = pd.Timestamp(datetime.fromtimestamp(file_path.stat().st_mtime))
+        modified_at = file_catalog.loc[file_path.name, "modified_at"]
+        assert abs(modified_at - expected_modified_at) < pd.Timedelta("1ms")
+
+
+def test_build_file_catalog_empty_directory(tmp_path: Path) -> None:
+    """
+    Because an empty folder is a perfectly valid thing to scan, we expect
+    an empty DataFrame with the usual columns instead of a KeyError.
+    """
+    file_catalog = build_file_catalog(tmp_path)
+
+    assert file_catalog.empty
+    assert list(file_catalog.columns) == CATALOG_COLUMNS
+
+
+def test_build_file_catalog_workers_match_serial_scan(tmp_path: Path) -> None:
+    """
+    Because the threaded scan must be a drop-in replacement, this test
+    builds a small deep/wide tree and checks that the catalog from several
+    workers is exactly the same (rows *and* order) as the serial one.
+    """
+    for top_index in range(4):
+        for nested_index in range(3):
+            nested_directory = tmp_path / f"top_{top_index}" / f"nested_{nested_index}"
+            nested_directory.mkdir(parents=True)
+            for file_index in range(5):
+                (nested_directory / f"f{file_index}.txt").write_text("x" * file_index)
+        (tmp_path / f"top_{top_index}" / "readme.md").write_text("top")
+
+    serial_catalog = build_file_catalog(tmp_path)
+    threaded_catalog = build_file_catalog(tmp_path, workers=4)
+
+    assert len(serial_catalog) == 4 * 3 * 5 + 4
+    pd.testing.assert_frame_equal(serial_catalog, threaded_catalog)
+
+
+def test_threaded_walk_lists_a_bounded_window_ahead(tmp_path: Path, monkeypatch) -> None:
+    """
+    Because a slow consumer must not make the pool list (and hold) the
+    whole tree, a walk paused inside its second folder should have listed
+    at most one lookahead window beyond the root.
+    """
+    import time
+
+    import src.walker as walker
+
+    for directory_index in range(60):
+        (tmp_path / f"dir_{directory_index:02}").mkdir()
+        (tmp_path / f"dir_{directory_index:02}" / "file.txt").write_text("x")
+    listed: list[str] = []
+    list_directory = walker.list_directory
+
+    def counting_list_directory(directory, with_stat, metrics=None):
+        listed.append(directory)
+        return list_directory(directory, with_stat, metrics)
+
+    monkeypatch.setattr(walker, "list_directory", counting_list_directory)
+    entries = iter_file_entries(tmp_path, workers=2)
+    assert next(entries)[1] == str(tmp_path / "dir_00")
+    time.sleep(0.2)
+
+    assert len(listed) <= 1 + 2 * walker.LISTING_LOOKAHEAD_PER_WORKER
+    assert len(list(entries)) == 59
+    assert len(listed) == 61
+
+
+def test_iter_file_entries_rejects_zero_workers(tmp_path: Path) -> None:
+    """A worker count below one is a caller mistake, not a silent serial scan."""
+    with pytest.raises(ValueError):
+        list(iter_file_entries(tmp_path, workers=0))
+
+
+def test_iter_file_records_yields_bounded_batches(tmp_path: Path) -> None:
+    """
+    Because the streaming API exists to cap memory, every batch must hold
+    at most `batch_size` rows, and stitching the batches back together
+    must give exactly the same catalog as a single-batch scan.
+    """
+    for file_index in range(7):
+        extension = [".txt", ".jpg", ".py"][file_index % 3]
+        (tmp_path / f"file_{file_index}{extension}").write_text("x" * file_index)
+
+    batches = list(iter_file_records(tmp_path, batch_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert all(list(batch.columns) == CATALOG_COLUMNS for batch in batches)
+
+    stitched_catalog = build_file_catalog(tmp_path, batch_size=3)
+    single_batch_catalog = build_file_catalog(tmp_path)
+    pd.testing.assert_frame_equal(
+        stitched_catalog.drop(columns=["last_accessed_at"]),
+        single_batch_catalog.drop(columns=["last_accessed_at"]),
+    )
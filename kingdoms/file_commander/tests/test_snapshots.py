@@ -0,0 +1,81 @@
+"""
+In this file we prove that a catalog survives a round trip through a
+Parquet snapshot, that filters on file_type / size_bytes are applied on
+load, and that snapshots can be listed per scanned root.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.scanner import build_file_catalog, iter_file_records
+from src.snapshots import (
+    CatalogSnapshotWriter,
+    iter_catalog_snapshot,
+    list_catalog_snapshots,
+    load_catalog_snapshot,
+    snapshot_batches,
+    write_catalog_snapshot,
+)
+
+
+def _make_tree(base_directory: Path) -> None:
+    (base_directory / "photos").mkdir()
+    for index in range(5):
+        (base_directory / "photos" / f"img_{index}.jpg").write_bytes(bytes(100 * index))
+    (base_directory / "notes.txt").write_text("hello")
+    (base_directory / "script.py").write_text("print('hi')")
+
+
+def test_snapshot_round_trip_matches_catalog(tmp_path: Path) -> None:
+    """
+    Because a snapshot replaces a rescan, loading it must give back the
+    same rows and dtypes build_file_catalog produced (row order aside).
+    """
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    catalog = build_file_catalog(tree)
+
+    # Small batches, so the snapshot has several batches/row groups.
+    with CatalogSnapshotWriter(tmp_path / "snapshots", tree) as writer:
+        passed_through = list(snapshot_batches(iter_file_records(tree, batch_size=3), writer))
+
+    assert sum(len(batch) for batch in passed_through) == len(catalog)
+    assert writer.info.row_count == len(catalog)
+    assert pq.ParquetFile(writer.info.path).metadata.num_row_groups == 3
+
+    loaded = load_catalog_snapshot(writer.info.path)
+    assert list(loaded.columns) == list(catalog.columns)
+    assert isinstance(loaded["file_type"].dtype, pd.CategoricalDtype)
+    assert loaded["modified_at"].dtype == catalog["modified_at"].dtype
+    pd.testing.assert_frame_equal(
+        loaded.astype({"directory": str, "extension": str, "file_type": str})
+        .sort_values("path").reset_index(drop=True),
+        catalog.astype({"directory": str, "extension": str, "file_type": str})
+        .sort_values("path").reset_index(drop=True),
+    )
+    assert sum(len(batch) for batch in iter_catalog_snapshot(writer.info.path, batch_size=2)) == 7
+
+
+def test_snapshot_filters_and_listing(tmp_path: Path) -> None:
+    """Because filters are pushed down, only matching rows come back; listings are per root."""
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    _make_tree(tree)
+    snapshot_directory = tmp_path / "snapshots"
+
+    first = write_catalog_snapshot(build_file_catalog(tree), snapshot_directory, tree,
+                                   scan_id="20260101T000000000000Z")
+    second = write_catalog_snapshot(build_file_catalog(tree), snapshot_directory, tree)
+    write_catalog_snapshot(build_file_catalog(tree / "photos"), snapshot_directory, tree / "photos")
+
+    big_images = load_catalog_snapshot(first.path, file_types=["image"], minimum_size_bytes=200)
+    assert sorted(big_images["name"]) == ["img_2.jpg", "img_3.jpg", "img_4.jpg"]
+    names_only = load_catalog_snapshot(first.path, columns=["name"], file_types=["code"])
+    assert list(names_only["name"]) == ["script.py"]
+
+    listed = list_catalog_snapshots(snapshot_directory, root=tree)
+    assert [snapshot.scan_id for snapshot in listed] == [second.scan_id, first.scan_id]
+    assert listed[0].row_count == 7
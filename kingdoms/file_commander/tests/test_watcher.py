@@ -0,0 +1,160 @@
+"""
+In this file we prove that the catalog watcher coalesces filesystem
+events into debounced batches, and that applying a batch leaves the
+catalog exactly as a fresh scan would.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+import src.watcher as watcher
+
+from src.catalog_store import apply_catalog_changes, load_catalog, replace_catalog
+from src.directory_tree import directory_summary
+from src.scanner import build_file_catalog
+from src.watcher import CatalogEventHandler, PendingCatalogChanges
+
+
+def _event(event_type: str, src_path: Path, dest_path: Path = None, is_directory: bool = False):
+    """A stand-in for a watchdog event (it only needs these attributes)."""
+    return SimpleNamespace(
+        event_type=event_type,
+        src_path=str(src_path),
+        dest_path=str(dest_path) if dest_path else "",
+        is_directory=is_directory,
+    )
+
+
+def test_pending_changes_debounce_and_max_delay() -> None:
+    """
+    Because a burst of events should become one batch, nothing is due until
+    the paths have been quiet for debounce_seconds, unless max_delay_seconds
+    passed since the first event.
+    """
+    pending = PendingCatalogChanges(debounce_seconds=1.0, max_delay_seconds=5.0)
+    pending.add("/tree/a.txt", now=0.0)
+    pending.add("/tree/a.txt", now=0.5)
+    pending.add("/tree/b.txt", now=0.9)
+
+    assert pending.take_ready(now=1.5) == set()
+    assert pending.take_ready(now=2.0) == {"/tree/a.txt", "/tree/b.txt"}
+    assert len(pending) == 0
+
+    for tick in range(12):
+        pending.add("/tree/log.txt", now=10.0 + tick * 0.5)
+    assert pending.take_ready(now=15.5) == {"/tree/log.txt"}
+
+
+def test_events_applied_in_one_batch_match_a_fresh_scan(tmp_path: Path) -> None:
+    """
+    Because apply_catalog_changes re-stats every touched path, a batch of
+    create/modify/delete/move events (including a folder moved in from
+    outside) must leave the same rows a full scan would find.
+    """
+    tree = tmp_path / "tree"
+    (tree / "docs").mkdir(parents=True)
+    (tree / "docs" / "old.txt").write_text("old")
+    (tree / "docs" / "gone.txt").write_text("gone")
+    (tree / "notes.txt").write_text("v1")
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    replace_catalog(engine, build_file_catalog(tree))
+
+    pending = PendingCatalogChanges()
+    handler = CatalogEventHandler(str(tree), pending, ignored_prefixes=(str(tree / "skip"),))
+
+    (tree / "notes.txt").write_text("version 2")
+    handler.dispatch(_event("modified", tree / "notes.txt"))
+    os.remove(tree / "docs" / "gone.txt")
+    handler.dispatch(_event("deleted", tree / "docs" / "gone.txt"))
+    os.rename(tree / "docs" / "old.txt", tree / "docs" / "new.txt")
+    handler.dispatch(_event("moved", tree / "docs" / "old.txt", tree / "docs" / "new.txt"))
+    (tmp_path / "outside" / "photos").mkdir(parents=True)
+    (tmp_path / "outside" / "photos" / "cat.jpg").write_text("meow")
+    os.rename(tmp_path / "outside" / "photos", tree / "photos")
+    handler.dispatch(_event("moved", tmp_path / "outside" / "photos", tree / "photos",
+                            is_directory=True))
+    handler.dispatch(_event("modified", tree / "docs", is_directory=True))
+    handler.dispatch(_event("created", tree / "skip" / "ignored.txt"))
+
+    paths = pending.take_ready(force=True)
+    assert paths == {
+        str(tree / "notes.txt"),
+        str(tree / "docs" / "gone.txt"),
+        str(tree / "docs" / "old.txt"),
+        str(tree / "docs" / "new.txt"),
+        str(tree / "photos"),
+    }
+
+    result = apply_catalog_changes(engine, paths)
+
+    assert (result.files_written, result.paths_removed) == (3, 2)
+    stored_catalog = load_catalog(engine, tree).set_index("path")
+    expected_catalog = build_file_catalog(tree).set_index("path")
+    assert sorted(stored_catalog.index) == sorted(expected_catalog.index)
+    assert stored_catalog.loc[str(tree / "notes.txt"), "size_bytes"] == len("version 2")
+
+
+def _wait_until(condition, timeout_seconds: float = 10.0) -> bool:
+    """Poll `condition` until it is true or the timeout passes."""
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_watch_catalog_rebuilds_the_tree_and_retries_locked_batches(
+    tmp_path: Path, monkeypatch
+) -> None:
+    """
+    Because the sidebar reads folder totals from the directory tree, the
+    watcher must rebuild it after the seed scan and after every batch; and
+    a batch that hits "database is locked" must be retried, not end the
+    watcher.
+    """
+    pytest.importorskip("watchdog")
+    tree = tmp_path / "tree"
+    (tree / "docs").mkdir(parents=True)
+    (tree / "docs" / "a.txt").write_text("a")
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+
+    apply_changes = watcher.apply_catalog_changes
+    attempts = []
+
+    def locked_once(engine, paths):
+        attempts.append(set(paths))
+        if len(attempts) == 1:
+            raise OperationalError("UPDATE", {}, Exception("database is locked"))
+        return apply_changes(engine, paths)
+
+    monkeypatch.setattr(watcher, "apply_catalog_changes", locked_once)
+    stop_event = threading.Event()
+    results, errors = [], []
+    thread = threading.Thread(target=watcher.watch_catalog, args=(engine, tree), kwargs={
+        "debounce_seconds": 0.1, "max_delay_seconds": 1.0, "stop_event": stop_event,
+        "on_batch": results.append, "on_error": errors.append,
+    })
+    thread.start()
+    try:
+        assert _wait_until(lambda: directory_summary(engine, tree) is not None)
+        assert directory_summary(engine, tree)["total_files"] == 1
+
+        (tree / "docs" / "b.txt").write_text("b")
+        assert _wait_until(lambda: results)
+    finally:
+        stop_event.set()
+        thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert len(errors) == 1 and "database is locked" in str(errors[0])
+    assert str(tree / "docs" / "b.txt") in attempts[0] and attempts[0] <= attempts[1]
+    assert directory_summary(engine, tree)["total_files"] == 2
+    assert directory_summary(engine, tree / "docs")["total_files"] == 2
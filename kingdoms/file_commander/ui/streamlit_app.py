@@ -8,11 +8,15 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import Optional
-from difflib import SequenceMatcher
+import dataclasses
+import io
+import os
 import sys
+import time
 
 import pandas as pd
 import streamlit as st
+from sqlalchemy.engine import Engine
 
 # ---------------------------------------------------------------------
 # PATH SETUP FOR IMPORTS
@@ -38,22 +42,361 @@ for path in (FILE_COMMANDER_ROOT, PROJECT_ROOT):
 # SQLite DB will live next to file_commander: .../kingdoms/file_commander/file_commander.db
 DB_PATH = FILE_COMMANDER_ROOT / "file_commander.db"
 
+# With DATABASE_URL set (docker-compose passes one), the catalog lives in
+# that database, e.g. the shared PostgreSQL service, instead of DB_PATH.
+CATALOG_DATABASE = os.environ.get("DATABASE_URL") or str(DB_PATH)
+
+# A server database has no file to stat, so its cached reads expire after
+# this many seconds instead (see catalog_version).
+SERVER_CATALOG_CACHE_SECONDS = 30
+
+# Every executed move writes a journal here, so an interrupted move can be
+# resumed or rolled back (src.operations.resume_moves / rollback_moves).
+MOVE_JOURNAL_DIRECTORY = FILE_COMMANDER_ROOT / "move_journals"
+
+# Every full scan can also be kept as a Parquet snapshot (src.snapshots),
+# so a catalog can be reloaded later without walking the disk again.
+SNAPSHOT_DIRECTORY = FILE_COMMANDER_ROOT / "snapshots"
+
+# Every full scan appends its metrics (src.scan_metrics) here, one JSON
+# object per line, so scan regressions can be charted and alerted on.
+SCAN_METRICS_LOG_PATH = FILE_COMMANDER_ROOT / "scan_metrics.jsonl"
+
 # ---------------------------------------------------------------------
 # Imports that depend on the paths above
 # ---------------------------------------------------------------------
-from src.scanner import build_file_catalog              # noqa: E402
-from shared.database.database import get_sqlite_engine  # noqa: E402
+from src.scanner import iter_file_records               # noqa: E402
+from src.scan_metrics import SCAN_STAGES, ScanMetrics   # noqa: E402
+from src.catalog_store import (                         # noqa: E402
+    incremental_scan,
+    record_scan,
+    replace_catalog_from_batches,
+)
+from src.catalog_query import (                         # noqa: E402
+    CatalogFilters,
+    count_catalog_rows,
+    fuzzy_search_catalog,
+    iter_catalog_query,
+    list_catalog_file_types,
+    prepare_catalog_queries,
+    query_catalog_page,
+)
+from src.directory_tree import (                        # noqa: E402
+    DirectoryTreeBuilder,
+    directory_breadcrumbs,
+    directory_children,
+    directory_file_types,
+    directory_summary,
+    directory_tree_batches,
+    rebuild_directory_tree,
+    store_directory_tree,
+)
+from src.content_types import content_type_batches     # noqa: E402
+from src.export import write_catalog_csv                # noqa: E402
+from src.move_jobs import MoveJob                       # noqa: E402
+from src.operations import new_journal_path             # noqa: E402
+from src.snapshots import (                             # noqa: E402
+    CatalogSnapshotWriter,
+    iter_catalog_snapshot,
+    list_catalog_snapshots,
+    new_scan_id,
+    snapshot_batches,
+)
+from shared.database.database import get_engine         # noqa: E402
+
+
+
+def render_move_job_progress() -> None:
+    """
+    Because a move job runs on its own thread, this panel only *reads* its
+    progress: a progress bar, files/s and MB/s, and the errors so far.
+
+    While the job runs it is drawn as a Streamlit fragment that refreshes
+    itself every second, so only this panel reruns, not the whole page.
+    When the job finishes we rebuild the folder tree and rerun the page
+    once, so the table picks up the new paths the job wrote into
+    file_catalog.
+    """
+    move_job: Optional[MoveJob] = st.session_state.get("move_job")
+    if move_job is None:
+        return
+
+    progress = move_job.progress()
+    st.progress(
+        progress.fraction_done,
+        text=(
+            f"Moved {progress.files_done} of {progress.total_files} files"
+            + (f" ({progress.files_failed} failed)" if progress.files_failed else "")
+        ),
+    )
+    files_column, speed_column, bytes_column = st.columns(3)
+    files_column.metric("Files/s", f"{progress.files_per_second:,.0f}")
+    speed_column.metric("MB/s", f"{progress.megabytes_per_second:,.1f}")
+    bytes_column.metric(
+        "Data moved",
+        f"{progress.bytes_done / (1024 * 1024):,.1f} of "
+        f"{progress.total_bytes / (1024 * 1024):,.1f} MB",
+    )
+
+    if progress.fatal_error:
+        st.error(f"Move job stopped: {progress.fatal_error}")
+    if progress.errors:
+        with st.expander(f"Errors ({progress.files_failed})"):
+            st.dataframe(
+                {
+                    "path": [path for path, _error in progress.errors],
+                    "error": [error for _path, error in progress.errors],
+                },
+                width="stretch",
+            )
+
+    if not progress.finished:
+        return
+    st.success(
+        f"Move finished in {progress.elapsed_seconds:.1f}s. "
+        f"Journal: {move_job.journal_path}"
+    )
+    if not st.session_state.get("move_job_shown_finished"):
+        st.session_state["move_job_shown_finished"] = True
+        catalog_root = st.session_state.get("catalog_root")
+        if catalog_root is not None and move_job.engine is not None:
+            rebuild_directory_tree(move_job.engine, catalog_root)
+        st.rerun()
+
+
+def render_scan_metrics(scan_metrics: ScanMetrics) -> None:
+    """
+    Because a spinner does not say *why* a scan was slow, this panel shows
+    where the time went (per stage), the counts, the stat latency and the
+    slowest folders, with the metrics as Prometheus text or JSON to take
+    away.
+    """
+    with st.expander(
+        f"📈 Scan metrics: {scan_metrics.files:,} files in {scan_metrics.wall_seconds:.1f}s "
+        f"({scan_metrics.files_per_second:,.0f} files/s)"
+    ):
+        directories_column, files_column, errors_column, stat_column = st.columns(4)
+        directories_column.metric("Directories", f"{scan_metrics.directories:,}")
+        files_column.metric("Files", f"{scan_metrics.files:,}")
+        errors_column.metric("Errors", f"{scan_metrics.errors:,}")
+        stat_column.metric(
+            "stat p99 below", f"{scan_metrics.stat_latency_quantile(0.99) * 1000:g} ms"
+        )
+
+        st.caption("Seconds per stage (listing and stat are summed over threads)")
+        st.bar_chart(pd.Series(
+            [scan_metrics.stage_seconds[stage] for stage in SCAN_STAGES], index=SCAN_STAGES
+        ))
+
+        st.caption("Slowest directories (listing + stat)")
+        st.dataframe(
+            pd.DataFrame([
+                {"directory": timing.directory, "seconds": timing.seconds, "files": timing.files}
+                for timing in scan_metrics.slowest_directories
+            ]),
+            hide_index=True,
+            width="stretch",
+        )
+
+        prometheus_column, json_column = st.columns(2)
+        prometheus_column.download_button(
+            "⬇️ Prometheus text", data=scan_metrics.to_prometheus(),
+            file_name="file_commander_scan.prom", mime="text/plain",
+        )
+        json_column.download_button(
+            "⬇️ JSON", data=scan_metrics.to_json_line(),
+            file_name="file_commander_scan.json", mime="application/json",
+        )
+
+
+# st.fragment arrived in Streamlit 1.37; older versions get a refresh button.
+if hasattr(st, "fragment"):
+    render_live_move_job_progress = st.fragment(run_every=1.0)(render_move_job_progress)
+else:
+    render_live_move_job_progress = None
+
+
+def render_selection(page_catalog: pd.DataFrame, destination_directory: Optional[Path]) -> None:
+    """
+    Because ticking a checkbox in the table should not re-run the filters
+    and queries above it, this part of the page (the selection table for
+    the current page, the move preview and the "Execute move" button) is
+    its own function, drawn as a Streamlit fragment when available.
+    """
+    move_job: Optional[MoveJob] = st.session_state.get("move_job")
+
+    # -------------------------------------------------------------------------
+    # 4. Display table with a selectable column (checkboxes)
+    #
+    # We add a `selected` column, default False, and render with
+    # st.data_editor so the user can check/uncheck rows.
+    # The edited DataFrame comes back as `edited_catalog`.
+    # -------------------------------------------------------------------------
+
+    # Add a checkbox column for selection (default False). The page is at
+    # most a few hundred rows, so this copy is cheap.
+    catalog_for_edit = page_catalog.copy()
+    if "selected" not in catalog_for_edit.columns:
+        catalog_for_edit.insert(0, "selected", False)
+
+    # Interactive table with checkboxes (for the current page).
+    edited_catalog = st.data_editor(
+        catalog_for_edit,
+        key="file_catalog_editor",
+        hide_index=True,
+        width="stretch",
+    )
+
+    # -------------------------------------------------------------------------
+    # 5. Move preview: show which files WOULD be moved, then (on
+    #    "Execute move") move them in the background.
+    #
+    # The preview only calculates:
+    #   - how many files are selected
+    #   - what their new paths WOULD be if moved to destination_directory
+    #
+    # Executing hands the plan to a MoveJob (src.move_jobs), which runs
+    # operations.move_files on its own thread: same-disk renames, copies
+    # across disks, a journal in move_journals/, and the moved rows
+    # updated in file_catalog as it goes. This script never waits for
+    # it; the progress panel (section 2b) polls it.
+    # -------------------------------------------------------------------------
+    selected_rows = edited_catalog[edited_catalog["selected"] == True]
+
+    st.write(f"Selected files: {len(selected_rows)}")
+
+    st.subheader("Move preview (dry run)")
+
+    if destination_directory is None:
+        st.info(
+            "Set a destination directory above to see where selected files "
+            "would be moved."
+        )
+    elif selected_rows.empty:
+        st.info(
+            "Select one or more files in the table to see the move preview."
+        )
+    else:
+        # Build a small preview table with original path and proposed destination.
+        preview_df = selected_rows[["path", "name"]].copy()
+        preview_df["destination_path"] = preview_df["name"].apply(
+            lambda name: str(destination_directory / name)
+        )
+
+        st.caption(
+            "These files would be moved from their current locations to "
+            "the destination directory:"
+        )
+        st.dataframe(preview_df, width="stretch")
+
+        job_running = move_job is not None and move_job.running
+        if st.button("🚚 Execute move", disabled=job_running):
+            if not destination_directory.is_dir():
+                st.error(f"Destination is not a directory: {destination_directory}")
+            else:
+                MOVE_JOURNAL_DIRECTORY.mkdir(exist_ok=True)
+                move_job = MoveJob(
+                    plan=[(path, str(destination_directory)) for path in selected_rows["path"]],
+                    engine=get_catalog_engine(CATALOG_DATABASE),
+                    # Unique per job, even for two moves started in one second.
+                    journal_path=new_journal_path(MOVE_JOURNAL_DIRECTORY, prefix="moves"),
+                    total_bytes=int(selected_rows["size_bytes"].sum()),
+                )
+                move_job.start()
+                st.session_state["move_job"] = move_job
+                st.session_state["move_job_shown_finished"] = False
+                # Rerun so the progress panel above shows the new job.
+                st.rerun()
+
+
+# Without st.fragment the selection table is drawn as part of the page.
+render_live_selection = (
+    st.fragment(render_selection) if hasattr(st, "fragment") else render_selection
+)
+
+
+# ---------------------------------------------------------------------
+# Cached catalog reads
+#
+# Streamlit reruns main() on every widget change, but the catalog only
+# changes when something writes to the database. So every read below is
+# cached, keyed by its parameters and by catalog_version(): the mtime and
+# size of the database file and its WAL. Any write (a scan here, a move
+# job, or `cli.py watch` in another process) changes the version, and
+# the next rerun reads fresh rows. (A server database behind DATABASE_URL
+# has no file, so there the version is a SERVER_CATALOG_CACHE_SECONDS
+# time bucket.)
+# ---------------------------------------------------------------------
+@st.cache_resource
+def get_catalog_engine(database: str) -> Engine:
+    """One engine (and connection pool) per database, shared by all reruns."""
+    return get_engine(database)
+
+
+def catalog_version(database: str) -> tuple[int, ...]:
+    if "://" in database:
+        return (int(time.time() // SERVER_CATALOG_CACHE_SECONDS),)
+    db_path = Path(database)
+    version: list[int] = []
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        try:
+            path_stat = path.stat()
+        except FileNotFoundError:
+            version.extend((0, 0))
+        else:
+            version.extend((path_stat.st_mtime_ns, path_stat.st_size))
+    return tuple(version)
+
+
+def filters_key(catalog_filters: CatalogFilters) -> tuple:
+    """
+    A plain tuple of the filters for st.cache_data to hash. `now` is
+    rounded down to the minute, so the stale filter does not make every
+    rerun a cache miss.
+    """
+    return dataclasses.astuple(dataclasses.replace(
+        catalog_filters, now=catalog_filters.now.replace(second=0, microsecond=0)
+    ))
 
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_prepare_catalog_queries(db_path: str, version: tuple) -> None:
+    prepare_catalog_queries(get_catalog_engine(db_path))
 
-def fuzzy_match(a: str, b:str, threshold: float= 0.7) -> bool:
-    """Return True if a and b are similar enough."""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio() >= threshold
 
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_count_catalog_rows(db_path: str, version: tuple, key: tuple) -> int:
+    return count_catalog_rows(get_catalog_engine(db_path), CatalogFilters(*key))
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_catalog_file_types(db_path: str, version: tuple, root: str) -> list[str]:
+    return list_catalog_file_types(get_catalog_engine(db_path), root)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_catalog_page(
+    db_path: str, version: tuple, key: tuple, limit: int, offset: int
+) -> pd.DataFrame:
+    return query_catalog_page(
+        get_catalog_engine(db_path), CatalogFilters(*key),
+        limit=limit, offset=offset, sort_by="modified_at",
+    )
 
 
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_fuzzy_search(db_path: str, version: tuple, key: tuple, limit: int) -> pd.DataFrame:
+    return fuzzy_search_catalog(get_catalog_engine(db_path), CatalogFilters(*key), limit=limit)
 
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_catalog_csv(db_path: str, version: tuple, key: tuple) -> bytes:
+    """The filtered catalog as CSV bytes; only built when a download is asked for."""
+    csv_buffer = io.StringIO()
+    rows = iter_catalog_query(get_catalog_engine(db_path), CatalogFilters(*key))
+    write_catalog_csv(rows, csv_buffer)
+    return csv_buffer.getvalue().encode("utf-8")
+
 
 def main() -> None:
     """
@@ -70,7 +413,7 @@ def main() -> None:
          - "stale" (not accessed in N days)
       5. Interactively select files in the table with checkboxes.
       6. See a *dry-run* preview of which files would be moved to the
-         destination directory (no actual file operations yet).
+         destination directory, and execute it as a background job.
     """
 
     # -------------------------------------------------------------------------
@@ -104,14 +447,14 @@ def main() -> None:
         target_directory = Path(directory_text).expanduser()
 
     # -------------------------------------------------------------------------
-    # 1b. Destination directory for future actions
+    # 1b. Destination directory for actions
     #
-    # UI: second text box "Destination directory for actions (future)"
-    # Code: same pattern as above, but we only *display* it for now.
-    #       The dry-run preview uses this Path to calculate target locations.
+    # UI: second text box "Destination directory for actions"
+    # Code: same pattern as above. The move preview uses this Path to
+    #       calculate target locations, and "Execute move" moves files there.
     # -------------------------------------------------------------------------
     destination_text = st.text_input(
-        label="Destination directory for actions (future)",
+        label="Destination directory for actions",
         help=(
             "Enter a folder path where files could be moved, e.g."
             " /Users/yourname/Desktop/archive"
@@ -126,11 +469,120 @@ def main() -> None:
         st.info(f"Planned destination directory: {destination_directory}")
 
     # -------------------------------------------------------------------------
-    # 2. Scan button: on click, build catalog and store it in session_state
+    # 1c. Scan threads
+    #
+    # UI: small number box "Scan threads".
+    # Code: passed to iter_file_records(workers=...). More threads help on
+    #       network shares and spinning disks; the result is the same.
+    # -------------------------------------------------------------------------
+    scan_workers = st.number_input(
+        label="Scan threads",
+        min_value=1,
+        max_value=64,
+        value=st.session_state.get("scan_workers", 1),
+        key="scan_workers",
+        help="Directories are listed in parallel; useful on network drives.",
+    )
+
+    # -------------------------------------------------------------------------
+    # 1d. Incremental rescan options
+    #
+    # UI: "Incremental rescan" checkbox (+ "verify files" when it is on).
+    # Code: uses src.catalog_store.incremental_scan, which skips folders
+    #       whose mtime is unchanged since the last scan of this directory.
+    # -------------------------------------------------------------------------
+    incremental_rescan = st.checkbox(
+        "Incremental rescan (skip unchanged folders)",
+        key="incremental_rescan",
+        help=(
+            "Reuses the folder index saved in file_commander.db. Much faster "
+            "for large, mostly-static trees."
+        ),
+    )
+    verify_files = False
+    if incremental_rescan:
+        verify_files = st.checkbox(
+            "Also re-check files in unchanged folders (catches in-place edits)",
+            key="verify_files",
+        )
+
+    # -------------------------------------------------------------------------
+    # 1e. Content sniffing
+    #
+    # UI: "Recognize files by content" checkbox.
+    # Code: full scans pass their batches through
+    #       src.content_types.content_type_batches, which reads the first
+    #       bytes of every "other" file and rewrites its file_type when
+    #       the contents match a known format (cached in the database).
+    # -------------------------------------------------------------------------
+    sniff_contents = st.checkbox(
+        "Recognize files by content (full scans; reads the first bytes of 'other' files)",
+        key="sniff_contents",
+        help="Finds PDFs, images, archives... that have no or a wrong extension.",
+    )
+
+    # -------------------------------------------------------------------------
+    # 1f. Snapshots
+    #
+    # UI: "Save a snapshot" checkbox, and (if this directory has snapshots)
+    #     a picker + "Load snapshot" button.
+    # Code: a full scan also writes its batches to snapshots/ as Parquet
+    #       while they go into SQLite. Loading a snapshot refills the
+    #       file_catalog table from that file instead of walking the disk,
+    #       rebuilds the directory tree and records the load in scan_history.
+    # -------------------------------------------------------------------------
+    save_snapshot = st.checkbox(
+        "Save a snapshot of full scans (Parquet, in snapshots/)",
+        value=True,
+        key="save_snapshot",
+    )
+
+    directory_snapshots = []
+    if target_directory is not None:
+        directory_snapshots = list_catalog_snapshots(SNAPSHOT_DIRECTORY, root=target_directory)
+
+    if directory_snapshots:
+        snapshot_column, load_column = st.columns([3, 1])
+        chosen_snapshot = snapshot_column.selectbox(
+            "Saved snapshots of this directory",
+            options=directory_snapshots,
+            format_func=lambda snapshot: (
+                f"{snapshot.scan_id} — {snapshot.row_count:,} files, "
+                f"{snapshot.size_bytes / (1024 * 1024):,.1f} MB"
+            ),
+        )
+        if load_column.button("📂 Load snapshot"):
+            engine = get_catalog_engine(CATALOG_DATABASE)
+            try:
+                with st.spinner(f"Loading snapshot {chosen_snapshot.scan_id}..."):
+                    load_report = replace_catalog_from_batches(
+                        engine, iter_catalog_snapshot(chosen_snapshot.path)
+                    )
+                    rebuild_directory_tree(engine, chosen_snapshot.root)
+                    # Under a new scan_id: the catalog changed now, so the
+                    # latest scan (and catalog_version) must change too,
+                    # even when an older snapshot is loaded.
+                    record_scan(
+                        engine, new_scan_id(), chosen_snapshot.root,
+                        load_report.rows_written, chosen_snapshot.path,
+                    )
+            except Exception as exc:
+                st.error(f"Could not load snapshot: {exc}")
+                return
+
+            st.session_state["catalog_root"] = str(target_directory)
+            st.success(
+                f"Loaded {load_report.rows_written:,} files from snapshot "
+                f"{chosen_snapshot.scan_id} in {load_report.total_seconds:.1f}s."
+            )
+
+    # -------------------------------------------------------------------------
+    # 2. Scan button: on click, build catalog and save it to SQLite
     #
     # UI: "🔍 Scan directory" button.
-    # Code: when clicked, validate the path, run the scanner, and stash
-    #       the resulting DataFrame in st.session_state["file_catalog"].
+    # Code: when clicked, validate the path, run the scanner, write the
+    #       rows to the "file_catalog" table and remember the directory in
+    #       st.session_state["catalog_root"].
     # -------------------------------------------------------------------------
     if st.button("🔍 Scan directory"):
         if target_directory is None:
@@ -145,58 +597,132 @@ def main() -> None:
             st.error(f"Path is not a directory: {target_directory}")
             return
 
-        with st.spinner(f"Scanning {target_directory}..."):
-            file_catalog = build_file_catalog(target_directory)
+        engine = get_catalog_engine(CATALOG_DATABASE)
+        scan_succeeded = False
 
-        # Store in session so we can reuse it across reruns.
-        # This is always the full, original scan result (never filtered).
-        st.session_state["file_catalog"] = file_catalog
-
-         # -----------------------------------------------------------------
-        # NEW: Save the catalog to SQLite so it lives beyond this session.
-        #
-        # Flow:
-        #   1. Ask our shared.database helper for a SQLite engine.
-        #   2. Use DataFrame.to_sql(...) to write into a table
-        #      called "file_catalog".
-        #   3. if_exists="replace" means:
-        #         - if table doesn't exist -> create it
-        #         - if it does exist -> drop & re-create with new data
-        #
-        # This gives us one "truth table" per scan that other tools
-        # (DBeaver, mini_labs, future ML, etc.) can query.
         # -----------------------------------------------------------------
+        # Incremental rescan: only folders whose mtime changed since the
+        # last scan are listed again, and only the changed rows are written
+        # to SQLite.
+        # -----------------------------------------------------------------
+        if incremental_rescan:
+            try:
+                with st.spinner(f"Rescanning changed folders in {target_directory}..."):
+                    rescan_result = incremental_scan(
+                        engine, target_directory, verify_files=verify_files
+                    )
+                    rebuild_directory_tree(engine, target_directory)
+
+                st.info(
+                    f"Incremental rescan in {rescan_result.elapsed_seconds:.1f}s: "
+                    f"listed {rescan_result.directories_listed} folders, "
+                    f"skipped {rescan_result.directories_skipped} unchanged; "
+                    f"+{rescan_result.files_inserted} new, "
+                    f"~{rescan_result.files_updated} changed, "
+                    f"-{rescan_result.files_deleted} deleted files."
+                )
+                scan_succeeded = True
+
+            except Exception as exc:
+                # Fall back to a normal full scan below.
+                st.warning(f"Incremental rescan failed, doing a full scan instead: {exc}")
+
+        if not scan_succeeded:
+            # -----------------------------------------------------------------
+            # Full scan: stream the catalog into SQLite batch by batch.
+            #
+            # Flow:
+            #   1. iter_file_records(...) walks the tree and yields small
+            #      DataFrames, so we never hold the whole catalog in memory.
+            #      With "Recognize files by content" on,
+            #      content_type_batches(...) fixes their file_type first.
+            #   2. If "Save a snapshot" is on, snapshot_batches(...) also
+            #      writes each batch (with inodes) to a Parquet snapshot as
+            #      it passes, and record_scan(...) registers it in
+            #      scan_history, so `cli.py diff` can compare scans later.
+            #   3. directory_tree_batches(...) sums each batch per folder
+            #      for the "Where did my disk go?" tree (section 3a).
+            #   4. replace_catalog_from_batches(...) bulk-loads them into a
+            #      table called "file_catalog" (WAL mode, one transaction,
+            #      indexes built afterwards, so DBeaver etc. can keep
+            #      reading). Like to_sql(if_exists="replace") it drops &
+            #      re-creates the table, and it resets the incremental
+            #      rescan index, since that no longer describes the table.
+            #
+            # This gives us one "truth table" per scan that other tools
+            # (DBeaver, mini_labs, future ML, etc.) can query — and it is
+            # also what the table below reads from.
+            # -----------------------------------------------------------------
+            try:
+                scan_metrics = ScanMetrics(target_directory)
+                batches = iter_file_records(
+                    target_directory, workers=int(scan_workers), with_inode=save_snapshot,
+                    metrics=scan_metrics,
+                )
+                if sniff_contents:
+                    batches = content_type_batches(batches, engine)
+                tree_builder = DirectoryTreeBuilder(target_directory)
+                batches = directory_tree_batches(batches, tree_builder)
+                with st.spinner(f"Scanning {target_directory}..."):
+                    if save_snapshot:
+                        with CatalogSnapshotWriter(SNAPSHOT_DIRECTORY, target_directory) as writer:
+                            load_report = replace_catalog_from_batches(
+                                engine, snapshot_batches(batches, writer), metrics=scan_metrics
+                            )
+                        record_scan(
+                            engine, writer.info.scan_id, target_directory,
+                            writer.info.row_count, writer.info.path,
+                        )
+                        st.caption(
+                            f"Snapshot {writer.info.scan_id} saved "
+                            f"({writer.info.size_bytes / (1024 * 1024):,.1f} MB)."
+                        )
+                    else:
+                        load_report = replace_catalog_from_batches(
+                            engine, batches, metrics=scan_metrics
+                        )
+                    store_directory_tree(engine, tree_builder.finish())
+
+                st.info(
+                    f"Catalog saved to {engine.url.render_as_string(hide_password=True)}"
+                    " (table: file_catalog) "
+                    f"in {load_report.total_seconds:.1f}s "
+                    f"({load_report.rows_per_second:,.0f} rows/s)."
+                )
+                scan_metrics.append_json_lines(SCAN_METRICS_LOG_PATH)
+                render_scan_metrics(scan_metrics)
+                scan_succeeded = True
+
+            except Exception as exc:
+                # Without the database there is nothing to show below.
+                st.error(f"Could not save catalog to database: {exc}")
+                return
+
+        # Remember *which* catalog we are looking at; the rows themselves
+        # stay in SQLite and are read one page at a time.
+        st.session_state["catalog_root"] = str(target_directory)
+
+        total_files = count_catalog_rows(engine, CatalogFilters(root=str(target_directory)))
+        st.success(f"Scan complete. Found {total_files} files.")
 
-
-        try:
-            # 1. Build a SQLite engine pointed at kingdoms/file_commander/file_commander.db
-            engine = get_sqlite_engine(DB_PATH)
-
-            # 2. Write the DataFrame into a table named "file_catalog".
-            #    if_exists="replace" = drop & recreate the table on each scan.
-            file_catalog.to_sql(
-                "file_catalog",          # table name
-                con=engine,
-                if_exists="replace",
-                index=False,             # don't store the DataFrame index
-            )
-
-            st.info(
-                f"Catalog saved to SQLite at {DB_PATH} (table: file_catalog)."
-            )
-
-        except Exception as exc:
-            # We don't want the whole app to die if DB write fails.
-            # Just warn and keep going with the in-memory catalog.
-            st.warning(f"Could not save catalog to database: {exc}")
-
-
-
-
-        st.success(f"Scan complete. Found {len(file_catalog)} files.")
+    # -------------------------------------------------------------------------
+    # 2b. Progress of the current (or last) move job (see section 5).
+    #
+    # Shown before the filters, so it stays visible even when the moved
+    # files no longer match them.
+    # -------------------------------------------------------------------------
+    move_job = st.session_state.get("move_job")
+    if move_job is not None:
+        st.subheader("Move job")
+        if move_job.running and render_live_move_job_progress is not None:
+            render_live_move_job_progress()
+        else:
+            render_move_job_progress()
+            if move_job.running:
+                st.button("🔄 Refresh progress")
 
     # -------------------------------------------------------------------------
-    # 3. If we have a catalog in session_state, show filters + table.
+    # 3. If we have scanned a directory, show filters + table.
     #
     # UI:
     #   - Sidebar "Filters"
@@ -205,13 +731,90 @@ def main() -> None:
     #   - stale_days number input
     #
     # Code:
-    #   - Start from full `file_catalog` from session.
-    #   - Apply filters to a copy (`filtered_catalog`).
-    #   - Never overwrite the original in session.
+    #   - The filters are collected into a CatalogFilters record.
+    #   - compile_catalog_filters(...) turns it into a parameterized SQL
+    #     WHERE clause, and we only ever fetch the page on screen
+    #     (LIMIT/OFFSET), so a rerun no longer copies the whole catalog.
+    #   - Counts and pages are cached per (filters, page, catalog
+    #     version), so a rerun that changes nothing runs no query.
     # -------------------------------------------------------------------------
-    file_catalog = st.session_state.get("file_catalog")
+    catalog_root = st.session_state.get("catalog_root")
+
+    if catalog_root is not None:
+        engine = get_catalog_engine(CATALOG_DATABASE)
+        db_path = CATALOG_DATABASE
+        cached_prepare_catalog_queries(db_path, catalog_version(db_path))
+        version = catalog_version(db_path)
+
+        total_files = cached_count_catalog_rows(
+            db_path, version, filters_key(CatalogFilters(root=catalog_root))
+        )
+        if total_files == 0:
+            st.info("The scanned directory has no files.")
+            return
+
+        # ---------------------------------------------------------------------
+        # 3a. "Where did my disk go?": drill down the precomputed folder tree.
+        #
+        # Every number here comes from the directory_tree tables built at
+        # scan time (src.directory_tree), so opening a folder is a couple
+        # of indexed lookups, not a groupby over every file.
+        # ---------------------------------------------------------------------
+        with st.expander("🌳 Where did my disk go?"):
+            if directory_summary(engine, catalog_root) is None:
+                # Catalogs scanned before the tree existed.
+                rebuild_directory_tree(engine, catalog_root)
+            if st.session_state.get("tree_root") != catalog_root:
+                st.session_state["tree_root"] = catalog_root
+                st.session_state["tree_directory"] = catalog_root
+            tree_directory = st.session_state["tree_directory"]
+            tree_summary = directory_summary(engine, tree_directory)
+
+            breadcrumbs = directory_breadcrumbs(tree_directory, catalog_root)
+            tree_directory = st.selectbox(
+                "Folder",
+                options=breadcrumbs[::-1],
+                format_func=lambda directory: os.path.relpath(directory, catalog_root),
+                key=f"tree_breadcrumbs:{tree_directory}",
+            )
+            if tree_summary is not None:
+                st.caption(
+                    f"{tree_summary['total_bytes'] / (1024 * 1024):,.1f} MB in "
+                    f"{tree_summary['total_files']:,} files "
+                    f"({tree_summary['own_files']:,} directly in this folder)"
+                )
+
+            child_column, type_column = st.columns([2, 1])
+            children = directory_children(engine, tree_directory, limit=50)
+            if children.empty:
+                child_column.info("No subfolders with files.")
+            else:
+                children_view = pd.DataFrame({
+                    "folder": children["directory"].map(os.path.basename),
+                    "size_mb": children["total_bytes"] / (1024 * 1024),
+                    "files": children["total_files"],
+                }).set_index("folder")
+                child_column.bar_chart(children_view["size_mb"])
+                child_column.dataframe(children_view, width="stretch")
+                open_child = child_column.selectbox(
+                    "Open subfolder",
+                    options=[""] + list(children["directory"]),
+                    format_func=lambda directory: os.path.basename(directory) or "—",
+                    key=f"tree_open_child:{tree_directory}",
+                )
+                if open_child:
+                    tree_directory = open_child
+            type_column.dataframe(
+                directory_file_types(engine, tree_directory).assign(
+                    size_mb=lambda types: types["total_bytes"] / (1024 * 1024)
+                )[["file_type", "size_mb", "total_files"]],
+                hide_index=True,
+                width="stretch",
+            )
+            if tree_directory != st.session_state["tree_directory"]:
+                st.session_state["tree_directory"] = tree_directory
+                st.rerun()
 
-    if file_catalog is not None and not file_catalog.empty:
         st.sidebar.header("Filters")
 
         #New: Search by name
@@ -220,8 +823,16 @@ def main() -> None:
             key="search_text"
         ).strip()
 
+        # Typo-tolerant search ("reprot" finds "report.pdf"), ranked by
+        # how close each name is. Uses the catalog's trigram index.
+        fuzzy_search = st.sidebar.checkbox(
+            "Fuzzy search (tolerate typos)",
+            value=False,
+            key="fuzzy_search",
+        )
+
         # File type filter (multiselect)
-        unique_file_types = sorted(file_catalog["file_type"].unique())
+        unique_file_types = cached_catalog_file_types(db_path, version, catalog_root)
         selected_file_types = st.sidebar.multiselect(
             label="File types",
             options=unique_file_types,
@@ -248,193 +859,116 @@ def main() -> None:
 
         if st.sidebar.button("Reset filters"):
             st.session_state["search_text"] = ""
+            st.session_state["fuzzy_search"] = False
             st.session_state["minimum_size_mb"] = 0
             st.session_state["stale_days"] = 0
             st.rerun()
 
 
         # ---------------------------------------------------------------------
-        # Apply filters starting from the full catalog every time.
-        # This makes the filters reversible (e.g., increasing then decreasing
-        # stale_days) because we never lose the original.
-        # ---------------------------------------------------------------------
-        filtered_catalog = file_catalog.copy()
-
-        # 1️⃣ Filter by file_type
-        if selected_file_types:
-            filtered_catalog = filtered_catalog[
-                filtered_catalog["file_type"].isin(selected_file_types)
-            ]
-
-        # 2️⃣ Filter by minimum size (MB -> bytes)
-        if minimum_size_mb > 0:
-            minimum_size_bytes = minimum_size_mb * 1024 * 1024
-            filtered_catalog = filtered_catalog[
-                filtered_catalog["size_bytes"] >= minimum_size_bytes
-            ]
-
-        # 3️⃣ Filter by "stale" last accessed
-        if stale_days > 0:
-            cutoff_timestamp = pd.Timestamp.now() - pd.Timedelta(days=stale_days)
-            filtered_catalog = filtered_catalog[
-                filtered_catalog["last_accessed_at"] < cutoff_timestamp
-            ]
-        # 4️⃣ Search filter (by name OR directory, using fuzzy_match)
-        # If the user typed something into `search_text`, we keep only
-        # the rows where EITHER:
-        #   - the file name is similar to the search text
-        #   - OR the directory path is similar to the search text
-        # if search_text: ----- ### this is for fuzzy logic -- currently not working
-        #     filtered_catalog = filtered_catalog[
-        #         filtered_catalog.apply(
-        #             lambda row: (
-        #                 fuzzy_match(search_text, row["name"])
-        #                 or fuzzy_match(search_text, row["directory"])
-        #             ),
-        #             axis=1,
-        #         )
-        #     ]
-
-        # 4️⃣ Search filter (simple "contains" search across name, directory, and extension)-- replaces
-        #fuzzy logic above
+        # Build the filters. Each one only narrows the query when it is set,
+        # and we always start from the whole scanned directory, so the
+        # filters stay reversible (e.g., increasing then decreasing
+        # stale_days).
         #
-        # Because we want users to be able to type things like "pdf", "resume",
-        # or part of a folder name, we do a case-insensitive substring search
-        # instead of fuzzy matching.
-        if search_text:
-            search_lower = search_text.lower()
-
-            name_matches = filtered_catalog["name"].str.lower().str.contains(
-                search_lower, na=False
-            )
-            dir_matches = filtered_catalog["directory"].str.lower().str.contains(
-                search_lower, na=False
-            )
-            ext_matches = filtered_catalog["extension"].str.lower().str.contains(
-                search_lower, na=False
+        #   1️⃣ file_type      -> file_type IN (...)   (empty = no filter)
+        #   2️⃣ minimum size   -> size_bytes >= ...    (MB -> bytes)
+        #   3️⃣ stale          -> last_accessed_at < now - stale_days
+        #   4️⃣ search text    -> case-insensitive "contains" on name,
+        #                        directory and extension (trigram index),
+        #                        or closest matches when fuzzy is on
+        # ---------------------------------------------------------------------
+        catalog_filters = CatalogFilters(
+            root=catalog_root,
+            file_types=selected_file_types if selected_file_types else None,
+            minimum_size_bytes=int(minimum_size_mb * 1024 * 1024),
+            stale_days=int(stale_days),
+            search_text=search_text,
+        )
+        catalog_filters_key = filters_key(catalog_filters)
+        if fuzzy_search and search_text:
+            # Fuzzy results are ranked by closeness, so we show the best
+            # matches on one page instead of paging by modified_at.
+            page_size = st.selectbox(
+                "Best matches to show", options=[50, 100, 250, 500], index=1, key="page_size"
             )
+            page_catalog = cached_fuzzy_search(db_path, version, catalog_filters_key, page_size)
+            matching_files = len(page_catalog)
+            page_number, page_count = 1, 1
+            sort_caption = "Sorted by match_score (closest first)"
+        else:
+            matching_files = cached_count_catalog_rows(db_path, version, catalog_filters_key)
+            page_catalog = None
+            sort_caption = "Sorted by modified_at (newest first)"
 
-            filtered_catalog = filtered_catalog[
-                name_matches | dir_matches | ext_matches
-            ]
-
-
-
-        # filtered_catalog = filtered_catalog[filtered_catalog["name"].str.contains(search_text, case = False, na= False)]
-
-
+        if matching_files == 0:
+            st.warning("No files match the current filters.")
+            return
 
-        # 4️⃣ Sort by modified_at (newest first)
-        if not filtered_catalog.empty:
-            filtered_catalog = filtered_catalog.sort_values(
-                "modified_at", ascending=False
+        # ---------------------------------------------------------------------
+        # Pagination: only the current page is read from SQLite.
+        # ---------------------------------------------------------------------
+        if page_catalog is None:
+            page_size_column, page_number_column = st.columns(2)
+            page_size = page_size_column.selectbox(
+                "Rows per page", options=[50, 100, 250, 500], index=1, key="page_size"
+            )
+            page_count = max(1, -(-matching_files // page_size))  # ceiling division
+            page_number = page_number_column.number_input(
+                f"Page (of {page_count})", min_value=1, max_value=page_count, value=1
             )
 
-        # Make sure a 'selected' column exists.
-        # This prepares us for future features where we mark rows as chosen.
-        # For now, it simply shows up as a True/False column in the table.
-        if "selected" not in filtered_catalog.columns:
-            filtered_catalog = filtered_catalog.copy()
-            filtered_catalog["selected"] = False
+            page_catalog = cached_catalog_page(
+                db_path, version, catalog_filters_key,
+                limit=page_size, offset=(int(page_number) - 1) * page_size,
+            )
 
 
         # ---------------------------------------------------------------------
-        # 4. Display table with a selectable column (checkboxes)
-        #
-        # We add a `selected` column, default False, and render with
-        # st.data_editor so the user can check/uncheck rows.
-        # The edited DataFrame comes back as `edited_catalog`.
+        # 4. The current page, shown once, as the selection table (see
+        #    render_selection below).
         # ---------------------------------------------------------------------
         st.subheader("File catalog (filtered)")
-        st.caption("Sorted by modified_at (newest first)")
-        # st.caption(
-        #   "Use the 'selected' column to mark files for a dry-run move preview. "
-        #   "This does not change your filesystem."
-        # )
-        st.dataframe(filtered_catalog, width="stretch")
+        st.caption(sort_caption)
 
 
         # ---------------------------------------------------------
         # New: allow the user to download the current filtered view
         # as a CSV file.
         #
-        # 1. Convert filtered_catalog (a DataFrame) into CSV text.
-        # 2. Encode the text as UTF-8 bytes, which Streamlit expects.
+        # Building the CSV means reading *every* matching row, so we
+        # only do it when asked:
+        # 1. "Prepare CSV" remembers which filters the CSV is for.
+        # 2. cached_catalog_csv streams the matching rows out of SQLite
+        #    in batches, writes them as CSV text and encodes it as UTF-8
+        #    bytes, which Streamlit expects. It is cached, so the rerun
+        #    caused by clicking "Download" does not build it again.
         # 3. Feed those bytes into st.download_button so the browser
         #    offers a .csv file to save.
         # ---------------------------------------------------------
-        csv_bytes = filtered_catalog.to_csv(index= False).encode("utf-8")
-
-        st.download_button(
-            label="⬇️ Download filtered catalog as CSV",
-            data=csv_bytes,
-            file_name= "file_commander_filtered.csv",
-            mime="text/csv",
-        )
-
-        if filtered_catalog.empty:
-            st.warning("No files match the current filters.")
-            return
+        if st.button("Prepare filtered catalog as CSV"):
+            st.session_state["csv_filters_key"] = catalog_filters_key
+
+        if st.session_state.get("csv_filters_key") == catalog_filters_key:
+            st.download_button(
+                label="⬇️ Download filtered catalog as CSV",
+                data=cached_catalog_csv(db_path, version, catalog_filters_key),
+                file_name= "file_commander_filtered.csv",
+                mime="text/csv",
+            )
 
         st.write(
-            f"Showing {len(filtered_catalog)} of {len(file_catalog)} files "
-            f"(stale_days = {stale_days}, min_size_mb = {minimum_size_mb})"
+            f"Showing {len(page_catalog)} of {matching_files} matching files "
+            f"({total_files} total; page {page_number} of {page_count}; "
+            f"stale_days = {stale_days}, min_size_mb = {minimum_size_mb})"
         )
 
 
-        # Add a checkbox column for selection (default False).
-        catalog_for_edit = filtered_catalog.copy()
-        if "selected" not in catalog_for_edit.columns:
-            catalog_for_edit.insert(0, "selected", False)
-
-        # Interactive table with checkboxes.
-        edited_catalog = st.data_editor(
-            catalog_for_edit,
-            key="file_catalog_editor",
-            hide_index=True,
-            width="stretch",
-        )
-
         # ---------------------------------------------------------------------
-        # 5. Dry-run move preview: show which files WOULD be moved
-        #
-        # We never call any move/delete functions here. We only calculate:
-        #   - how many files are selected
-        #   - what their new paths WOULD be if moved to destination_directory
+        # 4 + 5. Selection table and move preview, as a fragment: ticking a
+        # checkbox reruns only this part, not the filters and queries above.
         # ---------------------------------------------------------------------
-        selected_rows = edited_catalog[edited_catalog["selected"] == True]
-
-        #### Use for debugging
-        # st.write(
-        #     f"Showing {len(filtered_catalog)} of {len(file_catalog)} files "
-        #     f"(stale_days = {stale_days}, min_size_mb = {minimum_size_mb})"
-        # )
-        st.write(f"Selected files: {len(selected_rows)}")
-
-        st.subheader("Move preview (dry run)")
-
-        if destination_directory is None:
-            st.info(
-                "Set a destination directory above to see where selected files "
-                "would be moved."
-            )
-        elif selected_rows.empty:
-            st.info(
-                "Select one or more files in the table to see the move preview."
-            )
-        else:
-            # Build a small preview table with original path and proposed destination.
-            preview_df = selected_rows[["path", "name"]].copy()
-            preview_df["destination_path"] = preview_df["name"].apply(
-                lambda name: str(destination_directory / name)
-            )
-
-            st.caption(
-                "These files would be moved (in a future version) from their "
-                "current locations to the destination directory:"
-            )
-            st.dataframe(preview_df, width="stretch")
-            # st.dataframe(filtered_catalog, width="stretch")
+        render_live_selection(page_catalog, destination_directory)
 
     else:
         st.info("Scan a directory to see the file catalog.")
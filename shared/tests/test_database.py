@@ -0,0 +1,178 @@
+"""
+In this file we prove that the SQLite bulk loader writes every row,
+reads back like DataFrame.to_sql output, and builds the requested indexes,
+that get_engine picks the right database, and that the PostgreSQL COPY
+loader swaps in a complete table. The PostgreSQL tests run only when
+TEST_DATABASE_URL points at a server (e.g. the docker-compose postgres).
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from shared.database.database import (
+    POSTGRES_STAGING_SUFFIX,
+    bulk_load_postgres,
+    bulk_load_sqlite,
+    copy_text_rows,
+    get_engine,
+    get_sqlite_engine,
+)
+
+
+def _sample_batches() -> list[pd.DataFrame]:
+    """Two small batches with the kinds of columns a file catalog has."""
+    return [
+        pd.DataFrame({
+            "path": ["/a/one.txt", "/a/two.jpg"],
+            "file_type": pd.Categorical(["document", "image"]),
+            "size_bytes": [10, 20],
+            "modified_at": pd.to_datetime(
+                ["2024-01-02 03:04:05.123456", "2024-02-03 00:00:00.000000"]
+            ),
+        }),
+        pd.DataFrame({
+            "path": ["/b/three.py"],
+            "file_type": pd.Categorical(["code"]),
+            "size_bytes": [30],
+            "modified_at": pd.to_datetime([None]),
+        }),
+    ]
+
+
+def test_bulk_load_sqlite_round_trips_like_to_sql(tmp_path: Path) -> None:
+    """
+    Because other code reads these tables with pd.read_sql, the rows we
+    write must come back with the same values (including datetimes and
+    missing values) as if DataFrame.to_sql had written them.
+    """
+    engine = get_sqlite_engine(tmp_path / "bulk.db")
+
+    report = bulk_load_sqlite(engine, "catalog", _sample_batches(), batch_size=1)
+
+    assert report.rows_written == 3
+    assert report.batches_written == 2
+    assert report.rows_per_second > 0
+
+    loaded = pd.read_sql("SELECT * FROM catalog", engine, parse_dates=["modified_at"])
+    expected = pd.concat(_sample_batches(), ignore_index=True)
+    assert loaded["path"].tolist() == expected["path"].tolist()
+    assert loaded["size_bytes"].tolist() == [10, 20, 30]
+    assert loaded["modified_at"][0] == pd.Timestamp("2024-01-02 03:04:05.123456")
+    assert pd.isna(loaded["modified_at"][2])
+
+
+def test_bulk_load_sqlite_enables_wal_and_builds_indexes(tmp_path: Path) -> None:
+    """
+    Because readers must not be locked out and lookups must be fast, the
+    database should be in WAL mode afterwards and have our indexes.
+    """
+    engine = get_sqlite_engine(tmp_path / "bulk.db")
+
+    bulk_load_sqlite(
+        engine, "catalog", _sample_batches(), index_columns=["path", ("file_type", "size_bytes")]
+    )
+
+    with engine.connect() as connection:
+        journal_mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+        index_names = {
+            row[1] for row in connection.execute(text("PRAGMA index_list('catalog')"))
+        }
+    assert journal_mode.lower() == "wal"
+    assert index_names == {"idx_catalog_path", "idx_catalog_file_type_size_bytes"}
+
+
+def test_bulk_load_sqlite_rolls_back_on_error(tmp_path: Path) -> None:
+    """
+    Because the load is one transaction by default, a failure halfway must
+    leave the previous table untouched.
+    """
+    engine = get_sqlite_engine(tmp_path / "bulk.db")
+    bulk_load_sqlite(engine, "catalog", _sample_batches())
+
+    def failing_batches():
+        yield _sample_batches()[0]
+        raise RuntimeError("scanner blew up")
+
+    with pytest.raises(RuntimeError):
+        bulk_load_sqlite(engine, "catalog", failing_batches())
+
+    assert pd.read_sql("SELECT COUNT(*) AS n FROM catalog", engine)["n"][0] == 3
+
+
+def test_get_engine_prefers_argument_then_environment_then_default(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    with pytest.raises(ValueError):
+        get_engine()
+
+    default_engine = get_engine(default_sqlite_path=tmp_path / "default.db")
+    assert default_engine.url.database == str((tmp_path / "default.db").resolve())
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'from_environment.db'}")
+    environment_engine = get_engine(default_sqlite_path=tmp_path / "default.db")
+    assert environment_engine.url.database.endswith("from_environment.db")
+
+    explicit_engine = get_engine(tmp_path / "explicit.db")
+    assert explicit_engine.url.database.endswith("explicit.db")
+
+
+def test_copy_text_rows_escapes_text_and_marks_nulls() -> None:
+    """
+    Because COPY's text format gives tabs, newlines and backslashes a
+    meaning, those must be escaped inside values, while a missing value
+    is \\N and an empty string stays an empty field.
+    """
+    batch = pd.DataFrame({
+        "path": ["/a/tab\there", "", None, "C:\\new\nline"],
+        "size_bytes": [1, 2, 3, 4],
+        "modified_at": pd.to_datetime(
+            ["2024-01-02 03:04:05.500000", None, "2024-01-01 00:00:00.0", "2024-01-01 00:00:00.0"]
+        ),
+        "file_type": pd.Categorical(["a", "b", "a", None]),
+    })
+
+    assert copy_text_rows(batch).splitlines() == [
+        "/a/tab\\there\t1\t2024-01-02 03:04:05.500000\ta",
+        "\t2\t\\N\tb",
+        "\\N\t3\t2024-01-01 00:00:00.000000\ta",
+        "C:\\\\new\\nline\t4\t2024-01-01 00:00:00.000000\t\\N",
+    ]
+    assert copy_text_rows(batch.iloc[:0]) == ""
+
+
+def test_bulk_load_postgres_swaps_in_a_complete_table(postgres_engine) -> None:
+    engine = postgres_engine
+    table_name = "test_bulk_load_catalog"
+
+    bulk_load_postgres(engine, table_name, _sample_batches())
+    report = bulk_load_postgres(
+        engine, table_name, _sample_batches() + _sample_batches(), index_columns=["path"]
+    )
+    assert report.rows_written == 6
+
+    def failing_batches():
+        yield _sample_batches()[0]
+        raise RuntimeError("scanner blew up")
+
+    with pytest.raises(RuntimeError):
+        bulk_load_postgres(engine, table_name, failing_batches())
+
+    loaded = pd.read_sql(f"SELECT * FROM {table_name} ORDER BY path", engine)
+    assert len(loaded) == 6
+    assert loaded["modified_at"].iloc[0] == pd.Timestamp("2024-01-02 03:04:05.123456")
+    with engine.connect() as connection:
+        index_names = {row[0] for row in connection.execute(
+            text("SELECT indexname FROM pg_indexes"
+                 " WHERE schemaname = current_schema() AND tablename = :table"),
+            {"table": table_name},
+        )}
+        staging_left = connection.execute(
+            text("SELECT to_regclass(:staging)"),
+            {"staging": table_name + POSTGRES_STAGING_SUFFIX},
+        ).scalar()
+    assert index_names == {f"idx_{table_name}_path"}
+    assert staging_left is None